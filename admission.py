@@ -0,0 +1,377 @@
+"""
+Admission control utilities for the Belief Explorer backend.
+
+Limits the number of analyses a worker runs at once and queues a bounded number
+of requests beyond that. The limit adapts to observed latency (AIMD): it grows
+by about one per round trip while analyses finish within a tolerance of the
+median latency of recent analyses at their depth, and is cut by a fixed factor,
+at most once per round trip, when they slow down or fail. Requests answered
+without running the arbiters (claim cache hits, reused follow-ups) take a
+fraction of a full analysis's time and are left out, so they cannot drag the
+baseline down. A request that finds the queue full, or waits in it too long, is
+shed at once instead of timing out later.
+"""
+
+import os
+import math
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from utils.metrics import metrics
+from utils.request_context import current_request
+
+logger = logging.getLogger(__name__)
+
+# Buckets for the time admitted requests wait in the queue
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class SlotWaiter:
+    """
+    A queued request, woken when a slot is handed to it. Sync waiters block on
+    an event; async waiters await a future on their event loop.
+    """
+
+    __slots__ = ("granted", "_event", "_loop", "_future")
+
+    def __init__(self, loop=None):
+        """
+        Initialize the SlotWaiter.
+
+        Args:
+            loop (asyncio.AbstractEventLoop, optional): The loop of an async waiter
+        """
+        self.granted = False
+        self._loop = loop
+        self._event = threading.Event() if loop is None else None
+        self._future = loop.create_future() if loop is not None else None
+
+    def grant(self):
+        """Hand the waiter a slot. Called with the controller's lock held."""
+        self.granted = True
+        if self._event is not None:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        if not self._future.done():
+            self._future.set_result(True)
+
+    def wait(self, timeout):
+        """Block until a slot is granted or the timeout passes."""
+        return self._event.wait(timeout)
+
+    async def wait_async(self, timeout):
+        """Wait on the event loop until a slot is granted or the timeout passes."""
+        try:
+            await asyncio.wait_for(asyncio.shield(self._future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.granted
+
+class AdmissionController:
+    """
+    Admits requests up to an adaptive concurrency limit, with a bounded FIFO queue.
+
+    A finished request hands its slot directly to the oldest queued request, so
+    queued requests are served in arrival order.
+    """
+
+    def __init__(self, initial_limit=8, min_limit=1, max_limit=24, max_queue=8, queue_timeout=5.0,
+                 tolerance=2.0, backoff=0.9, window=100):
+        """
+        Initialize the AdmissionController.
+
+        Args:
+            initial_limit (int, optional): Concurrent requests admitted at first
+            min_limit (int, optional): Lowest the limit goes
+            max_limit (int, optional): Highest the limit goes
+            max_queue (int, optional): Requests that may wait for a slot
+            queue_timeout (float, optional): Seconds a request waits before it is shed
+            tolerance (float, optional): Latency, as a multiple of the baseline
+                latency for the depth, above which the limit is cut
+            backoff (float, optional): Factor the limit is multiplied by when it is cut
+            window (int, optional): Recent successful analyses per depth whose
+                median latency is the baseline
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.window = window
+
+        self._lock = threading.Lock()
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._inflight = 0
+        self._waiters = deque()
+        self._samples = {}    # depth -> latencies of recent successful analyses
+        self._baselines = {}  # depth -> median of those latencies
+        self._latency = None  # moving average, for Retry-After
+        self._last_cut = 0.0
+        self._publish()
+
+    @property
+    def limit(self):
+        """int: The current concurrency limit."""
+        return int(self._limit)
+
+    def _publish(self):
+        """Export the limit, in-flight count and queue depth. Called with the lock held."""
+        metrics.set_gauge("admission_limit", int(self._limit))
+        metrics.set_gauge("admission_inflight", self._inflight)
+        metrics.set_gauge("admission_queue_depth", len(self._waiters))
+
+    def _try_admit(self, loop=None):
+        """
+        Take a free slot or join the queue. Called with the lock held.
+
+        Returns:
+            tuple: (admitted, waiter); waiter is None when admitted or shed
+        """
+        if self._inflight < int(self._limit) and not self._waiters:
+            self._inflight += 1
+            self._publish()
+            return True, None
+        if len(self._waiters) >= self.max_queue:
+            return False, None
+        waiter = SlotWaiter(loop)
+        self._waiters.append(waiter)
+        self._publish()
+        return False, waiter
+
+    def _give_up(self, waiter):
+        """
+        Leave the queue after a timeout. Called with the lock held.
+
+        Returns:
+            bool: Whether a slot was granted in the meantime
+        """
+        if waiter.granted:
+            return True
+        self._waiters.remove(waiter)
+        self._publish()
+        return False
+
+    def _shed(self, reason):
+        metrics.inc("admission_shed_total", reason=reason)
+        logger.info("Shedding request: %s (limit %s, queue %s)", reason, int(self._limit), len(self._waiters))
+        return False
+
+    def acquire(self):
+        """
+        Wait for a slot, blocking this thread.
+
+        Returns:
+            bool: Whether the request was admitted; if so, call release when it finishes
+        """
+        start = time.perf_counter()
+        with self._lock:
+            admitted, waiter = self._try_admit()
+        if admitted:
+            return True
+        if waiter is None:
+            return self._shed("queue_full")
+
+        waiter.wait(self.queue_timeout)
+        with self._lock:
+            admitted = self._give_up(waiter)
+        if not admitted:
+            return self._shed("queue_timeout")
+        metrics.observe("admission_wait_seconds", time.perf_counter() - start, buckets=WAIT_BUCKETS)
+        return True
+
+    async def acquire_async(self):
+        """
+        Wait for a slot without blocking the event loop.
+
+        Returns:
+            bool: Whether the request was admitted; if so, call release when it finishes
+        """
+        start = time.perf_counter()
+        with self._lock:
+            admitted, waiter = self._try_admit(asyncio.get_running_loop())
+        if admitted:
+            return True
+        if waiter is None:
+            return self._shed("queue_full")
+
+        try:
+            await waiter.wait_async(self.queue_timeout)
+        except asyncio.CancelledError:
+            # The client went away; pass on a slot that was granted meanwhile
+            with self._lock:
+                granted = self._give_up(waiter)
+            if granted:
+                self.release()
+            raise
+        with self._lock:
+            admitted = self._give_up(waiter)
+        if not admitted:
+            return self._shed("queue_timeout")
+        metrics.observe("admission_wait_seconds", time.perf_counter() - start, buckets=WAIT_BUCKETS)
+        return True
+
+    def release(self, latency=None, depth=None, ok=True):
+        """
+        Free a slot and adapt the limit to the request's outcome.
+
+        Args:
+            latency (float, optional): Seconds the request took, or None to skip adapting
+            depth (str, optional): The analysis depth, whose latencies are compared
+            ok (bool, optional): Whether the request succeeded
+        """
+        with self._lock:
+            self._inflight -= 1
+            if latency is not None:
+                self._adapt(latency, depth, ok)
+            while self._waiters and self._inflight < int(self._limit):
+                self._inflight += 1
+                self._waiters.popleft().grant()
+            self._publish()
+
+    def _adapt(self, latency, depth, ok):
+        """Apply one AIMD step. Called with the lock held."""
+        # A median over a long window ignores outliers in either direction, and
+        # follows a lasting change in model speed once it fills half the window
+        samples = self._samples.get(depth)
+        if samples is None:
+            samples = self._samples[depth] = deque(maxlen=self.window)
+        if ok:
+            samples.append(latency)
+        baseline = sorted(samples)[len(samples) // 2] if samples else latency
+        self._baselines[depth] = baseline
+        self._latency = latency if self._latency is None else self._latency * 0.9 + latency * 0.1
+
+        now = time.monotonic()
+        if not ok or latency > baseline * self.tolerance:
+            # One cut per round trip: the requests finishing meanwhile saw the same overload
+            if now - self._last_cut >= baseline:
+                self._limit = max(self.min_limit, self._limit * self.backoff)
+                self._last_cut = now
+                metrics.inc("admission_limit_decreases_total")
+        elif self._inflight + 1 >= int(self._limit) / 2:
+            # Grow only while the limit is being used
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+    @staticmethod
+    def _adapt_latency(start, ok):
+        """
+        The latency a finished request adapts the limit with.
+
+        Returns:
+            float or None: Seconds since start, or None for a request that
+                succeeded without running the arbiters for any claim
+        """
+        context = current_request()
+        if ok and context is not None and context.analyzed_claims == 0:
+            return None
+        return time.perf_counter() - start
+
+    def retry_after(self):
+        """
+        Estimate how long a shed client should wait before trying again.
+
+        Returns:
+            int: Seconds, from 1 to 60
+        """
+        with self._lock:
+            latency = self._latency or 1.0
+            backlog = (len(self._waiters) + 1) / max(1, int(self._limit))
+        return max(1, min(60, math.ceil(latency * backlog)))
+
+    @contextmanager
+    def admit(self, depth=None):
+        """
+        Run a block in an admission slot.
+
+        Args:
+            depth (str, optional): The analysis depth
+
+        Yields:
+            bool: Whether the request was admitted; the block must shed it if not
+        """
+        if not self.acquire():
+            yield False
+            return
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield True
+            ok = True
+        finally:
+            self.release(self._adapt_latency(start, ok), depth, ok)
+
+    @asynccontextmanager
+    async def admit_async(self, depth=None):
+        """
+        Run a block in an admission slot without blocking the event loop.
+
+        Args:
+            depth (str, optional): The analysis depth
+
+        Yields:
+            bool: Whether the request was admitted; the block must shed it if not
+        """
+        if not await self.acquire_async():
+            yield False
+            return
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield True
+            ok = True
+        finally:
+            self.release(self._adapt_latency(start, ok), depth, ok)
+
+    def snapshot(self):
+        """
+        Report the controller's state.
+
+        Returns:
+            dict: The limit, in-flight requests, queue depth and baseline latency per depth
+        """
+        with self._lock:
+            return {
+                "limit": int(self._limit),
+                "inflight": self._inflight,
+                "queued": len(self._waiters),
+                "baselines": {depth: round(value, 3) for depth, value in self._baselines.items()}
+            }
+
+_controller = None
+_controller_configured = False
+_controller_lock = threading.Lock()
+
+def get_admission_controller():
+    """
+    Get the shared admission controller for this process.
+
+    ADMISSION_CONTROL set to "off" turns it off. ADMISSION_INITIAL_LIMIT,
+    ADMISSION_MIN_LIMIT, ADMISSION_MAX_LIMIT, ADMISSION_QUEUE_SIZE,
+    ADMISSION_QUEUE_TIMEOUT and ADMISSION_LATENCY_TOLERANCE set its parameters.
+    The settings are read once.
+
+    Returns:
+        AdmissionController or None: The controller, or None when it is off
+    """
+    global _controller, _controller_configured
+    if _controller_configured:
+        return _controller
+    with _controller_lock:
+        if not _controller_configured:
+            if os.environ.get('ADMISSION_CONTROL', 'on').lower() != 'off':
+                _controller = AdmissionController(
+                    initial_limit=int(os.environ.get('ADMISSION_INITIAL_LIMIT', 8)),
+                    min_limit=int(os.environ.get('ADMISSION_MIN_LIMIT', 1)),
+                    max_limit=int(os.environ.get('ADMISSION_MAX_LIMIT', 24)),
+                    max_queue=int(os.environ.get('ADMISSION_QUEUE_SIZE', 8)),
+                    queue_timeout=float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 5)),
+                    tolerance=float(os.environ.get('ADMISSION_LATENCY_TOLERANCE', 2))
+                )
+            _controller_configured = True
+    return _controller
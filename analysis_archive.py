@@ -0,0 +1,105 @@
+"""
+Analysis archive utilities for the Belief Explorer backend.
+
+Keeps every integrated analysis together with the raw arbiter outputs it was
+built from, so analyses can be re-scored offline when the integration formulas
+change instead of sending every claim through the model again.
+"""
+
+import os
+import json
+import uuid
+import logging
+import threading
+from datetime import datetime, timezone
+from utils.request_context import current_request
+
+logger = logging.getLogger(__name__)
+
+def build_record(claim, empirical_analysis, logical_analysis, pragmatic_analysis, analysis):
+    """
+    Build an archive record for one analyzed claim.
+
+    Args:
+        claim (str): The claim that was analyzed
+        empirical_analysis (dict): Raw output of the Empirical Arbiter
+        logical_analysis (dict): Raw output of the Logical Arbiter
+        pragmatic_analysis (dict): Raw output of the Pragmatic Arbiter
+        analysis (dict): The integrated analysis
+
+    Returns:
+        dict: The archive record
+    """
+    context = current_request()
+    return {
+        "id": uuid.uuid4().hex,
+        "requestId": context.request_id if context is not None else None,
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "integratorVersion": analysis.get("integratorVersion"),
+        "claim": claim,
+        "arbiters": {
+            "empirical": empirical_analysis,
+            "logical": logical_analysis,
+            "pragmatic": pragmatic_analysis
+        },
+        "analysis": analysis
+    }
+
+class AnalysisArchive:
+    """
+    Appends analysis records to a JSON Lines file.
+    """
+
+    def __init__(self, path):
+        """
+        Initialize the AnalysisArchive.
+
+        Args:
+            path (str): Path of the JSONL archive file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, claim, empirical_analysis, logical_analysis, pragmatic_analysis, analysis):
+        """
+        Archive an analyzed claim. Failures are logged and never raised, so the
+        archive cannot break a user request.
+
+        Args:
+            claim (str): The claim that was analyzed
+            empirical_analysis (dict): Raw output of the Empirical Arbiter
+            logical_analysis (dict): Raw output of the Logical Arbiter
+            pragmatic_analysis (dict): Raw output of the Pragmatic Arbiter
+            analysis (dict): The integrated analysis
+
+        Returns:
+            dict or None: The archived record, or None if it could not be written
+        """
+        record = build_record(claim, empirical_analysis, logical_analysis, pragmatic_analysis, analysis)
+        try:
+            line = json.dumps(record)
+            with self._lock:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line + "\n")
+            return record
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Could not archive analysis: %s", e)
+            return None
+
+_archive = None
+
+def get_archive():
+    """
+    Get the shared analysis archive for this process.
+
+    Returns:
+        AnalysisArchive or None: The archive named by ANALYSIS_ARCHIVE_PATH, or
+            None when archiving is not configured
+    """
+    global _archive
+    path = os.environ.get('ANALYSIS_ARCHIVE_PATH')
+    if not path:
+        return None
+    if _archive is None or _archive.path != path:
+        _archive = AnalysisArchive(path)
+    return _archive
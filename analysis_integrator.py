@@ -4,19 +4,231 @@ Analysis Integrator module for the Belief Explorer.
 This module combines the outputs from different arbiters into a comprehensive analysis.
 """
 
+import os
 import logging
 import math
 
+from utils.lexicon_matcher import LexiconMatcher, load_lexicon_file
+from utils.response_parser import ANALYSIS_SHAPES
+
 logger = logging.getLogger(__name__)
 
+# NumPy is only needed for batch integration, so it is imported on first use
+np = None
+
+def load_numpy():
+    """
+    Import NumPy for batch integration.
+
+    Returns:
+        module or None: numpy, or None if it is not installed
+    """
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+# Versioned formula sets for the composite metrics. Add a new version instead of
+# editing an existing one, so stored analyses can be re-scored with
+# backend/rescore.py and every record says which formulas produced it.
+FORMULA_SETS = {
+    1: {
+        "mdqScale": 5,
+        "csiComponents": (
+            ("empirical", "observability"),
+            ("logical", "consistency"),
+            ("pragmatic", "stakeholderValue"),
+            ("pragmatic", "adaptability"),
+        ),
+        "reflectiveComponents": (
+            ("logical", "fallacies"),
+            ("pragmatic", "consequences"),
+        ),
+    },
+}
+
+CURRENT_INTEGRATOR_VERSION = max(FORMULA_SETS)
+
+# Columns read by integrate_batch: column name -> (arbiter, component key or None for the score)
+BATCH_COLUMNS = {
+    **{shape["score"]: (arbiter, None) for arbiter, shape in ANALYSIS_SHAPES.items()},
+    **{component: (arbiter, component)
+       for arbiter, shape in ANALYSIS_SHAPES.items() for component in shape["components"]},
+}
+
+# Keywords for simple keyword-based domain detection
+DOMAIN_KEYWORDS = {
+    "science": ["scientific", "science", "research", "study", "studies", "evidence", "data", "experiment", "experiments", "theory", "theories", "hypothesis"],
+    "philosophy": ["philosophy", "philosophical", "ethics", "moral", "metaphysics", "epistemology", "knowledge", "reality", "existence"],
+    "politics": ["politics", "political", "government", "policy", "policies", "election", "elections", "democracy", "republican", "democrat", "liberal", "conservative"],
+    "religion": ["religion", "religious", "god", "faith", "belief", "spiritual", "divine", "sacred", "holy", "soul"],
+    "health": ["health", "medical", "medicine", "disease", "diseases", "treatment", "doctor", "doctors", "patient", "patients", "therapy", "diagnosis", "symptom", "symptoms"],
+    "technology": ["technology", "tech", "computer", "computers", "digital", "software", "hardware", "internet", "ai", "algorithm", "algorithms", "device", "devices"],
+    "conspiracy": ["conspiracy", "cover-up", "secret", "secrets", "hidden", "truth", "reveal", "government cover", "they don't want you to know"]
+}
+
+# Absolute terms that signal unexamined assumptions
+ABSOLUTE_TERMS = ["all", "everyone", "always", "never", "nobody", "certainly",
+                  "definitely", "obviously", "clearly", "absolutely", "undoubtedly",
+                  "every", "no one", "must", "should", "will", "won't", "proven"]
+
+ABSOLUTE_LABEL = ("assumption", "absolute")
+
+def load_claim_lexicons(path=None):
+    """
+    Build the claim lexicons from the built-in keywords and an optional file.
+
+    The file (LEXICON_PATH by default) is JSON of the form
+    {"domains": {"economics": ["inflation", ...]}, "absoluteTerms": ["ever", ...]};
+    its terms are added to the built-in ones and new domains are appended. Entries
+    that are not lists of strings are logged and skipped.
+
+    Args:
+        path (str, optional): Path of an external lexicon file
+
+    Returns:
+        dict: "domains" (name to keywords) and "absoluteTerms"
+    """
+    lexicons = {
+        "domains": {domain: list(keywords) for domain, keywords in DOMAIN_KEYWORDS.items()},
+        "absoluteTerms": list(ABSOLUTE_TERMS)
+    }
+    path = path or os.environ.get('LEXICON_PATH')
+    if not path:
+        return lexicons
+
+    try:
+        external = load_lexicon_file(path)
+        domains = external.get("domains", {})
+        if not isinstance(domains, dict):
+            logger.error("Skipping the domains in %s: expected an object of domain names to term lists", path)
+            domains = {}
+        for domain, keywords in domains.items():
+            if not _is_term_list(keywords):
+                logger.error("Skipping domain '%s' in %s: expected a list of strings", domain, path)
+                continue
+            lexicons["domains"].setdefault(domain, []).extend(keywords)
+        absolute_terms = external.get("absoluteTerms", [])
+        if _is_term_list(absolute_terms):
+            lexicons["absoluteTerms"].extend(absolute_terms)
+        else:
+            logger.error("Skipping absoluteTerms in %s: expected a list of strings", path)
+        logger.info("Loaded external lexicons from %s", path)
+    except (OSError, ValueError, AttributeError) as e:
+        logger.error("Could not load lexicons from %s: %s", path, e)
+    return lexicons
+
+def _is_term_list(value):
+    """Check that a lexicon entry is a list of strings, not a string to be split into letters."""
+    return isinstance(value, list) and all(isinstance(term, str) for term in value)
+
+def build_claim_matcher(lexicons):
+    """
+    Build the matcher that finds domain keywords and absolute terms in one scan.
+
+    Args:
+        lexicons (dict): Claim lexicons as returned by load_claim_lexicons
+
+    Returns:
+        LexiconMatcher: The built matcher, labelling matches ("domain", name)
+            or ABSOLUTE_LABEL
+    """
+    matcher = LexiconMatcher()
+    for domain, keywords in lexicons["domains"].items():
+        matcher.add_lexicon(("domain", domain), keywords)
+    matcher.add_lexicon(ABSOLUTE_LABEL, lexicons["absoluteTerms"])
+    matcher.build()
+    return matcher
+
+# Built once at startup and shared by every integrator
+CLAIM_LEXICONS = load_claim_lexicons()
+CLAIM_MATCHER = build_claim_matcher(CLAIM_LEXICONS)
+
+def get_formula_set(version=None):
+    """
+    Look up a versioned formula set.
+
+    Args:
+        version (int, optional): The integrator version. Defaults to the
+            INTEGRATOR_VERSION environment variable, or the latest version.
+
+    Returns:
+        tuple: The version and its formula set
+
+    Raises:
+        ValueError: If the version is not known
+    """
+    if version is None:
+        version = os.environ.get('INTEGRATOR_VERSION') or CURRENT_INTEGRATOR_VERSION
+    try:
+        version = int(version)
+        return version, FORMULA_SETS[version]
+    except (KeyError, ValueError):
+        raise ValueError(f"Unknown integrator version '{version}'. "
+                         f"Expected one of: {', '.join(map(str, FORMULA_SETS))}")
+
+def _round_scores(values):
+    """
+    Round an array of scores to 2 places exactly as the built-in round does.
+
+    np.round scales by 100 and rounds, and the scaling error can land a value
+    on the other side of a tie than Python's correctly rounded round(). For
+    values next to a tie, the exact product 100 * x is recovered with Dekker's
+    two-product algorithm and compared with the tie, rounding half to even.
+
+    Args:
+        values (numpy.ndarray): The scores
+
+    Returns:
+        numpy.ndarray: The rounded scores
+    """
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    low = np.floor(scaled)
+    near_tie = np.abs(scaled - low - 0.5) < 1e-9
+    if not near_tie.any():
+        return rounded
+
+    x = values[near_tie]
+    product = scaled[near_tie]
+    low = low[near_tie]
+
+    # Exact 100 * x == product + error (100 needs no splitting)
+    split = 134217729.0 * x
+    x_high = split - (split - x)
+    x_low = x - x_high
+    error = (100 * x_high - product) + 100 * x_low
+
+    # product - tie is exact, and rounding the sum keeps the sign of the exact difference
+    above = (product - (low + 0.5)) + error
+    exact_tie_up = (above == 0) & (np.fmod(low, 2) != 0)
+    # copysign keeps -0.0 for small negative values, as round() does
+    rounded[near_tie] = np.copysign((low + ((above > 0) | exact_tie_up)) / 100, x)
+    return rounded
+
 class AnalysisIntegrator:
     """
     Integrates analyses from different arbiters into a comprehensive analysis.
     """
     
-    def __init__(self):
-        """Initialize the AnalysisIntegrator."""
-        pass
+    def __init__(self, version=None, lexicons=None):
+        """
+        Initialize the AnalysisIntegrator.
+        
+        Args:
+            version (int, optional): The formula set to use. Defaults to the latest.
+            lexicons (dict, optional): Domain and absolute-term lexicons. Defaults
+                to the shared lexicons built at startup.
+        """
+        self.version, self.formulas = get_formula_set(version)
+        if lexicons is None:
+            self.domains, self.matcher = list(CLAIM_LEXICONS["domains"]), CLAIM_MATCHER
+        else:
+            self.domains, self.matcher = list(lexicons["domains"]), build_claim_matcher(lexicons)
     
     def integrate(self, claim, empirical_analysis, logical_analysis, pragmatic_analysis):
         """
@@ -37,62 +249,25 @@ class AnalysisIntegrator:
             logical_score = logical_analysis.get("logicalScore", 0.5)
             pragmatic_score = pragmatic_analysis.get("pragmaticScore", 0.5)
             
-            # Calculate Verifact Score (weighted geometric mean of empirical and logical scores)
-            # Pragmatic score is considered separately as it measures a different dimension
-            verifact_score = math.sqrt(empirical_score * logical_score)
-            
-            # Calculate Model Diversity Quotient (MDQ)
-            # Measures the degree of agreement/disagreement between different reasoning approaches
-            scores = [empirical_score, logical_score, pragmatic_score]
-            mean_score = sum(scores) / len(scores)
-            variance = sum((score - mean_score) ** 2 for score in scores) / len(scores)
-            mdq = min(1.0, math.sqrt(variance) * 5)  # Scale up to make it more meaningful
+            verifact_score, components = self._composite_metrics(
+                empirical_analysis, logical_analysis, pragmatic_analysis
+            )
             
-            # Calculate Contextual Sensitivity Index (CSI)
-            # For now, we'll use a combination of components from different arbiters
-            empirical_components = empirical_analysis.get("components", {})
-            logical_components = logical_analysis.get("components", {})
-            pragmatic_components = pragmatic_analysis.get("components", {})
-            
-            csi_components = [
-                empirical_components.get("observability", 0.5),
-                logical_components.get("consistency", 0.5),
-                pragmatic_components.get("stakeholderValue", 0.5),
-                pragmatic_components.get("adaptability", 0.5)
-            ]
-            csi = sum(csi_components) / len(csi_components)
-            
-            # Calculate Reflective Index
-            # Measures awareness of assumptions and bias recognition
-            # For now, we'll derive it from logical and pragmatic components
-            reflective_components = [
-                logical_components.get("fallacies", 0.5),
-                pragmatic_components.get("consequences", 0.5)
-            ]
-            reflective_index = sum(reflective_components) / len(reflective_components)
+            # Scan the claim once for domain keywords and absolute terms
+            matches = self.matcher.find_all(claim)
             
             # Detect domain based on claim content
-            domain = self._detect_domain(claim)
+            domain = self._detect_domain(claim, matches)
             
             # Detect assumptions
-            assumptions = self._detect_assumptions(claim, logical_analysis)
-            
-            # Compile all components for the integrated analysis
-            components = {
-                "empiricalVerifiability": empirical_score,
-                "logicalConsistency": logical_score,
-                "pragmaticUtility": pragmatic_score,
-                "modelDiversity": mdq,
-                "contextualSensitivity": csi,
-                "reflectiveIndex": reflective_index,
-                "falsifiability": empirical_components.get("testability", 0.5)
-            }
+            assumptions = self._detect_assumptions(claim, logical_analysis, matches)
             
             # Create the integrated analysis
             integrated_analysis = {
                 "claim": claim,
                 "domain": domain,
                 "assumptions": assumptions,
+                "integratorVersion": self.version,
                 "verifactScore": {
                     "overallScore": round(verifact_score, 2),
                     "components": {k: round(v, 2) for k, v in components.items()}
@@ -113,74 +288,226 @@ class AnalysisIntegrator:
                 }
             }
             
-            logger.info(f"Successfully integrated analysis for claim: {claim[:50]}...")
+            logger.info("Successfully integrated analysis for claim: %s...", claim[:50])
             return integrated_analysis
             
         except Exception as e:
-            logger.error(f"Error integrating analyses: {str(e)}", exc_info=True)
+            logger.error("Error integrating analyses: %s", e, exc_info=True)
             return self._get_default_integrated_analysis(claim)
     
-    def _detect_domain(self, claim):
+    def _composite_metrics(self, empirical_analysis, logical_analysis, pragmatic_analysis):
+        """
+        Calculate the composite metrics of one claim.
+        
+        integrate_batch performs the same floating point operations in the same
+        order, so both paths give bit-identical results.
+        
+        Args:
+            empirical_analysis (dict): Analysis from the Empirical Arbiter
+            logical_analysis (dict): Analysis from the Logical Arbiter
+            pragmatic_analysis (dict): Analysis from the Pragmatic Arbiter
+            
+        Returns:
+            tuple: The unrounded Verifact score and the dict of score components
+        """
+        empirical_score = empirical_analysis.get("empiricalScore", 0.5)
+        logical_score = logical_analysis.get("logicalScore", 0.5)
+        pragmatic_score = pragmatic_analysis.get("pragmaticScore", 0.5)
+        
+        # Calculate Verifact Score (weighted geometric mean of empirical and logical scores)
+        # Pragmatic score is considered separately as it measures a different dimension
+        verifact_score = math.sqrt(empirical_score * logical_score)
+        
+        # Calculate Model Diversity Quotient (MDQ)
+        # Measures the degree of agreement/disagreement between different reasoning approaches
+        scores = [empirical_score, logical_score, pragmatic_score]
+        mean_score = sum(scores) / len(scores)
+        # Square by multiplication: x ** 2 goes through libm pow, which is not
+        # correctly rounded on every platform
+        variance = sum((score - mean_score) * (score - mean_score) for score in scores) / len(scores)
+        mdq = min(1.0, math.sqrt(variance) * self.formulas["mdqScale"])  # Scale up to make it more meaningful
+        
+        # Calculate Contextual Sensitivity Index (CSI)
+        # For now, we'll use a combination of components from different arbiters
+        empirical_components = empirical_analysis.get("components", {})
+        logical_components = logical_analysis.get("components", {})
+        pragmatic_components = pragmatic_analysis.get("components", {})
+        arbiter_components = {
+            "empirical": empirical_components,
+            "logical": logical_components,
+            "pragmatic": pragmatic_components
+        }
+        
+        csi_components = [
+            arbiter_components[arbiter].get(key, 0.5)
+            for arbiter, key in self.formulas["csiComponents"]
+        ]
+        csi = sum(csi_components) / len(csi_components)
+        
+        # Calculate Reflective Index
+        # Measures awareness of assumptions and bias recognition
+        # For now, we'll derive it from logical and pragmatic components
+        reflective_components = [
+            arbiter_components[arbiter].get(key, 0.5)
+            for arbiter, key in self.formulas["reflectiveComponents"]
+        ]
+        reflective_index = sum(reflective_components) / len(reflective_components)
+        
+        # Compile all components for the integrated analysis
+        components = {
+            "empiricalVerifiability": empirical_score,
+            "logicalConsistency": logical_score,
+            "pragmaticUtility": pragmatic_score,
+            "modelDiversity": mdq,
+            "contextualSensitivity": csi,
+            "reflectiveIndex": reflective_index,
+            "falsifiability": empirical_components.get("testability", 0.5)
+        }
+        return verifact_score, components
+    
+    @staticmethod
+    def columns_from_analyses(rows):
+        """
+        Collect the scores integrate_batch reads from raw arbiter analyses.
+        
+        Args:
+            rows (iterable): (empirical_analysis, logical_analysis, pragmatic_analysis) tuples
+            
+        Returns:
+            dict: Column name to NumPy float64 array, with 0.5 for missing values
+        """
+        if load_numpy() is None:
+            raise ImportError("Batch integration requires NumPy (pip install numpy)")
+        
+        values = {column: [] for column in BATCH_COLUMNS}
+        for analyses in rows:
+            analyses = dict(zip(("empirical", "logical", "pragmatic"), analyses))
+            for column, (arbiter, component) in BATCH_COLUMNS.items():
+                analysis = analyses[arbiter]
+                if component is None:
+                    values[column].append(analysis.get(column, 0.5))
+                else:
+                    values[column].append(analysis.get("components", {}).get(component, 0.5))
+        return {column: np.asarray(items, dtype=np.float64) for column, items in values.items()}
+    
+    def integrate_batch(self, columns):
+        """
+        Calculate the composite metrics of many claims at once.
+        
+        The results are bit-identical to the verifactScore block that integrate
+        produces for each claim.
+        
+        Args:
+            columns (dict): Column name (see BATCH_COLUMNS) to an array of N scores.
+                Missing columns default to 0.5.
+            
+        Returns:
+            dict: "overallScore" and "components" (name to array), rounded to 2 places
+            
+        Raises:
+            ImportError: If NumPy is not installed
+            ValueError: If the columns have different lengths
+        """
+        if load_numpy() is None:
+            raise ImportError("Batch integration requires NumPy (pip install numpy)")
+        
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Score columns have different lengths: {sorted(lengths)}")
+        size = lengths.pop() if lengths else 0
+        
+        def column(name):
+            if name not in columns:
+                return np.full(size, 0.5)
+            return np.asarray(columns[name], dtype=np.float64)
+        
+        empirical_score = column("empiricalScore")
+        logical_score = column("logicalScore")
+        pragmatic_score = column("pragmaticScore")
+        
+        # Same operations, in the same order, as _composite_metrics
+        verifact_score = np.sqrt(empirical_score * logical_score)
+        
+        def mean(values):
+            # sum() starts from 0, which turns -0.0 into 0.0, so start from zeros too
+            total = np.zeros(size)
+            for value in values:
+                total += value
+            return total / len(values)
+        
+        mean_score = mean((empirical_score, logical_score, pragmatic_score))
+        variance = mean([(score - mean_score) * (score - mean_score)
+                         for score in (empirical_score, logical_score, pragmatic_score)])
+        # fmin, like min(1.0, x), returns 1.0 rather than NaN for a NaN score
+        mdq = np.fmin(1.0, np.sqrt(variance) * self.formulas["mdqScale"])
+        
+        csi = mean([column(key) for _, key in self.formulas["csiComponents"]])
+        reflective_index = mean([column(key) for _, key in self.formulas["reflectiveComponents"]])
+        
+        components = {
+            "empiricalVerifiability": empirical_score,
+            "logicalConsistency": logical_score,
+            "pragmaticUtility": pragmatic_score,
+            "modelDiversity": mdq,
+            "contextualSensitivity": csi,
+            "reflectiveIndex": reflective_index,
+            "falsifiability": column("testability")
+        }
+        return {
+            "overallScore": _round_scores(verifact_score),
+            "components": {k: _round_scores(v) for k, v in components.items()}
+        }
+    
+    def _detect_domain(self, claim, matches=None):
         """
         Detect the domain of a claim based on its content.
         
         Args:
             claim (str): The claim to analyze
+            matches (list, optional): Lexicon matches already found in the claim
             
         Returns:
             str: The detected domain
         """
-        claim_lower = claim.lower()
-        
-        # Simple keyword-based domain detection
-        domains = {
-            "science": ["scientific", "science", "research", "study", "evidence", "data", "experiment", "theory", "hypothesis"],
-            "philosophy": ["philosophy", "philosophical", "ethics", "moral", "metaphysics", "epistemology", "knowledge", "reality", "existence"],
-            "politics": ["politics", "political", "government", "policy", "election", "democracy", "republican", "democrat", "liberal", "conservative"],
-            "religion": ["religion", "religious", "god", "faith", "belief", "spiritual", "divine", "sacred", "holy", "soul"],
-            "health": ["health", "medical", "medicine", "disease", "treatment", "doctor", "patient", "therapy", "diagnosis", "symptom"],
-            "technology": ["technology", "tech", "computer", "digital", "software", "hardware", "internet", "ai", "algorithm", "device"],
-            "conspiracy": ["conspiracy", "cover-up", "secret", "hidden", "truth", "reveal", "government cover", "they don't want you to know"]
-        }
+        if matches is None:
+            matches = self.matcher.find_all(claim)
         
-        # Count matches for each domain
-        domain_scores = {domain: 0 for domain in domains}
-        for domain, keywords in domains.items():
-            for keyword in keywords:
-                if keyword in claim_lower:
-                    domain_scores[domain] += 1
+        # Count the distinct keywords matched for each domain
+        domain_keywords = {domain: set() for domain in self.domains}
+        for match in matches:
+            kind, name = match.label
+            if kind == "domain":
+                domain_keywords[name].add(match.term)
         
         # Find the domain with the highest score
-        max_score = max(domain_scores.values())
+        max_score = max((len(keywords) for keywords in domain_keywords.values()), default=0)
         if max_score > 0:
-            for domain, score in domain_scores.items():
-                if score == max_score:
+            for domain, keywords in domain_keywords.items():
+                if len(keywords) == max_score:
                     return domain
         
         # Default domain if no matches
         return "general"
     
-    def _detect_assumptions(self, claim, logical_analysis):
+    def _detect_assumptions(self, claim, logical_analysis, matches=None):
         """
         Detect assumptions in a claim.
         
         Args:
             claim (str): The claim to analyze
             logical_analysis (dict): Analysis from the Logical Arbiter
+            matches (list, optional): Lexicon matches already found in the claim
             
         Returns:
             str: Description of detected assumptions
         """
-        claim_lower = claim.lower()
-        
-        # Check for absolute terms
-        absolute_terms = ["all", "everyone", "always", "never", "nobody", "certainly", 
-                         "definitely", "obviously", "clearly", "absolutely", "undoubtedly",
-                         "every", "no one", "must", "should", "will", "won't", "proven"]
+        if matches is None:
+            matches = self.matcher.find_all(claim)
         
-        for term in absolute_terms:
-            if f" {term} " in f" {claim_lower} ":
-                return f"Contains absolute terms (e.g., '{term}')"
+        # Check for absolute terms, reporting the first one in the claim
+        for match in matches:
+            if match.label == ABSOLUTE_LABEL:
+                return f"Contains absolute terms (e.g., '{match.term}')"
         
         # Check for fallacies identified by the logical arbiter
         fallacies = logical_analysis.get("identifiedFallacies", [])
@@ -204,6 +531,7 @@ class AnalysisIntegrator:
             "claim": claim,
             "domain": "general",
             "assumptions": "Analysis could not determine assumptions",
+            "integratorVersion": self.version,
             "verifactScore": {
                 "overallScore": 0.5,
                 "components": {
@@ -0,0 +1,821 @@
+"""
+Analysis Pipeline module for the Belief Explorer.
+
+This module runs a statement through claim extraction, the arbiters, integration,
+perspective generation and response generation according to a depth profile.
+The async variant serves the ASGI app and runs the independent stages concurrently.
+Analyses from earlier turns of a conversation can be passed in, in which case
+claims they cover skip straight to the response step.
+"""
+
+import os
+import re
+import time
+import asyncio
+import logging
+from functools import cached_property
+from arbiters.empirical_arbiter import EmpiricalArbiter
+from arbiters.logical_arbiter import LogicalArbiter
+from arbiters.pragmatic_arbiter import PragmaticArbiter
+from models.claim_extractor import ClaimExtractor
+from models.analysis_integrator import AnalysisIntegrator
+from models.perspective_generator import PerspectiveGenerator
+from models.response_generator import ResponseGenerator
+from utils.analysis_archive import get_archive
+from utils.analysis_store import claim_hash, get_store
+from utils.claim_cache import get_claim_cache
+from utils.depth_profiles import DEFAULT_DEPTH, DEPTH_PROFILES, get_depth_profile
+from utils.event_log import conversation_event, get_event_log
+from utils.metrics import metrics
+from utils.request_context import current_request, request_scope, stage_timer
+from utils.tracing import annotate, start_span
+
+logger = logging.getLogger(__name__)
+
+# Buckets for the per-request token histogram
+TOKEN_BUCKETS = (500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+
+# The lazily built attributes, in the order build_components creates them
+COMPONENTS = (
+    "claim_extractor", "empirical_arbiter", "logical_arbiter", "pragmatic_arbiter",
+    "analysis_integrator", "perspective_generator", "response_generator",
+    "archive", "store", "event_log", "claim_cache"
+)
+
+# Components whose outputs are kept in the claim cache, by cache position
+CACHED_ARBITERS = ("empirical_arbiter", "logical_arbiter", "pragmatic_arbiter")
+
+# Text the lexicons are run over during the warm-up
+WARM_UP_TEXT = "Vaccines always cause more harm than good, and the economy will never recover."
+
+# Words that carry no claim of their own in a reply, such as "Yes, I still think so".
+# Negations are left out, so a reply that adds or drops a negation is a new claim.
+FOLLOW_UP_FILLER = frozenset("""
+a actually agree am an and are be believe but definitely do guess i i'm is it it's just me
+mean oh ok okay really right so still sure that the think this to true well yeah yep yes you
+""".split())
+
+NO_CLAIM_RESPONSE = (
+    "I couldn't identify a specific claim to analyze in your statement. "
+    "Could you rephrase it as a more specific belief or claim?"
+)
+
+def _content_words(text):
+    """Lowercase the words of a text and drop the follow-up filler."""
+    return set(re.findall(r"[\w']+", (text or "").lower())) - FOLLOW_UP_FILLER
+
+async def _run_stage(stage, awaitable):
+    """Await a component call as a timed pipeline stage."""
+    with stage_timer(stage):
+        return await awaitable
+
+class AnalysisPipeline:
+    """
+    Runs the full multi-arbiter analysis for a user statement.
+    """
+
+    def __init__(self, backend=None, archive=None, store=None, event_log=None, claim_cache=None,
+                 pack_size=None):
+        """
+        Initialize the AnalysisPipeline.
+
+        The components and sinks are built on first use, so creating the
+        pipeline at import time neither connects to the model backend nor
+        opens files and background threads before a server forks its workers.
+
+        Args:
+            backend (optional): The model backend shared by all components
+            archive (optional): Where analyses and raw arbiter outputs are kept
+                for re-scoring. Defaults to the archive named by ANALYSIS_ARCHIVE_PATH.
+            store (optional): The persistent analysis store. Defaults to the
+                store at ANALYSIS_STORE_PATH.
+            event_log (optional): Where conversation events are logged. Defaults
+                to the event log in EVENT_LOG_DIR.
+            claim_cache (optional): Arbiter outputs of recent claims. Defaults to
+                the shared claim cache (see CLAIM_CACHE_SIZE).
+            pack_size (int, optional): Most claims of a statement each arbiter
+                analyzes in one model call. Defaults to CLAIM_PACK_SIZE, or 1 (no packing).
+        """
+        self._backend = backend
+        self._archive = archive
+        self._store = store
+        self._event_log = event_log
+        self._claim_cache = claim_cache
+        self.pack_size = pack_size if pack_size is not None else int(os.environ.get('CLAIM_PACK_SIZE', 1))
+
+    @cached_property
+    def claim_extractor(self):
+        """ClaimExtractor: Extracts the claims of a statement."""
+        return ClaimExtractor(self._backend)
+
+    @cached_property
+    def empirical_arbiter(self):
+        """EmpiricalArbiter: Evaluates the evidence for a claim."""
+        return EmpiricalArbiter(self._backend)
+
+    @cached_property
+    def logical_arbiter(self):
+        """LogicalArbiter: Evaluates the reasoning of a claim."""
+        return LogicalArbiter(self._backend)
+
+    @cached_property
+    def pragmatic_arbiter(self):
+        """PragmaticArbiter: Evaluates the practical consequences of a claim."""
+        return PragmaticArbiter(self._backend)
+
+    @cached_property
+    def analysis_integrator(self):
+        """AnalysisIntegrator: Combines the arbiter outputs."""
+        return AnalysisIntegrator()
+
+    @cached_property
+    def perspective_generator(self):
+        """PerspectiveGenerator: Generates alternative perspectives."""
+        return PerspectiveGenerator(self._backend)
+
+    @cached_property
+    def response_generator(self):
+        """ResponseGenerator: Writes the conversational response."""
+        return ResponseGenerator(self._backend)
+
+    @cached_property
+    def archive(self):
+        """The analysis archive."""
+        return self._archive if self._archive is not None else get_archive()
+
+    @cached_property
+    def store(self):
+        """The persistent analysis store."""
+        return self._store if self._store is not None else get_store()
+
+    @cached_property
+    def event_log(self):
+        """The conversation event log."""
+        return self._event_log if self._event_log is not None else get_event_log()
+
+    @cached_property
+    def claim_cache(self):
+        """The cache of arbiter outputs per claim."""
+        return self._claim_cache if self._claim_cache is not None else get_claim_cache()
+
+    def build_components(self):
+        """
+        Build every component and sink now instead of on first use.
+
+        Returns:
+            AnalysisPipeline: The pipeline
+        """
+        for name in COMPONENTS:
+            getattr(self, name)
+        return self
+
+    def warm_up_steps(self, cached_claims=200):
+        """
+        List the steps that prepare a new worker for traffic.
+
+        Args:
+            cached_claims (int, optional): Most requested claims loaded into the claim cache
+
+        Returns:
+            list: (name, callable) pairs for WarmUp
+        """
+        return [
+            ("components", lambda: sum(getattr(self.build_components(), name) is not None for name in COMPONENTS)),
+            ("model_clients", self.connect_models),
+            ("lexicons", lambda: len(self.analysis_integrator.matcher.find_all(WARM_UP_TEXT))),
+            ("claim_cache", lambda: self.warm_claim_cache(cached_claims)),
+        ]
+
+    def connect_models(self):
+        """
+        Set up the model clients and their connections for every model the
+        components and depth profiles use.
+
+        Returns:
+            list: The models that were reached
+        """
+        names = [getattr(self, name).model_name for name in CACHED_ARBITERS + (
+            "claim_extractor", "perspective_generator", "response_generator")]
+        for profile in DEPTH_PROFILES.values():
+            names.extend(stage["model_name"] for stage in profile["stages"].values()
+                         if stage and "model_name" in stage)
+        return self.claim_extractor.backend.connect(names)
+
+    def warm_claim_cache(self, limit=200):
+        """
+        Load the arbiter outputs of the store's most requested claims into the claim cache.
+
+        Analyses without a recorded depth and arbiter fallbacks are skipped.
+
+        Args:
+            limit (int, optional): Number of claims read from the store
+
+        Returns:
+            int: The number of claims cached
+        """
+        if self.claim_cache is None or self.store is None:
+            return 0
+        cached = 0
+        # Least requested first, so the most requested are the last to be evicted
+        for row in reversed(self.store.top_claims(limit)):
+            arbiters = row["arbiters"]
+            analyses = tuple(arbiters.get(name.split("_")[0]) for name in CACHED_ARBITERS)
+            if row["depth"] is None or not all(analyses) or self._has_fallback(analyses):
+                continue
+            self.claim_cache.put(row["claim"], row["depth"], *analyses, created_at=row["createdAt"])
+            cached += 1
+        return cached
+
+    def _has_fallback(self, analyses):
+        """Check whether any arbiter output is the arbiter's default analysis."""
+        return bool(self._fallback_stages(analyses))
+
+    def _fallback_stages(self, analyses):
+        """List the arbiter stages whose output is the arbiter's default analysis."""
+        return [name.split("_")[0] for name, analysis in zip(CACHED_ARBITERS, analyses)
+                if analysis == getattr(self, name)._get_default_analysis()]
+
+    @staticmethod
+    def _record_fallbacks(stages):
+        """Mark the current request degraded by stages that fell back to their defaults."""
+        context = current_request()
+        if context is not None:
+            for stage in stages:
+                context.record_fallback(stage)
+
+    def _cached_arbiters(self, claim, depth):
+        """Look up a claim's arbiter outputs in the claim cache, marking the claim span."""
+        if depth is None or self.claim_cache is None:
+            return None
+        analyses = self.claim_cache.get(claim, depth)
+        annotate(cacheHit=analyses is not None)
+        return analyses
+
+    def _cache_arbiters(self, claim, depth, analyses):
+        """Keep a claim's fresh arbiter outputs unless one of them is a fallback."""
+        context = current_request()
+        if context is not None:
+            context.record_analyzed_claim()
+        if depth is not None and self.claim_cache is not None and not self._has_fallback(analyses):
+            self.claim_cache.put(claim, depth, *analyses)
+
+    def analyze(self, statement, conversation_history=None, depth=DEFAULT_DEPTH, summary=None,
+                prior_analyses=None):
+        """
+        Analyze a belief statement and generate a response.
+
+        Args:
+            statement (str): The user's statement or belief
+            conversation_history (list, optional): Previous conversation turns
+            depth (str, optional): The analysis depth tier
+            summary (str, optional): Summary of the turns before conversation_history,
+                from a server-side session
+            prior_analyses (list, optional): Integrated analyses from earlier turns at
+                this depth. Claims they cover are not analyzed again, and a follow-up
+                with no claim of its own is answered about the latest of them.
+
+        Returns:
+            dict: The "Response" text, the "AnalysisJSON" list of integrated analyses
+                and request "Metadata" such as the model routing decisions and token usage.
+                The metadata's "degraded" is "fallback" when a stage answered with its
+                default output.
+
+        Raises:
+            ValueError: If the depth tier is not known
+        """
+        start = time.perf_counter()
+        with request_scope() as context, start_span("analyze", context.request_id, depth=depth):
+            result = self._run(statement, conversation_history, depth, summary, prior_analyses)
+            self._finish(context, result, depth, start)
+
+        self._emit_event(statement, result, depth, conversation_history, start)
+        return result
+
+    async def analyze_async(self, statement, conversation_history=None, depth=DEFAULT_DEPTH, summary=None,
+                            prior_analyses=None):
+        """
+        Analyze a belief statement and generate a response without blocking the event loop.
+
+        The arbiters and perspective generation of a claim run concurrently, as do
+        the claims of a deep analysis.
+
+        Args:
+            statement (str): The user's statement or belief
+            conversation_history (list, optional): Previous conversation turns
+            depth (str, optional): The analysis depth tier
+            summary (str, optional): Summary of the turns before conversation_history
+            prior_analyses (list, optional): Integrated analyses from earlier turns at this depth
+
+        Returns:
+            dict: The same result as analyze
+
+        Raises:
+            ValueError: If the depth tier is not known
+        """
+        start = time.perf_counter()
+        with request_scope() as context, start_span("analyze", context.request_id, depth=depth):
+            result = await self._run_async(statement, conversation_history, depth, summary, prior_analyses)
+            self._finish(context, result, depth, start)
+
+        self._emit_event(statement, result, depth, conversation_history, start)
+        return result
+
+    def analyze_heuristic(self, statement, conversation_history=None, depth=DEFAULT_DEPTH):
+        """
+        Answer a statement without calling the model, for requests shed under overload.
+
+        The claims are split from the statement. A claim's arbiter outputs come
+        from the claim cache if it was analyzed recently and are neutral
+        defaults otherwise; the lexicons still find its domain and assumptions.
+        The response is the response generator's open question. Nothing is stored.
+
+        Args:
+            statement (str): The user's statement or belief
+            conversation_history (list, optional): Previous conversation turns
+            depth (str, optional): The analysis depth tier
+
+        Returns:
+            dict: The same result as analyze, with "degraded" set in the metadata
+
+        Raises:
+            ValueError: If the depth tier is not known
+        """
+        start = time.perf_counter()
+        with request_scope() as context, start_span("analyze", context.request_id, depth=depth, degraded=True):
+            profile = get_depth_profile(depth)
+            claims = self.claim_extractor._fallback_extraction(statement)[:profile["max_claims"]]
+            analyses = []
+            for claim in claims:
+                arbiters = self.claim_cache.get(claim, depth) if self.claim_cache is not None else None
+                if arbiters is None:
+                    arbiters = [getattr(self, name)._get_default_analysis() for name in CACHED_ARBITERS]
+                integrated_analysis = self.analysis_integrator.integrate(claim, *arbiters)
+                if profile["stages"]["perspectives"] is not None:
+                    integrated_analysis['perspectives'] = self.perspective_generator._get_default_perspectives(claim)
+                analyses.append(integrated_analysis)
+
+            result = {
+                "Response": self.response_generator._get_default_response(claims[0]),
+                "AnalysisJSON": analyses
+            }
+            self._finish(context, result, depth, start)
+            result["Metadata"]["degraded"] = "overload"
+        return result
+
+    def _finish(self, context, result, depth, start):
+        """Attach the request metadata to a result and record the request's usage and timings."""
+        result["Metadata"] = context.to_metadata()
+        usage = result["Metadata"]["usage"]
+        metrics.observe(
+            "request_tokens",
+            usage["promptTokens"] + usage["outputTokens"],
+            buckets=TOKEN_BUCKETS,
+            depth=depth,
+            tenant=context.tenant
+        )
+        logger.info(
+            "Analyzed statement at depth '%s' in %.2f s",
+            depth,
+            time.perf_counter() - start,
+            extra={"timings": {stage: round(seconds, 4) for stage, seconds in context.timings.items()}}
+        )
+
+    def _emit_event(self, statement, result, depth, conversation_history, start):
+        """Log the conversation event of an analyzed statement."""
+        if self.event_log is not None:
+            self.event_log.emit("conversation", **conversation_event(
+                statement,
+                result,
+                depth,
+                conversation_history,
+                time.perf_counter() - start
+            ))
+
+    def _run(self, statement, conversation_history, depth, summary=None, prior_analyses=None):
+        """Run the pipeline stages for a statement."""
+        claims, analyses = self._analyze_statement(statement, depth, prior_analyses)
+        if not claims:
+            return {
+                "Response": NO_CLAIM_RESPONSE,
+                "AnalysisJSON": "[]"
+            }
+
+        # Generate response for the primary claim
+        with stage_timer("response"):
+            response = self.response_generator.generate_response(
+                **self._response_args(claims, analyses, conversation_history, depth, summary)
+            )
+        self._check_response(claims, response)
+
+        return {
+            "Response": response,
+            "AnalysisJSON": analyses
+        }
+
+    async def _run_async(self, statement, conversation_history, depth, summary=None, prior_analyses=None):
+        """Run the pipeline stages for a statement, awaiting the model calls."""
+        claims, analyses = await self._analyze_statement_async(statement, depth, prior_analyses)
+        if not claims:
+            return {
+                "Response": NO_CLAIM_RESPONSE,
+                "AnalysisJSON": "[]"
+            }
+
+        with stage_timer("response"):
+            response = await self.response_generator.generate_response_async(
+                **self._response_args(claims, analyses, conversation_history, depth, summary)
+            )
+        self._check_response(claims, response)
+
+        return {
+            "Response": response,
+            "AnalysisJSON": analyses
+        }
+
+    @staticmethod
+    def _response_args(claims, analyses, conversation_history, depth, summary):
+        """Build the response generator's arguments for the primary claim."""
+        return {
+            "claim": claims[0],
+            "analysis": analyses[0],
+            "conversation_history": conversation_history or [],
+            "stage_profile": get_depth_profile(depth)["stages"]["response"],
+            "summary": summary
+        }
+
+    def _check_response(self, claims, response):
+        """Mark the request degraded if the response is the generator's default."""
+        if response == self.response_generator._get_default_response(claims[0]):
+            self._record_fallbacks(["response"])
+
+    def _analyze_statement(self, statement, depth, prior_analyses=None):
+        """
+        Extract a statement's claims and analyze them, reusing prior analyses.
+
+        Args:
+            statement (str): The user's statement or belief
+            depth (str): The analysis depth tier
+            prior_analyses (list, optional): Integrated analyses from earlier turns at this depth
+
+        Returns:
+            tuple: The claims to respond about and their integrated analyses, in
+                order; both empty if the statement has no claim and nothing came before
+        """
+        known = self._match_prior(statement, prior_analyses)
+        if known is not None:
+            return known
+        stages = get_depth_profile(depth)["stages"]
+
+        # Extract claims from the statement
+        with stage_timer("claims"):
+            extracted = self.claim_extractor.extract_claims(statement, stage_profile=stages["claims"])
+
+        claims, analyses, pending = self._plan_claims(statement, extracted, depth, prior_analyses)
+        if pending:
+            self._fill(analyses, pending, self.analyze_claims([claims[i] for i in pending], stages, depth))
+        return claims, analyses
+
+    async def _analyze_statement_async(self, statement, depth, prior_analyses=None):
+        """Extract a statement's claims and analyze them, reusing prior analyses, awaiting the model calls."""
+        known = self._match_prior(statement, prior_analyses)
+        if known is not None:
+            return known
+        stages = get_depth_profile(depth)["stages"]
+
+        with stage_timer("claims"):
+            extracted = await self.claim_extractor.extract_claims_async(statement, stage_profile=stages["claims"])
+
+        claims, analyses, pending = self._plan_claims(statement, extracted, depth, prior_analyses)
+        if pending:
+            self._fill(analyses, pending, await self.analyze_claims_async([claims[i] for i in pending], stages, depth))
+        return claims, analyses
+
+    def _match_prior(self, statement, prior_analyses):
+        """
+        Check, before extracting claims, whether a statement only returns to an earlier claim.
+
+        A statement with no words beyond filler, such as "Yes, I think so", is a
+        follow-up about the latest claim. One with the same words as an earlier
+        claim apart from filler, such as "I still think vaccines cause autism",
+        restates that claim. The match is two-way: a statement that leaves out
+        some of the claim's words, such as its negation ("Vaccines cause autism"
+        after "Vaccines do not cause autism"), or adds its own, is not a restatement.
+
+        Args:
+            statement (str): The user's statement or belief
+            prior_analyses (list, optional): Integrated analyses from earlier turns at this depth
+
+        Returns:
+            tuple or None: The claim and its analysis, each in a list, or None if
+                the statement needs its claims extracted
+        """
+        if not prior_analyses:
+            return None
+        words = _content_words(statement)
+        if not words:
+            return self._follow_up(prior_analyses)
+        for analysis in reversed(prior_analyses):
+            if words == _content_words(analysis.get("claim")):
+                metrics.inc("prior_analysis_lookups_total", result="hit")
+                annotate(reusedClaims=1)
+                logger.info("Statement restates the earlier claim: %s", analysis.get("claim"))
+                return [analysis.get("claim")], [analysis]
+        return None
+
+    def _plan_claims(self, statement, claims, depth, prior_analyses):
+        """
+        Decide which of a statement's extracted claims still need analyzing.
+
+        Args:
+            statement (str): The user's statement or belief
+            claims (list): The extracted claims
+            depth (str): The analysis depth tier
+            prior_analyses (list, optional): Integrated analyses from earlier turns at this depth
+
+        Returns:
+            tuple: The claims to respond about, their analyses so far (reused
+                ones, or None) and the indexes of the claims to analyze
+        """
+        if not claims:
+            logger.warning("No claims extracted from statement")
+            claims, analyses = self._follow_up(prior_analyses)
+            return claims, analyses, []
+
+        if self.store is not None:
+            self.store.record_statement(statement, claims, depth)
+
+        # The primary claim is always analyzed; deeper tiers also cover the others
+        claims = claims[:get_depth_profile(depth)["max_claims"]]
+        annotate(claimCount=len(claims))
+        logger.info("Analyzing %s claim(s) at depth '%s'", len(claims), depth)
+        analyses = self._reuse_analyses(claims, prior_analyses)
+        return claims, analyses, [index for index, analysis in enumerate(analyses) if analysis is None]
+
+    @staticmethod
+    def _fill(analyses, pending, fresh):
+        """Put the new analyses of the pending claims in their places."""
+        for index, analysis in zip(pending, fresh):
+            analyses[index] = analysis
+
+    def _reuse_analyses(self, claims, prior_analyses):
+        """
+        Match claims to analyses from earlier turns.
+
+        Returns:
+            list: The prior analysis of each claim, or None where it needs analyzing
+        """
+        if not prior_analyses:
+            return [None] * len(claims)
+        by_hash = {claim_hash(analysis.get("claim")): analysis for analysis in prior_analyses}
+        analyses = [by_hash.get(claim_hash(claim)) for claim in claims]
+        reused = sum(analysis is not None for analysis in analyses)
+        for result, count in (("hit", reused), ("miss", len(claims) - reused)):
+            if count:
+                metrics.inc("prior_analysis_lookups_total", count, result=result)
+        annotate(reusedClaims=reused)
+        return analyses
+
+    def _follow_up(self, prior_analyses):
+        """Answer a statement with no claim of its own about the conversation's latest claim."""
+        if not prior_analyses:
+            return [], []
+        analysis = prior_analyses[-1]
+        metrics.inc("prior_analysis_lookups_total", result="follow_up")
+        annotate(reusedClaims=1)
+        logger.info("No new claim; responding about the earlier claim: %s", analysis.get("claim"))
+        return [analysis.get("claim")], [analysis]
+
+    def analyze_claims(self, claims, stages, depth=None):
+        """
+        Analyze the claims of a statement, each in its own span.
+
+        With a pack size above 1, each arbiter analyzes the claims that miss the
+        claim cache in shared model calls first.
+
+        Args:
+            claims (list): The claims to analyze
+            stages (dict): Stage profiles from the depth profile
+            depth (str, optional): The depth tier of the stages
+
+        Returns:
+            list: The integrated analysis of each claim
+        """
+        outputs = self._pack_arbiters(claims, stages, depth) if self._packing(claims) else [None] * len(claims)
+        analyses = []
+        for index, (claim, arbiter_outputs) in enumerate(zip(claims, outputs)):
+            with start_span("claim", index=index):
+                analyses.append(self.analyze_claim(claim, stages, depth, arbiter_outputs))
+        return analyses
+
+    async def analyze_claims_async(self, claims, stages, depth=None):
+        """
+        Analyze the claims of a statement concurrently, each in its own span.
+
+        With a pack size above 1, each arbiter analyzes the claims that miss the
+        claim cache in shared model calls first.
+
+        Args:
+            claims (list): The claims to analyze
+            stages (dict): Stage profiles from the depth profile
+            depth (str, optional): The depth tier of the stages
+
+        Returns:
+            list: The integrated analysis of each claim
+        """
+        if self._packing(claims):
+            outputs = await self._pack_arbiters_async(claims, stages, depth)
+        else:
+            outputs = [None] * len(claims)
+        return list(await asyncio.gather(*(
+            self._analyze_claim_span_async(index, claim, stages, depth, arbiter_outputs)
+            for index, (claim, arbiter_outputs) in enumerate(zip(claims, outputs))
+        )))
+
+    async def _analyze_claim_span_async(self, index, claim, stages, depth, arbiter_outputs=None):
+        """Analyze one claim of a request in its own span."""
+        with start_span("claim", index=index):
+            return await self.analyze_claim_async(claim, stages, depth, arbiter_outputs)
+
+    def _packing(self, claims):
+        """Check whether the arbiters should pack these claims into shared calls."""
+        return self.pack_size > 1 and len(claims) > 1
+
+    def _pending_claims(self, claims, depth):
+        """
+        Look up each claim's arbiter outputs in the claim cache.
+
+        Returns:
+            tuple: The cached outputs of each claim (None on a miss) and the
+                indexes of the misses
+        """
+        outputs = [
+            self.claim_cache.get(claim, depth) if depth is not None and self.claim_cache is not None else None
+            for claim in claims
+        ]
+        return outputs, [index for index, output in enumerate(outputs) if output is None]
+
+    def _store_packed(self, claims, depth, outputs, pending, results):
+        """Fill in the packed arbiter outputs of the claims that missed the cache."""
+        for position, index in enumerate(pending):
+            outputs[index] = tuple(result[position] for result in results)
+            self._cache_arbiters(claims[index], depth, outputs[index])
+        return outputs
+
+    def _pack_arbiters(self, claims, stages, depth):
+        """
+        Run each arbiter over the claims that miss the claim cache, up to
+        pack_size claims per model call.
+
+        Returns:
+            list: The arbiter outputs of each claim
+        """
+        outputs, pending = self._pending_claims(claims, depth)
+        if not pending:
+            return outputs
+        pending_claims = [claims[index] for index in pending]
+        results = []
+        with start_span("packed_arbiters", claims=len(pending), packSize=self.pack_size):
+            for name in CACHED_ARBITERS:
+                stage = name.split("_")[0]
+                with stage_timer(stage):
+                    results.append(getattr(self, name).analyze_many(
+                        pending_claims, stage_profile=stages[stage], pack_size=self.pack_size))
+        return self._store_packed(claims, depth, outputs, pending, results)
+
+    async def _pack_arbiters_async(self, claims, stages, depth):
+        """
+        Run the arbiters concurrently over the claims that miss the claim
+        cache, up to pack_size claims per model call.
+
+        Returns:
+            list: The arbiter outputs of each claim
+        """
+        outputs, pending = self._pending_claims(claims, depth)
+        if not pending:
+            return outputs
+        pending_claims = [claims[index] for index in pending]
+        with start_span("packed_arbiters", claims=len(pending), packSize=self.pack_size):
+            results = await asyncio.gather(*(
+                _run_stage(name.split("_")[0], getattr(self, name).analyze_many_async(
+                    pending_claims, stage_profile=stages[name.split("_")[0]], pack_size=self.pack_size))
+                for name in CACHED_ARBITERS
+            ))
+        return self._store_packed(claims, depth, outputs, pending, results)
+
+    def analyze_claim(self, claim, stages, depth=None, arbiter_outputs=None):
+        """
+        Run the arbiters, integration and perspective generation for one claim.
+
+        Args:
+            claim (str): The claim to analyze
+            stages (dict): Stage profiles from the depth profile
+            depth (str, optional): The depth tier of the stages. When given, the
+                arbiter outputs are looked up in and added to the claim cache.
+            arbiter_outputs (tuple, optional): The claim's arbiter outputs, if
+                they were already produced, such as by packed calls
+
+        Returns:
+            dict: The integrated analysis, with perspectives when that stage runs
+        """
+        logger.info("Analyzing claim: %s", claim)
+
+        cached = arbiter_outputs if arbiter_outputs is not None else self._cached_arbiters(claim, depth)
+        if cached is None:
+            with stage_timer("empirical"):
+                empirical_analysis = self.empirical_arbiter.analyze(claim, stage_profile=stages["empirical"])
+            with stage_timer("logical"):
+                logical_analysis = self.logical_arbiter.analyze(claim, stage_profile=stages["logical"])
+            with stage_timer("pragmatic"):
+                pragmatic_analysis = self.pragmatic_arbiter.analyze(claim, stage_profile=stages["pragmatic"])
+            cached = (empirical_analysis, logical_analysis, pragmatic_analysis)
+            self._cache_arbiters(claim, depth, cached)
+
+        # Generate perspectives unless the depth profile skips them
+        perspectives = None
+        if stages["perspectives"] is not None:
+            with stage_timer("perspectives"):
+                perspectives = self.perspective_generator.generate_perspectives(
+                    claim,
+                    stage_profile=stages["perspectives"]
+                )
+
+        return self._integrate(claim, cached, perspectives)
+
+    async def analyze_claim_async(self, claim, stages, depth=None, arbiter_outputs=None):
+        """
+        Run the arbiters, integration and perspective generation for one claim,
+        with the model calls in flight together.
+
+        Args:
+            claim (str): The claim to analyze
+            stages (dict): Stage profiles from the depth profile
+            depth (str, optional): The depth tier of the stages. When given, the
+                arbiter outputs are looked up in and added to the claim cache.
+            arbiter_outputs (tuple, optional): The claim's arbiter outputs, if
+                they were already produced, such as by packed calls
+
+        Returns:
+            dict: The integrated analysis, with perspectives when that stage runs
+        """
+        logger.info("Analyzing claim: %s", claim)
+
+        # The arbiters and perspective generation only need the claim
+        cached = arbiter_outputs if arbiter_outputs is not None else self._cached_arbiters(claim, depth)
+        calls = []
+        if cached is None:
+            calls = [
+                _run_stage("empirical", self.empirical_arbiter.analyze_async(claim, stage_profile=stages["empirical"])),
+                _run_stage("logical", self.logical_arbiter.analyze_async(claim, stage_profile=stages["logical"])),
+                _run_stage("pragmatic", self.pragmatic_arbiter.analyze_async(claim, stage_profile=stages["pragmatic"])),
+            ]
+        if stages["perspectives"] is not None:
+            calls.append(_run_stage("perspectives", self.perspective_generator.generate_perspectives_async(
+                claim,
+                stage_profile=stages["perspectives"]
+            )))
+        results = list(await asyncio.gather(*calls))
+        if cached is None:
+            cached, results = tuple(results[:3]), results[3:]
+            self._cache_arbiters(claim, depth, cached)
+
+        return self._integrate(claim, cached, results[0] if results else None)
+
+    def _integrate(self, claim, arbiter_outputs, perspectives=None):
+        """
+        Integrate a claim's arbiter outputs and keep the result.
+
+        Args:
+            claim (str): The claim
+            arbiter_outputs (tuple): The empirical, logical and pragmatic analyses
+            perspectives (list, optional): The claim's perspectives, if that stage ran
+
+        Returns:
+            dict: The integrated analysis
+        """
+        empirical_analysis, logical_analysis, pragmatic_analysis = arbiter_outputs
+        fallbacks = self._fallback_stages(arbiter_outputs)
+        if perspectives is not None and perspectives == self.perspective_generator._get_default_perspectives(claim):
+            fallbacks.append("perspectives")
+        self._record_fallbacks(fallbacks)
+        with stage_timer("integration"):
+            integrated_analysis = self.analysis_integrator.integrate(
+                claim,
+                empirical_analysis,
+                logical_analysis,
+                pragmatic_analysis
+            )
+        if perspectives is not None:
+            integrated_analysis['perspectives'] = perspectives
+
+        # Keep the raw arbiter outputs so the analysis can be re-scored offline
+        for sink in (self.archive, self.store):
+            if sink is not None:
+                sink.record(
+                    claim,
+                    empirical_analysis,
+                    logical_analysis,
+                    pragmatic_analysis,
+                    integrated_analysis
+                )
+
+        return integrated_analysis
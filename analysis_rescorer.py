@@ -0,0 +1,247 @@
+"""
+Analysis Rescorer module for the Belief Explorer.
+
+This module re-integrates archived analyses with a versioned formula set. The
+archive is streamed in chunks that are re-scored in parallel worker processes,
+and progress is checkpointed so an interrupted run resumes where it stopped.
+"""
+
+import os
+import json
+import logging
+import multiprocessing
+from collections import deque
+from datetime import datetime, timezone
+from models.analysis_integrator import AnalysisIntegrator, load_numpy
+
+logger = logging.getLogger(__name__)
+
+def rescore_records(records, version):
+    """
+    Re-score archived analysis records with a formula set.
+
+    Records without raw arbiter outputs are returned unchanged.
+
+    Args:
+        records (list): Archive records
+        version (int): The integrator version to apply
+
+    Returns:
+        tuple: The records, the number re-scored and the number skipped
+    """
+    integrator = AnalysisIntegrator(version)
+    rescorable = [record for record in records if isinstance(record.get("arbiters"), dict)]
+    rows = [
+        (record["arbiters"].get("empirical") or {},
+         record["arbiters"].get("logical") or {},
+         record["arbiters"].get("pragmatic") or {})
+        for record in rescorable
+    ]
+
+    if rows and load_numpy() is not None:
+        batch = integrator.integrate_batch(integrator.columns_from_analyses(rows))
+        scores = [
+            {
+                "overallScore": float(batch["overallScore"][index]),
+                "components": {k: float(v[index]) for k, v in batch["components"].items()}
+            }
+            for index in range(len(rows))
+        ]
+    else:
+        scores = []
+        for row in rows:
+            verifact_score, components = integrator._composite_metrics(*row)
+            scores.append({
+                "overallScore": round(verifact_score, 2),
+                "components": {k: round(v, 2) for k, v in components.items()}
+            })
+
+    rescored_at = datetime.now(timezone.utc).isoformat()
+    for record, verifact_score in zip(rescorable, scores):
+        analysis = record.setdefault("analysis", {})
+        analysis["verifactScore"] = verifact_score
+        analysis["integratorVersion"] = integrator.version
+        record["integratorVersion"] = integrator.version
+        record["rescoredAt"] = rescored_at
+
+    return records, len(rescorable), len(records) - len(rescorable)
+
+def _rescore_lines(lines, version):
+    """
+    Worker task: parse, re-score and serialize a chunk of JSONL lines.
+
+    Args:
+        lines (list): Raw archive lines (bytes)
+        version (int): The integrator version to apply
+
+    Returns:
+        tuple: The output text, the number re-scored, skipped and unreadable
+    """
+    records = []
+    output = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if isinstance(record, dict):
+            records.append(record)
+            output.append(record)
+        else:
+            # Keep lines we cannot parse, in place, so that nothing is lost
+            output.append(line.decode('utf-8', errors='replace').rstrip("\r\n"))
+
+    # Records are re-scored in place
+    _, rescored, skipped = rescore_records(records, version)
+    text = "".join((json.dumps(item) if isinstance(item, dict) else item) + "\n" for item in output)
+    return text, rescored, skipped, len(output) - len(records)
+
+class AnalysisRescorer:
+    """
+    Re-scores an analysis archive into a new archive file.
+    """
+
+    def __init__(self, source_path, output_path, version=None, chunk_size=5000,
+                 workers=None, checkpoint_path=None):
+        """
+        Initialize the AnalysisRescorer.
+
+        Args:
+            source_path (str): The JSONL archive to read
+            output_path (str): Where the re-scored archive is written
+            version (int, optional): The integrator version. Defaults to the latest.
+            chunk_size (int, optional): Records per worker task
+            workers (int, optional): Worker processes. Defaults to the CPU count.
+            checkpoint_path (str, optional): Progress file. Defaults to the
+                output path with ".checkpoint" appended.
+        """
+        self.source_path = source_path
+        self.output_path = output_path
+        self.version = AnalysisIntegrator(version).version
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+        self.checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+
+    def _load_checkpoint(self):
+        """Load the checkpoint of an earlier run of the same job, if any."""
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable checkpoint: %s", e)
+            return None
+
+        if (checkpoint.get("source") != os.path.abspath(self.source_path)
+                or checkpoint.get("version") != self.version):
+            logger.warning("Checkpoint belongs to a different job; starting over")
+            return None
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint):
+        """Write the checkpoint atomically."""
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _read_chunks(self, offset):
+        """
+        Read the source archive in chunks of lines.
+
+        Args:
+            offset (int): Byte offset to start reading at
+
+        Yields:
+            tuple: A list of lines and the byte offset after them
+        """
+        with open(self.source_path, 'rb') as f:
+            f.seek(offset)
+            lines = []
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A record still being appended; leave it for the next run
+                    break
+                offset += len(line)
+                if line.strip():
+                    lines.append(line)
+                if len(lines) >= self.chunk_size:
+                    yield lines, offset
+                    lines = []
+            if lines:
+                yield lines, offset
+
+    def run(self, progress=None):
+        """
+        Re-score the archive, resuming from the checkpoint if there is one.
+
+        Args:
+            progress (callable, optional): Called with the checkpoint after each chunk
+
+        Returns:
+            dict: Totals of the run
+        """
+        checkpoint = self._load_checkpoint()
+        if checkpoint is None:
+            checkpoint = {
+                "source": os.path.abspath(self.source_path),
+                "version": self.version,
+                "sourceOffset": 0,
+                "sourceSize": os.path.getsize(self.source_path),
+                "outputSize": 0,
+                "rescored": 0,
+                "skipped": 0,
+                "unreadable": 0
+            }
+            open(self.output_path, 'w').close()
+        else:
+            logger.info("Resuming re-scoring at byte %s", checkpoint['sourceOffset'])
+
+        with open(self.output_path, 'r+b') as output:
+            # Drop anything written after the last checkpoint
+            output.truncate(checkpoint["outputSize"])
+            output.seek(checkpoint["outputSize"])
+
+            with multiprocessing.Pool(self.workers) as pool:
+                pending = deque()
+                chunks = self._read_chunks(checkpoint["sourceOffset"])
+
+                def submit():
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        return False
+                    lines, end_offset = chunk
+                    pending.append((pool.apply_async(_rescore_lines, (lines, self.version)), end_offset))
+                    return True
+
+                # Keep a bounded number of chunks in flight, written in source order
+                while len(pending) < self.workers * 2 and submit():
+                    pass
+                while pending:
+                    result, end_offset = pending.popleft()
+                    text, rescored, skipped, unreadable = result.get()
+                    output.write(text.encode('utf-8'))
+                    output.flush()
+                    os.fsync(output.fileno())
+
+                    checkpoint["sourceOffset"] = end_offset
+                    checkpoint["outputSize"] = output.tell()
+                    checkpoint["rescored"] += rescored
+                    checkpoint["skipped"] += skipped
+                    checkpoint["unreadable"] += unreadable
+                    self._save_checkpoint(checkpoint)
+                    if progress is not None:
+                        progress(checkpoint)
+                    submit()
+
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        logger.info("Re-scored %s analyses with integrator version %s", checkpoint['rescored'], self.version)
+        return {
+            "version": self.version,
+            "rescored": checkpoint["rescored"],
+            "skipped": checkpoint["skipped"],
+            "unreadable": checkpoint["unreadable"],
+            "output": self.output_path
+        }
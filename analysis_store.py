@@ -0,0 +1,710 @@
+"""
+Analysis store utilities for the Belief Explorer backend.
+
+Persists statements, extracted claims, raw arbiter outputs and integrated
+analyses in a local SQLite database (WAL mode). Writes are queued and applied in
+batches by a background thread so request threads never wait on disk, and
+indexed queries serve the /api/analyses endpoint. An FTS5 index over claims,
+assumptions and arbiter reasoning, kept current by triggers, serves /api/search.
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import atexit
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from utils.analysis_archive import build_record
+from utils.metrics import metrics
+from utils.request_context import current_request
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS statements (
+    request_id TEXT PRIMARY KEY,
+    statement TEXT NOT NULL,
+    claims_json TEXT NOT NULL,
+    depth TEXT,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS analyses (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    request_id TEXT,
+    claim TEXT NOT NULL,
+    claim_hash TEXT NOT NULL,
+    domain TEXT,
+    verifact REAL,
+    empirical REAL,
+    logical REAL,
+    pragmatic REAL,
+    integrator_version INTEGER,
+    created_at REAL NOT NULL,
+    arbiters_json TEXT NOT NULL,
+    analysis_json TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_statements_created ON statements (created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_claim_hash ON analyses (claim_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses (created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_verifact ON analyses (verifact);
+CREATE INDEX IF NOT EXISTS idx_analyses_domain_created ON analyses (domain, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_domain_verifact ON analyses (domain, verifact);
+CREATE INDEX IF NOT EXISTS idx_analyses_request ON analyses (request_id);
+"""
+
+# Full-text index of each analysis, keyed by the analyses rowid. The domain
+# column holds a tag built by domain_tag, so domain filters run inside the index.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5(
+    claim, assumptions, reasoning, domain,
+    tokenize = 'porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS analyses_fts_insert AFTER INSERT ON analyses BEGIN
+    INSERT INTO analyses_fts (rowid, claim, assumptions, reasoning, domain)
+    VALUES (new.rowid, new.claim, json_extract(new.analysis_json, '$.assumptions'),
+            coalesce(json_extract(new.arbiters_json, '$.empirical.reasoning'), '') || ' ' ||
+            coalesce(json_extract(new.arbiters_json, '$.logical.reasoning'), '') || ' ' ||
+            coalesce(json_extract(new.arbiters_json, '$.pragmatic.reasoning'), ''),
+            'domain' || lower(hex(new.domain)));
+END;
+
+CREATE TRIGGER IF NOT EXISTS analyses_fts_delete AFTER DELETE ON analyses BEGIN
+    DELETE FROM analyses_fts WHERE rowid = old.rowid;
+END;
+"""
+
+# Relative weight of each FTS column (claim, assumptions, reasoning, domain) in the rank
+SEARCH_WEIGHTS = (5.0, 2.0, 1.0, 0.0)
+
+# Only the most recent matches of a search are ranked
+SEARCH_CANDIDATES = 2000
+
+# Words in a larger share of recent analyses are not used for searching, like
+# stopwords (MySQL full-text search uses the same rule with one half)
+COMMON_TERM_SHARE = 0.1
+
+SEARCH_STOPWORDS = frozenset("""
+a an and are as at be been but by can do does for from had has have he her his how i if in
+into is it its me my no not of on or our she so than that the their them then there these
+they this to was we were what when which who why will with would you your
+""".split())
+
+MAX_QUERY_LIMIT = 200
+
+def claim_hash(claim):
+    """
+    Hash a claim for exact-match lookups, ignoring case and spacing.
+
+    Args:
+        claim (str): The claim text
+
+    Returns:
+        str: Hex digest of the normalized claim
+    """
+    normalized = re.sub(r"\s+", " ", (claim or "").strip().lower())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:32]
+
+def parse_timestamp(value):
+    """
+    Parse a query timestamp given as epoch seconds or an ISO 8601 string.
+
+    Args:
+        value (str or float): The timestamp
+
+    Returns:
+        float: Epoch seconds
+
+    Raises:
+        ValueError: If the value is not a timestamp
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid timestamp '{value}'")
+
+def _score(value):
+    """Return a score as a float, or None if it is not numeric."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class AnalysisStore:
+    """
+    SQLite-backed store of statements and analyses with a background writer.
+    """
+
+    def __init__(self, path, queue_size=10000, batch_size=500, flush_interval=0.5):
+        """
+        Initialize the AnalysisStore and start its writer thread.
+
+        Args:
+            path (str): Path of the SQLite database file
+            queue_size (int, optional): Pending writes kept before new ones are dropped
+            batch_size (int, optional): Maximum writes applied in one transaction
+            flush_interval (float, optional): Seconds a partial batch waits for more writes
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._local = threading.local()
+        self._closed = False
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        has_search = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'analyses_fts'").fetchone() is not None
+        connection.executescript(SEARCH_SCHEMA)
+        if not has_search:
+            self._rebuild_search_index(connection)
+        connection.commit()
+        self._writer_connection = connection
+
+        self._writer = threading.Thread(target=self._write_loop, name="analysis-store-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        """Open a connection configured for WAL mode."""
+        connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    @staticmethod
+    def _rebuild_search_index(connection):
+        """Index the analyses of a database created before the search index existed."""
+        count = connection.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        if not count:
+            return
+        logger.info("Building the search index for %s stored analyses", count)
+        connection.execute("DELETE FROM analyses_fts")
+        connection.execute(
+            "INSERT INTO analyses_fts (rowid, claim, assumptions, reasoning, domain) "
+            "SELECT rowid, claim, json_extract(analysis_json, '$.assumptions'), "
+            "coalesce(json_extract(arbiters_json, '$.empirical.reasoning'), '') || ' ' || "
+            "coalesce(json_extract(arbiters_json, '$.logical.reasoning'), '') || ' ' || "
+            "coalesce(json_extract(arbiters_json, '$.pragmatic.reasoning'), ''), "
+            "'domain' || lower(hex(domain)) "
+            "FROM analyses")
+
+    def _reader(self):
+        """Get this thread's read connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def _submit(self, kind, row):
+        """
+        Queue a write without blocking. When the queue is full the write is dropped.
+
+        Returns:
+            bool: Whether the write was queued
+        """
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait((kind, row))
+        except queue.Full:
+            self.dropped += 1
+            metrics.inc("analysis_store_dropped_total", kind=kind)
+            logger.warning("Analysis store queue is full; dropping a write")
+            return False
+        metrics.set_gauge("analysis_store_queue_depth", self._queue.qsize())
+        return True
+
+    def record_statement(self, statement, claims, depth=None):
+        """
+        Queue a statement and its extracted claims.
+
+        Args:
+            statement (str): The user's statement
+            claims (list): The extracted claims
+            depth (str, optional): The analysis depth tier
+
+        Returns:
+            bool: Whether the write was queued
+        """
+        context = current_request()
+        request_id = context.request_id if context is not None else None
+        if request_id is None:
+            return False
+        return self._submit("statement", (request_id, statement, json.dumps(claims), depth, time.time()))
+
+    def record(self, claim, empirical_analysis, logical_analysis, pragmatic_analysis, analysis):
+        """
+        Queue an analyzed claim with its raw arbiter outputs.
+
+        Args:
+            claim (str): The claim that was analyzed
+            empirical_analysis (dict): Raw output of the Empirical Arbiter
+            logical_analysis (dict): Raw output of the Logical Arbiter
+            pragmatic_analysis (dict): Raw output of the Pragmatic Arbiter
+            analysis (dict): The integrated analysis
+
+        Returns:
+            dict or None: The queued record, or None if it was dropped
+        """
+        record = build_record(claim, empirical_analysis, logical_analysis, pragmatic_analysis, analysis)
+        try:
+            row = self._analysis_row(record, time.time())
+        except (TypeError, ValueError) as e:
+            logger.warning("Could not store analysis: %s", e)
+            return None
+        return record if self._submit("analysis", row) else None
+
+    @staticmethod
+    def _analysis_row(record, created_at):
+        """Flatten an archive record into an analyses table row."""
+        analysis = record["analysis"]
+        arbiters = record["arbiters"]
+        return (
+            record["id"],
+            record.get("requestId"),
+            record["claim"],
+            claim_hash(record["claim"]),
+            analysis.get("domain"),
+            _score(analysis.get("verifactScore", {}).get("overallScore")),
+            _score(arbiters["empirical"].get("empiricalScore")),
+            _score(arbiters["logical"].get("logicalScore")),
+            _score(arbiters["pragmatic"].get("pragmaticScore")),
+            record.get("integratorVersion"),
+            created_at,
+            json.dumps(arbiters),
+            json.dumps(analysis),
+        )
+
+    def _write_loop(self):
+        """Apply queued writes in batches until the store is closed."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write_batch(batch)
+            if stop:
+                return
+
+    def _write_batch(self, batch, connection=None):
+        """Write a batch of queued rows in one transaction, on the writer thread's connection by default."""
+        connection = connection or self._writer_connection
+        statements = [row for kind, row in batch if kind == "statement"]
+        analyses = [row for kind, row in batch if kind == "analysis"]
+        flushes = [event for kind, event in batch if kind == "flush"]
+        start = time.perf_counter()
+        try:
+            with connection:
+                if statements:
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO statements VALUES (?, ?, ?, ?, ?)", statements)
+                if analyses:
+                    connection.executemany(
+                        "INSERT OR IGNORE INTO analyses (id, request_id, claim, claim_hash, domain, verifact, "
+                        "empirical, logical, pragmatic, integrator_version, created_at, arbiters_json, "
+                        "analysis_json) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", analyses)
+            metrics.inc("analysis_store_written_total", len(statements) + len(analyses))
+        except sqlite3.Error as e:
+            metrics.inc("analysis_store_write_errors_total")
+            logger.error("Could not write %s rows to the analysis store: %s", len(batch), e)
+        metrics.observe("analysis_store_batch_seconds", time.perf_counter() - start)
+        metrics.set_gauge("analysis_store_queue_depth", self._queue.qsize())
+        for event in flushes:
+            event.set()
+
+    def write_rows(self, rows):
+        """
+        Write archive records directly, bypassing the queue. Used for imports.
+
+        The import has its own connection, so its transactions never interleave
+        with the writer thread's; SQLite makes them take turns.
+
+        Args:
+            rows (iterable): Archive records, as built by build_record
+        """
+        connection = self._connect()
+        try:
+            batch = []
+            for record in rows:
+                created_at = record.get("createdAt")
+                created_at = parse_timestamp(created_at) if created_at else time.time()
+                batch.append(("analysis", self._analysis_row(record, created_at)))
+                if len(batch) >= self.batch_size:
+                    self._write_batch(batch, connection)
+                    batch = []
+            if batch:
+                self._write_batch(batch, connection)
+        finally:
+            connection.close()
+
+    def flush(self, timeout=10.0):
+        """
+        Wait until the writes queued so far have been applied.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait
+
+        Returns:
+            bool: Whether the writes were applied in time
+        """
+        done = threading.Event()
+        try:
+            self._queue.put(("flush", done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=10.0):
+        """
+        Stop accepting writes, apply the queued ones and stop the writer.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait for the writer
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout)
+
+    @staticmethod
+    def _query_sql(domain=None, min_verifact=None, max_verifact=None, since=None, until=None,
+                   claim=None, integrator_version=None, sort="recent", limit=50, cursor=None):
+        """
+        Build the SQL for a query of stored analyses. See query for the arguments.
+
+        Returns:
+            tuple: The SQL, its parameters and the sort column
+        """
+        if sort not in ("recent", "verifact"):
+            raise ValueError("sort must be 'recent' or 'verifact'")
+        limit = max(1, min(int(limit), MAX_QUERY_LIMIT))
+
+        conditions = []
+        params = []
+        if claim:
+            conditions.append("claim_hash = ?")
+            params.append(claim_hash(claim))
+        if domain:
+            conditions.append("domain = ?")
+            params.append(domain)
+        # The unary + keeps SQLite on the index that matches the sort order
+        verifact_column = "verifact" if sort == "verifact" else "+verifact"
+        time_column = "created_at" if sort == "recent" else "+created_at"
+        if min_verifact is not None:
+            conditions.append(f"{verifact_column} >= ?")
+            params.append(float(min_verifact))
+        if max_verifact is not None:
+            conditions.append(f"{verifact_column} <= ?")
+            params.append(float(max_verifact))
+        if since is not None:
+            conditions.append(f"{time_column} >= ?")
+            params.append(float(since))
+        if until is not None:
+            conditions.append(f"{time_column} < ?")
+            params.append(float(until))
+        if integrator_version is not None:
+            conditions.append("integrator_version = ?")
+            params.append(int(integrator_version))
+
+        sort_column = "created_at" if sort == "recent" else "verifact"
+        if cursor:
+            try:
+                cursor_value, cursor_rowid = cursor.rsplit(":", 1)
+                cursor_value, cursor_rowid = float(cursor_value), int(cursor_rowid)
+            except ValueError:
+                raise ValueError(f"Invalid cursor '{cursor}'")
+            # A row value comparison lets SQLite seek the index to the cursor
+            conditions.append(f"({sort_column}, rowid) < (?, ?)")
+            params.extend([cursor_value, cursor_rowid])
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = (f"SELECT rowid, id, request_id, claim, domain, verifact, integrator_version, created_at, "
+               f"analysis_json FROM analyses {where} "
+               f"ORDER BY {sort_column} DESC, rowid DESC LIMIT ?")
+        # One extra row tells whether there is a next page
+        return sql, params + [limit + 1], sort_column
+
+    def explain(self, **filters):
+        """
+        Describe how SQLite runs a query. Takes the same arguments as query.
+
+        Returns:
+            str: The query plan steps, separated by "; "
+        """
+        sql, params, _ = self._query_sql(**filters)
+        plan = self._reader().execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        return "; ".join(row["detail"] for row in plan)
+
+    def query(self, domain=None, min_verifact=None, max_verifact=None, since=None, until=None,
+              claim=None, integrator_version=None, sort="recent", limit=50, cursor=None):
+        """
+        Query stored analyses using the indexes.
+
+        Args:
+            domain (str, optional): Only analyses in this domain
+            min_verifact (float, optional): Minimum overall Verifact score
+            max_verifact (float, optional): Maximum overall Verifact score
+            since (float, optional): Only analyses created at or after this epoch time
+            until (float, optional): Only analyses created before this epoch time
+            claim (str, optional): Only analyses of this exact claim (case and spacing ignored)
+            integrator_version (int, optional): Only analyses scored with this version
+            sort (str, optional): "recent" (newest first) or "verifact" (highest first)
+            limit (int, optional): Maximum number of results, at most MAX_QUERY_LIMIT
+            cursor (str, optional): The nextCursor of a previous page
+
+        Returns:
+            dict: "analyses" (list of summaries with the integrated analysis) and
+                "nextCursor" (None on the last page)
+
+        Raises:
+            ValueError: If a filter or the cursor is invalid
+        """
+        limit = max(1, min(int(limit), MAX_QUERY_LIMIT))
+        sql, params, sort_column = self._query_sql(
+            domain, min_verifact, max_verifact, since, until, claim, integrator_version, sort, limit, cursor)
+        rows = self._reader().execute(sql, params).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = f"{last[sort_column]!r}:{last['rowid']}"
+
+        return {
+            "analyses": [
+                {
+                    "id": row["id"],
+                    "requestId": row["request_id"],
+                    "claim": row["claim"],
+                    "domain": row["domain"],
+                    "verifactScore": row["verifact"],
+                    "integratorVersion": row["integrator_version"],
+                    "createdAt": datetime.fromtimestamp(row["created_at"], timezone.utc).isoformat(),
+                    "analysis": json.loads(row["analysis_json"])
+                }
+                for row in rows
+            ],
+            "nextCursor": next_cursor
+        }
+
+    def top_claims(self, limit=100):
+        """
+        Find the most often analyzed claims with their latest arbiter outputs.
+
+        Args:
+            limit (int, optional): Maximum number of claims
+
+        Returns:
+            list: Dicts with the "claim", its "requests" count, the "depth" of
+                the latest request (None for imported analyses), the raw
+                "arbiters" outputs and "createdAt" (epoch seconds), most
+                requested first
+        """
+        # The claim_hash index covers the grouping, so the table is only read for the top rows
+        rows = self._reader().execute(
+            "SELECT a.claim, a.created_at, a.arbiters_json, s.depth, top.requests "
+            "FROM (SELECT claim_hash, COUNT(*) AS requests, MAX(rowid) AS latest FROM analyses "
+            "      GROUP BY claim_hash ORDER BY requests DESC LIMIT ?) AS top "
+            "JOIN analyses a ON a.rowid = top.latest "
+            "LEFT JOIN statements s ON s.request_id = a.request_id "
+            "ORDER BY top.requests DESC",
+            (max(1, int(limit)),)
+        ).fetchall()
+        return [
+            {
+                "claim": row["claim"],
+                "requests": row["requests"],
+                "depth": row["depth"],
+                "arbiters": json.loads(row["arbiters_json"]),
+                "createdAt": row["created_at"]
+            }
+            for row in rows
+        ]
+
+    def _match_floor(self, connection, match):
+        """
+        Find the rowid of the SEARCH_CANDIDATES-th most recent match of an FTS5
+        expression. FTS5 walks matches newest first, so this is cheap.
+
+        Returns:
+            int or None: The rowid, or None if there are fewer matches
+        """
+        row = connection.execute(
+            "SELECT rowid FROM analyses_fts WHERE analyses_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+            (match, SEARCH_CANDIDATES - 1)
+        ).fetchone()
+        return row[0] if row else None
+
+    def search(self, text, domain=None, limit=20):
+        """
+        Find stored analyses matching a free-text query, best matches first.
+
+        Every word of the query must appear in the claim, the assumptions or the
+        arbiters' reasoning, and matches are ranked with bm25, claim matches
+        highest. Only the SEARCH_CANDIDATES most recent matches are ranked.
+        Stopwords and words found in more than COMMON_TERM_SHARE of recent
+        analyses are ignored: they barely change the bm25 rank but computing
+        their weight means reading every analysis that contains them. When a
+        query has only such words, its matches are returned newest first.
+
+        Args:
+            text (str): The search text
+            domain (str, optional): Only analyses in this domain
+            limit (int, optional): Maximum number of results, at most MAX_QUERY_LIMIT
+
+        Returns:
+            dict: "results", each with the analysis summary, a highlighted
+                "snippet" and its "rank" (lower is better, None when ranked by
+                recency), and "ignoredTerms"
+
+        Raises:
+            ValueError: If the query has no searchable words
+        """
+        words = search_words(text)
+        limit = max(1, min(int(limit), MAX_QUERY_LIMIT))
+        connection = self._reader()
+
+        newest = connection.execute("SELECT MAX(rowid) FROM analyses").fetchone()[0] or 0
+        ranked = []
+        for word in words:
+            floor = self._match_floor(connection, search_expression([word]))
+            if floor is None or SEARCH_CANDIDATES / (newest - floor + 1) <= COMMON_TERM_SHARE:
+                ranked.append(word)
+
+        match = search_expression(ranked or words, domain)
+        floor = self._match_floor(connection, match) or 0
+        if ranked:
+            weights = ", ".join(str(weight) for weight in SEARCH_WEIGHTS)
+            score, order = f"bm25(analyses_fts, {weights})", "score"
+        else:
+            score, order = "NULL", "analyses_fts.rowid DESC"
+
+        rows = connection.execute(
+            "SELECT a.rowid, a.id, a.request_id, a.claim, a.domain, a.verifact, a.integrator_version, "
+            f"a.created_at, snippet(analyses_fts, -1, '[', ']', '...', 16) AS snippet, {score} AS score "
+            "FROM analyses_fts JOIN analyses a ON a.rowid = analyses_fts.rowid "
+            "WHERE analyses_fts MATCH ? AND analyses_fts.rowid >= ? "
+            f"ORDER BY {order} LIMIT ?",
+            (match, floor, limit)
+        ).fetchall()
+
+        return {
+            "results": [
+                {
+                    "id": row["id"],
+                    "requestId": row["request_id"],
+                    "claim": row["claim"],
+                    "domain": row["domain"],
+                    "verifactScore": row["verifact"],
+                    "integratorVersion": row["integrator_version"],
+                    "createdAt": datetime.fromtimestamp(row["created_at"], timezone.utc).isoformat(),
+                    "snippet": row["snippet"],
+                    "rank": round(row["score"], 4) if row["score"] is not None else None
+                }
+                for row in rows
+            ],
+            "ignoredTerms": [word for word in words if word not in ranked] if ranked else []
+        }
+
+def search_words(text):
+    """
+    Split search text into the words to search for, without stopwords.
+
+    Args:
+        text (str): The search text
+
+    Returns:
+        list: Distinct lowercase words, in order, at most 32. Stopwords are kept
+            only when the text has nothing else.
+
+    Raises:
+        ValueError: If the text has no searchable words
+    """
+    words = list(dict.fromkeys(word.lower() for word in re.findall(r"\w+", text or "")))[:32]
+    if not words:
+        raise ValueError("The search query has no searchable words")
+    return [word for word in words if word not in SEARCH_STOPWORDS] or words
+
+def domain_tag(domain):
+    """
+    Build the token that stands for a domain in the search index. The tag is
+    opaque so that it never matches words in the text, which keeps domain
+    filters cheap.
+
+    Args:
+        domain (str): The domain
+
+    Returns:
+        str: The domain tag
+    """
+    return "domain" + domain.encode('utf-8').hex()
+
+def search_expression(words, domain=None):
+    """
+    Build an FTS5 query that matches analyses containing every word.
+
+    Words are quoted, so FTS5 operators in user input are searched for literally.
+
+    Args:
+        words (list): The words, as returned by search_words
+        domain (str, optional): Restrict matches to this domain
+
+    Returns:
+        str: The FTS5 MATCH expression
+    """
+    expression = " ".join(f'"{word}"' for word in words)
+    if domain:
+        expression = f"domain : {domain_tag(domain)} AND ({expression})"
+    return expression
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """
+    Get the shared analysis store for this process.
+
+    Returns:
+        AnalysisStore or None: The store at ANALYSIS_STORE_PATH, or None when
+            the store is not configured
+    """
+    global _store
+    path = os.environ.get('ANALYSIS_STORE_PATH')
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = AnalysisStore(path)
+            atexit.register(_store.close)
+    return _store
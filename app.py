@@ -3,20 +3,29 @@ Belief Explorer - Backend Application
 A Flask-based backend for the Belief Explorer critical thinking platform.
 """
 
+import gc
 import os
-from flask import Flask, request, jsonify, send_from_directory
+import re
+from contextlib import nullcontext
+from flask import Flask, Response, g, request, jsonify, send_file, send_from_directory
 from dotenv import load_dotenv
 import logging
 
 # Import custom modules
-from arbiters.empirical_arbiter import EmpiricalArbiter
-from arbiters.logical_arbiter import LogicalArbiter
-from arbiters.pragmatic_arbiter import PragmaticArbiter
-from models.claim_extractor import ClaimExtractor
-from models.analysis_integrator import AnalysisIntegrator
-from models.perspective_generator import PerspectiveGenerator
-from models.response_generator import ResponseGenerator
+from models.analysis_pipeline import AnalysisPipeline
+from utils.admission import get_admission_controller
+from utils.analysis_store import get_store, parse_timestamp
 from utils.config import configure_logging
+from utils.depth_profiles import DEFAULT_DEPTH, DEPTH_PROFILES, normalize_depth
+from utils.job_queue import get_job_queue
+from utils.metrics import get_shared_metrics, metrics
+from utils.model_backend import load_sdk
+from utils.profiling import get_profiler, profile_request
+from utils.request_context import request_scope, tenant_for_key
+from utils.scheduler import PRIORITY_CLASSES
+from utils.session_store import get_session_store
+from utils.tracing import start_span
+from utils.warmup import WarmUp
 
 # Load environment variables
 load_dotenv()
@@ -28,20 +37,241 @@ logger = logging.getLogger(__name__)
 # Initialize Flask app
 app = Flask(__name__, static_folder='../static')
 
-# Initialize components
-claim_extractor = ClaimExtractor()
-empirical_arbiter = EmpiricalArbiter()
-logical_arbiter = LogicalArbiter()
-pragmatic_arbiter = PragmaticArbiter()
-analysis_integrator = AnalysisIntegrator()
-perspective_generator = PerspectiveGenerator()
-response_generator = ResponseGenerator()
+# Initialize components (each is built on first use)
+analysis_pipeline = AnalysisPipeline()
+
+# Readiness waits for this worker's warm-up; see start_warm_up
+warm_up = WarmUp(analysis_pipeline.warm_up_steps(int(os.environ.get('WARM_UP_CACHED_CLAIMS', 200))))
+
+def start_warm_up():
+    """
+    Start this worker's warm-up and metrics snapshots in the background, and its
+    job workers once the warm-up is done.
+
+    Called after a preloading server forks the worker, since the clients,
+    connections, caches and threads it builds belong to one process. A readiness
+    probe also starts it, so every way of serving the app warms up.
+    """
+    warm_up.start()
+    shared_metrics = get_shared_metrics()
+    if shared_metrics is not None:
+        shared_metrics.start()
+    job_queue = get_job_queue()
+    if job_queue is not None:
+        job_queue.start(run_job, ready=warm_up.wait)
+
+def run_job(statement, conversation_history, depth, tenant, job_id):
+    """
+    Run a queued analysis job.
+
+    The job's id is its request id, and its model calls are scheduled as batch
+    work, behind interactive requests.
+
+    Args:
+        statement (str): The user's statement
+        conversation_history (list): Previous conversation turns
+        depth (str): The analysis depth
+        tenant (str): The tenant that queued the job
+        job_id (str): The job id
+
+    Returns:
+        dict: The analysis result
+    """
+    with request_scope(job_id, tenant, "batch") as context, start_span("job", context.request_id):
+        return analysis_pipeline.analyze(statement, conversation_history, depth)
+
+def preload():
+    """
+    Prepare the shared read-only state before a preloading server forks workers.
+
+    The lexicons, schemas and depth profiles are built when their modules are
+    imported; this also imports the model SDK, then moves everything allocated
+    so far out of the garbage collector's reach, so the workers keep sharing
+    those pages instead of copying them when a collection touches them. Model
+    clients, connections, files and threads are left for each worker to create.
+    """
+    if os.environ.get('MODEL_BACKEND', 'gemini').lower() != 'mock':
+        load_sdk()
+    gc.freeze()
+
+# A caller-supplied trace id is reused when it has the W3C/OTLP form
+TRACE_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# Requests shed under overload get a 429, or the model-free answer when this is "heuristic"
+SHED_MODE = os.environ.get('ADMISSION_SHED_MODE', 'reject').lower()
+
+def request_priority(requested):
+    """
+    Choose the priority class of a request's model calls.
+
+    Clients may lower their own requests with the X-Priority header, such as
+    "batch" for bulk work; anything else is interactive.
+
+    Args:
+        requested (str or None): The X-Priority header value
+
+    Returns:
+        str: The priority class
+    """
+    requested = (requested or "").lower()
+    return requested if requested in PRIORITY_CLASSES else "interactive"
+
+def parse_analysis_request(data):
+    """
+    Validate the payload of an analysis request.
+
+    Args:
+        data: The decoded JSON payload
+
+    Returns:
+        tuple: The statement, the normalized depth and None, or None, None and
+            the error response (body and status)
+    """
+    if not data or not isinstance(data, dict):
+        return None, None, ({"error": "No data provided"}, 400)
+
+    statement = data.get('statement')
+    if not statement:
+        return None, None, ({"error": "No statement provided"}, 400)
+
+    requested_depth = data.get('depth', DEFAULT_DEPTH)
+    depth = normalize_depth(requested_depth)
+    if depth is None:
+        return None, None, ({
+            "error": f"Unknown depth '{requested_depth}'",
+            "depths": list(DEPTH_PROFILES)
+        }, 400)
+    return statement, depth, None
+
+def request_trace_id(header):
+    """
+    Choose the trace id of a request: the caller's, when it has the W3C/OTLP form.
+
+    Args:
+        header (str or None): The X-Trace-Id header value
+
+    Returns:
+        str or None: The trace id, or None to make a new one
+    """
+    trace_id = (header or '').lower()
+    return trace_id if TRACE_ID_PATTERN.match(trace_id) else None
+
+def open_session(data, tenant, depth):
+    """
+    Find the conversation an analysis request belongs to.
+
+    A request with a "sessionId" key continues a server-side session, or starts
+    one if the id is null, unknown or expired; its history, the summary of
+    older turns and the analyses of earlier claims come from the session.
+    Other requests send their own "history".
+
+    Args:
+        data (dict): The request payload
+        tenant (str): The tenant making the request
+        depth (str): The depth tier of the request
+
+    Returns:
+        tuple: The session (None without one), the conversation history, the
+            summary of older turns (or None) and the session's analyses at
+            this depth (or None)
+    """
+    if 'sessionId' not in data:
+        return None, data.get('history', []), None, None
+    session = get_session_store().open(data['sessionId'], tenant)
+    return session, session["turns"], session["summary"] or None, session["analyses"].get(depth)
+
+def record_session_turn(session, statement, result, depth):
+    """
+    Add a finished turn to its session and return the session id to the client.
+
+    The turn's analyses are kept for follow-ups unless they are the defaults
+    of a degraded answer.
+
+    Args:
+        session (dict or None): The session from open_session
+        statement (str): The user's statement
+        result (dict): The analysis result; its metadata gets the "sessionId"
+        depth (str): The depth tier of the analysis
+    """
+    if session is None:
+        return
+    metadata = result.setdefault("Metadata", {})
+    analyses = result.get("AnalysisJSON")
+    if metadata.get("degraded") or not isinstance(analyses, list):
+        analyses = None
+    get_session_store().record_turn(session["id"], statement, result.get("Response", ""), analyses, depth)
+    metadata["sessionId"] = session["id"]
+
+def admit_analysis(depth):
+    """
+    Wait for the admission controller to admit an analysis.
+
+    Args:
+        depth (str): The analysis depth
+
+    Returns:
+        context manager: Yields whether the analysis was admitted
+    """
+    admission = get_admission_controller()
+    return admission.admit(depth) if admission is not None else nullcontext(True)
+
+def shed_response(statement, conversation_history, depth, session=None):
+    """
+    Answer an analysis request that was not admitted.
+
+    Args:
+        statement (str): The user's statement
+        conversation_history (list): Previous conversation turns
+        depth (str): The analysis depth
+        session (dict, optional): The request's session, which a model-free answer joins
+
+    Returns:
+        tuple: The response body, status and headers
+    """
+    if SHED_MODE == 'heuristic':
+        metrics.inc("admission_degraded_total", depth=depth)
+        result = analysis_pipeline.analyze_heuristic(statement, conversation_history, depth)
+        record_session_turn(session, statement, result, depth)
+        return result, 200, {'X-Degraded': 'overload'}
+    retry_after = get_admission_controller().retry_after()
+    return {"error": "The server is overloaded. Please try again shortly.", "retryAfter": retry_after}, \
+        429, {'Retry-After': str(retry_after)}
+
+@app.after_request
+def add_trace_header(response):
+    """Return the trace id (and profile id, if profiled) of an analysis request in headers."""
+    trace_id = g.get('trace_id')
+    if trace_id:
+        response.headers['X-Trace-Id'] = trace_id
+    profile_id = g.get('profile_id')
+    if profile_id:
+        response.headers['X-Profile-Id'] = profile_id
+    return response
 
 @app.route('/')
 def index():
     """Serve the main application page."""
     return send_from_directory('../', 'index.html')
 
+@app.route('/healthz')
+def healthz():
+    """Liveness probe: the worker is serving requests."""
+    return jsonify({"status": "ok"})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness probe: 200 once the warm-up has finished, 503 with its progress until then."""
+    start_warm_up()
+    status = warm_up.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expose the metrics of every worker, or of this process alone, in the Prometheus text format."""
+    shared_metrics = get_shared_metrics()
+    text = shared_metrics.render() if shared_metrics is not None else metrics.render()
+    return Response(text, mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/analyze', methods=['POST'])
 def analyze_belief():
     """
@@ -50,84 +280,257 @@ def analyze_belief():
     Expected JSON payload:
     {
         "statement": "The belief statement to analyze",
+        "sessionId": "..." | null  (continue or start a server-side conversation), or
         "history": [
             {"role": "assistant", "content": "Previous assistant message"},
             {"role": "user", "content": "Previous user message"}
-        ]
+        ],
+        "depth": "fast" | "standard" | "deep"  (optional, defaults to "standard")
     }
     
     Returns:
     {
         "Response": "Assistant's response to the user",
-        "AnalysisJSON": "[{...analysis data...}]"
+        "AnalysisJSON": "[{...analysis data...}]",
+        "Metadata": {"requestId": "...", "sessionId": "...", "routing": [{...routing decision...}],
+                     "usage": {"promptTokens": 0, "outputTokens": 0, "costUsd": 0.0, "stages": {...}}}
     }
     """
-    try:
-        # Get request data
-        data = request.json
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
+    # Every log record and span of the request carries its id, which is also the trace id
+    trace_id = request_trace_id(request.headers.get('X-Trace-Id'))
+    tenant = tenant_for_key(request.headers.get('X-API-Key'))
+    priority = request_priority(request.headers.get('X-Priority'))
+    with request_scope(trace_id, tenant, priority) as context, \
+            start_span("POST /api/analyze", context.request_id), \
+            profile_request(context.request_id, request.headers.get('X-Profile'), request.path) as profile_id:
+        g.trace_id = context.request_id
+        g.profile_id = profile_id
+        try:
+            # Get request data
+            data = request.json
+            user_statement, depth, error = parse_analysis_request(data)
+            if error is not None:
+                return jsonify(error[0]), error[1]
+            
+            logger.info("Received statement for analysis: %s...", user_statement[:50])
+            session, conversation_history, summary, prior_analyses = open_session(data, tenant, depth)
+            
+            # Run the multi-arbiter pipeline at the requested depth, if the worker has room
+            with admit_analysis(depth) as admitted:
+                if not admitted:
+                    body, status, headers = shed_response(user_statement, conversation_history, depth, session)
+                    return jsonify(body), status, headers
+                result = analysis_pipeline.analyze(user_statement, conversation_history, depth, summary,
+                                                   prior_analyses)
+            
+            record_session_turn(session, user_statement, result, depth)
+            logger.info("Analysis completed successfully")
+            return jsonify(result)
         
-        user_statement = data.get('statement')
-        conversation_history = data.get('history', [])
-        
-        if not user_statement:
-            return jsonify({"error": "No statement provided"}), 400
-        
-        logger.info(f"Received statement for analysis: {user_statement[:50]}...")
-        
-        # Extract claims from the statement
-        claims = claim_extractor.extract_claims(user_statement)
-        
-        if not claims:
-            logger.warning("No claims extracted from statement")
+        except Exception as e:
+            logger.error("Error processing request: %s", e, exc_info=True)
             return jsonify({
-                "Response": "I couldn't identify a specific claim to analyze in your statement. Could you rephrase it as a more specific belief or claim?",
-                "AnalysisJSON": "[]"
-            })
-        
-        # Analyze the primary claim with each arbiter
-        primary_claim = claims[0]
-        logger.info(f"Analyzing primary claim: {primary_claim}")
-        
-        empirical_analysis = empirical_arbiter.analyze(primary_claim)
-        logical_analysis = logical_arbiter.analyze(primary_claim)
-        pragmatic_analysis = pragmatic_arbiter.analyze(primary_claim)
-        
-        # Integrate the analyses
-        integrated_analysis = analysis_integrator.integrate(
-            primary_claim,
-            empirical_analysis,
-            logical_analysis,
-            pragmatic_analysis
+                "error": "An error occurred while processing your request",
+                "details": str(e)
+            }), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue an analysis to run in the background and return its job id at once.
+    
+    Accepts the same JSON payload as /api/analyze, plus:
+        "callback": true  (optional; post the finished job to JOB_CALLBACK_URL)
+    
+    Returns (202, with a Location header):
+    {
+        "jobId": "...",
+        "status": "queued",
+        "statusUrl": "/api/jobs/..."
+    }
+    """
+    job_queue = get_job_queue()
+    if job_queue is None:
+        return jsonify({"error": "Jobs are not enabled"}), 503
+    
+    data = request.get_json(silent=True)
+    statement, depth, error = parse_analysis_request(data)
+    if error is not None:
+        return jsonify(error[0]), error[1]
+    
+    callback = bool(data.get('callback', False))
+    if callback and not job_queue.callback_url:
+        return jsonify({"error": "Job callbacks are not enabled"}), 400
+    
+    job = job_queue.submit(
+        statement,
+        data.get('history', []),
+        depth,
+        tenant=tenant_for_key(request.headers.get('X-API-Key')),
+        callback=callback
+    )
+    if job is None:
+        return jsonify({"error": "The job queue is full. Please try again later."}), 503, {'Retry-After': '60'}
+    
+    status_url = f"/api/jobs/{job['jobId']}"
+    logger.info("Queued job %s", job['jobId'])
+    return jsonify({"jobId": job['jobId'], "status": job['status'], "statusUrl": status_url}), \
+        202, {'Location': status_url}
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Get the status of a job, and its result once it is done.
+    
+    Jobs are only visible with the X-API-Key they were queued with.
+    
+    Returns:
+    {
+        "jobId": "...",
+        "status": "queued" | "running" | "done" | "failed",
+        "depth": "standard",
+        "attempts": 1,
+        "createdAt": "...", "startedAt": "...", "finishedAt": "...",
+        "result": {...same as /api/analyze...},
+        "error": "...",
+        "callback": "pending" | "delivered" | "failed"
+    }
+    """
+    job_queue = get_job_queue()
+    if job_queue is None:
+        return jsonify({"error": "Jobs are not enabled"}), 503
+    
+    job = job_queue.get(job_id, tenant=tenant_for_key(request.headers.get('X-API-Key')))
+    if job is None:
+        return jsonify({"error": f"No job '{job_id}'"}), 404
+    return jsonify(job)
+
+@app.route('/api/analyses', methods=['GET'])
+def query_analyses():
+    """
+    Query stored analyses.
+    
+    Query parameters (all optional):
+        domain, minVerifact, maxVerifact, since, until (epoch seconds or ISO 8601),
+        claim (exact claim text), integratorVersion, sort ("recent" or "verifact"),
+        limit (at most 200), cursor (nextCursor of the previous page)
+    
+    Returns:
+    {
+        "analyses": [{"id": "...", "claim": "...", "domain": "...", "verifactScore": 0.7, ...}],
+        "nextCursor": "..." or null
+    }
+    """
+    store = get_store()
+    if store is None:
+        return jsonify({"error": "The analysis store is not enabled"}), 503
+    
+    args = request.args
+    try:
+        result = store.query(
+            domain=args.get('domain'),
+            min_verifact=args.get('minVerifact', type=float),
+            max_verifact=args.get('maxVerifact', type=float),
+            since=parse_timestamp(args['since']) if 'since' in args else None,
+            until=parse_timestamp(args['until']) if 'until' in args else None,
+            claim=args.get('claim'),
+            integrator_version=args.get('integratorVersion', type=int),
+            sort=args.get('sort', 'recent'),
+            limit=args.get('limit', 50, type=int),
+            cursor=args.get('cursor')
         )
-        
-        # Generate perspectives
-        perspectives = perspective_generator.generate_perspectives(primary_claim)
-        integrated_analysis['perspectives'] = perspectives
-        
-        # Generate response
-        response = response_generator.generate_response(
-            primary_claim,
-            integrated_analysis,
-            conversation_history
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(result)
+
+@app.route('/api/search', methods=['GET'])
+def search_analyses():
+    """
+    Full-text search of stored claims, assumptions and arbiter reasoning.
+    
+    Query parameters:
+        q (required): The search text
+        domain (optional): Only analyses in this domain
+        limit (optional): Maximum number of results, at most 200 (default 20)
+    
+    Returns:
+    {
+        "results": [{"id": "...", "claim": "...", "snippet": "...[match]...", "rank": -7.2, ...}],
+        "ignoredTerms": []
+    }
+    """
+    store = get_store()
+    if store is None:
+        return jsonify({"error": "The analysis store is not enabled"}), 503
+    
+    try:
+        result = store.search(
+            request.args.get('q', ''),
+            domain=request.args.get('domain'),
+            limit=request.args.get('limit', 20, type=int)
         )
-        
-        # Prepare final output
-        result = {
-            "Response": response,
-            "AnalysisJSON": [integrated_analysis]
-        }
-        
-        logger.info("Analysis completed successfully")
-        return jsonify(result)
-    
-    except Exception as e:
-        logger.error(f"Error processing request: {str(e)}", exc_info=True)
-        return jsonify({
-            "error": "An error occurred while processing your request",
-            "details": str(e)
-        }), 500
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(result)
+
+def _admin_profiler():
+    """Return the profiler if the caller presents the admin token, else an error response."""
+    profiler = get_profiler()
+    if profiler is None or not profiler.admin_token:
+        return None, (jsonify({"error": "Profiling admin endpoints are not enabled"}), 404)
+    if not profiler.is_admin(request.headers.get('X-Admin-Token')):
+        return None, (jsonify({"error": "A valid X-Admin-Token header is required"}), 403)
+    return profiler, None
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    """
+    List the saved request profiles, newest first. Requires the X-Admin-Token header.
+    
+    Returns:
+    {
+        "profiles": [{"id": "...", "reason": "requested" | "sampled", "endpoint": "...",
+                      "durationSeconds": 1.8, "createdAt": "..."}]
+    }
+    """
+    profiler, error = _admin_profiler()
+    if error:
+        return error
+    return jsonify({"profiles": profiler.list_profiles()})
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+def download_profile(profile_id):
+    """
+    Download a request profile. Requires the X-Admin-Token header.
+    
+    Query parameters (all optional):
+        format ("pstats" for the binary profile, or "text" for a report),
+        sort (pstats sort key for the report, default "cumulative"),
+        limit (functions listed in the report, default 50)
+    """
+    profiler, error = _admin_profiler()
+    if error:
+        return error
+    
+    path = profiler.profile_path(profile_id)
+    if path is None:
+        return jsonify({"error": f"No profile '{profile_id}'"}), 404
+    
+    if request.args.get('format', 'pstats') == 'text':
+        try:
+            report = profiler.render_text(
+                profile_id,
+                sort=request.args.get('sort', 'cumulative'),
+                limit=request.args.get('limit', 50, type=int)
+            )
+        except KeyError as e:
+            return jsonify({"error": f"Unknown sort key {e}"}), 400
+        return Response(report, mimetype='text/plain')
+    
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                     download_name=f"{profile_id}.prof")
 
 if __name__ == '__main__':
     # Get port from environment or use default
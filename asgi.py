@@ -0,0 +1,218 @@
+"""
+Belief Explorer - ASGI Application
+An async entry point for the Belief Explorer backend.
+
+`/api/analyze` is served on the event loop with the async pipeline, so one
+process keeps many model calls in flight instead of holding a worker for each
+request. Every other route is passed to the Flask app on a worker thread.
+"""
+
+import io
+import sys
+import json
+import asyncio
+import logging
+from contextlib import nullcontext
+from dotenv import load_dotenv
+
+# Load environment variables before the components read them
+load_dotenv()
+
+from app import (
+    analysis_pipeline,
+    app as flask_app,
+    open_session,
+    parse_analysis_request,
+    record_session_turn,
+    request_priority,
+    request_trace_id,
+    shed_response,
+    start_warm_up,
+)
+from utils.admission import get_admission_controller
+from utils.request_context import request_scope, tenant_for_key
+from utils.tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+async def app(scope, receive, send):
+    """
+    The ASGI application.
+
+    Args:
+        scope (dict): The connection scope
+        receive (callable): Receives events from the server
+        send (callable): Sends events to the server
+    """
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    body = await _read_body(receive)
+    if scope["path"] == "/api/analyze" and scope["method"] == "POST":
+        await analyze_belief(scope, body, send)
+    else:
+        await _call_wsgi(flask_app, scope, body, send)
+
+async def analyze_belief(scope, body, send):
+    """
+    Analyze a belief statement using the multi-arbiter system.
+
+    Accepts and returns the same JSON as the Flask route, including the
+    X-Trace-Id, X-API-Key and X-Priority headers. Request profiling is not available here:
+    cProfile follows a thread, and this thread serves many requests at once.
+
+    Args:
+        scope (dict): The connection scope
+        body (bytes): The request body
+        send (callable): Sends events to the server
+    """
+    headers = _headers(scope)
+    trace_id = request_trace_id(headers.get('x-trace-id'))
+    tenant = tenant_for_key(headers.get('x-api-key'))
+    priority = request_priority(headers.get('x-priority'))
+
+    # Every log record and span of the request carries its id, which is also the trace id
+    with request_scope(trace_id, tenant, priority) as context, \
+            start_span("POST /api/analyze", context.request_id):
+        trace_header = [(b"x-trace-id", context.request_id.encode('ascii'))]
+        try:
+            try:
+                data = json.loads(body) if body else None
+            except ValueError:
+                await _send_json(send, 400, {"error": "The request body is not valid JSON"}, trace_header)
+                return
+            user_statement, depth, error = parse_analysis_request(data)
+            if error is not None:
+                await _send_json(send, error[1], error[0], trace_header)
+                return
+
+            logger.info("Received statement for analysis: %s...", user_statement[:50])
+            session, conversation_history, summary, prior_analyses = await asyncio.to_thread(
+                open_session, data, tenant, depth)
+
+            # Run the multi-arbiter pipeline at the requested depth, if the process has room
+            admission = get_admission_controller()
+            async with admission.admit_async(depth) if admission is not None else nullcontext(True) as admitted:
+                if not admitted:
+                    body, status, headers = await asyncio.to_thread(
+                        shed_response, user_statement, conversation_history, depth, session)
+                    await _send_json(send, status, body, trace_header + [
+                        (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()
+                    ])
+                    return
+                result = await analysis_pipeline.analyze_async(user_statement, conversation_history, depth, summary,
+                                                               prior_analyses)
+
+            await asyncio.to_thread(record_session_turn, session, user_statement, result, depth)
+
+            logger.info("Analysis completed successfully")
+            await _send_json(send, 200, result, trace_header)
+
+        except Exception as e:
+            logger.error("Error processing request: %s", e, exc_info=True)
+            await _send_json(send, 500, {
+                "error": "An error occurred while processing your request",
+                "details": str(e)
+            }, trace_header)
+
+async def _lifespan(receive, send):
+    """Start the warm-up at startup and acknowledge the server's startup and shutdown events."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            start_warm_up()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def _read_body(receive):
+    """Read the whole request body."""
+    parts = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        parts.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(parts)
+
+def _headers(scope):
+    """Return the request headers as a dict with lower-case names."""
+    return {name.decode('latin-1'): value.decode('latin-1') for name, value in scope.get("headers", [])}
+
+async def _send_json(send, status, payload, headers=()):
+    """Send a JSON response."""
+    data = json.dumps(payload).encode('utf-8')
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode('ascii'))]
+                   + list(headers)
+    })
+    await send({"type": "http.response.body", "body": data})
+
+def _wsgi_environ(scope, body):
+    """Build the WSGI environ of an ASGI HTTP request."""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"].encode('utf-8').decode('latin-1'),
+        "QUERY_STRING": scope.get("query_string", b"").decode('latin-1'),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        key = name.decode('latin-1').upper().replace("-", "_")
+        value = value.decode('latin-1')
+        if key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            environ[key] = value
+        else:
+            key = "HTTP_" + key
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+async def _call_wsgi(wsgi_app, scope, body, send):
+    """Serve a request with a WSGI app on a worker thread."""
+    environ = _wsgi_environ(scope, body)
+
+    def run():
+        response = {}
+        chunks = []
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = headers
+            return chunks.append
+
+        result = wsgi_app(environ, start_response)
+        try:
+            for data in result:
+                chunks.append(data)
+        finally:
+            close = getattr(result, "close", None)
+            if close is not None:
+                close()
+        return response, b"".join(chunks)
+
+    response, data = await asyncio.to_thread(run)
+    await send({
+        "type": "http.response.start",
+        "status": response["status"],
+        "headers": [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response["headers"]]
+    })
+    await send({"type": "http.response.body", "body": data})
@@ -0,0 +1,921 @@
+"""
+Benchmark suite for the Belief Explorer backend.
+
+Each benchmark is a function registered in BENCHMARKS and can be run by name:
+
+    python tests/benchmarks.py depth --runs 5
+    python tests/benchmarks.py depth --backend gemini
+    python tests/benchmarks.py streaming
+    python tests/benchmarks.py parsing
+    python tests/benchmarks.py schema --format-error-rate 0.1
+    python tests/benchmarks.py integration
+    python tests/benchmarks.py lexicon
+    python tests/benchmarks.py store --rows 1000000
+    python tests/benchmarks.py search --rows 2000000
+    python tests/benchmarks.py eventlog
+    python tests/benchmarks.py logging
+    python tests/benchmarks.py serving --concurrency 200
+    python tests/benchmarks.py startup --workers 4
+    python tests/benchmarks.py packing --pack-sizes 1,2,3,5,8
+
+The mock backend is used by default so that results are reproducible offline.
+"""
+
+import os
+import sys
+import re
+import json
+import time
+import random
+import asyncio
+import argparse
+import gzip
+import itertools
+import tempfile
+import logging
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueListener, RotatingFileHandler
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The sample statements repeat, so a claim cache would skip most arbiter calls
+os.environ.setdefault('CLAIM_CACHE_SIZE', '0')
+
+from backend.arbiters.empirical_arbiter import EmpiricalArbiter
+from backend.arbiters.logical_arbiter import LogicalArbiter
+from backend.arbiters.pragmatic_arbiter import PragmaticArbiter
+from backend.models.analysis_integrator import ABSOLUTE_TERMS, BATCH_COLUMNS, DOMAIN_KEYWORDS, AnalysisIntegrator
+from backend.models.analysis_pipeline import AnalysisPipeline
+from backend.utils.analysis_store import SEARCH_STOPWORDS, AnalysisStore, search_expression, search_words
+from backend.utils.config import get_default_model
+from backend.utils.depth_profiles import DEPTH_PROFILES
+from backend.utils.event_log import EventLog, read_events
+from backend.utils.lexicon_matcher import LexiconMatcher
+from backend.utils.logging_pipeline import JsonFormatter, NonBlockingQueueHandler, RequestContextFilter, SamplingFilter
+from backend.utils.model_backend import GeminiBackend, MockBackend, estimate_cost
+from backend.utils.request_context import request_scope
+from backend.utils.response_parser import (
+    CLAIMS_SCHEMA,
+    PERSPECTIVES_SCHEMA,
+    analysis_schema,
+    extract_json_object,
+    extract_string_list,
+    has_perspective_objects,
+)
+from backend.utils.structured_output import parse_json_stream, parse_json_text
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_STATEMENTS = [
+    "The Earth is flat because the horizon looks flat from where I'm standing.",
+    "Vaccines cause more harm than good, and the government hides the data.",
+    "Social media makes everyone less happy. We should ban it for teenagers.",
+    "Artificial intelligence will definitely replace all programmers within ten years.",
+]
+
+class RecordingBackend:
+    """
+    Wraps a backend and records every call it serves.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.calls = []
+
+    @property
+    def available(self):
+        return self.backend.available
+
+    def generate_content(self, prompt, model_name, generation_config, stage=None):
+        response = self.backend.generate_content(prompt, model_name, generation_config, stage=stage)
+        self.calls.append((stage, response))
+        return response
+
+    def generate_content_stream(self, prompt, model_name, generation_config, stage=None):
+        stream = self.backend.generate_content_stream(prompt, model_name, generation_config, stage=stage)
+        self.calls.append((stage, stream))
+        return stream
+
+def _make_backend(args):
+    """Create the backend selected on the command line."""
+    if args.backend == "gemini":
+        return GeminiBackend()
+    return MockBackend(latency_scale=args.latency_scale)
+
+def _percentile(values, percent):
+    """Return the given percentile of a list of values."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def bench_depth(args):
+    """
+    Compare latency, token usage and cost of each analysis depth tier.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    recorder = RecordingBackend(_make_backend(args))
+    pipeline = AnalysisPipeline(recorder)
+
+    print(f"\n=== DEPTH TIERS ({args.backend} backend, {args.runs} runs x {len(SAMPLE_STATEMENTS)} statements) ===")
+    print(f"{'depth':<10}{'p50 s':>9}{'p95 s':>9}{'calls':>8}{'in tok':>9}{'out tok':>9}{'cost $':>11}")
+
+    for depth in DEPTH_PROFILES:
+        latencies = []
+        recorder.calls = []
+        requests = 0
+        for _ in range(args.runs):
+            for statement in SAMPLE_STATEMENTS:
+                start = time.perf_counter()
+                pipeline.analyze(statement, [], depth)
+                latencies.append(time.perf_counter() - start)
+                requests += 1
+
+        prompt_tokens = sum(r.prompt_tokens for _, r in recorder.calls)
+        output_tokens = sum(r.output_tokens for _, r in recorder.calls)
+        cost = sum(estimate_cost(r.model_name, r.prompt_tokens, r.output_tokens) for _, r in recorder.calls)
+
+        print(f"{depth:<10}"
+              f"{statistics.median(latencies):>9.3f}"
+              f"{_percentile(latencies, 95):>9.3f}"
+              f"{len(recorder.calls) / requests:>8.1f}"
+              f"{prompt_tokens / requests:>9.0f}"
+              f"{output_tokens / requests:>9.0f}"
+              f"{cost / requests:>11.5f}")
+
+def bench_streaming(args):
+    """
+    Compare reading whole completions with stopping the stream once the JSON closes.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    backend = _make_backend(args)
+    config = {"max_output_tokens": 1024}
+    model_name = get_default_model()
+    stages = {
+        "empirical": "object",
+        "logical": "object",
+        "pragmatic": "object",
+        "perspectives": "array",
+    }
+
+    print(f"\n=== STREAMING EARLY STOP ({args.backend} backend, {args.runs} runs x {len(SAMPLE_STATEMENTS)} claims) ===")
+    print(f"{'stage':<14}{'full s':>9}{'stream s':>10}{'full tok':>10}{'stream tok':>12}")
+
+    for stage, expect in stages.items():
+        full_latency, stream_latency, full_tokens, stream_tokens = [], [], [], []
+        for _ in range(args.runs):
+            for claim in SAMPLE_STATEMENTS:
+                prompt = f'Analyze the following claim: "{claim}"'
+
+                start = time.perf_counter()
+                response = backend.generate_content(prompt, model_name, config, stage=stage)
+                parse_json_text(response.text, expect)
+                full_latency.append(time.perf_counter() - start)
+                full_tokens.append(response.output_tokens)
+
+                start = time.perf_counter()
+                stream = backend.generate_content_stream(prompt, model_name, config, stage=stage)
+                parse_json_stream(stream, expect)
+                stream_latency.append(time.perf_counter() - start)
+                stream_tokens.append(stream.output_tokens)
+
+        print(f"{stage:<14}"
+              f"{statistics.mean(full_latency):>9.3f}"
+              f"{statistics.mean(stream_latency):>10.3f}"
+              f"{statistics.mean(full_tokens):>10.0f}"
+              f"{statistics.mean(stream_tokens):>12.0f}")
+
+def _legacy_object(text):
+    """The greedy-regex extraction the arbiters used before the shared parser."""
+    match = re.search(r'({[\s\S]*})', text)
+    if not match:
+        raise ValueError("Could not find JSON in response")
+    return json.loads(match.group(1))
+
+def _time_call(function, text, repeat):
+    """Return the mean time in microseconds of parsing a text, ignoring ValueError."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        try:
+            function(text)
+        except ValueError:
+            pass
+    return (time.perf_counter() - start) * 1_000_000 / repeat
+
+def bench_parsing(args):
+    """
+    Compare the shared response parser with the legacy greedy regex.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    corpus_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parser_corpus.json')
+    with open(corpus_path, encoding='utf-8') as f:
+        entries = json.load(f)["entries"]
+    objects = [entry["text"] for entry in entries if entry["expect"] == "object"]
+    lists = [entry["text"] for entry in entries if entry["stage"] == "claims"]
+    repeat = max(1, args.runs) * 100
+
+    print(f"\n=== RESPONSE PARSING (mean us per response, {repeat} repeats) ===")
+    print(f"{'input':<32}{'legacy':>12}{'shared':>12}")
+
+    legacy = sum(_time_call(_legacy_object, text, repeat) for text in objects) / len(objects)
+    shared = sum(_time_call(extract_json_object, text, repeat) for text in objects) / len(objects)
+    print(f"{'corpus objects':<32}{legacy:>12.1f}{shared:>12.1f}")
+
+    shared = sum(_time_call(extract_string_list, text, repeat) for text in lists) / len(lists)
+    print(f"{'corpus claim lists':<32}{'(eval)':>12}{shared:>12.1f}")
+
+    # Stray opening braces make the greedy regex backtrack quadratically
+    for size in (1000, 5000, 20000):
+        text = "{ " * size + "no closing brace"
+        legacy = _time_call(_legacy_object, text, 1)
+        shared = _time_call(extract_json_object, text, 1)
+        print(f"{f'{size} stray braces':<32}{legacy:>12.1f}{shared:>12.1f}")
+
+# Response schema and expected JSON kind of each structured stage
+STAGE_SCHEMAS = {
+    "claims": (CLAIMS_SCHEMA, "list"),
+    "empirical": (analysis_schema("empirical"), "object"),
+    "logical": (analysis_schema("logical"), "object"),
+    "pragmatic": (analysis_schema("pragmatic"), "object"),
+    "perspectives": (PERSPECTIVES_SCHEMA, "array"),
+}
+
+def _call_stage(backend, stage, expect, prompt, model_name, config):
+    """
+    Make a stage's model call the way its component does and parse the result.
+
+    Returns:
+        tuple: Whether parsing succeeded and the output tokens of the call
+    """
+    if expect == "list":
+        response = backend.generate_content(prompt, model_name, config, stage=stage)
+        return extract_string_list(response.text) is not None, response.output_tokens
+
+    accept = has_perspective_objects if stage == "perspectives" else None
+    stream = backend.generate_content_stream(prompt, model_name, config, stage=stage)
+    try:
+        parse_json_stream(stream, expect, accept)
+        ok = True
+    except ValueError:
+        ok = False
+    return ok, stream.output_tokens
+
+def bench_schema(args):
+    """
+    Compare parse failures and output tokens with and without schema-constrained output.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    if args.backend == "gemini":
+        backend = GeminiBackend()
+    else:
+        backend = MockBackend(latency_scale=0, format_error_rate=args.format_error_rate, seed=0)
+    model_name = get_default_model()
+    base_config = {"max_output_tokens": 1024}
+
+    print(f"\n=== SCHEMA-CONSTRAINED OUTPUT ({args.backend} backend, {args.runs} runs x {len(SAMPLE_STATEMENTS)} claims) ===")
+    print(f"{'stage':<14}{'free fail':>11}{'schema fail':>13}{'free tok':>10}{'schema tok':>12}")
+
+    for stage, (schema, expect) in STAGE_SCHEMAS.items():
+        configs = {
+            "free": base_config,
+            "schema": dict(base_config, response_mime_type="application/json", response_schema=schema),
+        }
+        failures = {label: 0 for label in configs}
+        tokens = {label: [] for label in configs}
+        for _ in range(args.runs):
+            for claim in SAMPLE_STATEMENTS:
+                prompt = f'Analyze the following claim: "{claim}"'
+                for label, config in configs.items():
+                    ok, output_tokens = _call_stage(backend, stage, expect, prompt, model_name, config)
+                    failures[label] += 0 if ok else 1
+                    tokens[label].append(output_tokens)
+
+        calls = args.runs * len(SAMPLE_STATEMENTS)
+        print(f"{stage:<14}"
+              f"{failures['free'] / calls:>11.1%}"
+              f"{failures['schema'] / calls:>13.1%}"
+              f"{statistics.mean(tokens['free']):>10.0f}"
+              f"{statistics.mean(tokens['schema']):>12.0f}")
+
+def _random_analyses(count, seed=0):
+    """
+    Build random arbiter analyses, with some missing keys and scores on 0.005 steps
+    so that rounding ties are exercised.
+
+    Returns:
+        list: (empirical, logical, pragmatic) analysis tuples
+    """
+    rng = random.Random(seed)
+    keys = {"empirical": [], "logical": [], "pragmatic": []}
+    for column, (arbiter, component) in BATCH_COLUMNS.items():
+        keys[arbiter].append((column, component))
+
+    def score():
+        if rng.random() < 0.3:
+            return rng.randrange(201) / 200
+        return rng.random()
+
+    rows = []
+    for _ in range(count):
+        row = []
+        for arbiter in ("empirical", "logical", "pragmatic"):
+            analysis = {"components": {}}
+            for column, component in keys[arbiter]:
+                if rng.random() < 0.05:
+                    continue
+                if component is None:
+                    analysis[column] = score()
+                else:
+                    analysis["components"][component] = score()
+            row.append(analysis)
+        rows.append(tuple(row))
+    return rows
+
+def bench_integration(args):
+    """
+    Compare scalar and vectorized integration of composite metrics, and check
+    that both give bit-identical results.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    import numpy as np
+
+    integrator = AnalysisIntegrator()
+
+    print("\n=== BATCH INTEGRATION (composite metrics only) ===")
+    print(f"{'rows':>10}{'scalar s':>11}{'batch s':>10}{'speedup':>10}{'identical':>11}")
+
+    for size in (10_000, 100_000, 1_000_000):
+        rows = _random_analyses(size)
+
+        start = time.perf_counter()
+        scalar = []
+        for empirical, logical, pragmatic in rows:
+            verifact, components = integrator._composite_metrics(empirical, logical, pragmatic)
+            scalar.append((round(verifact, 2), {k: round(v, 2) for k, v in components.items()}))
+        scalar_time = time.perf_counter() - start
+
+        columns = integrator.columns_from_analyses(rows)
+        start = time.perf_counter()
+        batch = integrator.integrate_batch(columns)
+        batch_time = time.perf_counter() - start
+
+        # Compare bit patterns, so that -0.0 and 0.0 count as different
+        def same_bits(batch_values, scalar_values):
+            return np.array_equal(batch_values.view(np.uint64), np.array(scalar_values).view(np.uint64))
+
+        identical = same_bits(batch["overallScore"], [overall for overall, _ in scalar])
+        for name, values in batch["components"].items():
+            identical = identical and same_bits(values, [c[name] for _, c in scalar])
+
+        print(f"{size:>10}"
+              f"{scalar_time:>11.3f}"
+              f"{batch_time:>10.3f}"
+              f"{scalar_time / batch_time:>9.0f}x"
+              f"{str(identical):>11}")
+
+def _legacy_lexicon_scan(lexicons, text):
+    """The per-keyword substring checks the integrator used before the shared matcher."""
+    text_lower = text.lower()
+    return {label: sum(1 for term in terms if term in text_lower) for label, terms in lexicons.items()}
+
+def _regex_lexicon_scan(pattern, text):
+    """A single alternation regex with word boundaries."""
+    return [match.group(0) for match in pattern.finditer(text.lower())]
+
+def bench_lexicon(args):
+    """
+    Compare lexicon matching strategies as the lexicon grows.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    rng = random.Random(0)
+    base_terms = [term for terms in DOMAIN_KEYWORDS.values() for term in terms] + ABSOLUTE_TERMS
+    repeat = max(1, args.runs) * 200
+
+    print(f"\n=== LEXICON MATCHING (mean us per claim, {len(SAMPLE_STATEMENTS)} claims, {repeat} repeats) ===")
+    print(f"{'terms':>8}{'substring':>12}{'regex':>10}{'matcher':>10}")
+
+    for extra in (0, 1000, 5000, 20000):
+        synthetic = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 12)))
+                     for _ in range(extra)]
+        lexicons = {"base": base_terms, "external": synthetic}
+        matcher = LexiconMatcher(lexicons)
+        matcher.build()
+        terms = sorted(base_terms + synthetic, key=len, reverse=True)
+        pattern = re.compile(r"(?<!\w)(?:" + "|".join(re.escape(term) for term in terms) + r")(?!\w)")
+
+        timings = []
+        for function, scanner in ((_legacy_lexicon_scan, lexicons), (_regex_lexicon_scan, pattern),
+                                  (lambda m, text: m.find_all(text), matcher)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for claim in SAMPLE_STATEMENTS:
+                    function(scanner, claim)
+            timings.append((time.perf_counter() - start) * 1_000_000 / (repeat * len(SAMPLE_STATEMENTS)))
+
+        print(f"{len(terms):>8}" + "".join(f"{timing:>{width}.1f}" for timing, width in zip(timings, (12, 10, 10))))
+
+def _synthetic_records(count, now, seed=0):
+    """
+    Build synthetic archive records with claims and reasoning drawn from a
+    Zipf-distributed vocabulary, so that search terms range from rare to common.
+
+    Yields:
+        dict: Archive records, oldest first, 30 seconds apart
+    """
+    rng = random.Random(seed)
+    domains = list(DOMAIN_KEYWORDS) + ["general"]
+    vocabulary = [term for terms in DOMAIN_KEYWORDS.values() for term in terms if " " not in term]
+    vocabulary += ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 10)))
+                   for _ in range(20000)]
+    rng.shuffle(vocabulary)
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+
+    def sentence(length):
+        return " ".join(rng.choices(vocabulary, cum_weights=cumulative, k=length)).capitalize() + "."
+
+    for index in range(count):
+        yield {
+            "id": f"{index:012x}",
+            "requestId": f"r{index // 2:011x}",
+            "createdAt": now - (count - index) * 30,
+            "integratorVersion": 1,
+            "claim": sentence(rng.randint(6, 14)),
+            "arbiters": {
+                "empirical": {"empiricalScore": rng.random(), "reasoning": sentence(rng.randint(15, 30))},
+                "logical": {"logicalScore": rng.random(), "reasoning": sentence(rng.randint(15, 30))},
+                "pragmatic": {"pragmaticScore": rng.random(), "reasoning": sentence(rng.randint(15, 30))}
+            },
+            "analysis": {
+                "domain": rng.choice(domains),
+                "assumptions": "No obvious unexamined assumptions detected",
+                "verifactScore": {"overallScore": rng.randrange(101) / 100}
+            }
+        }
+
+def _load_store(directory, rows, now):
+    """Create a store in a directory and bulk-load synthetic records into it."""
+    store = AnalysisStore(os.path.join(directory, "analyses.db"), batch_size=10000)
+    start = time.perf_counter()
+    store.write_rows(_synthetic_records(rows, now))
+    load_time = time.perf_counter() - start
+    size = os.path.getsize(store.path) / 1_000_000
+    print(f"\n({rows} rows loaded in {load_time:.1f} s, {size:.0f} MB)")
+    return store
+
+def bench_store(args):
+    """
+    Bulk-load synthetic analyses into a fresh store and time indexed queries.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    now = time.time()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = _load_store(directory, args.rows, now)
+        claim = store.query(limit=1)["analyses"][0]["claim"]
+        print("=== ANALYSIS STORE ===")
+        queries = [
+            ("recent", {}),
+            ("domain=health", {"domain": "health"}),
+            ("domain=health&minVerifact=0.7", {"domain": "health", "min_verifact": 0.7}),
+            ("... sort=verifact", {"domain": "health", "min_verifact": 0.7, "sort": "verifact"}),
+            ("minVerifact=0.95", {"min_verifact": 0.95}),
+            ("since=last day", {"since": now - 86400}),
+            ("claim=...", {"claim": claim}),
+        ]
+        repeat = max(1, args.runs) * 20
+        print(f"{'query':<34}{'first page ms':>15}{'page 5 ms':>11}  plan")
+        for name, filters in queries:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                page = store.query(limit=50, **filters)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            # Follow the cursor to the fifth page
+            page_timings = []
+            for _ in range(repeat):
+                cursor = None
+                for _ in range(5):
+                    start = time.perf_counter()
+                    page = store.query(limit=50, cursor=cursor, **filters)
+                    elapsed = time.perf_counter() - start
+                    cursor = page["nextCursor"]
+                    if cursor is None:
+                        break
+                page_timings.append(elapsed * 1000)
+
+            plan = store.explain(**filters)
+            print(f"{name:<34}{statistics.median(timings):>15.2f}{statistics.median(page_timings):>11.2f}  {plan}")
+        store.close()
+
+def bench_search(args):
+    """
+    Time full-text searches of a synthetic corpus, from rare to very common terms.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        store = _load_store(directory, args.rows, time.time())
+        reader = store._reader()
+
+        def share(text, domain=None):
+            matches = reader.execute("SELECT COUNT(*) FROM analyses_fts WHERE analyses_fts MATCH ?",
+                                     (search_expression(search_words(text), domain),)).fetchone()[0]
+            return matches / args.rows
+
+        # Pick terms found in about 0.1%, 1%, 5% and 30% of the analyses
+        reader.execute("CREATE VIRTUAL TABLE temp.search_terms USING fts5vocab(main, analyses_fts, row)")
+        terms = [(row["doc"] / args.rows, row["term"]) for row in reader.execute("SELECT term, doc FROM search_terms")
+                 if row["term"].isalpha() and row["term"] not in SEARCH_STOPWORDS]
+        picked = [min(terms, key=lambda item: abs(item[0] - target))[1] for target in (0.001, 0.01, 0.05, 0.3)]
+        rare, uncommon, common, frequent = picked
+
+        searches = [
+            (rare, None),
+            (uncommon, None),
+            (common, None),
+            (frequent, None),
+            (f"{uncommon} {common}", None),
+            (f"the {common} and {frequent}", None),
+            (common, "health"),
+            (f"{uncommon} {rare}", "science"),
+        ]
+        repeat = max(1, args.runs) * 10
+        print("=== FULL-TEXT SEARCH (20 results) ===")
+        print(f"{'query':<34}{'domain':<10}{'share':>8}{'median ms':>11}{'p95 ms':>9}  ignored")
+        for text, domain in searches:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = store.search(text, domain=domain, limit=20)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"{text:<34}{domain or '':<10}{share(text, domain):>8.2%}"
+                  f"{statistics.median(timings):>11.2f}{_percentile(timings, 95):>9.2f}  "
+                  f"{' '.join(result['ignoredTerms'])}")
+
+        example = store.search(f"{uncommon} {common}", limit=1)["results"][0]
+        print(f"\nExample snippet: {example['snippet']}")
+        store.close()
+
+def bench_eventlog(args):
+    """
+    Compare the request-thread cost of queued event logging with writing each
+    event synchronously, and check backpressure when the writer falls behind.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    analyses = [{"claim": claim, "verifactScore": {"overallScore": 0.5}} for claim in SAMPLE_STATEMENTS]
+    fields = {"statement": SAMPLE_STATEMENTS[0], "response": "A thoughtful response. " * 40,
+              "claimCount": len(analyses), "analyses": analyses}
+    count = max(1, args.runs) * 10000
+
+    def summarize(name, timings, extra=""):
+        timings = [t * 1_000_000 for t in timings]
+        print(f"{name:<14}{statistics.median(timings):>10.1f}{_percentile(timings, 99):>10.1f}"
+              f"{max(timings):>10.0f}  {extra}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"\n=== EVENT LOG ({count} events, us on the request thread) ===")
+        print(f"{'writer':<14}{'median':>10}{'p99':>10}{'max':>10}")
+
+        path = os.path.join(directory, "sync.ndjson.gz")
+        timings = []
+        with gzip.open(path, 'ab') as f:
+            for _ in range(count):
+                start = time.perf_counter()
+                f.write((json.dumps({"type": "conversation", **fields}) + "\n").encode('utf-8'))
+                f.flush()
+                timings.append(time.perf_counter() - start)
+        summarize("synchronous", timings)
+
+        log = EventLog(os.path.join(directory, "queued"), queue_size=count)
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            log.emit("conversation", **fields)
+            timings.append(time.perf_counter() - start)
+        log.close(timeout=60)
+        written = sum(1 for name in os.listdir(log.directory)
+                      for _ in read_events(os.path.join(log.directory, name)))
+        summarize("queued", timings, f"{written} written, {log.dropped} dropped")
+
+        # A queue much smaller than the burst: emit must drop rather than wait
+        log = EventLog(os.path.join(directory, "small"), queue_size=100)
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            log.emit("conversation", **fields)
+            timings.append(time.perf_counter() - start)
+        log.close(timeout=60)
+        summarize("queue of 100", timings, f"{log.dropped} dropped")
+
+def bench_logging(args):
+    """
+    Compare the cost of a log call on the calling thread with synchronous
+    handlers and with the queued logging pipeline.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    import queue
+
+    count = max(1, args.runs) * 10000
+    claim = SAMPLE_STATEMENTS[0]
+    text_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    with tempfile.TemporaryDirectory() as directory:
+        def run(name, handlers, lazy, listener=None):
+            bench_logger = logging.getLogger(f"bench.{name}")
+            bench_logger.propagate = False
+            bench_logger.setLevel(logging.INFO)
+            for handler in handlers:
+                bench_logger.addHandler(handler)
+            if listener is not None:
+                listener.start()
+
+            timings = []
+            for index in range(count):
+                # A new request every 10 records, as in a real request
+                with request_scope():
+                    start = time.perf_counter()
+                    if lazy:
+                        bench_logger.info("Completed empirical analysis for claim: %s...", claim[:50])
+                    else:
+                        bench_logger.info(f"Completed empirical analysis for claim: {claim[:50]}...")
+                    timings.append((time.perf_counter() - start) * 1_000_000)
+
+            if listener is not None:
+                listener.stop()
+            for handler in handlers:
+                handler.close()
+            print(f"{name:<26}{statistics.median(timings):>10.1f}{_percentile(timings, 99):>10.1f}")
+
+        def sync_handlers(name):
+            file_handler = RotatingFileHandler(os.path.join(directory, f"{name}.log"), maxBytes=10485760, backupCount=5)
+            file_handler.setFormatter(text_format)
+            console_handler = logging.StreamHandler(open(os.devnull, 'w'))
+            console_handler.setFormatter(text_format)
+            return [console_handler, file_handler]
+
+        def queued(name, sample_rate=1.0):
+            file_handler = RotatingFileHandler(os.path.join(directory, f"{name}.log"), maxBytes=10485760, backupCount=5)
+            file_handler.setFormatter(JsonFormatter())
+            console_handler = logging.StreamHandler(open(os.devnull, 'w'))
+            console_handler.setFormatter(text_format)
+            queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=count))
+            queue_handler.addFilter(RequestContextFilter())
+            if sample_rate < 1.0:
+                queue_handler.addFilter(SamplingFilter(sample_rate))
+            listener = QueueListener(queue_handler.queue, console_handler, file_handler)
+            return [queue_handler], listener
+
+        print(f"\n=== LOGGING ({count} info records, us on the calling thread) ===")
+        print(f"{'pipeline':<26}{'median':>10}{'p99':>10}")
+        run("synchronous, f-string", sync_handlers("sync"), lazy=False)
+        handlers, listener = queued("queued")
+        run("queued, lazy", handlers, lazy=True, listener=listener)
+        handlers, listener = queued("sampled", sample_rate=0.1)
+        run("queued, lazy, 10% sampled", handlers, lazy=True, listener=listener)
+
+def bench_serving(args):
+    """
+    Compare a burst of concurrent requests served by four sync workers, as with
+    `gunicorn -w 4`, and by one event loop running the async pipeline.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    count = args.concurrency
+    statements = [SAMPLE_STATEMENTS[i % len(SAMPLE_STATEMENTS)] for i in range(count)]
+    pipeline = AnalysisPipeline(MockBackend(latency_scale=args.latency_scale))
+
+    def summarize(name, latencies, wall):
+        print(f"{name:<22}{wall:>9.2f}{count / wall:>10.1f}"
+              f"{statistics.median(latencies):>9.2f}{_percentile(latencies, 95):>9.2f}")
+
+    print(f"\n=== SERVING ({count} concurrent requests, mock latency x{args.latency_scale}) ===")
+    print(f"{'mode':<22}{'wall s':>9}{'req/s':>10}{'p50 s':>9}{'p95 s':>9}")
+
+    # Every request arrives at once; its latency includes the wait for a free worker
+    start = time.perf_counter()
+
+    def serve(statement):
+        pipeline.analyze(statement, [], "standard")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=4) as workers:
+        latencies = list(workers.map(serve, statements))
+    summarize("sync, 4 workers", latencies, time.perf_counter() - start)
+
+    async def serve_async(statement):
+        await pipeline.analyze_async(statement, [], "standard")
+        return time.perf_counter() - start
+
+    async def burst():
+        return await asyncio.gather(*(serve_async(statement) for statement in statements))
+
+    start = time.perf_counter()
+    latencies = asyncio.run(burst())
+    summarize("async, 1 event loop", latencies, time.perf_counter() - start)
+
+def bench_packing(args):
+    """
+    Compare arbiter calls that carry one claim with packs of several claims:
+    model calls, tokens and cost per claim, the latency of one pack, and the
+    claims per second analyzed by four concurrent calls.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    claims = [
+        f"{sentence.strip()} (case {run + 1})"
+        for run in range(args.runs)
+        for statement in SAMPLE_STATEMENTS
+        for sentence in statement.split(".") if len(sentence.strip()) > 10
+    ]
+    recorder = RecordingBackend(_make_backend(args))
+    arbiters = [EmpiricalArbiter(recorder), LogicalArbiter(recorder), PragmaticArbiter(recorder)]
+
+    print(f"\n=== CLAIM PACKING ({args.backend} backend, {len(claims)} claims x 3 arbiters) ===")
+    print(f"{'pack':<6}{'calls':>7}{'in tok/claim':>14}{'out tok/claim':>15}{'cost $/claim':>14}"
+          f"{'pack p50 s':>12}{'claims/s':>10}")
+
+    for pack_size in (int(size) for size in args.pack_sizes.split(",")):
+        packs = [claims[start:start + pack_size] for start in range(0, len(claims), pack_size)]
+        recorder.calls = []
+        latencies = []
+
+        def run(pack):
+            start = time.perf_counter()
+            for arbiter in arbiters:
+                arbiter.analyze_many(pack, pack_size=pack_size)
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=4) as workers:
+            list(workers.map(run, packs))
+        wall = time.perf_counter() - start
+
+        # A stream's usage is known once it has been read
+        responses = [response for _, response in recorder.calls]
+        prompt_tokens = sum(r.prompt_tokens for r in responses)
+        output_tokens = sum(r.output_tokens for r in responses)
+        cost = sum(estimate_cost(r.model_name, r.prompt_tokens, r.output_tokens) for r in responses)
+        print(f"{pack_size:<6}{len(responses):>7}{prompt_tokens / len(claims):>14.0f}"
+              f"{output_tokens / len(claims):>15.0f}{cost / len(claims):>14.5f}"
+              f"{statistics.median(latencies):>12.2f}{len(claims) / wall:>10.1f}")
+
+# Runs in a fresh interpreter: argv is the backend directory, the mode and the worker count
+STARTUP_PROBE = """
+import os, sys, json, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+mode, workers = sys.argv[2], int(sys.argv[3])
+
+def report(**values):
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    values.update(rss=fields["Rss"], private=fields["Private_Clean"] + fields["Private_Dirty"])
+    # One write per line, so lines from forked workers do not interleave
+    os.write(1, (json.dumps(values) + "\\n").encode())
+
+def ready(app):
+    app.load_sdk()
+    app.analysis_pipeline.build_components()
+
+import app
+if mode == "eager":
+    # Before the imports were deferred, all of this happened when app was imported
+    ready(app)
+    report(**{"import": time.perf_counter() - start, "ready": time.perf_counter() - start})
+elif mode == "lazy":
+    report(**{"import": time.perf_counter() - start})
+else:
+    app.preload()
+    report(**{"import": time.perf_counter() - start})
+    children = []
+    for _ in range(workers):
+        forked = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            ready(app)
+            report(ready=time.perf_counter() - forked)
+            os._exit(0)
+        children.append(pid)
+    for pid in children:
+        os.waitpid(pid, 0)
+"""
+
+def bench_startup(args):
+    """
+    Measure import time and memory per worker process, importing the app
+    as a worker does without preloading, and forking workers from a master
+    that imported it and called preload().
+
+    "eager" builds the model SDK and every component at import, as the app did
+    before they were deferred. Memory is read from /proc/self/smaps_rollup, so
+    this benchmark needs Linux; "private" is the memory a worker does not share.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    backend_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+    env = dict(os.environ, MODEL_BACKEND="gemini", GEMINI_API_KEY="benchmark", LOG_LEVEL="WARNING")
+
+    def probe(mode):
+        samples = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, "-c", STARTUP_PROBE, backend_dir, mode, str(args.workers)],
+                env=env, capture_output=True, text=True, check=True
+            ).stdout
+            samples.append([json.loads(line) for line in output.splitlines() if line.startswith("{")])
+        return samples
+
+    def median(samples, key):
+        values = [value for sample in samples for value in [sample.get(key)] if value is not None]
+        return statistics.median(values) if values else None
+
+    def cell(value, width, fmt):
+        return f"{'-':>{width}}" if value is None else f"{value:>{width}{fmt}}"
+
+    def row(name, import_s, ready_s, rss, private, total):
+        print(f"{name:<26}{cell(import_s, 9, '.3f')}{cell(ready_s, 9, '.3f')}"
+              f"{cell(rss, 9, '.1f')}{cell(private, 11, '.1f')}{cell(total, 12, '.1f')}")
+
+    print(f"\n=== STARTUP ({args.workers} workers, median of {args.runs} runs) ===")
+    print(f"{'process':<26}{'import s':>9}{'ready s':>9}{'RSS MB':>9}{'private MB':>11}{'total MB':>12}")
+    for mode, name in (("eager", "worker, eager (before)"), ("lazy", "worker, lazy import")):
+        samples = [sample[0] for sample in probe(mode)]
+        rss = median(samples, "rss")
+        row(name, median(samples, "import"), median(samples, "ready"), rss, median(samples, "private"),
+            rss * args.workers)
+
+    runs = probe("preload")
+    masters = [run[0] for run in runs]
+    workers = [worker for run in runs for worker in run[1:]]
+    master_rss = median(masters, "rss")
+    worker_private = median(workers, "private")
+    row("preload master", median(masters, "import"), None, master_rss, median(masters, "private"), None)
+    row("forked worker", None, median(workers, "ready"), median(workers, "rss"), worker_private,
+        master_rss + worker_private * args.workers)
+
+BENCHMARKS = {
+    "depth": bench_depth,
+    "streaming": bench_streaming,
+    "parsing": bench_parsing,
+    "schema": bench_schema,
+    "integration": bench_integration,
+    "lexicon": bench_lexicon,
+    "store": bench_store,
+    "search": bench_search,
+    "eventlog": bench_eventlog,
+    "logging": bench_logging,
+    "serving": bench_serving,
+    "startup": bench_startup,
+    "packing": bench_packing,
+}
+
+def main(argv=None):
+    """Parse arguments and run the selected benchmark."""
+    parser = argparse.ArgumentParser(description="Belief Explorer benchmark suite")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--runs", type=int, default=3, help="Repetitions per sample")
+    parser.add_argument("--backend", choices=["mock", "gemini"], default="mock")
+    parser.add_argument("--latency-scale", type=float, default=0.1,
+                        help="Multiplier for simulated mock latency")
+    parser.add_argument("--format-error-rate", type=float, default=0.1,
+                        help="Share of unconstrained mock answers that ignore the format")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows loaded by the store and search benchmarks")
+    parser.add_argument("--concurrency", type=int, default=100, help="Concurrent requests in the serving benchmark")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes in the startup benchmark")
+    parser.add_argument("--pack-sizes", default="1,2,3,5,8", help="Claims per arbiter call in the packing benchmark")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    BENCHMARKS[args.benchmark](args)
+
+if __name__ == "__main__":
+    main()
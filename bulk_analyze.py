@@ -0,0 +1,73 @@
+"""
+Bulk analysis script for the Belief Explorer.
+
+Runs the analysis pipeline over a JSONL or CSV file of statements and writes the
+results as JSONL while they finish. Interrupted runs resume from their checkpoint
+when started again with the same arguments; statements that failed are retried.
+
+    python tests/bulk_analyze.py statements.jsonl results.jsonl --depth fast
+    python tests/bulk_analyze.py statements.csv results.jsonl --workers 16 --rate 5
+    python tests/bulk_analyze.py statements.jsonl results.jsonl --processes --workers 4
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models.bulk_analyzer import BulkAnalyzer
+from backend.utils.depth_profiles import DEFAULT_DEPTH, DEPTH_PROFILES
+
+def _duration(seconds):
+    """Format seconds as a short duration, such as 1h02m or 3m05s."""
+    if seconds is None:
+        return "--"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+def main(argv=None):
+    """Parse arguments and analyze the statements."""
+    parser = argparse.ArgumentParser(description="Analyze a file of statements with the Belief Explorer")
+    parser.add_argument("source", help="JSONL or CSV file of statements")
+    parser.add_argument("output", help="Where to write the results (JSONL)")
+    parser.add_argument("--depth", choices=list(DEPTH_PROFILES), default=DEFAULT_DEPTH,
+                        help="Depth of statements that do not give one")
+    parser.add_argument("--workers", type=int, default=4, help="Statements analyzed at once")
+    parser.add_argument("--processes", action="store_true", help="Use worker processes instead of threads")
+    parser.add_argument("--rate", type=float, help="Most statements started per second (default: no limit)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: OUTPUT.checkpoint)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    analyzer = BulkAnalyzer(
+        args.source,
+        args.output,
+        depth=args.depth,
+        workers=args.workers,
+        processes=args.processes,
+        rate=args.rate,
+        checkpoint_path=args.checkpoint
+    )
+    start = time.perf_counter()
+
+    def progress(stats):
+        finished = stats["skipped"] + stats["done"] + stats["failed"]
+        print(f"\r{finished / max(1, stats['total']):6.1%}  {finished}/{stats['total']} "
+              f"({stats['failed']} failed)  {stats['rate']:.2f}/s  ETA {_duration(stats['eta'])}   ",
+              end="", flush=True)
+
+    summary = analyzer.run(progress=progress)
+    print(f"\nAnalyzed {summary['analyzed']} statements in {time.perf_counter() - start:.1f} s "
+          f"({summary['skipped']} done earlier, {summary['failed']} failed) -> {summary['output']}")
+    if summary["failed"]:
+        print(f"Failures are listed in {summary['errors']}; run the same command again to retry them")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Bulk Analyzer module for the Belief Explorer.
+
+This module runs the analysis pipeline over a file of statements (JSONL or CSV)
+with a pool of worker threads or processes, at a limited rate. Results are
+appended to a JSONL file as they finish, so the output itself records which
+statements are done, and an interrupted run resumes without analyzing them again.
+"""
+
+import os
+import csv
+import json
+import time
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from models.analysis_pipeline import AnalysisPipeline
+from utils.depth_profiles import DEFAULT_DEPTH, DEPTH_PROFILES, normalize_depth
+from utils.request_context import request_scope
+
+logger = logging.getLogger(__name__)
+
+def prepare_item(row, default_depth):
+    """
+    Turn a row of the statements file into an item to analyze.
+
+    Args:
+        row: The parsed row: a dict, or a bare statement string
+        default_depth (str): The depth of items that do not give one
+
+    Returns:
+        tuple: The item (a dict, its depth normalized) and the reason it cannot
+            be analyzed, or None
+    """
+    if isinstance(row, str):
+        row = {"statement": row}
+    if not isinstance(row, dict):
+        return {}, f"Expected an object or a string, got {type(row).__name__}"
+    item = dict(row)
+    depth = normalize_depth(item.get("depth") or default_depth)
+    if depth is None:
+        return item, f"Unknown depth '{item['depth']}'"
+    item["depth"] = depth
+    if not isinstance(item.get("statement"), str) or not item["statement"].strip():
+        return item, "No statement"
+    if item.get("history") is not None and not isinstance(item["history"], list):
+        return item, "History must be a list of turns"
+    return item, None
+
+def read_statements(path, default_depth=DEFAULT_DEPTH):
+    """
+    Read the statements to analyze.
+
+    A JSONL file holds one object per line with a "statement" and, optionally,
+    an "id", a "depth" and a "history"; a line may also be a bare JSON string.
+    A CSV file needs a "statement" column and may have "id" and "depth" columns.
+    Rows that cannot be analyzed are yielded with the reason, so one bad row
+    does not stop a run.
+
+    Args:
+        path (str): The JSONL or CSV file
+        default_depth (str, optional): The depth of items that do not give one
+
+    Yields:
+        tuple: The item's index in the file, the item (a dict) and the reason
+            it cannot be analyzed, or None
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (line for line in f if line.strip())
+        for index, row in enumerate(rows):
+            if isinstance(row, str):
+                try:
+                    row = json.loads(row)
+                except ValueError as e:
+                    yield index, {}, f"Invalid JSON: {e}"
+                    continue
+            item, error = prepare_item(row, default_depth)
+            yield index, item, error
+
+_pipeline = None
+
+def _process_init():
+    """Worker process initializer: build a pipeline for this process."""
+    global _pipeline
+    _pipeline = AnalysisPipeline()
+
+def analyze_item(item, default_depth, pipeline=None):
+    """
+    Analyze one item as batch work.
+
+    Args:
+        item (dict): The statement and its optional id, depth and history
+        default_depth (str): The depth of items that do not give one
+        pipeline (AnalysisPipeline, optional): The pipeline. Defaults to this
+            worker process's pipeline.
+
+    Returns:
+        dict: The analysis result
+
+    Raises:
+        ValueError: If the item cannot be analyzed, such as for an unknown depth
+    """
+    item, error = prepare_item(item, default_depth)
+    if error is not None:
+        raise ValueError(error)
+    pipeline = pipeline or _pipeline
+    with request_scope(priority="batch"):
+        return pipeline.analyze(item["statement"], item.get("history") or [], item["depth"])
+
+class RateLimiter:
+    """
+    Spaces out calls to an average rate, allowing short bursts.
+    """
+
+    def __init__(self, rate, burst=1):
+        """
+        Initialize the RateLimiter.
+
+        Args:
+            rate (float): Calls per second
+            burst (int, optional): Calls that may be made at once after an idle spell
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait until a call may be made."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if delay:
+            time.sleep(delay)
+
+class BulkAnalyzer:
+    """
+    Analyzes a file of statements into a JSONL results file.
+    """
+
+    def __init__(self, source_path, output_path, depth=DEFAULT_DEPTH, workers=4, processes=False,
+                 rate=None, checkpoint_path=None):
+        """
+        Initialize the BulkAnalyzer.
+
+        Args:
+            source_path (str): The JSONL or CSV file of statements
+            output_path (str): Where the results are written, one JSON object per line
+            depth (str, optional): The depth of items that do not give one
+            workers (int, optional): Statements analyzed at once
+            processes (bool, optional): Use worker processes instead of threads
+            rate (float, optional): Most statements started per second (default: no limit)
+            checkpoint_path (str, optional): Progress file. Defaults to the
+                output path with ".checkpoint" appended.
+
+        Raises:
+            ValueError: If the depth tier is not known
+        """
+        if depth not in DEPTH_PROFILES:
+            raise ValueError(f"Unknown depth '{depth}'")
+        self.source_path = source_path
+        self.output_path = output_path
+        self.errors_path = f"{output_path}.errors"
+        self.depth = depth
+        self.workers = workers
+        self.processes = processes
+        self.rate_limiter = RateLimiter(rate, burst=workers) if rate else None
+        self.checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+
+    def _load_checkpoint(self):
+        """Load the checkpoint of an earlier run of the same job, if any."""
+        if not os.path.exists(self.checkpoint_path) or not os.path.exists(self.output_path):
+            return None
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable checkpoint: %s", e)
+            return None
+
+        if checkpoint.get("source") != os.path.abspath(self.source_path) or checkpoint.get("depth") != self.depth:
+            logger.warning("Checkpoint belongs to a different job; starting over")
+            return None
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint):
+        """Write the checkpoint atomically."""
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _finished_items(self):
+        """
+        Read the indexes of the items already in the output.
+
+        A partial last line, left by a crash, is cut off.
+
+        Returns:
+            set: The indexes of the finished items
+        """
+        finished = set()
+        with open(self.output_path, 'r+b') as f:
+            size = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    finished.add(json.loads(line)["index"])
+                except (ValueError, KeyError, TypeError):
+                    break
+                size += len(line)
+            f.truncate(size)
+        return finished
+
+    def _executor(self):
+        """Create the worker pool."""
+        if self.processes:
+            return ProcessPoolExecutor(self.workers, initializer=_process_init)
+        return ThreadPoolExecutor(self.workers, thread_name_prefix="bulk-analyzer")
+
+    def run(self, progress=None):
+        """
+        Analyze the statements, resuming from the checkpoint if there is one.
+
+        Args:
+            progress (callable, optional): Called with a dict of "total", "done",
+                "failed", "skipped" (finished by an earlier run), "rate" (per second)
+                and "eta" (seconds) after each statement
+
+        Returns:
+            dict: Totals of the run
+        """
+        total = sum(1 for _ in read_statements(self.source_path, self.depth))
+        checkpoint = self._load_checkpoint()
+        if checkpoint is None:
+            checkpoint = {"source": os.path.abspath(self.source_path), "depth": self.depth, "total": total}
+            open(self.output_path, 'w').close()
+            self._save_checkpoint(checkpoint)
+            finished = set()
+        else:
+            finished = self._finished_items()
+            logger.info("Resuming bulk analysis with %s of %s statements done", len(finished), total)
+
+        pipeline = None if self.processes else AnalysisPipeline()
+        stats = {"total": total, "done": 0, "failed": 0, "skipped": len(finished), "rate": 0.0, "eta": None}
+        start = time.perf_counter()
+        last_sync = start
+
+        with open(self.output_path, 'ab') as output, open(self.errors_path, 'w', encoding='utf-8') as errors, \
+                self._executor() as executor:
+            pending = {}
+            items = (entry for entry in read_statements(self.source_path, self.depth) if entry[0] not in finished)
+
+            def submit():
+                for index, item, error in items:
+                    if error is not None:
+                        # A bad row is listed with the failures instead of stopping the run
+                        logger.error("Statement %s cannot be analyzed: %s", index, error)
+                        errors.write(json.dumps({"index": index, "id": item.get("id"),
+                                                 "statement": item.get("statement"), "error": error}) + "\n")
+                        stats["failed"] += 1
+                        continue
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.acquire()
+                    future = executor.submit(analyze_item, item, self.depth, pipeline)
+                    pending[future] = (index, item)
+                    return True
+                return False
+
+            # Keep a bounded number of statements in flight
+            while len(pending) < self.workers * 2 and submit():
+                pass
+            while pending:
+                completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    index, item = pending.pop(future)
+                    record = {"index": index, "id": item.get("id"), "statement": item["statement"],
+                              "depth": item["depth"]}
+                    try:
+                        record["result"] = future.result()
+                    except Exception as e:
+                        record["error"] = f"{type(e).__name__}: {e}"
+                    else:
+                        degraded = record["result"].get("Metadata", {}).get("degraded")
+                        if degraded:
+                            fallbacks = ", ".join(record["result"]["Metadata"].get("fallbacks", []))
+                            record["error"] = f"Degraded result ({degraded}: {fallbacks})"
+                    if "error" in record:
+                        # Failed and degraded statements are not marked done, so the next run retries them
+                        logger.error("Statement %s failed: %s", index, record["error"])
+                        errors.write(json.dumps(record) + "\n")
+                        stats["failed"] += 1
+                    else:
+                        output.write((json.dumps(record) + "\n").encode('utf-8'))
+                        stats["done"] += 1
+
+                now = time.perf_counter()
+                output.flush()
+                if now - last_sync >= 1.0:
+                    os.fsync(output.fileno())
+                    last_sync = now
+                processed = stats["done"] + stats["failed"]
+                stats["rate"] = processed / max(now - start, 1e-9)
+                remaining = total - stats["skipped"] - processed
+                stats["eta"] = remaining / stats["rate"] if stats["rate"] else None
+                if progress is not None:
+                    progress(dict(stats))
+                while len(pending) < self.workers * 2 and submit():
+                    pass
+
+            os.fsync(output.fileno())
+
+        if not stats["failed"]:
+            os.remove(self.errors_path)
+            os.remove(self.checkpoint_path)
+        logger.info("Analyzed %s statements (%s failed) in %.1f s", stats["done"], stats["failed"],
+                    time.perf_counter() - start)
+        return {
+            "total": total,
+            "analyzed": stats["done"],
+            "failed": stats["failed"],
+            "skipped": stats["skipped"],
+            "seconds": round(time.perf_counter() - start, 3),
+            "output": self.output_path,
+            "errors": self.errors_path if stats["failed"] else None
+        }
@@ -0,0 +1,64 @@
+"""
+Shared harness for the Belief Explorer behavior test scripts.
+
+Each test script groups its checks into functions that return their number of
+failures, and hands them to run_checks:
+
+    from checks import check, run_checks
+
+    def check_something():
+        return check("something holds", compute() == expected)
+
+    if __name__ == "__main__":
+        run_checks(check_something)
+"""
+
+import sys
+import asyncio
+import inspect
+import tempfile
+import functools
+
+def check(name, ok):
+    """
+    Print the outcome of a check.
+
+    Args:
+        name (str): What the check verifies
+        ok (bool): Whether it held
+
+    Returns:
+        int: 1 if the check failed, else 0
+    """
+    print(f"{'ok  ' if ok else 'FAIL'} {name}")
+    return 0 if ok else 1
+
+def in_directory(group):
+    """
+    Give a group of checks a scratch directory, removed once the group has run.
+
+    Args:
+        group (callable): A function taking the directory path
+
+    Returns:
+        callable: The group, taking no arguments
+    """
+    @functools.wraps(group)
+    def run():
+        with tempfile.TemporaryDirectory() as directory:
+            return group(directory)
+    return run
+
+def run_checks(*groups):
+    """
+    Run groups of checks and exit with a non-zero status if any failed.
+
+    Args:
+        *groups (callable): Functions, or coroutine functions, that take no
+            arguments and return their number of failed checks
+    """
+    failures = 0
+    for group in groups:
+        failures += asyncio.run(group()) if inspect.iscoroutinefunction(group) else group()
+    print(f"{failures} failed check(s)" if failures else "All checks passed")
+    sys.exit(1 if failures else 0)
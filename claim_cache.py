@@ -0,0 +1,107 @@
+"""
+Claim cache utilities for the Belief Explorer backend.
+
+Keeps the raw arbiter outputs of recently analyzed claims in memory, keyed by
+the normalized claim and the analysis depth, so a repeated claim is integrated
+from them instead of being sent to the three arbiters again. The cache is
+bounded (least recently used entries are evicted) and entries expire after a
+maximum age. A warm-up fills it from the analysis store's most requested claims.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from utils.analysis_store import claim_hash
+from utils.metrics import metrics
+
+class ClaimCache:
+    """
+    Thread-safe LRU cache of arbiter outputs per claim and depth.
+    """
+
+    def __init__(self, max_entries=1000, max_age=86400.0):
+        """
+        Initialize the ClaimCache.
+
+        Args:
+            max_entries (int, optional): Entries kept before the least recently used is evicted
+            max_age (float, optional): Seconds an entry is served after the analysis was made
+        """
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, claim, depth):
+        """
+        Look up the arbiter outputs of a claim.
+
+        Args:
+            claim (str): The claim
+            depth (str): The analysis depth tier
+
+        Returns:
+            tuple or None: The empirical, logical and pragmatic analyses, or None on a miss
+        """
+        key = (claim_hash(claim), depth)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.max_age:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        metrics.inc("claim_cache_lookups_total", result="hit" if entry is not None else "miss", depth=depth)
+        return entry[1] if entry is not None else None
+
+    def put(self, claim, depth, empirical_analysis, logical_analysis, pragmatic_analysis, created_at=None):
+        """
+        Keep the arbiter outputs of a claim.
+
+        Args:
+            claim (str): The claim
+            depth (str): The analysis depth tier
+            empirical_analysis (dict): Output of the Empirical Arbiter
+            logical_analysis (dict): Output of the Logical Arbiter
+            pragmatic_analysis (dict): Output of the Pragmatic Arbiter
+            created_at (float, optional): Epoch time of the analysis. Defaults to now.
+        """
+        key = (claim_hash(claim), depth)
+        created_at = created_at if created_at is not None else time.time()
+        with self._lock:
+            self._entries[key] = (created_at, (empirical_analysis, logical_analysis, pragmatic_analysis))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            metrics.set_gauge("claim_cache_entries", len(self._entries))
+
+_claim_cache = None
+_claim_cache_configured = False
+_claim_cache_lock = threading.Lock()
+
+def get_claim_cache():
+    """
+    Get the shared claim cache for this process.
+
+    CLAIM_CACHE_SIZE sets the number of entries (1000 by default; 0 turns the
+    cache off) and CLAIM_CACHE_MAX_AGE the seconds an entry is served (one day
+    by default). The settings are read once.
+
+    Returns:
+        ClaimCache or None: The cache, or None when it is off
+    """
+    global _claim_cache, _claim_cache_configured
+    if _claim_cache_configured:
+        return _claim_cache
+    with _claim_cache_lock:
+        if not _claim_cache_configured:
+            size = int(os.environ.get('CLAIM_CACHE_SIZE', 1000))
+            if size > 0:
+                _claim_cache = ClaimCache(size, float(os.environ.get('CLAIM_CACHE_MAX_AGE', 86400)))
+            _claim_cache_configured = True
+    return _claim_cache
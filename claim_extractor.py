@@ -5,8 +5,12 @@ This module is responsible for extracting claims from user statements.
 """
 
 import logging
-import google.generativeai as genai
-from utils.config import get_gemini_api_key
+from utils.config import get_default_model
+from utils.depth_profiles import apply_stage_profile
+from utils.model_backend import get_backend
+from utils.response_parser import CLAIMS_SCHEMA, parse_claims
+from utils.structured_output import with_response_schema
+from utils.tracing import annotate
 
 logger = logging.getLogger(__name__)
 
@@ -15,106 +19,125 @@ class ClaimExtractor:
     Extracts claims from user statements using Gemini 2.5 Pro.
     """
     
-    def __init__(self):
-        """Initialize the ClaimExtractor with Gemini API."""
-        self.api_key = get_gemini_api_key()
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
-        else:
+    # Schema for constrained JSON output from the model service
+    RESPONSE_SCHEMA = CLAIMS_SCHEMA
+    
+    def __init__(self, backend=None):
+        """
+        Initialize the ClaimExtractor with a model backend.
+        
+        Args:
+            backend (optional): The model backend to use. Defaults to the shared backend.
+        """
+        self.backend = backend or get_backend()
+        if not self.backend.available:
             logger.error("No Gemini API key found. ClaimExtractor will not function.")
         
         # Configure the model
-        self.model_name = "models/gemini-2.5-pro"
-        self.generation_config = {
+        self.model_name = get_default_model()
+        self.generation_config = with_response_schema({
             "temperature": 0.2,  # Low temperature for more deterministic outputs
             "top_p": 0.8,
             "top_k": 40,
             "max_output_tokens": 1024,
-        }
+        }, self.RESPONSE_SCHEMA)
     
-    def extract_claims(self, statement):
+    def extract_claims(self, statement, stage_profile=None):
         """
         Extract claims from a user statement.
         
         Args:
             statement (str): The user's statement or belief
+            stage_profile (dict, optional): Model overrides for this call
             
         Returns:
             list: A list of extracted claims as strings
         """
-        if not statement or not self.api_key:
+        if not statement or not self.backend.available:
             return []
         
         try:
-            # Create the prompt for claim extraction
-            prompt = f"""
-            Extract the main claims or beliefs from the following statement. 
-            Focus on extracting clear, specific claims that can be analyzed.
-            If multiple claims are present, extract up to 3 of the most significant ones.
-            If no clear claims are present, extract the main point as a claim.
-            
-            Statement: "{statement}"
-            
-            Output the claims as a Python list of strings, with the most significant claim first.
-            Example output format: ["Main claim here", "Secondary claim here"]
-            """
-            
-            # Generate response from Gemini
-            model = genai.GenerativeModel(
-                model_name=self.model_name,
-                generation_config=self.generation_config
-            )
-            
-            response = model.generate_content(prompt)
-            
-            # Process the response to extract the claims list
-            response_text = response.text
-            
-            # Extract the list from the response
-            claims = self._parse_claims_from_response(response_text)
-            
-            logger.info(f"Extracted {len(claims)} claims from statement")
-            return claims
-            
+            response = self.backend.generate_content(**self._request(statement, stage_profile))
+            return self._accept(response.text)
         except Exception as e:
-            logger.error(f"Error extracting claims: {str(e)}", exc_info=True)
-            
-            # Fallback to simple extraction if API fails
-            return self._fallback_extraction(statement)
+            return self._fail(statement, e)
     
-    def _parse_claims_from_response(self, response_text):
+    async def extract_claims_async(self, statement, stage_profile=None):
         """
-        Parse claims from the model's response text.
+        Extract claims from a user statement without blocking the event loop.
         
         Args:
-            response_text (str): The raw response from the model
+            statement (str): The user's statement or belief
+            stage_profile (dict, optional): Model overrides for this call
             
         Returns:
-            list: A list of extracted claims
+            list: A list of extracted claims as strings
         """
+        if not statement or not self.backend.available:
+            return []
+        
         try:
-            # Try to find a list-like structure in the response
-            if "[" in response_text and "]" in response_text:
-                list_text = response_text[response_text.find("["):response_text.rfind("]")+1]
-                # Safely evaluate the string as a Python list
-                claims = eval(list_text)
-                if isinstance(claims, list) and all(isinstance(item, str) for item in claims):
-                    return claims
-            
-            # If we can't parse a list, try to extract claims line by line
-            lines = [line.strip() for line in response_text.split("\n") if line.strip()]
-            claims = []
-            for line in lines:
-                # Remove common prefixes like numbers, dashes, etc.
-                clean_line = line.lstrip("0123456789.- *\"'")
-                if clean_line and len(clean_line) > 10:  # Minimum length for a claim
-                    claims.append(clean_line)
+            response = await self.backend.generate_content_async(**self._request(statement, stage_profile))
+            return self._accept(response.text)
+        except Exception as e:
+            return self._fail(statement, e)
+    
+    def _request(self, statement, stage_profile=None):
+        """
+        Build the model call that extracts a statement's claims.
+        
+        Args:
+            statement (str): The user's statement or belief
+            stage_profile (dict, optional): Model overrides for this call
             
-            return claims[:3]  # Return up to 3 claims
+        Returns:
+            dict: The prompt, model name, generation config and stage of the call
+        """
+        model_name, generation_config = apply_stage_profile(
+            self.model_name, self.generation_config, stage_profile
+        )
+        return {
+            "prompt": self._build_prompt(statement),
+            "model_name": model_name,
+            "generation_config": generation_config,
+            "stage": "claims"
+        }
+    
+    def _accept(self, response_text):
+        """Extract the claims list from the model's answer without evaluating it."""
+        claims = parse_claims(response_text)
+        annotate(parse="ok")
+        logger.info("Extracted %s claims from statement", len(claims))
+        return claims
+    
+    def _fail(self, statement, error):
+        """Log a failed extraction and fall back to simple extraction."""
+        logger.error("Error extracting claims: %s", error, exc_info=True)
+        annotate(parse="fallback", error=type(error).__name__)
+        return self._fallback_extraction(statement)
+    
+    def _build_prompt(self, statement):
+        """
+        Build the claim extraction prompt for a statement.
+        
+        Args:
+            statement (str): The user's statement or belief
             
-        except Exception as e:
-            logger.error(f"Error parsing claims from response: {str(e)}", exc_info=True)
-            return []
+        Returns:
+            str: The prompt
+        """
+        return f"""
+        Extract the main claims or beliefs from the following statement. 
+        Focus on extracting clear, specific claims that can be analyzed.
+        If multiple claims are present, extract up to 3 of the most significant ones.
+        If the statement makes no claim of its own, such as a plain answer to a question
+        or an agreement with something said earlier, output an empty list: []
+        
+        Statement: "{statement}"
+        
+        Output the claims as a Python list of strings, with the most significant claim first.
+        Example output format: ["Main claim here", "Secondary claim here"]
+        """
     
     def _fallback_extraction(self, statement):
         """
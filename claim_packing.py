@@ -0,0 +1,202 @@
+"""
+Claim packing utilities for the Belief Explorer backend.
+
+An arbiter can analyze several claims in one model call: the claims are
+numbered in a single prompt, so the long instructions are sent once, and the
+model answers with an array of analyses keyed by claim number. The array is
+split back into one analysis per claim. A claim whose analysis is missing or
+unreadable is analyzed again on its own, and if the whole answer cannot be
+parsed every claim of the pack is.
+"""
+
+import asyncio
+import logging
+from utils.depth_profiles import apply_stage_profile
+from utils.metrics import metrics
+from utils.response_parser import validate_analysis
+from utils.structured_output import parse_json_stream, parse_json_stream_async, with_response_schema
+from utils.tracing import annotate
+
+logger = logging.getLogger(__name__)
+
+# Key of the claim number in each analysis of a packed answer
+CLAIM_ID = "claimId"
+
+def packed_schema(schema):
+    """
+    Build the response schema of a packed answer from an arbiter's schema.
+
+    Args:
+        schema (dict): The schema of one analysis
+
+    Returns:
+        dict: The schema of an array of analyses, each with its claim number
+    """
+    return {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": dict(schema["properties"], **{CLAIM_ID: {"type": "integer"}}),
+            "required": [CLAIM_ID, *schema["required"]],
+        },
+        "min_items": 1,
+    }
+
+def number_claims(claims):
+    """
+    List claims for a packed prompt, numbered from 1.
+
+    Args:
+        claims (list): The claims
+
+    Returns:
+        str: One '[n] "claim"' line per claim
+    """
+    return "\n".join(f'[{number}] "{claim}"' for number, claim in enumerate(claims, 1))
+
+def packed_config(generation_config, schema, count):
+    """
+    Adapt an arbiter's generation settings to a pack of claims.
+
+    Args:
+        generation_config (dict): The settings for one claim, after the stage profile
+        schema (dict): The schema of one analysis
+        count (int): The number of claims in the pack
+
+    Returns:
+        dict: A new generation config with the packed schema and room for every analysis
+    """
+    config = dict(generation_config)
+    config.pop("response_schema", None)
+    config.pop("response_mime_type", None)
+    config["max_output_tokens"] = config.get("max_output_tokens", 1024) * count
+    return with_response_schema(config, packed_schema(schema))
+
+def split_packed(items, count, kind):
+    """
+    Split a packed answer into one analysis per claim.
+
+    Args:
+        items (list): The parsed answer
+        count (int): The number of claims in the pack
+        kind (str): "empirical", "logical" or "pragmatic"
+
+    Returns:
+        list: The validated analysis of each claim, or None where it is missing,
+            repeated or unreadable
+    """
+    analyses = [None] * count
+    seen = set()
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        number = item.pop(CLAIM_ID, None)
+        if isinstance(number, bool) or not isinstance(number, int) or not 1 <= number <= count:
+            continue
+        if number in seen:
+            # Two answers for one claim; trust neither
+            analyses[number - 1] = None
+            continue
+        seen.add(number)
+        try:
+            analyses[number - 1] = validate_analysis(item, kind)
+        except ValueError:
+            pass
+    return analyses
+
+def _packs(claims, pack_size):
+    """Split claims into packs of at most pack_size."""
+    pack_size = max(1, pack_size or len(claims))
+    return [claims[start:start + pack_size] for start in range(0, len(claims), pack_size)]
+
+def _record(kind, analyses):
+    """Count a pack's outcome and the claims that fall back to their own calls."""
+    missing = sum(analysis is None for analysis in analyses)
+    result = "ok" if not missing else "failed" if missing == len(analyses) else "partial"
+    metrics.inc("claim_pack_total", stage=kind, result=result)
+    if missing:
+        metrics.inc("claim_pack_fallback_claims_total", missing, stage=kind)
+        logger.warning("Packed %s analysis left %s of %s claims unanswered", kind, missing, len(analyses))
+    annotate(pack=len(analyses), packFallbacks=missing)
+
+def _request(arbiter, kind, pack, stage_profile=None):
+    """Build the model call that analyzes a pack of claims."""
+    model_name, generation_config = apply_stage_profile(arbiter.model_name, arbiter.generation_config, stage_profile)
+    return {
+        "prompt": arbiter._build_packed_prompt(pack),
+        "model_name": model_name,
+        "generation_config": packed_config(generation_config, arbiter.RESPONSE_SCHEMA, len(pack)),
+        "stage": kind
+    }
+
+def _fail(kind, pack, error):
+    """Log a failed packed call; every claim of the pack falls back to its own call."""
+    logger.error("Error in packed %s analysis: %s", kind, error, exc_info=True)
+    return [None] * len(pack)
+
+def analyze_packed(arbiter, kind, claims, stage_profile=None, pack_size=None):
+    """
+    Analyze claims with an arbiter, several claims per model call.
+
+    Args:
+        arbiter: The arbiter, with analyze, _build_packed_prompt, backend,
+            model_name, generation_config and RESPONSE_SCHEMA
+        kind (str): "empirical", "logical" or "pragmatic"; also the call's stage
+        claims (list): The claims to analyze
+        stage_profile (dict, optional): Model overrides for the calls
+        pack_size (int, optional): Most claims per call (default: all of them)
+
+    Returns:
+        list: The analysis of each claim, in order
+    """
+    results = []
+    for pack in _packs(claims, pack_size):
+        if len(pack) == 1 or not arbiter.backend.available:
+            results.extend(arbiter.analyze(claim, stage_profile=stage_profile) for claim in pack)
+            continue
+        try:
+            stream = arbiter.backend.generate_content_stream(**_request(arbiter, kind, pack, stage_profile))
+            analyses = split_packed(parse_json_stream(stream, expect="array"), len(pack), kind)
+        except Exception as e:
+            analyses = _fail(kind, pack, e)
+        _record(kind, analyses)
+        results.extend(
+            analysis if analysis is not None else arbiter.analyze(claim, stage_profile=stage_profile)
+            for claim, analysis in zip(pack, analyses)
+        )
+    return results
+
+async def analyze_packed_async(arbiter, kind, claims, stage_profile=None, pack_size=None):
+    """
+    Analyze claims with an arbiter, several claims per model call, without
+    blocking the event loop. The packs and any fallback calls run concurrently.
+
+    Args:
+        arbiter: The arbiter, with analyze_async, _build_packed_prompt, backend,
+            model_name, generation_config and RESPONSE_SCHEMA
+        kind (str): "empirical", "logical" or "pragmatic"; also the call's stage
+        claims (list): The claims to analyze
+        stage_profile (dict, optional): Model overrides for the calls
+        pack_size (int, optional): Most claims per call (default: all of them)
+
+    Returns:
+        list: The analysis of each claim, in order
+    """
+    async def run_pack(pack):
+        if len(pack) == 1 or not arbiter.backend.available:
+            return await asyncio.gather(*(arbiter.analyze_async(claim, stage_profile=stage_profile)
+                                          for claim in pack))
+        try:
+            stream = await arbiter.backend.generate_content_stream_async(**_request(arbiter, kind, pack, stage_profile))
+            analyses = split_packed(await parse_json_stream_async(stream, expect="array"), len(pack), kind)
+        except Exception as e:
+            analyses = _fail(kind, pack, e)
+        _record(kind, analyses)
+
+        async def resolve(claim, analysis):
+            return analysis if analysis is not None else await arbiter.analyze_async(claim, stage_profile=stage_profile)
+
+        return await asyncio.gather(*(resolve(claim, analysis) for claim, analysis in zip(pack, analyses)))
+
+    packs = await asyncio.gather(*(run_pack(pack) for pack in _packs(claims, pack_size)))
+    return [analysis for pack in packs for analysis in pack]
@@ -3,24 +3,48 @@ Configuration utilities for the Belief Explorer backend.
 """
 
 import os
+import queue
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueListener, RotatingFileHandler
+from utils.logging_pipeline import JsonFormatter, NonBlockingQueueHandler, RequestContextFilter, SamplingFilter
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_log_listener = None
 
 def configure_logging():
-    """Configure logging for the application."""
+    """
+    Configure logging for the application.
+
+    The root logger gets a single non-blocking queue handler; the console and
+    rotating file handlers run on a background listener thread. The log file is
+    written as JSON lines. Calling this again has no effect.
+
+    Environment variables:
+        LOG_LEVEL: Root log level (default INFO)
+        LOG_FORMAT: "text" (default) or "json" for the console
+        LOG_SAMPLE_RATE: Share of requests whose info logs are kept (default 1.0)
+        LOG_QUEUE_SIZE: Records buffered before new ones are dropped (default 10000)
+    """
+    global _log_listener
+    logger = logging.getLogger()
+    if _log_listener is not None:
+        return logger
+
     # Create logs directory if it doesn't exist
     log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs')
     os.makedirs(log_dir, exist_ok=True)
     
     # Configure root logger
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
+    logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
     
     # Create console handler
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(console_format)
+    if os.environ.get('LOG_FORMAT', 'text').lower() == 'json':
+        console_handler.setFormatter(JsonFormatter())
+    else:
+        console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
     
     # Create file handler
     file_handler = RotatingFileHandler(
@@ -28,19 +52,54 @@ def configure_logging():
         maxBytes=10485760,  # 10MB
         backupCount=5
     )
-    file_handler.setLevel(logging.INFO)
-    file_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(file_format)
+    file_handler.setFormatter(JsonFormatter())
+    
+    # Records are queued on the calling thread and handled on the listener thread
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=int(os.environ.get('LOG_QUEUE_SIZE', 10000))))
+    queue_handler.addFilter(RequestContextFilter())
+    sample_rate = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+    if sample_rate < 1.0:
+        queue_handler.addFilter(SamplingFilter(sample_rate))
     
-    # Add handlers to logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    _log_listener = QueueListener(queue_handler.queue, console_handler, file_handler, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    
+    logger.addHandler(queue_handler)
+    
+    # A preloading server configures logging in the master and then forks
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_restart_log_listener)
     
     return logger
 
+def _restart_log_listener():
+    """
+    Give a forked worker its own log queue and listener thread.
+
+    Only the forking thread is copied into the child, so the parent's listener
+    is not running there, and the parent's queue may be left locked.
+    """
+    global _log_listener
+    parent_listener = _log_listener
+    atexit.unregister(parent_listener.stop)
+    
+    log_queue = queue.Queue(maxsize=parent_listener.queue.maxsize)
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            handler.queue = log_queue
+    
+    _log_listener = QueueListener(log_queue, *parent_listener.handlers, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
 def get_gemini_api_key():
     """Get the Gemini API key from environment variables."""
     api_key = os.environ.get('GEMINI_API_KEY')
     if not api_key:
         logging.warning("GEMINI_API_KEY not found in environment variables")
     return api_key
+
+def get_default_model():
+    """Get the default Gemini model name from environment variables."""
+    return os.environ.get('GEMINI_MODEL', 'models/gemini-2.5-pro')
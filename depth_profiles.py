@@ -0,0 +1,105 @@
+"""
+Depth profile utilities for the Belief Explorer backend.
+
+An analysis depth tier ("fast", "standard" or "deep") maps each pipeline stage
+to a model choice and token limit, decides which stages run, and sets how many
+extracted claims are analyzed.
+"""
+
+PRO_MODEL = "models/gemini-2.5-pro"
+FLASH_MODEL = "models/gemini-2.5-flash"
+
+STAGES = ("claims", "empirical", "logical", "pragmatic", "perspectives", "response")
+
+DEFAULT_DEPTH = "standard"
+
+# A stage set to None is skipped. An empty dict keeps the component's own settings.
+DEPTH_PROFILES = {
+    "fast": {
+        "description": "Quick take: flash model, short outputs, no perspectives",
+        "max_claims": 1,
+        "stages": {
+            "claims": {"model_name": FLASH_MODEL, "max_output_tokens": 256},
+            "empirical": {"model_name": FLASH_MODEL, "max_output_tokens": 512},
+            "logical": {"model_name": FLASH_MODEL, "max_output_tokens": 512},
+            "pragmatic": {"model_name": FLASH_MODEL, "max_output_tokens": 512},
+            "perspectives": None,
+            "response": {"model_name": FLASH_MODEL, "max_output_tokens": 256},
+        },
+    },
+    "standard": {
+        "description": "Default analysis of the primary claim with every stage",
+        "max_claims": 1,
+        "stages": {stage: {} for stage in STAGES},
+    },
+    "deep": {
+        "description": "Thorough analysis of every extracted claim with longer outputs",
+        "max_claims": 3,
+        "stages": {
+            "claims": {"model_name": PRO_MODEL, "max_output_tokens": 1024},
+            "empirical": {"model_name": PRO_MODEL, "max_output_tokens": 2048},
+            "logical": {"model_name": PRO_MODEL, "max_output_tokens": 2048},
+            "pragmatic": {"model_name": PRO_MODEL, "max_output_tokens": 2048},
+            "perspectives": {"model_name": PRO_MODEL, "max_output_tokens": 2048},
+            "response": {"model_name": PRO_MODEL, "max_output_tokens": 1024},
+        },
+    },
+}
+
+def normalize_depth(depth=None):
+    """
+    Normalize a depth tier name as a request sends it. Case is ignored.
+
+    Args:
+        depth (str, optional): The tier name. Defaults to DEFAULT_DEPTH.
+
+    Returns:
+        str or None: The tier name in lower case, or None if it is not a known tier
+    """
+    if depth is None:
+        return DEFAULT_DEPTH
+    if not isinstance(depth, str) or depth.lower() not in DEPTH_PROFILES:
+        return None
+    return depth.lower()
+
+def get_depth_profile(depth=None):
+    """
+    Look up the profile for an analysis depth tier.
+
+    Args:
+        depth (str, optional): The tier name. Defaults to DEFAULT_DEPTH.
+
+    Returns:
+        dict: The depth profile
+
+    Raises:
+        ValueError: If the tier is not known
+    """
+    name = normalize_depth(depth or DEFAULT_DEPTH)
+    if name is None:
+        raise ValueError(f"Unknown depth '{depth}'. Expected one of: {', '.join(DEPTH_PROFILES)}")
+    return DEPTH_PROFILES[name]
+
+def apply_stage_profile(model_name, generation_config, stage_profile=None):
+    """
+    Apply a stage profile's overrides to a component's model settings.
+
+    Args:
+        model_name (str): The component's default model
+        generation_config (dict): The component's default generation settings
+        stage_profile (dict, optional): Overrides for "model_name" and any
+            generation setting such as "max_output_tokens"
+
+    Returns:
+        tuple: The model name and a new generation config dict
+    """
+    config = dict(generation_config)
+    if not stage_profile:
+        return model_name, config
+
+    for key, value in stage_profile.items():
+        if key == "model_name":
+            model_name = value
+        else:
+            config[key] = value
+    return model_name, config
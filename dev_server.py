@@ -5,24 +5,22 @@ This script sets up a proxy server to simulate the backend API during frontend d
 """
 
 import os
+import re
 import sys
 import json
 import logging
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, g, request, jsonify, send_from_directory
 from flask_cors import CORS
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import backend components
-from backend.models.claim_extractor import ClaimExtractor
-from backend.arbiters.empirical_arbiter import EmpiricalArbiter
-from backend.arbiters.logical_arbiter import LogicalArbiter
-from backend.arbiters.pragmatic_arbiter import PragmaticArbiter
-from backend.models.analysis_integrator import AnalysisIntegrator
-from backend.models.perspective_generator import PerspectiveGenerator
-from backend.models.response_generator import ResponseGenerator
+from backend.models.analysis_pipeline import AnalysisPipeline
 from backend.utils.config import configure_logging
+from backend.utils.depth_profiles import DEFAULT_DEPTH, DEPTH_PROFILES
+from backend.utils.request_context import request_scope, tenant_for_key
+from backend.utils.tracing import start_span
 
 # Configure logging
 configure_logging()
@@ -33,13 +31,18 @@ app = Flask(__name__, static_folder='../static')
 CORS(app)  # Enable CORS for all routes
 
 # Initialize components
-claim_extractor = ClaimExtractor()
-empirical_arbiter = EmpiricalArbiter()
-logical_arbiter = LogicalArbiter()
-pragmatic_arbiter = PragmaticArbiter()
-analysis_integrator = AnalysisIntegrator()
-perspective_generator = PerspectiveGenerator()
-response_generator = ResponseGenerator()
+analysis_pipeline = AnalysisPipeline()
+
+# A caller-supplied trace id is reused when it has the W3C/OTLP form
+TRACE_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+@app.after_request
+def add_trace_header(response):
+    """Return the trace id of an analysis request in the X-Trace-Id header."""
+    trace_id = g.get('trace_id')
+    if trace_id:
+        response.headers['X-Trace-Id'] = trace_id
+    return response
 
 @app.route('/')
 def index():
@@ -57,7 +60,8 @@ def analyze_belief():
         "history": [
             {"role": "assistant", "content": "Previous assistant message"},
             {"role": "user", "content": "Previous user message"}
-        ]
+        ],
+        "depth": "fast" | "standard" | "deep"  (optional, defaults to "standard")
     }
     
     Returns:
@@ -66,72 +70,47 @@ def analyze_belief():
         "AnalysisJSON": "[{...analysis data...}]"
     }
     """
-    try:
-        # Get request data
-        data = request.json
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
-        
-        user_statement = data.get('statement')
-        conversation_history = data.get('history', [])
-        
-        if not user_statement:
-            return jsonify({"error": "No statement provided"}), 400
+    # Every log record and span of the request carries its id, which is also the trace id
+    trace_id = request.headers.get('X-Trace-Id', '').lower()
+    tenant = tenant_for_key(request.headers.get('X-API-Key'))
+    with request_scope(trace_id if TRACE_ID_PATTERN.match(trace_id) else None, tenant) as context, \
+            start_span("POST /api/analyze", context.request_id):
+        g.trace_id = context.request_id
+        try:
+            # Get request data
+            data = request.json
+            if not data:
+                return jsonify({"error": "No data provided"}), 400
+            
+            user_statement = data.get('statement')
+            conversation_history = data.get('history', [])
+            
+            if not user_statement:
+                return jsonify({"error": "No statement provided"}), 400
+            
+            depth = data.get('depth', DEFAULT_DEPTH)
+            if not isinstance(depth, str) or depth not in DEPTH_PROFILES:
+                return jsonify({
+                    "error": f"Unknown depth '{depth}'",
+                    "depths": list(DEPTH_PROFILES)
+                }), 400
+            
+            logger.info("Received statement for analysis: %s...", user_statement[:50])
+            
+            # Run the multi-arbiter pipeline at the requested depth
+            result = analysis_pipeline.analyze(user_statement, conversation_history, depth)
+            if isinstance(result["AnalysisJSON"], list):
+                result["AnalysisJSON"] = json.dumps(result["AnalysisJSON"])
+            
+            logger.info("Analysis completed successfully")
+            return jsonify(result)
         
-        logger.info(f"Received statement for analysis: {user_statement[:50]}...")
-        
-        # Extract claims from the statement
-        claims = claim_extractor.extract_claims(user_statement)
-        
-        if not claims:
-            logger.warning("No claims extracted from statement")
+        except Exception as e:
+            logger.error("Error processing request: %s", e, exc_info=True)
             return jsonify({
-                "Response": "I couldn't identify a specific claim to analyze in your statement. Could you rephrase it as a more specific belief or claim?",
-                "AnalysisJSON": "[]"
-            })
-        
-        # Analyze the primary claim with each arbiter
-        primary_claim = claims[0]
-        logger.info(f"Analyzing primary claim: {primary_claim}")
-        
-        empirical_analysis = empirical_arbiter.analyze(primary_claim)
-        logical_analysis = logical_arbiter.analyze(primary_claim)
-        pragmatic_analysis = pragmatic_arbiter.analyze(primary_claim)
-        
-        # Integrate the analyses
-        integrated_analysis = analysis_integrator.integrate(
-            primary_claim,
-            empirical_analysis,
-            logical_analysis,
-            pragmatic_analysis
-        )
-        
-        # Generate perspectives
-        perspectives = perspective_generator.generate_perspectives(primary_claim)
-        integrated_analysis['perspectives'] = perspectives
-        
-        # Generate response
-        response = response_generator.generate_response(
-            primary_claim,
-            integrated_analysis,
-            conversation_history
-        )
-        
-        # Prepare final output
-        result = {
-            "Response": response,
-            "AnalysisJSON": json.dumps([integrated_analysis])
-        }
-        
-        logger.info("Analysis completed successfully")
-        return jsonify(result)
-    
-    except Exception as e:
-        logger.error(f"Error processing request: {str(e)}", exc_info=True)
-        return jsonify({
-            "error": "An error occurred while processing your request",
-            "details": str(e)
-        }), 500
+                "error": "An error occurred while processing your request",
+                "details": str(e)
+            }), 500
 
 if __name__ == '__main__':
     # Get port from environment or use default
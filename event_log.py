@@ -0,0 +1,318 @@
+"""
+Event log utilities for the Belief Explorer backend.
+
+Writes structured conversation events (the statement, the response, summary
+scores and the analyses) as gzip-compressed NDJSON segments. Events are queued
+and written in batches by a background thread, so request threads never wait
+on disk; when the queue is full, events are dropped and counted. Segments are
+rotated by size and age, and a segment is only given its final name once it is
+complete.
+"""
+
+import os
+import gzip
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".ndjson.gz"
+
+def _average(values):
+    """Return the mean of a list of numbers, or None if it is empty."""
+    return round(sum(values) / len(values), 4) if values else None
+
+def conversation_event(statement, result, depth=None, conversation_history=None, duration=None):
+    """
+    Build the event logged for one analyzed statement.
+
+    The summary fields mirror the columns of the original conversation log sheet.
+
+    Args:
+        statement (str): The user's statement
+        result (dict): The pipeline result ("Response", "AnalysisJSON", "Metadata")
+        depth (str, optional): The analysis depth tier
+        conversation_history (list, optional): Previous conversation turns
+        duration (float, optional): Seconds the analysis took
+
+    Returns:
+        dict: The event fields
+    """
+    analyses = result.get("AnalysisJSON")
+    if not isinstance(analyses, list):
+        analyses = []
+
+    scores = {"verifact": [], "modelDiversity": [], "contextualSensitivity": [], "reflectiveIndex": []}
+    for analysis in analyses:
+        verifact_score = analysis.get("verifactScore") or {}
+        components = verifact_score.get("components") or {}
+        for name, value in (("verifact", verifact_score.get("overallScore")),
+                            ("modelDiversity", components.get("modelDiversity")),
+                            ("contextualSensitivity", components.get("contextualSensitivity")),
+                            ("reflectiveIndex", components.get("reflectiveIndex"))):
+            if isinstance(value, (int, float)):
+                scores[name].append(value)
+
+    metadata = result.get("Metadata") or {}
+    return {
+        "requestId": metadata.get("requestId"),
+        "depth": depth,
+        "statement": statement,
+        "response": result.get("Response"),
+        "historyLength": len(conversation_history or []),
+        "claimCount": len(analyses),
+        "avgVerifactScore": _average(scores["verifact"]),
+        "avgModelDiversity": _average(scores["modelDiversity"]),
+        "avgContextualSensitivity": _average(scores["contextualSensitivity"]),
+        "avgReflectiveIndex": _average(scores["reflectiveIndex"]),
+        "durationSeconds": round(duration, 3) if duration is not None else None,
+        # Copies, so the request can go on changing its result while the event waits to be written
+        "routing": list(metadata.get("routing", [])),
+        "usage": dict(metadata["usage"]) if metadata.get("usage") else None,
+        "analyses": list(analyses)
+    }
+
+class EventLog:
+    """
+    Asynchronous, batched writer of compressed NDJSON event segments.
+    """
+
+    def __init__(self, directory, queue_size=10000, batch_size=200, flush_interval=1.0,
+                 max_segment_bytes=64 * 1024 * 1024, max_segment_seconds=3600):
+        """
+        Initialize the EventLog and start its writer thread.
+
+        Args:
+            directory (str): Directory the segments are written to
+            queue_size (int, optional): Pending events kept before new ones are dropped
+            batch_size (int, optional): Maximum events written at once
+            flush_interval (float, optional): Seconds a partial batch waits for more events
+            max_segment_bytes (int, optional): Uncompressed bytes after which a segment is rotated
+            max_segment_seconds (float, optional): Age after which a segment is rotated
+        """
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_seconds = max_segment_seconds
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._segment = None
+        self._segment_path = None
+        self._segment_bytes = 0
+        self._segment_opened = 0.0
+        self._segment_count = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._writer = threading.Thread(target=self._write_loop, name="event-log-writer", daemon=True)
+        self._writer.start()
+
+    def emit(self, event_type, **fields):
+        """
+        Queue an event without blocking. When the queue is full the event is dropped.
+
+        Args:
+            event_type (str): The kind of event, such as "conversation"
+            **fields: The event fields; they are serialized on the writer thread
+
+        Returns:
+            bool: Whether the event was queued
+        """
+        if self._closed:
+            return False
+        event = {"ts": datetime.now(timezone.utc).isoformat(), "type": event_type}
+        event.update(fields)
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            metrics.inc("event_log_dropped_total", type=event_type)
+            return False
+        return True
+
+    def _write_loop(self):
+        """Write queued events in batches until the log is closed."""
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # Let an idle segment rotate on age
+                self._rotate_if_due()
+                continue
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                # The writer must outlive a bad batch, or every later event is dropped
+                metrics.inc("event_log_write_errors_total")
+                logger.error("Could not write a batch of %s events: %s", len(batch), e, exc_info=True)
+                for item in batch:
+                    if isinstance(item, threading.Event):
+                        item.set()
+            if stop:
+                break
+        self._close_segment()
+
+    def _write_batch(self, batch):
+        """Serialize a batch of events and append it to the current segment."""
+        flushes = [item for item in batch if isinstance(item, threading.Event)]
+        events = [item for item in batch if not isinstance(item, threading.Event)]
+        start = time.perf_counter()
+
+        lines = []
+        for event in events:
+            try:
+                lines.append(json.dumps(event, default=str))
+            except Exception as e:
+                # Anything, such as a field changed while it was serialized, costs only its own event
+                metrics.inc("event_log_write_errors_total")
+                logger.warning("Could not serialize a %s event: %s", event.get('type'), e)
+
+        if lines:
+            data = ("\n".join(lines) + "\n").encode('utf-8')
+            try:
+                self._rotate_if_due()
+                if self._segment is None:
+                    self._open_segment()
+                self._segment.write(data)
+                # A sync flush keeps the segment readable up to here if the process dies
+                self._segment.flush()
+                self._segment_bytes += len(data)
+                metrics.inc("event_log_events_total", len(lines))
+            except OSError as e:
+                metrics.inc("event_log_write_errors_total")
+                logger.error("Could not write %s events to the event log: %s", len(lines), e)
+                self._close_segment()
+
+        metrics.observe("event_log_batch_seconds", time.perf_counter() - start)
+        metrics.set_gauge("event_log_queue_depth", self._queue.qsize())
+        for done in flushes:
+            done.set()
+
+    def _open_segment(self):
+        """Open a new segment file."""
+        self._segment_count += 1
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        name = f"events-{stamp}-{os.getpid()}-{self._segment_count}{SEGMENT_SUFFIX}"
+        self._segment_path = os.path.join(self.directory, name)
+        self._segment = gzip.open(f"{self._segment_path}.part", 'ab')
+        self._segment_bytes = 0
+        self._segment_opened = time.monotonic()
+
+    def _close_segment(self):
+        """Close the current segment and give it its final name."""
+        if self._segment is None:
+            return
+        try:
+            self._segment.close()
+            os.replace(f"{self._segment_path}.part", self._segment_path)
+        except OSError as e:
+            logger.error("Could not close event log segment %s: %s", self._segment_path, e)
+        self._segment = None
+
+    def _rotate_if_due(self):
+        """Close the current segment if it is too large or too old."""
+        if self._segment is None:
+            return
+        if (self._segment_bytes >= self.max_segment_bytes
+                or time.monotonic() - self._segment_opened >= self.max_segment_seconds):
+            self._close_segment()
+            metrics.inc("event_log_rotations_total")
+
+    def flush(self, timeout=10.0):
+        """
+        Wait until the events queued so far have been written.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait
+
+        Returns:
+            bool: Whether the events were written in time
+        """
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=10.0):
+        """
+        Stop accepting events, write the queued ones and close the segment.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait for the writer
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout)
+
+def read_events(path):
+    """
+    Read the events of a segment, including one that is still being written.
+
+    Args:
+        path (str): Path of the segment
+
+    Yields:
+        dict: The events
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                if line.endswith("\n"):
+                    yield json.loads(line)
+        except EOFError:
+            # The writer has not closed this segment yet
+            return
+
+_event_log = None
+_event_log_lock = threading.Lock()
+
+def get_event_log():
+    """
+    Get the shared event log for this process.
+
+    Returns:
+        EventLog or None: The event log writing to EVENT_LOG_DIR, or None when
+            event logging is not configured
+    """
+    global _event_log
+    directory = os.environ.get('EVENT_LOG_DIR')
+    if not directory:
+        return None
+    with _event_log_lock:
+        if _event_log is None:
+            _event_log = EventLog(
+                directory,
+                max_segment_bytes=int(os.environ.get('EVENT_LOG_MAX_SEGMENT_MB', 64)) * 1024 * 1024,
+                max_segment_seconds=float(os.environ.get('EVENT_LOG_MAX_SEGMENT_SECONDS', 3600))
+            )
+            atexit.register(_event_log.close)
+    return _event_log
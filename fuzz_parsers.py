@@ -0,0 +1,179 @@
+"""
+Fuzz test script for the Belief Explorer response parsers.
+
+This script checks the seed corpus against its expected outcomes, then mutates
+every corpus entry (truncation, stray braces and quotes, duplication, deep
+nesting) and checks that the parsers only ever fail with ValueError and that
+parse time stays linear in the input size.
+
+    python tests/fuzz_parsers.py --iterations 2000
+    python tests/fuzz_parsers.py --recorded recorded_responses.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.utils.response_parser import (
+    extract_json_array,
+    extract_json_object,
+    has_perspective_objects,
+    parse_claims,
+    validate_analysis,
+    validate_perspectives,
+)
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parser_corpus.json')
+
+# Slowest acceptable parse, in microseconds per input character
+MAX_MICROSECONDS_PER_CHAR = 50.0
+
+def load_corpus(recorded_path=None):
+    """
+    Load the seed corpus and, optionally, responses recorded with RESPONSE_RECORD_PATH.
+
+    Args:
+        recorded_path (str, optional): Path to a JSONL file of recorded responses
+
+    Returns:
+        list: Corpus entries with "stage", "text" and, for seeds, "expect"
+    """
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        entries = json.load(f)["entries"]
+
+    if recorded_path:
+        with open(recorded_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    entries.append({"stage": record.get("stage"), "text": record.get("text", "")})
+    return entries
+
+def parse_for_stage(stage, text):
+    """
+    Run the parser a component would use for a stage.
+
+    Args:
+        stage (str): The pipeline stage
+        text (str): The response text
+
+    Returns:
+        The validated result
+    """
+    if stage == "claims":
+        return parse_claims(text)
+    if stage == "perspectives":
+        return validate_perspectives(extract_json_array(text, accept=has_perspective_objects))
+    return validate_analysis(extract_json_object(text), stage)
+
+def check_seeds(entries):
+    """
+    Check that each seed entry parses, or fails, as expected.
+
+    Args:
+        entries (list): Corpus entries
+
+    Returns:
+        int: Number of failed checks
+    """
+    failures = 0
+    for index, entry in enumerate(entries):
+        expect = entry.get("expect")
+        if expect is None:
+            continue
+        try:
+            result = parse_for_stage(entry["stage"], entry["text"])
+            ok = expect != "error" and bool(result)
+        except ValueError:
+            ok = expect == "error"
+        if not ok:
+            failures += 1
+            print(f"Seed {index} ({entry['stage']}) did not produce expected outcome '{expect}'")
+    return failures
+
+def mutate(text, rng):
+    """
+    Apply a random mutation to a response text.
+
+    Args:
+        text (str): The original text
+        rng (random.Random): Random number generator
+
+    Returns:
+        str: The mutated text
+    """
+    choice = rng.randrange(7)
+    if not text:
+        return text
+    if choice == 0:
+        return text[:rng.randrange(len(text))]
+    if choice == 1:
+        pos = rng.randrange(len(text))
+        return text[:pos] + rng.choice("{}[]\"'\\,:") + text[pos:]
+    if choice == 2:
+        pos = rng.randrange(len(text))
+        return text[:pos] + text[pos + 1:]
+    if choice == 3:
+        return rng.choice("{[") * rng.randrange(1, 5000) + text
+    if choice == 4:
+        return text + rng.choice(["{", "[", "\"", "'", "\\"]) * rng.randrange(1, 5000)
+    if choice == 5:
+        return text * rng.randrange(2, 20)
+    return "".join(rng.choice("{}[]\"' ,:a\\") for _ in range(rng.randrange(1, 2000)))
+
+def fuzz(entries, iterations, seed):
+    """
+    Fuzz the parsers with mutated corpus entries.
+
+    Args:
+        entries (list): Corpus entries
+        iterations (int): Number of mutated inputs to try
+        seed (int): Random seed
+
+    Returns:
+        int: Number of failures
+    """
+    rng = random.Random(seed)
+    failures = 0
+    slowest = 0.0
+    for _ in range(iterations):
+        entry = rng.choice(entries)
+        text = mutate(entry["text"], rng)
+        for stage in ("claims", "empirical", "logical", "pragmatic", "perspectives"):
+            start = time.perf_counter()
+            try:
+                parse_for_stage(stage, text)
+            except ValueError:
+                pass
+            except Exception as e:
+                failures += 1
+                print(f"Unexpected {type(e).__name__} for stage {stage}: {text[:80]!r}")
+            elapsed = (time.perf_counter() - start) * 1_000_000 / max(1, len(text))
+            slowest = max(slowest, elapsed)
+            if elapsed > MAX_MICROSECONDS_PER_CHAR and len(text) > 1000:
+                failures += 1
+                print(f"Slow parse ({elapsed:.1f} us/char, {len(text)} chars) for stage {stage}")
+
+    print(f"Fuzzed {iterations} inputs, slowest parse {slowest:.2f} us/char, {failures} failures")
+    return failures
+
+def main(argv=None):
+    """Run the seed checks and the fuzzer."""
+    parser = argparse.ArgumentParser(description="Fuzz the Belief Explorer response parsers")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--recorded", help="JSONL file of responses recorded with RESPONSE_RECORD_PATH")
+    args = parser.parse_args(argv)
+
+    entries = load_corpus(args.recorded)
+    failures = check_seeds(entries) + fuzz(entries, args.iterations, args.seed)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Gunicorn settings for the Belief Explorer backend.
+
+    gunicorn -c gunicorn.conf.py run:app
+
+The app is imported once in the master process and the workers are forked from
+it, so they share its modules and read-only state instead of each importing them.
+"""
+
+import os
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+# Threaded workers, so the admission controller sees the excess requests and sheds
+# them; keep threads at or above ADMISSION_MAX_LIMIT + ADMISSION_QUEUE_SIZE
+threads = int(os.environ.get('WORKER_THREADS', 32))
+preload_app = True
+
+def on_starting(server):
+    """Give this server's workers a fresh directory to share their metrics through."""
+    from backend.utils.metrics import prepare_metrics_dir
+    prepare_metrics_dir(os.environ.get('METRICS_DIR') or os.path.join(
+        tempfile.gettempdir(), f"belief_explorer_metrics_{os.environ.get('PORT', 5000)}"))
+
+def when_ready(server):
+    """Build the shared read-only state after the app is loaded and before the workers are forked."""
+    from backend.app import preload
+    preload()
+
+def post_fork(server, worker):
+    """Warm up each worker; /readyz answers 503 until it has finished."""
+    from backend.app import start_warm_up
+    start_warm_up()
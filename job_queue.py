@@ -0,0 +1,548 @@
+"""
+Job queue utilities for the Belief Explorer backend.
+
+Runs analyses that may outlast a proxy's timeout as jobs: a request queues the
+job and returns its id at once, and the job is run later by a bounded pool of
+worker threads. Jobs are kept in a local SQLite database (WAL mode), so they
+survive restarts, and every worker process serving the app can take them. A
+worker holds a lease on the job it runs and renews it while the job runs; a job
+whose lease lapses, because its process died, is taken up again by another
+worker, up to a maximum number of attempts. Each lease has an owner, so a worker
+that lost its lease can neither renew it nor record the job's outcome. A job that
+fails with a transient error, or returns a degraded result, is queued again after
+an exponential backoff. A finished job can be posted to a configured callback URL.
+"""
+
+import os
+import json
+import time
+import uuid
+import atexit
+import sqlite3
+import logging
+import threading
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    tenant TEXT NOT NULL,
+    status TEXT NOT NULL,
+    statement TEXT NOT NULL,
+    history_json TEXT NOT NULL,
+    depth TEXT NOT NULL,
+    callback INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    lease_until REAL,
+    lease_owner TEXT,
+    not_before REAL,
+    result_json TEXT,
+    error TEXT,
+    callback_status TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+"""
+
+# Columns added after the first release, with their definitions
+ADDED_COLUMNS = {"lease_owner": "TEXT", "not_before": "REAL"}
+
+# Job states; queued and running jobs are pending
+JOB_STATES = ("queued", "running", "done", "failed")
+
+# Buckets for the time jobs wait and run, in seconds
+JOB_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 900.0)
+
+# Errors of a job itself, such as a bad depth, which another attempt would repeat;
+# other errors (timeouts, connection and database errors) are retried
+PERMANENT_ERRORS = (ValueError, TypeError, KeyError, AttributeError)
+
+# Seconds between attempts to deliver a callback
+CALLBACK_BACKOFF = (1.0, 4.0, 15.0)
+
+def _iso(timestamp):
+    """Format an epoch timestamp as ISO 8601, or return None."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp else None
+
+class JobQueue:
+    """
+    SQLite-backed queue of analysis jobs with a pool of worker threads.
+    """
+
+    def __init__(self, path, workers=2, max_queued=1000, lease_seconds=60.0, max_attempts=3,
+                 callback_url=None, callback_timeout=10.0, retention_seconds=7 * 86400.0,
+                 poll_interval=1.0, retry_delay=30.0, max_retry_delay=900.0):
+        """
+        Initialize the JobQueue. Call start to run jobs in this process.
+
+        Args:
+            path (str): Path of the SQLite database file
+            workers (int, optional): Jobs this process runs at once
+            max_queued (int, optional): Queued jobs accepted before new ones are refused
+            lease_seconds (float, optional): Seconds a worker's claim on a job lasts
+                unless renewed; a job is taken up again this long after its process dies
+            max_attempts (int, optional): Times a job is started before it is failed
+            callback_url (str, optional): URL finished jobs are posted to, if they ask
+            callback_timeout (float, optional): Seconds a callback request may take
+            retention_seconds (float, optional): Seconds finished jobs are kept
+            poll_interval (float, optional): Seconds an idle worker waits before
+                looking for jobs queued by other processes
+            retry_delay (float, optional): Seconds before a failed attempt is retried;
+                the delay doubles with each attempt
+            max_retry_delay (float, optional): Longest delay before a retry
+        """
+        self.path = path
+        self.workers = workers
+        self.max_queued = max_queued
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.callback_url = callback_url
+        self.callback_timeout = callback_timeout
+        self.retention_seconds = retention_seconds
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        # Job id to the lease owner this process claimed it as
+        self._running = {}
+        self._threads = []
+        self._last_purge = 0.0
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        columns = {row["name"] for row in connection.execute("PRAGMA table_info(jobs)")}
+        for column, definition in ADDED_COLUMNS.items():
+            if column not in columns:
+                connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+
+    def _connect(self):
+        """Open a connection configured for WAL mode, with explicit transactions."""
+        connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _connection(self):
+        """Get this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def submit(self, statement, conversation_history=None, depth=None, tenant=None, callback=False):
+        """
+        Queue an analysis job.
+
+        Args:
+            statement (str): The user's statement
+            conversation_history (list, optional): Previous conversation turns
+            depth (str, optional): The analysis depth tier
+            tenant (str, optional): The tenant the job is run for
+            callback (bool, optional): Whether to post the finished job to the callback URL
+
+        Returns:
+            dict or None: The job's status, or None if the queue is full
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            queued = connection.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= self.max_queued:
+                connection.execute("ROLLBACK")
+                metrics.inc("jobs_rejected_total")
+                return None
+            connection.execute(
+                "INSERT INTO jobs (id, tenant, status, statement, history_json, depth, callback, created_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, tenant or "anonymous", statement, json.dumps(conversation_history or []),
+                 depth, int(bool(callback)), now))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        metrics.inc("jobs_submitted_total", depth=depth)
+        metrics.set_gauge("job_queue_depth", queued + 1)
+        self._wakeup.set()
+        return self.get(job_id)
+
+    def get(self, job_id, tenant=None):
+        """
+        Look up a job.
+
+        Args:
+            job_id (str): The job id
+            tenant (str, optional): Only find the job if it belongs to this tenant
+
+        Returns:
+            dict or None: The job's status, with its result once done, or None if
+                there is no such job
+        """
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or (tenant is not None and row["tenant"] != tenant):
+            return None
+        return self._status(row)
+
+    @staticmethod
+    def _status(row):
+        """Build the public status of a job row."""
+        status = {
+            "jobId": row["id"],
+            "status": row["status"],
+            "depth": row["depth"],
+            "attempts": row["attempts"],
+            "createdAt": _iso(row["created_at"]),
+            "startedAt": _iso(row["started_at"]),
+            "finishedAt": _iso(row["finished_at"])
+        }
+        if row["result_json"] is not None:
+            status["result"] = json.loads(row["result_json"])
+        if row["error"] is not None:
+            status["error"] = row["error"]
+        if row["status"] == "queued" and row["not_before"] is not None:
+            status["retryAt"] = _iso(row["not_before"])
+        if row["callback"]:
+            status["callback"] = row["callback_status"] or "pending"
+        return status
+
+    def counts(self):
+        """
+        Count the jobs in each state.
+
+        Returns:
+            dict: State to number of jobs
+        """
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys(JOB_STATES, 0)
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def claim(self):
+        """
+        Take the oldest queued job, or one whose worker's lease has lapsed.
+
+        Returns:
+            sqlite3.Row or None: The job, now running under a lease owned by this
+                claim; its "lease_owner" must be given to finish
+        """
+        connection = self._connection()
+        # The pid tells operators which process holds a job; the random part makes each claim unique
+        owner = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        while True:
+            now = time.time()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT * FROM jobs WHERE (status = 'queued' AND (not_before IS NULL OR not_before <= ?)) "
+                    "OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY created_at LIMIT 1", (now, now)).fetchone()
+                if row is None:
+                    connection.execute("COMMIT")
+                    return None
+                if row["attempts"] >= self.max_attempts:
+                    # Its worker died on every attempt; the job itself is likely the cause
+                    connection.execute(
+                        "UPDATE jobs SET status = 'failed', finished_at = ?, lease_until = NULL, lease_owner = NULL, "
+                        "error = ? WHERE id = ?", (now, f"Abandoned after {row['attempts']} attempts", row["id"]))
+                    connection.execute("COMMIT")
+                    metrics.inc("jobs_finished_total", status="failed")
+                    logger.warning("Job %s was abandoned after %s attempts", row["id"], row["attempts"])
+                    continue
+                connection.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, "
+                    "lease_until = ?, lease_owner = ? WHERE id = ?", (now, now + self.lease_seconds, owner, row["id"]))
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            if row["status"] == "running":
+                metrics.inc("jobs_resumed_total")
+                logger.info("Resuming job %s after its worker's lease lapsed", row["id"])
+            return connection.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+
+    def finish(self, job_id, owner, result=None, error=None):
+        """
+        Record the outcome of a job this process ran.
+
+        Args:
+            job_id (str): The job id
+            owner (str): The lease owner the job was claimed as
+            result (dict, optional): The analysis result
+            error (str, optional): Why the job failed; the job is done if this is None
+
+        Returns:
+            bool: Whether the outcome was recorded. It is dropped if the lease
+                lapsed and another worker has taken the job.
+        """
+        status = "failed" if error is not None else "done"
+        cursor = self._connection().execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, lease_until = NULL, lease_owner = NULL, "
+            "result_json = ?, error = ? WHERE id = ? AND status = 'running' AND lease_owner = ?",
+            (status, time.time(), json.dumps(result) if result is not None else None, error, job_id, owner))
+        if cursor.rowcount == 0:
+            metrics.inc("job_outcomes_dropped_total")
+            logger.warning("Dropping the outcome of job %s: its lease was taken over", job_id)
+            return False
+        metrics.inc("jobs_finished_total", status=status)
+        return True
+
+    def retry_after(self, attempts):
+        """
+        Seconds to wait before the next attempt of a job.
+
+        Args:
+            attempts (int): Attempts the job has had
+
+        Returns:
+            float: The delay, doubling with each attempt up to max_retry_delay
+        """
+        return min(self.max_retry_delay, self.retry_delay * 2 ** max(0, attempts - 1))
+
+    def retry(self, job_id, owner, reason, delay=0.0):
+        """
+        Queue a job this process ran again, keeping why its attempt did not count.
+
+        Args:
+            job_id (str): The job id
+            owner (str): The lease owner the job was claimed as
+            reason (str): Why the job is retried
+            delay (float, optional): Seconds before the job may be claimed again
+
+        Returns:
+            bool: Whether the job was queued again. It is not if the lease lapsed
+                and another worker has taken the job.
+        """
+        cursor = self._connection().execute(
+            "UPDATE jobs SET status = 'queued', lease_until = NULL, lease_owner = NULL, not_before = ?, "
+            "error = ? WHERE id = ? AND status = 'running' AND lease_owner = ?",
+            (time.time() + delay, reason, job_id, owner))
+        if cursor.rowcount == 0:
+            metrics.inc("job_outcomes_dropped_total")
+            logger.warning("Dropping the retry of job %s: its lease was taken over", job_id)
+            return False
+        metrics.inc("jobs_retried_total")
+        return True
+
+    def _renew_leases(self):
+        """Extend the leases this process still owns on the jobs it is running."""
+        with self._lock:
+            running = list(self._running.items())
+        if not running:
+            return
+        connection = self._connection()
+        lease_until = time.time() + self.lease_seconds
+        for job_id, owner in running:
+            cursor = connection.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (lease_until, job_id, owner))
+            if cursor.rowcount == 0:
+                metrics.inc("job_leases_lost_total")
+                logger.warning("Lost the lease on job %s to another worker", job_id)
+
+    def purge(self, older_than=None):
+        """
+        Delete finished jobs.
+
+        Args:
+            older_than (float, optional): Age in seconds of the jobs deleted
+                (default: the retention period)
+
+        Returns:
+            int: The number of jobs deleted
+        """
+        cutoff = time.time() - (self.retention_seconds if older_than is None else older_than)
+        cursor = self._connection().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,))
+        return cursor.rowcount
+
+    def start(self, runner, ready=None):
+        """
+        Start the worker threads of this process. Later calls do nothing.
+
+        Args:
+            runner (callable): Runs a job, given its statement, conversation history,
+                depth, tenant and id, and returns the result
+            ready (callable, optional): Blocks until the process may start running jobs
+        """
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work_loop, args=(runner, ready),
+                                          name=f"job-worker-{index}", daemon=True)
+                self._threads.append(thread)
+            self._threads.append(threading.Thread(target=self._lease_loop, name="job-leases", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=10.0):
+        """
+        Stop taking jobs and wait for the running ones to finish.
+
+        Jobs still running when the timeout passes are taken up again by another
+        worker once their lease lapses.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait for each worker
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _lease_loop(self):
+        """Renew the leases of running jobs until the queue is stopped."""
+        while not self._stopping.wait(self.lease_seconds / 3):
+            try:
+                self._renew_leases()
+            except sqlite3.Error as e:
+                logger.error("Could not renew job leases: %s", e)
+
+    def _work_loop(self, runner, ready):
+        """Take and run jobs until the queue is stopped."""
+        if ready is not None:
+            ready()
+        while not self._stopping.is_set():
+            try:
+                job = self.claim()
+            except sqlite3.Error as e:
+                logger.error("Could not take a job: %s", e)
+                job = None
+            if job is None:
+                self._idle()
+                continue
+            self._run(job, runner)
+
+    def _idle(self):
+        """Wait for a new job, purging old ones now and then."""
+        now = time.time()
+        if now - self._last_purge > 3600:
+            self._last_purge = now
+            try:
+                purged = self.purge()
+                metrics.set_gauge("job_queue_depth", self.counts()["queued"])
+            except sqlite3.Error as e:
+                logger.error("Could not purge finished jobs: %s", e)
+            else:
+                if purged:
+                    logger.info("Purged %s finished jobs", purged)
+        self._wakeup.wait(self.poll_interval)
+        self._wakeup.clear()
+
+    def _run(self, job, runner):
+        """Run a claimed job, record its outcome and deliver its callback."""
+        job_id = job["id"]
+        with self._lock:
+            self._running[job_id] = job["lease_owner"]
+        metrics.observe("job_wait_seconds", job["started_at"] - job["created_at"], buckets=JOB_BUCKETS)
+        start = time.perf_counter()
+        result = error = None
+        retryable = False
+        try:
+            result = runner(job["statement"], json.loads(job["history_json"]), job["depth"],
+                            job["tenant"], job_id)
+        except Exception as e:
+            logger.error("Job %s failed: %s", job_id, e, exc_info=True)
+            error = f"{type(e).__name__}: {e}"
+            retryable = not isinstance(e, PERMANENT_ERRORS)
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+        metrics.observe("job_seconds", time.perf_counter() - start, buckets=JOB_BUCKETS, depth=job["depth"])
+        metadata = result.get("Metadata", {}) if isinstance(result, dict) else {}
+        if metadata.get("degraded"):
+            # A stage fell back to its default output; the job is not done
+            error = f"Degraded result ({metadata['degraded']}: {', '.join(metadata.get('fallbacks', []))})"
+            retryable = True
+            logger.warning("Job %s returned a degraded result on attempt %s", job_id, job["attempts"])
+        try:
+            if retryable and job["attempts"] < self.max_attempts:
+                # Back off, so an outage of the model service does not use up every attempt at once
+                delay = self.retry_after(job["attempts"])
+                if self.retry(job_id, job["lease_owner"], error, delay):
+                    logger.info("Retrying job %s in %.0f s", job_id, delay)
+                return
+            finished = self.finish(job_id, job["lease_owner"], result, error)
+        except sqlite3.Error as e:
+            # The lease lapses and the job runs again
+            logger.error("Could not record the outcome of job %s: %s", job_id, e)
+            return
+        if not finished:
+            # The worker that took the job over records it and posts its callback
+            return
+        if job["callback"] and self.callback_url:
+            self._deliver(job_id)
+
+    def _deliver(self, job_id):
+        """Post a finished job to the callback URL, retrying with backoff."""
+        body = json.dumps(self.get(job_id)).encode('utf-8')
+        outcome = "failed"
+        for attempt, delay in enumerate((0.0,) + CALLBACK_BACKOFF):
+            if delay and self._stopping.wait(delay):
+                break
+            request = urllib.request.Request(self.callback_url, data=body, method="POST",
+                                             headers={"Content-Type": "application/json",
+                                                      "X-Job-Id": job_id})
+            try:
+                with urllib.request.urlopen(request, timeout=self.callback_timeout) as response:
+                    response.read()
+                outcome = "delivered"
+                break
+            except (urllib.error.URLError, OSError) as e:
+                logger.warning("Callback for job %s failed (attempt %s): %s", job_id, attempt + 1, e)
+        metrics.inc("job_callbacks_total", result=outcome)
+        try:
+            self._connection().execute("UPDATE jobs SET callback_status = ? WHERE id = ?", (outcome, job_id))
+        except sqlite3.Error as e:
+            logger.error("Could not record the callback of job %s: %s", job_id, e)
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue():
+    """
+    Get the shared job queue for this process.
+
+    JOB_WORKERS sets the jobs each process runs at once (2 by default),
+    JOB_QUEUE_SIZE the queued jobs accepted (1000), JOB_LEASE_SECONDS how long
+    a dead worker's job waits to be taken up again (60), JOB_MAX_ATTEMPTS the
+    times a job is started (3), JOB_RETRY_DELAY the seconds before a failed
+    attempt is retried, doubling each time (30), JOB_CALLBACK_URL where finished
+    jobs are posted and JOB_RETENTION_DAYS how long they are kept (7).
+
+    Returns:
+        JobQueue or None: The queue at JOB_QUEUE_PATH, or None when jobs are not
+            configured
+    """
+    global _job_queue
+    path = os.environ.get('JOB_QUEUE_PATH')
+    if not path:
+        return None
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(
+                path,
+                workers=int(os.environ.get('JOB_WORKERS', 2)),
+                max_queued=int(os.environ.get('JOB_QUEUE_SIZE', 1000)),
+                lease_seconds=float(os.environ.get('JOB_LEASE_SECONDS', 60)),
+                max_attempts=int(os.environ.get('JOB_MAX_ATTEMPTS', 3)),
+                retry_delay=float(os.environ.get('JOB_RETRY_DELAY', 30)),
+                callback_url=os.environ.get('JOB_CALLBACK_URL') or None,
+                retention_seconds=float(os.environ.get('JOB_RETENTION_DAYS', 7)) * 86400
+            )
+            atexit.register(_job_queue.stop)
+    return _job_queue
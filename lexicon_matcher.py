@@ -0,0 +1,199 @@
+"""
+Lexicon matching utilities for the Belief Explorer backend.
+
+Provides an Aho-Corasick matcher that finds every whole-word occurrence of any
+term from a set of labelled lexicons in a single pass over the text. Scan time
+depends on the length of the text and the number of matches, not on the number
+of terms, so lexicons can grow to thousands of entries.
+"""
+
+import json
+import logging
+from collections import deque, namedtuple
+
+logger = logging.getLogger(__name__)
+
+LexiconMatch = namedtuple("LexiconMatch", ["start", "end", "term", "label"])
+
+def normalize_text(text):
+    """
+    Normalize text for matching: lowercase with typographic apostrophes straightened.
+
+    Args:
+        text (str): The text to normalize
+
+    Returns:
+        str: The normalized text, with the same length and character positions
+    """
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # A few characters lowercase to two; keep those as they are so positions hold
+        lowered = "".join(char.lower() if len(char.lower()) == 1 else char for char in text)
+    return lowered.replace("’", "'")
+
+def _is_word_char(char):
+    """Return True for characters that continue a word."""
+    return char.isalnum() or char == "_"
+
+class LexiconMatcher:
+    """
+    Finds whole-word matches of labelled terms with an Aho-Corasick automaton.
+
+    A term matches only where it is not preceded or followed by a letter, digit
+    or underscore, so "ai" matches "AI-powered" but not "said". Terms may contain
+    spaces and punctuation ("no one", "cover-up").
+    """
+
+    def __init__(self, lexicons=None):
+        """
+        Initialize the LexiconMatcher.
+
+        Args:
+            lexicons (dict, optional): Map of label to an iterable of terms
+        """
+        self._goto = [{}]
+        self._terms = [()]  # terms ending at each node
+        self._fail = [0]
+        self._outputs = [()]  # terms ending at each node or at its suffix nodes
+        self._built = True
+        self.term_count = 0
+        for label, terms in (lexicons or {}).items():
+            self.add_lexicon(label, terms)
+
+    def add_term(self, term, label):
+        """
+        Add a term to the matcher.
+
+        Args:
+            term (str): The term to find
+            label: The label reported with its matches
+        """
+        term = normalize_text(term.strip())
+        if not term:
+            return
+
+        node = 0
+        for char in term:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._terms.append(())
+            node = next_node
+
+        entry = (len(term), term, label)
+        if entry not in self._terms[node]:
+            self._terms[node] = self._terms[node] + (entry,)
+            self.term_count += 1
+            self._built = False
+
+    def add_lexicon(self, label, terms):
+        """
+        Add every term of a lexicon under one label.
+
+        Args:
+            label: The label reported with matches
+            terms (iterable): The terms
+        """
+        for term in terms:
+            self.add_term(term, label)
+
+    def build(self):
+        """
+        Compute the failure links and merged outputs of the automaton.
+
+        Called automatically by the first search after terms are added; call it
+        up front to keep the work out of the first request.
+        """
+        self._fail = [0] * len(self._goto)
+        self._outputs = list(self._terms)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                # Children of the root fail back to the root
+                self._fail[child] = self._goto[fail].get(char, 0) if node else 0
+                self._outputs[child] = self._terms[child] + self._outputs[self._fail[child]]
+                queue.append(child)
+        self._built = True
+
+    def find_all(self, text):
+        """
+        Find every whole-word match in a text.
+
+        Args:
+            text (str): The text to scan
+
+        Returns:
+            list: LexiconMatch tuples ordered by position, overlapping matches included
+        """
+        if not text:
+            return []
+        if not self._built:
+            self.build()
+
+        text = normalize_text(text)
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        length = len(text)
+        matches = []
+        node = 0
+
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not outputs[node]:
+                continue
+
+            after = index + 1
+            if after < length and _is_word_char(text[after]):
+                continue
+            for term_length, term, label in outputs[node]:
+                start = after - term_length
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                matches.append(LexiconMatch(start, after, term, label))
+
+        matches.sort(key=lambda match: (match.start, -match.end))
+        return matches
+
+    def count_labels(self, text):
+        """
+        Count the distinct terms matched for each label.
+
+        Args:
+            text (str): The text to scan
+
+        Returns:
+            dict: Map of label to the number of distinct matched terms
+        """
+        terms = {}
+        for match in self.find_all(text):
+            terms.setdefault(match.label, set()).add(match.term)
+        return {label: len(found) for label, found in terms.items()}
+
+def load_lexicon_file(path):
+    """
+    Load a JSON object of lexicons from a file.
+
+    Args:
+        path (str): Path of the JSON file
+
+    Returns:
+        dict: The parsed lexicons
+
+    Raises:
+        ValueError: If the file is not a JSON object
+    """
+    with open(path, encoding='utf-8') as f:
+        lexicons = json.load(f)
+    if not isinstance(lexicons, dict):
+        raise ValueError(f"Lexicon file {path} must contain a JSON object")
+    return lexicons
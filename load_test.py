@@ -0,0 +1,131 @@
+"""
+Load test for a running Belief Explorer server.
+
+Sends analysis requests from many concurrent clients and reports throughput and
+latency, so the sync (gunicorn) and async (uvicorn) serving modes can be
+compared on the same host:
+
+    MODEL_BACKEND=mock MOCK_LATENCY_SCALE=1 gunicorn -w 4 -b 0.0.0.0:5000 run:app
+    python tests/load_test.py --url http://localhost:5000 --clients 200 --requests 1000
+
+    MODEL_BACKEND=mock MOCK_LATENCY_SCALE=1 python run_asgi.py
+    python tests/load_test.py --url http://localhost:5000 --clients 200 --requests 1000
+"""
+
+import json
+import time
+import argparse
+import statistics
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+STATEMENTS = [
+    "The Earth is flat because the horizon looks flat from where I'm standing.",
+    "Vaccines cause more harm than good, and the government hides the data.",
+    "Social media makes everyone less happy. We should ban it for teenagers.",
+    "Artificial intelligence will definitely replace all programmers within ten years.",
+]
+
+def _percentile(values, percent):
+    """Return the given percentile of a list of values."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def send_request(url, statement, depth, timeout):
+    """
+    Send one analysis request.
+
+    Args:
+        url (str): The /api/analyze URL
+        statement (str): The statement to analyze
+        depth (str): The analysis depth
+        timeout (float): Seconds to wait for the response
+
+    Returns:
+        tuple: The HTTP status (0 for a connection error) and the latency in seconds
+    """
+    body = json.dumps({"statement": statement, "history": [], "depth": depth}).encode('utf-8')
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = 0
+    return status, time.perf_counter() - start
+
+def run(url, clients, requests, depth="standard", timeout=120.0):
+    """
+    Run the load test.
+
+    Each client sends requests back to back until the total is reached.
+
+    Args:
+        url (str): Base URL of the server
+        clients (int): Number of concurrent clients
+        requests (int): Total number of requests
+        depth (str, optional): The analysis depth
+        timeout (float, optional): Seconds each request may take
+
+    Returns:
+        dict: Request count, wall time, throughput, latency percentiles and status counts
+    """
+    endpoint = url.rstrip("/") + "/api/analyze"
+    counter = iter(range(requests))
+    lock = threading.Lock()
+    results = []
+
+    def client():
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            outcome = send_request(endpoint, STATEMENTS[index % len(STATEMENTS)], depth, timeout)
+            with lock:
+                results.append(outcome)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for _ in range(clients):
+            pool.submit(client)
+    wall = time.perf_counter() - start
+
+    latencies = [latency for status, latency in results if status == 200]
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    return {
+        "requests": len(results),
+        "wallSeconds": round(wall, 2),
+        "throughput": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50": round(statistics.median(latencies), 3) if latencies else None,
+        "p95": round(_percentile(latencies, 95), 3) if latencies else None,
+        "p99": round(_percentile(latencies, 99), 3) if latencies else None,
+        "statuses": statuses
+    }
+
+def main(argv=None):
+    """Parse arguments and run the load test."""
+    parser = argparse.ArgumentParser(description="Belief Explorer load test")
+    parser.add_argument("--url", default="http://localhost:5000", help="Base URL of the server")
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests")
+    parser.add_argument("--depth", default="standard", help="Analysis depth")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds each request may take")
+    args = parser.parse_args(argv)
+
+    result = run(args.url, args.clients, args.requests, args.depth, args.timeout)
+    print(f"\n=== LOAD TEST ({args.url}, {args.clients} clients, {args.requests} requests) ===")
+    print(f"wall {result['wallSeconds']} s, {result['throughput']} req/s")
+    print(f"latency p50 {result['p50']} s, p95 {result['p95']} s, p99 {result['p99']} s")
+    print(f"statuses {result['statuses']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Logging pipeline utilities for the Belief Explorer backend.
+
+Log records are put on a bounded queue by the thread that logs them and handled
+by a background listener, so formatting and file I/O never run on a request
+thread. Records carry the id of the request being served, info logs can be
+sampled per request, and records can be written as JSON lines.
+"""
+
+import json
+import queue
+import random
+import logging
+import zlib
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
+from utils.metrics import metrics
+from utils.request_context import current_request
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+class RequestContextFilter(logging.Filter):
+    """
+    Stamps records with the id of the current request.
+
+    Runs on the logging thread, where the request context is visible.
+    """
+
+    def filter(self, record):
+        context = current_request()
+        record.request_id = context.request_id if context is not None else None
+        return True
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a share of the records below WARNING.
+
+    Records of a request are kept or dropped together, so sampled requests have
+    complete logs. Records outside a request are sampled individually.
+    """
+
+    def __init__(self, rate):
+        """
+        Initialize the SamplingFilter.
+
+        Args:
+            rate (float): Share of records to keep, from 0.0 to 1.0
+        """
+        super().__init__()
+        self.rate = rate
+        self._threshold = int(rate * 0xFFFFFFFF)
+
+    def filter(self, record):
+        if self.rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            return zlib.crc32(request_id.encode('utf-8')) <= self._threshold
+        return random.random() < self.rate
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Queue handler that drops records when the queue is full and leaves the
+    message to be formatted by the listener.
+    """
+
+    def prepare(self, record):
+        # The queue stays in this process, so the record can be passed as it is
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("log_records_dropped_total", level=record.levelname)
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as single-line JSON objects.
+
+    Fields passed with extra= (such as stage timings) are included as they are.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "requestId": getattr(record, "request_id", None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
@@ -5,8 +5,13 @@ This module assesses logical structure, consistency, fallacies, and argument pat
 """
 
 import logging
-import google.generativeai as genai
-from utils.config import get_gemini_api_key
+from utils.claim_packing import analyze_packed, analyze_packed_async, number_claims
+from utils.config import get_default_model
+from utils.depth_profiles import apply_stage_profile
+from utils.model_backend import get_backend
+from utils.response_parser import analysis_schema, validate_analysis
+from utils.structured_output import parse_json_stream, parse_json_stream_async, with_response_schema
+from utils.tracing import annotate
 
 logger = logging.getLogger(__name__)
 
@@ -15,53 +20,202 @@ class LogicalArbiter:
     Evaluates claims based on logical structure, consistency, and reasoning patterns.
     """
     
-    def __init__(self):
-        """Initialize the LogicalArbiter with Gemini API."""
-        self.api_key = get_gemini_api_key()
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
-        else:
+    # Schema for constrained JSON output from the model service
+    RESPONSE_SCHEMA = analysis_schema("logical")
+    
+    def __init__(self, backend=None):
+        """
+        Initialize the LogicalArbiter with a model backend.
+        
+        Args:
+            backend (optional): The model backend to use. Defaults to the shared backend.
+        """
+        self.backend = backend or get_backend()
+        if not self.backend.available:
             logger.error("No Gemini API key found. LogicalArbiter will not function.")
         
         # Configure the model
-        self.model_name = "models/gemini-2.5-pro"
-        self.generation_config = {
+        self.model_name = get_default_model()
+        self.generation_config = with_response_schema({
             "temperature": 0.1,  # Very low temperature for consistent analysis
             "top_p": 0.8,
             "top_k": 40,
             "max_output_tokens": 1024,
-        }
+        }, self.RESPONSE_SCHEMA)
     
-    def analyze(self, claim):
+    def analyze(self, claim, stage_profile=None):
         """
         Analyze a claim from a logical perspective.
         
         Args:
             claim (str): The claim to analyze
+            stage_profile (dict, optional): Model overrides for this call
+            
+        Returns:
+            dict: Analysis results including scores and reasoning
+        """
+        if not claim or not self.backend.available:
+            return self._get_default_analysis()
+        
+        try:
+            stream = self.backend.generate_content_stream(**self._request(claim, stage_profile))
+            # Stop generation as soon as the JSON object is complete
+            return self._accept(claim, parse_json_stream(stream, expect="object"))
+        except Exception as e:
+            return self._fail(e)
+    
+    async def analyze_async(self, claim, stage_profile=None):
+        """
+        Analyze a claim from a logical perspective without blocking the event loop.
+        
+        Args:
+            claim (str): The claim to analyze
+            stage_profile (dict, optional): Model overrides for this call
             
         Returns:
             dict: Analysis results including scores and reasoning
         """
-        if not claim or not self.api_key:
+        if not claim or not self.backend.available:
             return self._get_default_analysis()
         
         try:
-            # Create the prompt for logical analysis
-            prompt = f"""
-            You are the Logical Arbiter, a specialized analytical system that evaluates claims based on logical structure, consistency, and reasoning patterns.
+            stream = await self.backend.generate_content_stream_async(**self._request(claim, stage_profile))
+            return self._accept(claim, await parse_json_stream_async(stream, expect="object"))
+        except Exception as e:
+            return self._fail(e)
+    
+    def _request(self, claim, stage_profile=None):
+        """
+        Build the model call that analyzes a claim.
+        
+        Args:
+            claim (str): The claim to analyze
+            stage_profile (dict, optional): Model overrides for this call
+            
+        Returns:
+            dict: The prompt, model name, generation config and stage of the call
+        """
+        model_name, generation_config = apply_stage_profile(
+            self.model_name, self.generation_config, stage_profile
+        )
+        return {
+            "prompt": self._build_prompt(claim),
+            "model_name": model_name,
+            "generation_config": generation_config,
+            "stage": "logical"
+        }
+    
+    def _accept(self, claim, parsed):
+        """Validate the model's parsed analysis of a claim."""
+        analysis = validate_analysis(parsed, "logical")
+        annotate(parse="ok")
+        logger.info("Completed logical analysis for claim: %s...", claim[:50])
+        return analysis
+    
+    def _fail(self, error):
+        """Log a failed analysis and fall back to the default analysis."""
+        logger.error("Error in logical analysis: %s", error, exc_info=True)
+        annotate(parse="fallback", error=type(error).__name__)
+        return self._get_default_analysis()
+    
+    def analyze_many(self, claims, stage_profile=None, pack_size=None):
+        """
+        Analyze several claims from a logical perspective, packing them into shared calls.
+        
+        Each call carries up to pack_size claims; a claim the answer leaves out
+        or garbles is analyzed with its own call.
+        
+        Args:
+            claims (list): The claims to analyze
+            stage_profile (dict, optional): Model overrides for the calls
+            pack_size (int, optional): Most claims per call (default: all of them)
+            
+        Returns:
+            list: The analysis of each claim, in order
+        """
+        return analyze_packed(self, "logical", claims, stage_profile, pack_size)
+    
+    async def analyze_many_async(self, claims, stage_profile=None, pack_size=None):
+        """
+        Analyze several claims from a logical perspective, packing them into shared
+        calls, without blocking the event loop.
+        
+        Args:
+            claims (list): The claims to analyze
+            stage_profile (dict, optional): Model overrides for the calls
+            pack_size (int, optional): Most claims per call (default: all of them)
             
-            Analyze the following claim from a logical perspective:
-            "{claim}"
+        Returns:
+            list: The analysis of each claim, in order
+        """
+        return await analyze_packed_async(self, "logical", claims, stage_profile, pack_size)
+    
+    def _build_prompt(self, claim):
+        """
+        Build the logical analysis prompt for a claim.
+        
+        Args:
+            claim (str): The claim to analyze
             
-            Focus your analysis on:
-            1. Premise-conclusion structure: Does the claim have clear premises and conclusion?
-            2. Internal consistency: Is the claim free from contradictions?
-            3. Deductive validity: If structured as a deductive argument, is it valid?
-            4. Inductive strength: If structured as an inductive argument, is it strong?
-            5. Fallacies: Does the claim contain logical fallacies?
+        Returns:
+            str: The prompt
+        """
+        return f"""
+        You are the Logical Arbiter, a specialized analytical system that evaluates claims based on logical structure, consistency, and reasoning patterns.
+        
+        Analyze the following claim from a logical perspective:
+        "{claim}"
+        
+        Focus your analysis on:
+        1. Premise-conclusion structure: Does the claim have clear premises and conclusion?
+        2. Internal consistency: Is the claim free from contradictions?
+        3. Deductive validity: If structured as a deductive argument, is it valid?
+        4. Inductive strength: If structured as an inductive argument, is it strong?
+        5. Fallacies: Does the claim contain logical fallacies?
+        
+        Provide your analysis in JSON format with the following structure:
+        {{
+            "logicalScore": 0.0 to 1.0, // Overall logical consistency score
+            "components": {{
+                "structure": 0.0 to 1.0,
+                "consistency": 0.0 to 1.0,
+                "validity": 0.0 to 1.0,
+                "fallacies": 0.0 to 1.0 // Higher score means fewer fallacies
+            }},
+            "reasoning": "Your detailed reasoning explaining the scores",
+            "identifiedFallacies": ["fallacy1", "fallacy2"] // Optional list of identified fallacies
+        }}
+        
+        Ensure your analysis is balanced, nuanced, and focused solely on logical considerations.
+        """
+    
+    def _build_packed_prompt(self, claims):
+        """
+        Build the logical analysis prompt for several claims.
+        
+        Args:
+            claims (list): The claims to analyze
             
-            Provide your analysis in JSON format with the following structure:
+        Returns:
+            str: The prompt
+        """
+        return f"""
+        You are the Logical Arbiter, a specialized analytical system that evaluates claims based on logical structure, consistency, and reasoning patterns.
+        
+        Analyze each of the following claims, separately, from a logical perspective:
+        {number_claims(claims)}
+        
+        For each claim, focus your analysis on:
+        1. Premise-conclusion structure: Does the claim have clear premises and conclusion?
+        2. Internal consistency: Is the claim free from contradictions?
+        3. Deductive validity: If structured as a deductive argument, is it valid?
+        4. Inductive strength: If structured as an inductive argument, is it strong?
+        5. Fallacies: Does the claim contain logical fallacies?
+        
+        Provide your analyses as a JSON array with one object per claim, in this structure:
+        [
             {{
+                "claimId": 1, // The number of the claim analyzed
                 "logicalScore": 0.0 to 1.0, // Overall logical consistency score
                 "components": {{
                     "structure": 0.0 to 1.0,
@@ -72,74 +226,10 @@ class LogicalArbiter:
                 "reasoning": "Your detailed reasoning explaining the scores",
                 "identifiedFallacies": ["fallacy1", "fallacy2"] // Optional list of identified fallacies
             }}
-            
-            Ensure your analysis is balanced, nuanced, and focused solely on logical considerations.
-            """
-            
-            # Generate response from Gemini
-            model = genai.GenerativeModel(
-                model_name=self.model_name,
-                generation_config=self.generation_config
-            )
-            
-            response = model.generate_content(prompt)
-            
-            # Process the response to extract the analysis
-            analysis = self._parse_analysis_from_response(response.text)
-            
-            logger.info(f"Completed logical analysis for claim: {claim[:50]}...")
-            return analysis
-            
-        except Exception as e:
-            logger.error(f"Error in logical analysis: {str(e)}", exc_info=True)
-            return self._get_default_analysis()
-    
-    def _parse_analysis_from_response(self, response_text):
-        """
-        Parse analysis from the model's response text.
+        ]
         
-        Args:
-            response_text (str): The raw response from the model
-            
-        Returns:
-            dict: The parsed analysis
+        Ensure each analysis is balanced, nuanced, and focused solely on logical considerations of its own claim.
         """
-        try:
-            # Try to find a JSON-like structure in the response
-            import json
-            import re
-            
-            # Extract JSON object using regex
-            json_match = re.search(r'({[\s\S]*})', response_text)
-            if json_match:
-                json_str = json_match.group(1)
-                analysis = json.loads(json_str)
-                
-                # Validate the structure
-                if not isinstance(analysis, dict):
-                    raise ValueError("Analysis is not a dictionary")
-                
-                if "logicalScore" not in analysis:
-                    analysis["logicalScore"] = 0.5
-                
-                if "components" not in analysis or not isinstance(analysis["components"], dict):
-                    analysis["components"] = {
-                        "structure": 0.5,
-                        "consistency": 0.5,
-                        "validity": 0.5,
-                        "fallacies": 0.5
-                    }
-                
-                if "reasoning" not in analysis:
-                    analysis["reasoning"] = "Analysis reasoning not provided."
-                
-                return analysis
-            
-            raise ValueError("Could not find JSON in response")
-            
-        except Exception as e:
-            logger.error(f"Error parsing logical analysis: {str(e)}", exc_info=True)
-            return self._get_default_analysis()
     
     def _get_default_analysis(self):
         """
@@ -2,6 +2,7 @@
 
 // Global variables
 let conversationHistory = [];
+let sessionId = null; // Server-side conversation, started by the first reply
 let lastAnalysisData = null;
 let radarChart = null;
 
@@ -114,6 +115,9 @@ async function handleSend() {
 
   try {
     const response = await fetchAnalysis(text);
+    if (response.Metadata && response.Metadata.sessionId) {
+      sessionId = response.Metadata.sessionId;
+    }
     
     // Add assistant response to conversation
     conversationHistory.push({ role: 'assistant', content: response.Response });
@@ -150,9 +154,10 @@ async function fetchAnalysis(statement) {
   // API endpoint will be replaced with actual backend URL
   const API_URL = 'https://api.beliefexplorer.com/api/analyze';
   
+  // The server keeps the history; only the new statement and the session are sent
   const payload = {
     statement: statement,
-    history: conversationHistory.slice(0, -1) // Send history before current message
+    sessionId: sessionId
   };
   
   const response = await fetch(API_URL, {
@@ -0,0 +1,316 @@
+"""
+Metrics utilities for the Belief Explorer backend.
+
+A small in-process registry of counters, gauges and histograms that can be
+rendered in the Prometheus text exposition format. Under a server with several
+worker processes, each worker also writes snapshots of its registry to a shared
+directory, and a scrape merges them so it covers every worker.
+"""
+
+import os
+import glob
+import json
+import time
+import uuid
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0)
+
+def _label_key(labels):
+    """Turn a labels dict into a hashable, ordered key."""
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _format_labels(key, extra=None):
+    """Format a label key as a Prometheus label set."""
+    items = list(key) + list(extra or [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of counters, gauges and histograms.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        """
+        Increment a counter.
+
+        Args:
+            name (str): The metric name
+            value (float, optional): The amount to add
+            **labels: Label values for this series
+        """
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """
+        Set a gauge to a value.
+
+        Args:
+            name (str): The metric name
+            value (float): The new value
+            **labels: Label values for this series
+        """
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        """
+        Record an observation in a histogram.
+
+        Args:
+            name (str): The metric name
+            value (float): The observed value
+            buckets (tuple, optional): Upper bounds of the histogram buckets
+            **labels: Label values for this series
+        """
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+                series[key] = histogram
+            for i, bound in enumerate(histogram["buckets"]):
+                if value <= bound:
+                    histogram["counts"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def get(self, name, **labels):
+        """
+        Get the current value of a counter or gauge.
+
+        Args:
+            name (str): The metric name
+            **labels: Label values for the series
+
+        Returns:
+            float: The value, or 0 if the series does not exist
+        """
+        key = _label_key(labels)
+        with self._lock:
+            if name in self._counters:
+                return self._counters[name].get(key, 0)
+            return self._gauges.get(name, {}).get(key, 0)
+
+    def snapshot(self):
+        """
+        Copy the registry's values into plain data another process can merge.
+
+        Returns:
+            dict: Lists of "counters", "gauges" and "histograms" series
+        """
+        with self._lock:
+            return {
+                "counters": [[name, list(key), value]
+                             for name, series in self._counters.items() for key, value in series.items()],
+                "gauges": [[name, list(key), value]
+                           for name, series in self._gauges.items() for key, value in series.items()],
+                "histograms": [[name, list(key), list(h["buckets"]), list(h["counts"]), h["sum"], h["count"]]
+                               for name, series in self._histograms.items() for key, h in series.items()]
+            }
+
+    def merge(self, snapshot, **labels):
+        """
+        Add a snapshot of another registry to this one.
+
+        Counters and histograms are summed. Gauges cannot be, so each keeps its
+        own series, told apart by the extra labels.
+
+        Args:
+            snapshot (dict): The output of snapshot
+            **labels: Labels added to the snapshot's gauges, such as its pid
+        """
+        with self._lock:
+            for name, key, value in snapshot["counters"]:
+                key = _label_key(dict(key))
+                series = self._counters.setdefault(name, {})
+                series[key] = series.get(key, 0) + value
+            for name, key, value in snapshot["gauges"]:
+                self._gauges.setdefault(name, {})[_label_key(dict(key, **labels))] = value
+            for name, key, buckets, counts, total, count in snapshot["histograms"]:
+                key = _label_key(dict(key))
+                series = self._histograms.setdefault(name, {})
+                histogram = series.get(key)
+                if histogram is None:
+                    histogram = {"buckets": tuple(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+                    series[key] = histogram
+                elif list(histogram["buckets"]) != buckets:
+                    continue
+                histogram["counts"] = [a + b for a, b in zip(histogram["counts"], counts)]
+                histogram["sum"] += total
+                histogram["count"] += count
+
+    def render(self):
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text
+        """
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {name} gauge")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    for bound, count in zip(histogram["buckets"], histogram["counts"]):
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {histogram['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram['sum']}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+# Shared registry for the process
+metrics = MetricsRegistry()
+
+def _alive(pid):
+    """Check whether a process is still running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class SharedMetrics:
+    """
+    Shares a worker's registry with the other workers of a server through files.
+
+    Each worker writes a snapshot of its registry to its own file in the
+    directory every few seconds, and a scrape merges all the files. Counters
+    and histograms of workers that have exited are still counted; their
+    gauges are dropped.
+    """
+
+    def __init__(self, registry, directory, interval=5.0):
+        """
+        Initialize the SharedMetrics.
+
+        Args:
+            registry (MetricsRegistry): This process's registry
+            directory (str): The directory shared by the server's workers
+            interval (float, optional): Seconds between snapshots
+        """
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self.pid = os.getpid()
+        # The random part keeps a recycled pid from overwriting an exited worker's counters
+        self.path = os.path.join(directory, f"metrics-{self.pid}-{uuid.uuid4().hex[:8]}.json")
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def write(self):
+        """Write this worker's snapshot atomically."""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(temp_path, self.path)
+
+    def start(self):
+        """Start writing snapshots in the background, and once more at exit. Safe to call again."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._thread = threading.Thread(target=self._write_loop, name="metrics-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.write)
+
+    def _write_loop(self):
+        """Write a snapshot every interval."""
+        while True:
+            try:
+                self.write()
+            except OSError as e:
+                logger.error("Could not write metrics snapshot: %s", e)
+            time.sleep(self.interval)
+
+    def render(self):
+        """
+        Render the metrics of every worker in the Prometheus text exposition format.
+
+        Gauges carry a "pid" label, since the workers' values cannot be added up.
+
+        Returns:
+            str: The exposition text
+        """
+        self.write()
+        combined = MetricsRegistry()
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            try:
+                pid = int(os.path.basename(path).split("-")[1])
+                with open(path, encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError, IndexError):
+                continue
+            if pid != self.pid and not _alive(pid):
+                snapshot["gauges"] = []
+            combined.merge(snapshot, pid=pid)
+        return combined.render()
+
+def prepare_metrics_dir(directory):
+    """
+    Empty the shared metrics directory as a server starts, and point its workers at it.
+
+    Args:
+        directory (str): The directory
+    """
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "metrics-*.json*")):
+        os.remove(path)
+    os.environ['METRICS_DIR'] = directory
+
+_shared_metrics = None
+_shared_metrics_lock = threading.Lock()
+
+def get_shared_metrics():
+    """
+    Get this worker's link to the shared metrics directory.
+
+    METRICS_DIR names the directory; without it metrics stay in the process and
+    a scrape covers only the worker that serves it. METRICS_SNAPSHOT_INTERVAL
+    sets the seconds between snapshots (5 by default).
+
+    Returns:
+        SharedMetrics or None: The shared metrics, or None when METRICS_DIR is not set
+    """
+    global _shared_metrics
+    directory = os.environ.get('METRICS_DIR')
+    if not directory:
+        return None
+    with _shared_metrics_lock:
+        # A worker forked from a process that already had one needs its own file
+        if _shared_metrics is None or _shared_metrics.pid != os.getpid():
+            _shared_metrics = SharedMetrics(
+                metrics,
+                directory,
+                interval=float(os.environ.get('METRICS_SNAPSHOT_INTERVAL', 5))
+            )
+    return _shared_metrics
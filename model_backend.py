@@ -0,0 +1,770 @@
+"""
+Model Backend module for the Belief Explorer.
+
+This module puts the generative model service behind a small interface so that
+components can run against Gemini or against a local mock backend.
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import inspect
+import random
+import logging
+import threading
+from utils.config import get_gemini_api_key
+from utils.model_router import ModelRouter
+from utils.response_parser import matches_schema
+
+logger = logging.getLogger(__name__)
+
+# Published list prices in USD per 1M tokens: (input, output)
+MODEL_PRICING = {
+    "models/gemini-2.5-pro": (1.25, 10.00),
+    "models/gemini-2.5-flash": (0.30, 2.50),
+    "models/gemini-2.5-flash-lite": (0.10, 0.40),
+}
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens in a piece of text.
+
+    Args:
+        text (str): The text to measure
+
+    Returns:
+        int: Approximate token count (roughly 4 characters per token)
+    """
+    if not text:
+        return 0
+    return max(1, len(text) // 4)
+
+def estimate_cost(model_name, prompt_tokens, output_tokens):
+    """
+    Estimate the cost of a model call in USD.
+
+    Args:
+        model_name (str): The model that served the call
+        prompt_tokens (int): Number of prompt tokens
+        output_tokens (int): Number of output tokens
+
+    Returns:
+        float: Estimated cost in USD (0.0 for unknown models)
+    """
+    input_price, output_price = MODEL_PRICING.get(model_name, (0.0, 0.0))
+    return (prompt_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+_record_lock = threading.Lock()
+
+def record_response(stage, model_name, text, cancelled=False):
+    """
+    Append a raw model response to the file named by RESPONSE_RECORD_PATH.
+
+    Recorded responses feed the parser fuzz corpus. Nothing is written when the
+    variable is not set.
+
+    Args:
+        stage (str): The pipeline stage that made the call
+        model_name (str): The model that served the call
+        text (str): The raw response text
+        cancelled (bool, optional): Whether the stream was stopped early
+    """
+    path = os.environ.get('RESPONSE_RECORD_PATH')
+    if not path or not text:
+        return
+    line = json.dumps({"stage": stage, "model": model_name, "text": text, "cancelled": cancelled})
+    try:
+        with _record_lock:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+    except OSError as e:
+        logger.warning("Could not record model response: %s", e)
+
+class ModelResponse:
+    """
+    The text and usage figures of a single model call.
+    """
+
+    def __init__(self, text, model_name, prompt_tokens=0, output_tokens=0, latency=0.0):
+        self.text = text
+        self.model_name = model_name
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+        self.latency = latency
+
+    @property
+    def cost(self):
+        """float: Estimated cost of the call in USD."""
+        return estimate_cost(self.model_name, self.prompt_tokens, self.output_tokens)
+
+class ModelStream:
+    """
+    A streamed model call that yields text chunks as they arrive.
+
+    Closing the stream before it is exhausted cancels the rest of the
+    generation. Usage figures are final once the stream is exhausted or closed.
+    """
+
+    def __init__(self, chunks, model_name, prompt, cancel=None):
+        """
+        Initialize the ModelStream.
+
+        Args:
+            chunks (iterator): Iterator of (text, usage_metadata) pairs
+            model_name (str): The model serving the call
+            prompt (str): The prompt that was sent
+            cancel (callable, optional): Cancels the generation on the service
+        """
+        self._chunks = chunks
+        self._cancel = cancel
+        self._parts = []
+        self._callbacks = []
+        self._start = time.perf_counter()
+        self.model_name = model_name
+        self.prompt_tokens = estimate_tokens(prompt)
+        self.output_tokens = 0
+        self.latency = 0.0
+        self.cancelled = False
+        self.finished = False
+
+    def __iter__(self):
+        try:
+            for text, usage in self._chunks:
+                if usage is not None:
+                    self._apply_usage(usage)
+                if text:
+                    self._parts.append(text)
+                    yield text
+        except Exception:
+            self._finish(ok=False)
+            raise
+        self._finish(ok=True)
+
+    @property
+    def text(self):
+        """str: The text received so far."""
+        return "".join(self._parts)
+
+    @property
+    def cost(self):
+        """float: Estimated cost of the call in USD, final once the stream is done."""
+        return estimate_cost(self.model_name, self.prompt_tokens, self.output_tokens)
+
+    def add_done_callback(self, callback):
+        """
+        Register a function to call once the stream is exhausted or closed.
+
+        Args:
+            callback (callable): Called with the stream and whether it succeeded
+        """
+        self._callbacks.append(callback)
+
+    def close(self):
+        """Stop reading the stream and cancel the rest of the generation."""
+        if self.finished:
+            return
+        self.cancelled = True
+        if self._cancel is not None:
+            try:
+                self._cancel()
+            except Exception as e:
+                logger.warning("Could not cancel model stream: %s", e)
+        close_chunks = getattr(self._chunks, "close", None)
+        if close_chunks is not None:
+            close_chunks()
+        self._finish(ok=True)
+
+    def _apply_usage(self, usage):
+        """Take token counts from the service's usage metadata."""
+        prompt_tokens = getattr(usage, "prompt_token_count", 0)
+        output_tokens = getattr(usage, "candidates_token_count", 0)
+        if prompt_tokens:
+            self.prompt_tokens = prompt_tokens
+        if output_tokens:
+            self.output_tokens = max(self.output_tokens, output_tokens)
+
+    def _finish(self, ok):
+        """Record final figures and run the done callbacks once."""
+        if self.finished:
+            return
+        self.finished = True
+        self.latency = time.perf_counter() - self._start
+        self.output_tokens = max(self.output_tokens, estimate_tokens(self.text))
+        for callback in self._callbacks:
+            callback(self, ok)
+
+class AsyncModelStream(ModelStream):
+    """
+    A streamed model call read with "async for", for the async serving mode.
+
+    Closing it with aclose() before it is exhausted cancels the rest of the
+    generation, as close() does for a ModelStream.
+    """
+
+    def __iter__(self):
+        raise TypeError("AsyncModelStream must be read with 'async for'")
+
+    async def __aiter__(self):
+        try:
+            async for text, usage in self._chunks:
+                if usage is not None:
+                    self._apply_usage(usage)
+                if text:
+                    self._parts.append(text)
+                    yield text
+        except Exception:
+            self._finish(ok=False)
+            raise
+        self._finish(ok=True)
+
+    async def aclose(self):
+        """Stop reading the stream and cancel the rest of the generation."""
+        if self.finished:
+            return
+        self.cancelled = True
+        if self._cancel is not None:
+            try:
+                result = self._cancel()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning("Could not cancel model stream: %s", e)
+        close_chunks = getattr(self._chunks, "aclose", None)
+        if close_chunks is not None:
+            await close_chunks()
+        self._finish(ok=True)
+
+def load_sdk():
+    """
+    Import the Gemini SDK.
+
+    The SDK and its gRPC and protobuf dependencies take most of the backend's
+    import time, so they are only imported when a Gemini call is made, or by
+    the preloading master process so that forked workers share them.
+
+    Returns:
+        module: google.generativeai
+    """
+    import google.generativeai as genai
+    return genai
+
+class GeminiBackend:
+    """
+    Sends prompts to the Gemini API.
+    """
+
+    name = "gemini"
+
+    def __init__(self):
+        """
+        Initialize the GeminiBackend with the configured API key.
+
+        The SDK is imported and configured on the first call, not here, so
+        building the backend does not cost a process its startup time.
+        """
+        self.api_key = get_gemini_api_key()
+        self._genai = None
+        self._lock = threading.Lock()
+
+    def _sdk(self):
+        """Get the SDK, importing and configuring it on first use."""
+        if self._genai is None:
+            with self._lock:
+                if self._genai is None:
+                    genai = load_sdk()
+                    if self.api_key:
+                        genai.configure(api_key=self.api_key)
+                    self._genai = genai
+        return self._genai
+
+    def _model(self, model_name, generation_config):
+        """Create a model handle."""
+        return self._sdk().GenerativeModel(
+            model_name=model_name,
+            generation_config=generation_config
+        )
+
+    def connect(self, model_names):
+        """
+        Set up the client and its connection to the API before the first call.
+
+        Counting the tokens of a short text is free, and goes through the same
+        client as generation, so it opens the TLS connection and checks that
+        the key can use each model.
+
+        Args:
+            model_names (iterable): The models the pipeline calls
+
+        Returns:
+            list: The models that were reached
+        """
+        if not self.available:
+            return []
+        names = list(dict.fromkeys(model_names))
+        for model_name in names:
+            self._model(model_name, None).count_tokens("warm up")
+        return names
+
+    @property
+    def available(self):
+        """bool: Whether the backend can serve requests."""
+        return bool(self.api_key)
+
+    def generate_content(self, prompt, model_name, generation_config, stage=None):
+        """
+        Generate content for a prompt.
+
+        Args:
+            prompt (str): The prompt to send
+            model_name (str): The model to use
+            generation_config (dict): Generation settings for the model
+            stage (str, optional): The pipeline stage making the call
+
+        Returns:
+            ModelResponse: The generated text and usage figures
+        """
+        start = time.perf_counter()
+        model = self._model(model_name, generation_config)
+        response = model.generate_content(prompt)
+        latency = time.perf_counter() - start
+
+        text = response.text
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or estimate_tokens(prompt)
+        output_tokens = getattr(usage, "candidates_token_count", 0) or estimate_tokens(text)
+        record_response(stage, model_name, text)
+
+        return ModelResponse(text, model_name, prompt_tokens, output_tokens, latency)
+
+    def generate_content_stream(self, prompt, model_name, generation_config, stage=None):
+        """
+        Generate content for a prompt as a stream of text chunks.
+
+        Args:
+            prompt (str): The prompt to send
+            model_name (str): The model to use
+            generation_config (dict): Generation settings for the model
+            stage (str, optional): The pipeline stage making the call
+
+        Returns:
+            ModelStream: The streamed response
+        """
+        model = self._model(model_name, generation_config)
+        response = model.generate_content(prompt, stream=True)
+
+        def chunks():
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without text parts, such as the final usage chunk
+                    text = ""
+                yield text, getattr(chunk, "usage_metadata", None)
+
+        # The underlying gRPC call can be cancelled to stop generation server-side
+        cancel = getattr(getattr(response, "_iterator", None), "cancel", None)
+        stream = ModelStream(chunks(), model_name, prompt, cancel=cancel)
+        stream.add_done_callback(
+            lambda finished, ok: record_response(stage, model_name, finished.text, finished.cancelled)
+        )
+        return stream
+
+    async def generate_content_async(self, prompt, model_name, generation_config, stage=None):
+        """
+        Generate content for a prompt without blocking the event loop.
+
+        Args:
+            prompt (str): The prompt to send
+            model_name (str): The model to use
+            generation_config (dict): Generation settings for the model
+            stage (str, optional): The pipeline stage making the call
+
+        Returns:
+            ModelResponse: The generated text and usage figures
+        """
+        start = time.perf_counter()
+        model = self._model(model_name, generation_config)
+        response = await model.generate_content_async(prompt)
+        latency = time.perf_counter() - start
+
+        text = response.text
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or estimate_tokens(prompt)
+        output_tokens = getattr(usage, "candidates_token_count", 0) or estimate_tokens(text)
+        record_response(stage, model_name, text)
+
+        return ModelResponse(text, model_name, prompt_tokens, output_tokens, latency)
+
+    async def generate_content_stream_async(self, prompt, model_name, generation_config, stage=None):
+        """
+        Generate content for a prompt as an async stream of text chunks.
+
+        Args:
+            prompt (str): The prompt to send
+            model_name (str): The model to use
+            generation_config (dict): Generation settings for the model
+            stage (str, optional): The pipeline stage making the call
+
+        Returns:
+            AsyncModelStream: The streamed response
+        """
+        model = self._model(model_name, generation_config)
+        response = await model.generate_content_async(prompt, stream=True)
+
+        async def chunks():
+            async for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without text parts, such as the final usage chunk
+                    text = ""
+                yield text, getattr(chunk, "usage_metadata", None)
+
+        cancel = getattr(getattr(response, "_iterator", None), "cancel", None)
+        stream = AsyncModelStream(chunks(), model_name, prompt, cancel=cancel)
+        stream.add_done_callback(
+            lambda finished, ok: record_response(stage, model_name, finished.text, finished.cancelled)
+        )
+        return stream
+
+class MockBackend:
+    """
+    Serves canned responses with simulated latency.
+
+    Used for offline development and for the benchmark suite, so that latency
+    and cost can be compared between configurations without calling Gemini.
+    When the generation config carries a response_schema the mock returns bare
+    JSON that matches it, as the real service does. Without one, answers are
+    wrapped in fences and commentary, and a configurable share of them ignore
+    the requested format altogether.
+    """
+
+    name = "mock"
+
+    # Simulated latency per model: (seconds per call, seconds per output token)
+    MODEL_LATENCY = {
+        "models/gemini-2.5-pro": (0.8, 0.004),
+        "models/gemini-2.5-flash": (0.25, 0.0015),
+        "models/gemini-2.5-flash-lite": (0.15, 0.001),
+    }
+    DEFAULT_LATENCY = (0.5, 0.003)
+
+    # Commentary appended after JSON answers, as real completions often do
+    CHATTY_TRAILER = (
+        "Notes on the scores above: each component was weighed on its own before the "
+        "overall score was set. The reasoning field summarizes the main considerations, "
+        "but further evidence could shift these values in either direction, and the "
+        "analysis should be read as a starting point for reflection rather than a verdict. "
+        "Different framings of the same claim may also lead to different assessments."
+    )
+
+    # Structured stages whose format instructions the mock may ignore
+    JSON_STAGES = ("claims", "empirical", "logical", "pragmatic", "perspectives")
+
+    def __init__(self, latency_scale=None, format_error_rate=None, seed=None):
+        """
+        Initialize the MockBackend.
+
+        Args:
+            latency_scale (float, optional): Multiplier applied to the simulated
+                latency. Defaults to the MOCK_LATENCY_SCALE environment variable, or 0.
+            format_error_rate (float, optional): Share of unconstrained answers that
+                do not follow the requested format. Defaults to the
+                MOCK_FORMAT_ERROR_RATE environment variable, or 0.
+            seed (int, optional): Seed for choosing which answers are malformed
+        """
+        if latency_scale is None:
+            latency_scale = float(os.environ.get('MOCK_LATENCY_SCALE', 0))
+        if format_error_rate is None:
+            format_error_rate = float(os.environ.get('MOCK_FORMAT_ERROR_RATE', 0))
+        self.latency_scale = latency_scale
+        self.format_error_rate = format_error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    @property
+    def available(self):
+        """bool: Whether the backend can serve requests."""
+        return True
+
+    def connect(self, model_names):
+        """
+        Set up the backend before the first call. The mock has nothing to connect.
+
+        Args:
+            model_names (iterable): The models the pipeline calls
+
+        Returns:
+            list: The models that were reached
+        """
+        return list(dict.fromkeys(model_names))
+
+    def generate_content(self, prompt, model_name, generation_config, stage=None):
+        """
+        Generate a canned response for a prompt.
+
+        Args:
+            prompt (str): The prompt to send
+            model_name (str): The model to simulate
+            generation_config (dict): Generation settings for the model
+            stage (str, optional): The pipeline stage making the call
+
+        Returns:
+            ModelResponse: The canned text and estimated usage figures
+        """
+        text = self._limit_output(self._build_response(prompt, stage, generation_config), generation_config)
+
+        prompt_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(text)
+
+        per_call, per_token = self.MODEL_LATENCY.get(model_name, self.DEFAULT_LATENCY)
+        latency = (per_call + per_token * output_tokens) * self.latency_scale
+        if latency > 0:
+            time.sleep(latency)
+
+        return ModelResponse(text, model_name, prompt_tokens, output_tokens, latency)
+
+    def generate_content_stream(self, prompt, model_name, generation_config, stage=None):
+        """
+        Stream a canned response for a prompt in small chunks.
+
+        Args:
+            prompt (str): The prompt to send
+            model_name (str): The model to simulate
+            generation_config (dict): Generation settings for the model
+            stage (str, optional): The pipeline stage making the call
+
+        Returns:
+            ModelStream: The streamed response
+        """
+        text = self._limit_output(self._build_response(prompt, stage, generation_config), generation_config)
+        per_call, per_token = self.MODEL_LATENCY.get(model_name, self.DEFAULT_LATENCY)
+        chunk_size = 32
+
+        def chunks():
+            if per_call * self.latency_scale > 0:
+                time.sleep(per_call * self.latency_scale)
+            for i in range(0, len(text), chunk_size):
+                chunk = text[i:i + chunk_size]
+                delay = per_token * estimate_tokens(chunk) * self.latency_scale
+                if delay > 0:
+                    time.sleep(delay)
+                yield chunk, None
+
+        return ModelStream(chunks(), model_name, prompt)
+
+    async def generate_content_async(self, prompt, model_name, generation_config, stage=None):
+        """
+        Generate a canned response for a prompt, waiting without blocking the event loop.
+
+        Args:
+            prompt (str): The prompt to send
+            model_name (str): The model to simulate
+            generation_config (dict): Generation settings for the model
+            stage (str, optional): The pipeline stage making the call
+
+        Returns:
+            ModelResponse: The canned text and estimated usage figures
+        """
+        text = self._limit_output(self._build_response(prompt, stage, generation_config), generation_config)
+
+        prompt_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(text)
+
+        per_call, per_token = self.MODEL_LATENCY.get(model_name, self.DEFAULT_LATENCY)
+        latency = (per_call + per_token * output_tokens) * self.latency_scale
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+        return ModelResponse(text, model_name, prompt_tokens, output_tokens, latency)
+
+    async def generate_content_stream_async(self, prompt, model_name, generation_config, stage=None):
+        """
+        Stream a canned response for a prompt in small chunks to an async reader.
+
+        Args:
+            prompt (str): The prompt to send
+            model_name (str): The model to simulate
+            generation_config (dict): Generation settings for the model
+            stage (str, optional): The pipeline stage making the call
+
+        Returns:
+            AsyncModelStream: The streamed response
+        """
+        text = self._limit_output(self._build_response(prompt, stage, generation_config), generation_config)
+        per_call, per_token = self.MODEL_LATENCY.get(model_name, self.DEFAULT_LATENCY)
+        chunk_size = 32
+
+        async def chunks():
+            if per_call * self.latency_scale > 0:
+                await asyncio.sleep(per_call * self.latency_scale)
+            for i in range(0, len(text), chunk_size):
+                chunk = text[i:i + chunk_size]
+                delay = per_token * estimate_tokens(chunk) * self.latency_scale
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield chunk, None
+
+        return AsyncModelStream(chunks(), model_name, prompt)
+
+    @staticmethod
+    def _limit_output(text, generation_config):
+        """Respect the output token limit the way the real service would."""
+        max_tokens = generation_config.get("max_output_tokens", 1024)
+        if estimate_tokens(text) > max_tokens:
+            return text[:max_tokens * 4]
+        return text
+
+    def _build_response(self, prompt, stage, generation_config):
+        """
+        Build a canned response in the format a stage asks for.
+
+        Args:
+            prompt (str): The prompt that was sent
+            stage (str): The pipeline stage making the call
+            generation_config (dict): Generation settings for the model
+
+        Returns:
+            str: The response text
+
+        Raises:
+            ValueError: If the canned answer does not match the requested schema
+        """
+        quoted = re.search(r'"([^"]+)"', prompt)
+        subject = quoted.group(1) if quoted else "the claim"
+
+        # Arbiter prompts with several claims list them as '[n] "claim"' and get one analysis each
+        packed = re.findall(r'^\s*\[(\d+)\] "(.*)"\s*$', prompt, re.MULTILINE)
+        if packed and stage in ("empirical", "logical", "pragmatic"):
+            body = json.dumps([
+                dict(json.loads(self._build_body(claim, stage)), claimId=int(number))
+                for number, claim in packed
+            ])
+        else:
+            body = self._build_body(subject, stage)
+        schema = generation_config.get("response_schema")
+        if schema is not None:
+            # Constrained output is the bare JSON value
+            if not matches_schema(json.loads(body), schema):
+                raise ValueError(f"Mock response for stage '{stage}' does not match its schema")
+            return body
+
+        if stage in self.JSON_STAGES and self.format_error_rate > 0:
+            with self._random_lock:
+                malformed = self._random.random() < self.format_error_rate
+                prose = self._random.random() < 0.5
+            if malformed:
+                return self._build_malformed(body, subject, prose)
+        if stage in ("empirical", "logical", "pragmatic", "perspectives"):
+            return f"```json\n{body}\n```\n\n{self.CHATTY_TRAILER}"
+        return body
+
+    @staticmethod
+    def _build_malformed(body, subject, prose):
+        """
+        Build an answer that ignores the requested JSON format.
+
+        Args:
+            body (str): The well-formed JSON answer
+            subject (str): The statement or claim quoted in the prompt
+            prose (bool): Answer in prose instead of a Python literal
+
+        Returns:
+            str: A Python-literal rendering of the answer or a prose-only answer
+        """
+        if not prose:
+            return f"Here is the analysis:\n{json.loads(body)!r}"
+        return (f"Looking at '{subject}', the evidence is mixed. I would rate it as moderately "
+                f"supported overall, though several premises are left implicit and the "
+                f"practical consequences depend heavily on context.")
+
+    def _build_body(self, subject, stage):
+        """
+        Build the content of a canned response for a stage.
+
+        Args:
+            subject (str): The statement or claim quoted in the prompt
+            stage (str): The pipeline stage making the call
+
+        Returns:
+            str: The response content
+        """
+        if stage == "claims":
+            claims = [s.strip() for s in subject.split(".") if len(s.strip()) > 10]
+            return json.dumps(claims[:3] or [subject])
+        if stage == "empirical":
+            return json.dumps({
+                "empiricalScore": 0.6,
+                "components": {
+                    "evidenceAvailability": 0.6,
+                    "measurability": 0.5,
+                    "observability": 0.7,
+                    "testability": 0.6
+                },
+                "reasoning": f"Parts of '{subject}' can be checked against observation."
+            })
+        if stage == "logical":
+            return json.dumps({
+                "logicalScore": 0.7,
+                "components": {
+                    "structure": 0.7,
+                    "consistency": 0.8,
+                    "validity": 0.6,
+                    "fallacies": 0.7
+                },
+                "reasoning": f"'{subject}' is internally consistent but leaves premises implicit.",
+                "identifiedFallacies": []
+            })
+        if stage == "pragmatic":
+            return json.dumps({
+                "pragmaticScore": 0.5,
+                "components": {
+                    "utility": 0.5,
+                    "consequences": 0.5,
+                    "stakeholderValue": 0.6,
+                    "adaptability": 0.4
+                },
+                "reasoning": f"Acting on '{subject}' has mixed practical consequences.",
+                "keyStakeholders": ["individuals", "communities"]
+            })
+        if stage == "perspectives":
+            return json.dumps([
+                {
+                    "name": name,
+                    "description": f"A {name.lower()} viewpoint.",
+                    "assessment": f"From a {name.lower()} viewpoint, '{subject}' invites scrutiny.",
+                    "score": score
+                }
+                for name, score in (("Scientific", 0.6), ("Ethical", 0.5), ("Historical", 0.4))
+            ])
+        return (f"That's an interesting belief to explore. What first led you to think that "
+                f"{subject}? What would change your mind about it?")
+
+_backend = None
+
+def get_backend():
+    """
+    Get the shared model backend for this process.
+
+    The backend is chosen by the MODEL_BACKEND environment variable
+    ("gemini" by default, or "mock") and is wrapped in a ModelRouter unless
+    MODEL_ROUTER is set to "off".
+
+    Returns:
+        ModelRouter, GeminiBackend or MockBackend: The shared backend instance
+    """
+    global _backend
+    if _backend is None:
+        backend_name = os.environ.get('MODEL_BACKEND', 'gemini').lower()
+        if backend_name == 'mock':
+            backend = MockBackend()
+        else:
+            backend = GeminiBackend()
+        logger.info("Using %s model backend", backend.name)
+
+        if os.environ.get('MODEL_ROUTER', 'on').lower() != 'off':
+            backend = ModelRouter(backend)
+        _backend = backend
+    return _backend
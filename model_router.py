@@ -0,0 +1,485 @@
+"""
+Model Router module for the Belief Explorer.
+
+This module sits between the components and the model backend. It keeps rolling
+latency and error statistics per model and sends a stage to a secondary model
+while its primary is too slow or failing, moving back once the primary recovers.
+It also accounts the tokens and cost of every call to its stage, request and tenant,
+and waits for the call scheduler before each call is sent.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from utils.metrics import metrics
+from utils.request_context import ANONYMOUS_TENANT, current_request
+from utils.scheduler import DEFAULT_PRIORITY, get_call_scheduler
+from utils.tracing import begin_span
+
+logger = logging.getLogger(__name__)
+
+# Secondary model to use when a model is degraded
+DEFAULT_FALLBACK_MODELS = {
+    "models/gemini-2.5-pro": "models/gemini-2.5-flash",
+    "models/gemini-2.5-flash": "models/gemini-2.5-flash-lite",
+}
+
+# p95 latency budget in seconds for each stage
+DEFAULT_LATENCY_BUDGETS = {
+    "claims": 10.0,
+    "empirical": 20.0,
+    "logical": 20.0,
+    "pragmatic": 20.0,
+    "perspectives": 25.0,
+    "response": 15.0,
+}
+
+class ModelStats:
+    """
+    Rolling latency and error statistics for one model.
+    """
+
+    def __init__(self, window_size=50, window_seconds=300.0):
+        """
+        Initialize the ModelStats.
+
+        Args:
+            window_size (int, optional): Maximum number of samples kept
+            window_seconds (float, optional): Maximum age of a sample in seconds
+        """
+        self.window_seconds = window_seconds
+        self.samples = deque(maxlen=window_size)
+
+    def record(self, latency, ok, now=None):
+        """
+        Record the outcome of a call.
+
+        Args:
+            latency (float): Call latency in seconds
+            ok (bool): Whether the call succeeded
+            now (float, optional): Timestamp of the call
+        """
+        self.samples.append((now if now is not None else time.monotonic(), latency, ok))
+
+    def _recent(self, now=None):
+        """Return the samples that are still inside the time window."""
+        cutoff = (now if now is not None else time.monotonic()) - self.window_seconds
+        return [sample for sample in self.samples if sample[0] >= cutoff]
+
+    def summary(self, now=None):
+        """
+        Summarize the samples in the window.
+
+        Args:
+            now (float, optional): The current timestamp
+
+        Returns:
+            dict: Sample count, p95 latency of successful calls and error rate
+        """
+        recent = self._recent(now)
+        if not recent:
+            return {"samples": 0, "p95": 0.0, "errorRate": 0.0}
+
+        latencies = sorted(latency for _, latency, ok in recent if ok)
+        errors = sum(1 for _, _, ok in recent if not ok)
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else 0.0
+        return {"samples": len(recent), "p95": p95, "errorRate": errors / len(recent)}
+
+    def clear(self):
+        """Forget all samples."""
+        self.samples.clear()
+
+class ModelRouter:
+    """
+    Routes each model call to a healthy model for its stage.
+
+    A (stage, model) pair becomes degraded when the model's p95 latency exceeds
+    the stage's budget or its error rate exceeds the threshold. Calls then go to
+    the fallback model. After the recovery period one probe call is sent to the
+    primary; if it succeeds within budget the pair is healthy again.
+    """
+
+    def __init__(self, backend, fallback_models=None, latency_budgets=None,
+                 error_threshold=None, min_samples=None, recovery_seconds=None, scheduler=None):
+        """
+        Initialize the ModelRouter.
+
+        Args:
+            backend: The model backend that serves the calls
+            fallback_models (dict, optional): Map of model to its secondary model
+            latency_budgets (dict, optional): Map of stage to p95 budget in seconds
+            error_threshold (float, optional): Error rate that marks a model degraded
+            min_samples (int, optional): Samples needed before stats are trusted
+            recovery_seconds (float, optional): Time before the primary is probed again
+            scheduler (CallScheduler, optional): Orders the calls by priority and tenant.
+                Defaults to the shared scheduler (see MODEL_MAX_CONCURRENCY).
+        """
+        self.backend = backend
+        self.scheduler = scheduler if scheduler is not None else get_call_scheduler()
+        self.fallback_models = fallback_models or self._load_json_env('MODEL_FALLBACKS', DEFAULT_FALLBACK_MODELS)
+        self.latency_budgets = latency_budgets or self._load_budgets()
+        self.error_threshold = error_threshold if error_threshold is not None else float(os.environ.get('ROUTER_ERROR_THRESHOLD', 0.3))
+        self.min_samples = min_samples if min_samples is not None else int(os.environ.get('ROUTER_MIN_SAMPLES', 5))
+        self.recovery_seconds = recovery_seconds if recovery_seconds is not None else float(os.environ.get('ROUTER_RECOVERY_SECONDS', 60))
+
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._degraded = {}  # (stage, model) -> time the pair was degraded
+        self._probing = set()
+
+    @property
+    def name(self):
+        """str: Name of the underlying backend."""
+        return self.backend.name
+
+    @property
+    def available(self):
+        """bool: Whether the underlying backend can serve requests."""
+        return self.backend.available
+
+    def connect(self, model_names):
+        """
+        Set up the underlying backend for the given models and their fallbacks.
+
+        Args:
+            model_names (iterable): The models the pipeline calls
+
+        Returns:
+            list: The models that were reached
+        """
+        names = list(dict.fromkeys(model_names))
+        fallbacks = [self.fallback_models[name] for name in names if name in self.fallback_models]
+        return self.backend.connect(names + fallbacks)
+
+    @staticmethod
+    def _load_json_env(variable, default):
+        """Load a JSON object from an environment variable, or return the default."""
+        value = os.environ.get(variable)
+        if not value:
+            return dict(default)
+        try:
+            return json.loads(value)
+        except ValueError:
+            logger.error("Ignoring invalid JSON in %s", variable)
+            return dict(default)
+
+    def _load_budgets(self):
+        """Load the latency budgets, applying ROUTER_LATENCY_BUDGET if set."""
+        budgets = self._load_json_env('ROUTER_LATENCY_BUDGETS', DEFAULT_LATENCY_BUDGETS)
+        if os.environ.get('ROUTER_LATENCY_BUDGET'):
+            budget = float(os.environ['ROUTER_LATENCY_BUDGET'])
+            budgets = {stage: budget for stage in budgets}
+        return budgets
+
+    def _stats_for(self, model_name):
+        """Get or create the stats for a model. Must hold the lock."""
+        stats = self._stats.get(model_name)
+        if stats is None:
+            stats = self._stats[model_name] = ModelStats()
+        return stats
+
+    def _budget_for(self, stage):
+        """Return the p95 latency budget of a stage."""
+        return self.latency_budgets.get(stage, max(self.latency_budgets.values(), default=30.0))
+
+    def _health_problem(self, model_name, stage):
+        """Return why a model is unhealthy for a stage, or None. Must hold the lock."""
+        summary = self._stats_for(model_name).summary()
+        if summary["samples"] < self.min_samples:
+            return None
+        if summary["errorRate"] > self.error_threshold:
+            return "error_rate"
+        if summary["p95"] > self._budget_for(stage):
+            return "latency"
+        return None
+
+    def choose_model(self, model_name, stage):
+        """
+        Choose the model that should serve a call.
+
+        Args:
+            model_name (str): The model the component asked for
+            stage (str): The pipeline stage
+
+        Returns:
+            tuple: The chosen model and the reason for the choice
+        """
+        key = (stage, model_name)
+        now = time.monotonic()
+        with self._lock:
+            degraded_at = self._degraded.get(key)
+            if degraded_at is None:
+                problem = self._health_problem(model_name, stage)
+                fallback = self.fallback_models.get(model_name)
+                if problem is None or fallback is None:
+                    return model_name, "primary"
+                self._degraded[key] = now
+                logger.warning("Routing stage '%s' from %s to %s (%s)", stage, model_name, fallback, problem)
+                metrics.set_gauge("model_router_degraded", 1, stage=stage, model=model_name)
+                return fallback, f"fallback:{problem}"
+
+            # Send a single probe to the primary once the recovery period has passed
+            if now - degraded_at >= self.recovery_seconds and key not in self._probing:
+                self._probing.add(key)
+                return model_name, "probe"
+
+            return self.fallback_models[model_name], "fallback:degraded"
+
+    def _finish_probe(self, model_name, stage, latency, ok):
+        """Mark a pair healthy after a good probe, or restart its recovery period."""
+        key = (stage, model_name)
+        with self._lock:
+            self._probing.discard(key)
+            if ok and latency <= self._budget_for(stage):
+                self._degraded.pop(key, None)
+                self._stats_for(model_name).clear()
+                logger.info("Stage '%s' recovered on %s", stage, model_name)
+                metrics.set_gauge("model_router_degraded", 0, stage=stage, model=model_name)
+            else:
+                self._degraded[key] = time.monotonic()
+
+    def _route(self, model_name, stage):
+        """Choose a model for a call and record the decision."""
+        chosen, reason = self.choose_model(model_name, stage)
+
+        metrics.inc("model_route_total", stage=stage, requested=model_name, model=chosen, reason=reason)
+        context = current_request()
+        if context is not None:
+            context.record_routing(stage, model_name, chosen, reason)
+        return chosen, reason
+
+    def _record_outcome(self, model_name, chosen, stage, reason, latency, ok):
+        """Update the rolling statistics with the outcome of a call."""
+        with self._lock:
+            self._stats_for(chosen).record(latency, ok)
+        metrics.observe("model_call_seconds", latency, stage=stage, model=chosen)
+        if not ok:
+            metrics.inc("model_call_errors_total", stage=stage, model=chosen)
+        if reason == "probe":
+            self._finish_probe(model_name, stage, latency, ok)
+
+    @staticmethod
+    def _record_usage(stage, response):
+        """Account the tokens and cost of a call to its stage, request and tenant."""
+        context = current_request()
+        stage = stage or "unknown"
+        labels = {
+            "stage": stage,
+            "model": response.model_name,
+            "tenant": context.tenant if context is not None else ANONYMOUS_TENANT
+        }
+        metrics.inc("model_prompt_tokens_total", response.prompt_tokens, **labels)
+        metrics.inc("model_output_tokens_total", response.output_tokens, **labels)
+        metrics.inc("model_cost_usd_total", response.cost, **labels)
+        if context is not None:
+            context.record_usage(stage, response.prompt_tokens, response.output_tokens, response.cost)
+
+    def _start_call(self, model_name, stage, streamed=False):
+        """Route a call and open its span."""
+        chosen, reason = self._route(model_name, stage)
+        attributes = {"stage": stage, "model": chosen, "requestedModel": model_name, "route": reason}
+        if streamed:
+            attributes["streamed"] = True
+        return chosen, reason, begin_span("model", **attributes)
+
+    def _finish_call(self, model_name, chosen, stage, reason, span, latency, response=None, ok=True, error=None):
+        """Record the outcome, token usage and span of a finished call."""
+        ok = ok and error is None
+        self._record_outcome(model_name, chosen, stage, reason, latency, ok)
+        if response is not None:
+            # Tokens of a failed or cancelled stream are billed too
+            self._record_usage(stage, response)
+        if span is not None:
+            if response is not None:
+                span.set_attributes(
+                    promptTokens=response.prompt_tokens,
+                    outputTokens=response.output_tokens,
+                    outputChars=len(response.text or "")
+                )
+                if getattr(response, "cancelled", False):
+                    span.set_attributes(cancelled=True)
+            if not ok:
+                span.status = "error"
+            span.end(error=error)
+
+    def _slot_request(self, prompt, span):
+        """Describe a call to the scheduler: its priority class, tenant and size."""
+        context = current_request()
+        priority = context.priority if context is not None else DEFAULT_PRIORITY
+        if span is not None:
+            span.set_attributes(priority=priority)
+        return priority, context.tenant if context is not None else ANONYMOUS_TENANT, len(prompt)
+
+    def _acquire_slot(self, prompt, span):
+        """Wait for the scheduler to let a call go out."""
+        if self.scheduler is not None:
+            waited = self.scheduler.acquire(*self._slot_request(prompt, span))
+            if span is not None:
+                span.set_attributes(queueMs=round(waited * 1000, 1))
+
+    async def _acquire_slot_async(self, prompt, span):
+        """Wait on the event loop for the scheduler to let a call go out."""
+        if self.scheduler is not None:
+            waited = await self.scheduler.acquire_async(*self._slot_request(prompt, span))
+            if span is not None:
+                span.set_attributes(queueMs=round(waited * 1000, 1))
+
+    def _release_slot(self):
+        """Free the call's scheduler slot."""
+        if self.scheduler is not None:
+            self.scheduler.release()
+
+    def generate_content(self, prompt, model_name, generation_config, stage=None):
+        """
+        Route a call to a healthy model and record its outcome.
+
+        Args:
+            prompt (str): The prompt to send
+            model_name (str): The model the component asked for
+            generation_config (dict): Generation settings for the model
+            stage (str, optional): The pipeline stage making the call
+
+        Returns:
+            ModelResponse: The generated text and usage figures
+        """
+        chosen, reason, span = self._start_call(model_name, stage)
+        try:
+            self._acquire_slot(prompt, span)
+        except BaseException as e:
+            self._finish_call(model_name, chosen, stage, reason, span, 0.0, error=e)
+            raise
+
+        start = time.perf_counter()
+        try:
+            response = self.backend.generate_content(prompt, chosen, generation_config, stage=stage)
+        except BaseException as e:
+            self._release_slot()
+            self._finish_call(model_name, chosen, stage, reason, span, time.perf_counter() - start, error=e)
+            raise
+        self._release_slot()
+        self._finish_call(model_name, chosen, stage, reason, span, time.perf_counter() - start, response=response)
+        return response
+
+    async def generate_content_async(self, prompt, model_name, generation_config, stage=None):
+        """
+        Route a call to a healthy model without blocking the event loop and record its outcome.
+
+        Args:
+            prompt (str): The prompt to send
+            model_name (str): The model the component asked for
+            generation_config (dict): Generation settings for the model
+            stage (str, optional): The pipeline stage making the call
+
+        Returns:
+            ModelResponse: The generated text and usage figures
+        """
+        chosen, reason, span = self._start_call(model_name, stage)
+        try:
+            await self._acquire_slot_async(prompt, span)
+        except BaseException as e:
+            self._finish_call(model_name, chosen, stage, reason, span, 0.0, error=e)
+            raise
+
+        start = time.perf_counter()
+        try:
+            response = await self.backend.generate_content_async(prompt, chosen, generation_config, stage=stage)
+        except BaseException as e:
+            self._release_slot()
+            self._finish_call(model_name, chosen, stage, reason, span, time.perf_counter() - start, error=e)
+            raise
+        self._release_slot()
+        self._finish_call(model_name, chosen, stage, reason, span, time.perf_counter() - start, response=response)
+        return response
+
+    def generate_content_stream(self, prompt, model_name, generation_config, stage=None):
+        """
+        Route a streamed call to a healthy model and record its outcome once
+        the stream is exhausted or closed.
+
+        Args:
+            prompt (str): The prompt to send
+            model_name (str): The model the component asked for
+            generation_config (dict): Generation settings for the model
+            stage (str, optional): The pipeline stage making the call
+
+        Returns:
+            ModelStream: The streamed response
+        """
+        chosen, reason, span = self._start_call(model_name, stage, streamed=True)
+        try:
+            self._acquire_slot(prompt, span)
+        except BaseException as e:
+            self._finish_call(model_name, chosen, stage, reason, span, 0.0, error=e)
+            raise
+
+        start = time.perf_counter()
+        try:
+            stream = self.backend.generate_content_stream(prompt, chosen, generation_config, stage=stage)
+        except BaseException as e:
+            self._release_slot()
+            self._finish_call(model_name, chosen, stage, reason, span, time.perf_counter() - start, error=e)
+            raise
+
+        # The slot is held until the stream is exhausted or closed
+        def finish(finished, ok):
+            self._release_slot()
+            self._finish_call(model_name, chosen, stage, reason, span, finished.latency, response=finished, ok=ok)
+
+        stream.add_done_callback(finish)
+        return stream
+
+    async def generate_content_stream_async(self, prompt, model_name, generation_config, stage=None):
+        """
+        Route a streamed call to a healthy model without blocking the event loop
+        and record its outcome once the stream is exhausted or closed.
+
+        Args:
+            prompt (str): The prompt to send
+            model_name (str): The model the component asked for
+            generation_config (dict): Generation settings for the model
+            stage (str, optional): The pipeline stage making the call
+
+        Returns:
+            AsyncModelStream: The streamed response
+        """
+        chosen, reason, span = self._start_call(model_name, stage, streamed=True)
+        try:
+            await self._acquire_slot_async(prompt, span)
+        except BaseException as e:
+            self._finish_call(model_name, chosen, stage, reason, span, 0.0, error=e)
+            raise
+
+        start = time.perf_counter()
+        try:
+            stream = await self.backend.generate_content_stream_async(prompt, chosen, generation_config, stage=stage)
+        except BaseException as e:
+            self._release_slot()
+            self._finish_call(model_name, chosen, stage, reason, span, time.perf_counter() - start, error=e)
+            raise
+
+        # The slot is held until the stream is exhausted or closed
+        def finish(finished, ok):
+            self._release_slot()
+            self._finish_call(model_name, chosen, stage, reason, span, finished.latency, response=finished, ok=ok)
+
+        stream.add_done_callback(finish)
+        return stream
+
+    def snapshot(self):
+        """
+        Report the current statistics and degraded stages.
+
+        Returns:
+            dict: Per-model stats and the list of degraded stage/model pairs
+        """
+        with self._lock:
+            return {
+                "models": {name: stats.summary() for name, stats in self._stats.items()},
+                "degraded": [
+                    {"stage": stage, "model": model, "fallback": self.fallback_models.get(model)}
+                    for stage, model in self._degraded
+                ]
+            }
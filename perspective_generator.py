@@ -5,8 +5,12 @@ This module generates multiple perspectives on a claim.
 """
 
 import logging
-import google.generativeai as genai
-from utils.config import get_gemini_api_key
+from utils.config import get_default_model
+from utils.depth_profiles import apply_stage_profile
+from utils.model_backend import get_backend
+from utils.response_parser import PERSPECTIVES_SCHEMA, has_perspective_objects, validate_perspectives
+from utils.structured_output import parse_json_stream, parse_json_stream_async, with_response_schema
+from utils.tracing import annotate
 
 logger = logging.getLogger(__name__)
 
@@ -15,143 +19,152 @@ class PerspectiveGenerator:
     Generates multiple perspectives on a claim using Gemini 2.5 Pro.
     """
     
-    def __init__(self):
-        """Initialize the PerspectiveGenerator with Gemini API."""
-        self.api_key = get_gemini_api_key()
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
-        else:
+    # Schema for constrained JSON output from the model service
+    RESPONSE_SCHEMA = PERSPECTIVES_SCHEMA
+    
+    def __init__(self, backend=None):
+        """
+        Initialize the PerspectiveGenerator with a model backend.
+        
+        Args:
+            backend (optional): The model backend to use. Defaults to the shared backend.
+        """
+        self.backend = backend or get_backend()
+        if not self.backend.available:
             logger.error("No Gemini API key found. PerspectiveGenerator will not function.")
         
         # Configure the model
-        self.model_name = "models/gemini-2.5-pro"
-        self.generation_config = {
+        self.model_name = get_default_model()
+        self.generation_config = with_response_schema({
             "temperature": 0.7,  # Higher temperature for more diverse perspectives
             "top_p": 0.9,
             "top_k": 40,
             "max_output_tokens": 1024,
-        }
+        }, self.RESPONSE_SCHEMA)
     
-    def generate_perspectives(self, claim):
+    def generate_perspectives(self, claim, stage_profile=None):
         """
         Generate multiple perspectives on a claim.
         
         Args:
             claim (str): The claim to analyze
+            stage_profile (dict, optional): Model overrides for this call
             
         Returns:
             list: A list of perspective objects
         """
-        if not claim or not self.api_key:
+        if not claim or not self.backend.available:
             return self._get_default_perspectives(claim)
         
         try:
-            # Create the prompt for perspective generation
-            prompt = f"""
-            You are analyzing this specific claim: "{claim}"
-
-            Generate EXACTLY 3 different perspectives on THIS CLAIM ONLY.
-
-            Your response must be a JSON array with 3 objects, each containing:
-            - "name": Brief title of perspective (e.g., "Scientific" or "Ethical")
-            - "description": One sentence explaining this viewpoint
-            - "assessment": One sentence evaluating THE CLAIM from this perspective
-            - "score": A score from 0.0 to 1.0 representing how well the claim aligns with this perspective
-
-            Do not add any text outside the JSON array.
-            Example format (but about the provided claim, not this example):
-            [
-              {{
-                "name": "Perspective1",
-                "description": "Description of this perspective.",
-                "assessment": "Assessment of the original claim from this perspective.",
-                "score": 0.7
-              }},
-              {{
-                "name": "Perspective2",
-                "description": "Description of perspective 2.",
-                "assessment": "Assessment from perspective 2.",
-                "score": 0.5
-              }},
-              {{
-                "name": "Perspective3", 
-                "description": "Description of perspective 3.",
-                "assessment": "Assessment from perspective 3.",
-                "score": 0.3
-              }}
-            ]
-            """
-            
-            # Generate response from Gemini
-            model = genai.GenerativeModel(
-                model_name=self.model_name,
-                generation_config=self.generation_config
-            )
-            
-            response = model.generate_content(prompt)
-            
-            # Process the response to extract the perspectives
-            perspectives = self._parse_perspectives_from_response(response.text)
-            
-            logger.info(f"Generated {len(perspectives)} perspectives for claim: {claim[:50]}...")
-            return perspectives
-            
+            stream = self.backend.generate_content_stream(**self._request(claim, stage_profile))
+            # Stop generation as soon as the JSON array of perspectives is complete
+            return self._accept(claim, parse_json_stream(stream, expect="array", accept=has_perspective_objects))
         except Exception as e:
-            logger.error(f"Error generating perspectives: {str(e)}", exc_info=True)
-            return self._get_default_perspectives(claim)
+            return self._fail(claim, e)
     
-    def _parse_perspectives_from_response(self, response_text):
+    async def generate_perspectives_async(self, claim, stage_profile=None):
         """
-        Parse perspectives from the model's response text.
+        Generate multiple perspectives on a claim without blocking the event loop.
         
         Args:
-            response_text (str): The raw response from the model
+            claim (str): The claim to analyze
+            stage_profile (dict, optional): Model overrides for this call
             
         Returns:
             list: A list of perspective objects
         """
+        if not claim or not self.backend.available:
+            return self._get_default_perspectives(claim)
+        
         try:
-            # Try to find a JSON-like structure in the response
-            import json
-            import re
-            
-            # Extract JSON array using regex
-            json_match = re.search(r'(\[[\s\S]*\])', response_text)
-            if json_match:
-                json_str = json_match.group(1)
-                perspectives = json.loads(json_str)
-                
-                # Validate the structure
-                if not isinstance(perspectives, list):
-                    raise ValueError("Perspectives is not a list")
-                
-                # Ensure each perspective has the required fields
-                valid_perspectives = []
-                for perspective in perspectives:
-                    if not isinstance(perspective, dict):
-                        continue
-                    
-                    # Ensure required fields exist
-                    if not all(key in perspective for key in ["name", "description", "assessment"]):
-                        continue
-                    
-                    # Add score if missing
-                    if "score" not in perspective:
-                        perspective["score"] = 0.5
-                    
-                    valid_perspectives.append(perspective)
-                
-                # Ensure we have at least one valid perspective
-                if not valid_perspectives:
-                    raise ValueError("No valid perspectives found")
-                
-                return valid_perspectives
+            stream = await self.backend.generate_content_stream_async(**self._request(claim, stage_profile))
+            return self._accept(claim, await parse_json_stream_async(
+                stream,
+                expect="array",
+                accept=has_perspective_objects
+            ))
+        except Exception as e:
+            return self._fail(claim, e)
+    
+    def _request(self, claim, stage_profile=None):
+        """
+        Build the model call that generates a claim's perspectives.
+        
+        Args:
+            claim (str): The claim to analyze
+            stage_profile (dict, optional): Model overrides for this call
             
-            raise ValueError("Could not find JSON array in response")
+        Returns:
+            dict: The prompt, model name, generation config and stage of the call
+        """
+        model_name, generation_config = apply_stage_profile(
+            self.model_name, self.generation_config, stage_profile
+        )
+        return {
+            "prompt": self._build_prompt(claim),
+            "model_name": model_name,
+            "generation_config": generation_config,
+            "stage": "perspectives"
+        }
+    
+    def _accept(self, claim, parsed):
+        """Validate the model's parsed perspectives on a claim."""
+        perspectives = validate_perspectives(parsed)
+        annotate(parse="ok")
+        logger.info("Generated %s perspectives for claim: %s...", len(perspectives), claim[:50])
+        return perspectives
+    
+    def _fail(self, claim, error):
+        """Log a failed generation and fall back to the default perspectives."""
+        logger.error("Error generating perspectives: %s", error, exc_info=True)
+        annotate(parse="fallback", error=type(error).__name__)
+        return self._get_default_perspectives(claim)
+    
+    def _build_prompt(self, claim):
+        """
+        Build the perspective generation prompt for a claim.
+        
+        Args:
+            claim (str): The claim to analyze
             
-        except Exception as e:
-            logger.error(f"Error parsing perspectives: {str(e)}", exc_info=True)
-            return self._get_default_perspectives()
+        Returns:
+            str: The prompt
+        """
+        return f"""
+        You are analyzing this specific claim: "{claim}"
+        
+        Generate EXACTLY 3 different perspectives on THIS CLAIM ONLY.
+        
+        Your response must be a JSON array with 3 objects, each containing:
+        - "name": Brief title of perspective (e.g., "Scientific" or "Ethical")
+        - "description": One sentence explaining this viewpoint
+        - "assessment": One sentence evaluating THE CLAIM from this perspective
+        - "score": A score from 0.0 to 1.0 representing how well the claim aligns with this perspective
+        
+        Do not add any text outside the JSON array.
+        Example format (but about the provided claim, not this example):
+        [
+          {{
+            "name": "Perspective1",
+            "description": "Description of this perspective.",
+            "assessment": "Assessment of the original claim from this perspective.",
+            "score": 0.7
+          }},
+          {{
+            "name": "Perspective2",
+            "description": "Description of perspective 2.",
+            "assessment": "Assessment from perspective 2.",
+            "score": 0.5
+          }},
+          {{
+            "name": "Perspective3", 
+            "description": "Description of perspective 3.",
+            "assessment": "Assessment from perspective 3.",
+            "score": 0.3
+          }}
+        ]
+        """
     
     def _get_default_perspectives(self, claim=None):
         """
@@ -0,0 +1,257 @@
+"""
+Profiling utilities for the Belief Explorer backend.
+
+Runs cProfile over individual production requests, either when an admin asks
+for it with a request header or for a random sample of requests, and keeps the
+profiles in a directory so they can be downloaded and opened with pstats or
+snakeviz. Requests that are not profiled only pay for one random draw.
+"""
+
+import io
+import os
+import hmac
+import json
+import time
+import pstats
+import random
+import cProfile
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = ".prof"
+
+class RequestProfiler:
+    """
+    Profiles selected requests and keeps the most recent profiles on disk.
+
+    Only one request is profiled at a time: cProfile hooks a single thread, and
+    a second profiler would also slow the request it shares the process with.
+    A request selected while another is being profiled runs unprofiled.
+    """
+
+    def __init__(self, directory, admin_token=None, sample_rate=0.0, max_profiles=100):
+        """
+        Initialize the RequestProfiler.
+
+        Args:
+            directory (str): Directory the profiles are written to
+            admin_token (str, optional): Token that requests a profile through the
+                X-Profile header and authorizes the admin endpoints
+            sample_rate (float, optional): Share of requests profiled at random
+            max_profiles (int, optional): Number of profiles kept; older ones are deleted
+        """
+        self.directory = directory
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.max_profiles = max_profiles
+        self._busy = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def is_admin(self, token):
+        """
+        Check an admin token.
+
+        Args:
+            token (str): The token presented by the caller
+
+        Returns:
+            bool: Whether the token matches the configured admin token
+        """
+        if not self.admin_token or not token:
+            return False
+        return hmac.compare_digest(token.encode('utf-8'), self.admin_token.encode('utf-8'))
+
+    def select(self, requested_token=None):
+        """
+        Decide whether to profile a request.
+
+        Args:
+            requested_token (str, optional): The X-Profile header value
+
+        Returns:
+            str or None: "requested" or "sampled", or None to run unprofiled
+        """
+        if requested_token and self.is_admin(requested_token):
+            return "requested"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    @contextmanager
+    def profile(self, profile_id, reason, endpoint=None):
+        """
+        Profile a block and save the profile when it finishes.
+
+        Args:
+            profile_id (str): The id the profile is saved under, such as the request id
+            reason (str): Why the request is profiled
+            endpoint (str, optional): The endpoint being served
+
+        Yields:
+            str or None: The profile id, or None if another request is being profiled
+        """
+        if not self._busy.acquire(blocking=False):
+            metrics.inc("profiles_skipped_total", reason=reason)
+            yield None
+            return
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                yield profile_id
+            finally:
+                profiler.disable()
+            self._save(profiler, profile_id, {
+                "id": profile_id,
+                "reason": reason,
+                "endpoint": endpoint,
+                "durationSeconds": round(time.perf_counter() - start, 4),
+                "createdAt": datetime.now(timezone.utc).isoformat()
+            })
+        finally:
+            self._busy.release()
+
+    def _save(self, profiler, profile_id, info):
+        """Write a profile and its description, then prune old profiles."""
+        path = os.path.join(self.directory, profile_id + PROFILE_SUFFIX)
+        try:
+            profiler.dump_stats(path)
+            with open(path[:-len(PROFILE_SUFFIX)] + ".json", 'w', encoding='utf-8') as f:
+                json.dump(info, f)
+        except OSError as e:
+            logger.error("Could not save profile %s: %s", profile_id, e)
+            return
+        metrics.inc("profiles_captured_total", reason=info["reason"])
+        logger.info("Saved %s profile %s (%.2f s)", info["reason"], profile_id, info["durationSeconds"])
+        self._prune()
+
+    def _prune(self):
+        """Delete the oldest profiles beyond max_profiles."""
+        for info in self.list_profiles()[self.max_profiles:]:
+            for suffix in (PROFILE_SUFFIX, ".json"):
+                try:
+                    os.remove(os.path.join(self.directory, info["id"] + suffix))
+                except OSError:
+                    pass
+
+    def list_profiles(self):
+        """
+        List the saved profiles, newest first.
+
+        Returns:
+            list: Descriptions of the profiles (id, reason, endpoint, duration, time)
+        """
+        profiles = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        profiles.sort(key=lambda info: info.get("createdAt", ""), reverse=True)
+        return profiles
+
+    def profile_path(self, profile_id):
+        """
+        Get the path of a saved profile.
+
+        Args:
+            profile_id (str): The profile id
+
+        Returns:
+            str or None: The path of the pstats file, or None if there is no such profile
+        """
+        # Ids are request ids; anything else cannot name a profile
+        if not profile_id or not profile_id.isalnum():
+            return None
+        path = os.path.join(self.directory, profile_id + PROFILE_SUFFIX)
+        return path if os.path.exists(path) else None
+
+    def render_text(self, profile_id, sort="cumulative", limit=50):
+        """
+        Render a saved profile as a pstats text report.
+
+        Args:
+            profile_id (str): The profile id
+            sort (str, optional): pstats sort key, such as "cumulative" or "tottime"
+            limit (int, optional): Number of functions listed
+
+        Returns:
+            str or None: The report, or None if there is no such profile
+
+        Raises:
+            KeyError: If the sort key is not known to pstats
+        """
+        path = self.profile_path(profile_id)
+        if path is None:
+            return None
+        output = io.StringIO()
+        stats = pstats.Stats(path, stream=output)
+        stats.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+_profiler = None
+_profiler_configured = False
+_profiler_lock = threading.Lock()
+
+def get_profiler():
+    """
+    Get the shared request profiler for this process.
+
+    The profiler is on when ADMIN_TOKEN is set or PROFILE_SAMPLE_RATE is above
+    zero. Profiles are written to PROFILE_DIR (a temporary directory by default)
+    and the newest PROFILE_MAX_COUNT are kept. The settings are read once.
+
+    Returns:
+        RequestProfiler or None: The profiler, or None when profiling is off
+    """
+    global _profiler, _profiler_configured
+    if _profiler_configured:
+        return _profiler
+    with _profiler_lock:
+        if not _profiler_configured:
+            admin_token = os.environ.get('ADMIN_TOKEN')
+            sample_rate = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+            if admin_token or sample_rate > 0:
+                directory = os.environ.get('PROFILE_DIR') or os.path.join(
+                    tempfile.gettempdir(), "belief-explorer-profiles"
+                )
+                _profiler = RequestProfiler(
+                    directory,
+                    admin_token=admin_token,
+                    sample_rate=sample_rate,
+                    max_profiles=int(os.environ.get('PROFILE_MAX_COUNT', 100))
+                )
+            _profiler_configured = True
+    return _profiler
+
+@contextmanager
+def profile_request(profile_id, requested_token=None, endpoint=None):
+    """
+    Profile a request if an admin asked for it or it is sampled.
+
+    Args:
+        profile_id (str): The id the profile is saved under, such as the request id
+        requested_token (str, optional): The X-Profile header value
+        endpoint (str, optional): The endpoint being served
+
+    Yields:
+        str or None: The profile id when the request is profiled, otherwise None
+    """
+    profiler = get_profiler()
+    reason = profiler.select(requested_token) if profiler is not None else None
+    if reason is None:
+        yield None
+        return
+    with profiler.profile(profile_id, reason, endpoint) as active_id:
+        yield active_id
@@ -0,0 +1,206 @@
+"""
+Request context utilities for the Belief Explorer backend.
+
+Holds per-request state (request id, tenant, priority, routing decisions, token usage,
+stages that fell back to defaults, ...) in a context
+variable so components can record details without threading extra arguments
+through every call.
+"""
+
+import time
+import uuid
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from utils.tracing import start_span
+
+_current_request = ContextVar("belief_explorer_request", default=None)
+
+ANONYMOUS_TENANT = "anonymous"
+
+def tenant_for_key(api_key):
+    """
+    Derive the tenant id of an API key.
+
+    The id is a short digest, so keys never appear in metrics, logs or events.
+
+    Args:
+        api_key (str or None): The key sent in the X-API-Key header
+
+    Returns:
+        str: The tenant id, or "anonymous" for requests without a key
+    """
+    if not api_key:
+        return ANONYMOUS_TENANT
+    return "key-" + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+
+class RequestContext:
+    """
+    State collected while serving a single analysis request.
+    """
+
+    def __init__(self, request_id=None, tenant=None, priority=None):
+        """
+        Initialize the RequestContext.
+
+        Args:
+            request_id (str, optional): An existing request id to reuse
+            tenant (str, optional): The tenant the request is served for
+            priority (str, optional): The priority class of its model calls
+                ("interactive", "streaming" or "batch"; interactive by default)
+        """
+        self.request_id = request_id or uuid.uuid4().hex
+        self.tenant = tenant or ANONYMOUS_TENANT
+        self.priority = priority or "interactive"
+        self.routing = []
+        self.timings = {}
+        self.usage = {}
+        self.fallbacks = []
+        self.analyzed_claims = 0
+
+    def record_routing(self, stage, requested_model, model, reason):
+        """
+        Record which model served a stage.
+
+        Args:
+            stage (str): The pipeline stage
+            requested_model (str): The model the component asked for
+            model (str): The model that actually served the call
+            reason (str): Why the router chose that model
+        """
+        self.routing.append({
+            "stage": stage,
+            "requestedModel": requested_model,
+            "model": model,
+            "reason": reason
+        })
+
+    def record_analyzed_claim(self):
+        """Count a claim whose arbiters ran, rather than being served from a cache or an earlier turn."""
+        self.analyzed_claims += 1
+
+    def record_fallback(self, stage):
+        """
+        Record that a stage answered with its default output instead of a model's.
+
+        Args:
+            stage (str): The pipeline stage
+        """
+        if stage not in self.fallbacks:
+            self.fallbacks.append(stage)
+
+    def record_timing(self, stage, seconds):
+        """
+        Add time spent in a pipeline stage. Stages that run once per claim accumulate.
+
+        Args:
+            stage (str): The pipeline stage
+            seconds (float): The time spent
+        """
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def record_usage(self, stage, prompt_tokens, output_tokens, cost):
+        """
+        Add the token usage of a model call to its stage.
+
+        Args:
+            stage (str): The pipeline stage
+            prompt_tokens (int): Prompt tokens of the call
+            output_tokens (int): Output tokens of the call
+            cost (float): Estimated cost of the call in USD
+        """
+        usage = self.usage.get(stage)
+        if usage is None:
+            usage = self.usage[stage] = {"calls": 0, "promptTokens": 0, "outputTokens": 0, "costUsd": 0.0}
+        usage["calls"] += 1
+        usage["promptTokens"] += prompt_tokens
+        usage["outputTokens"] += output_tokens
+        usage["costUsd"] += cost
+
+    def usage_summary(self):
+        """
+        Summarize the token usage of the request.
+
+        Returns:
+            dict: Totals and a per-stage breakdown of calls, tokens and cost
+        """
+        stages = {
+            stage: dict(usage, costUsd=round(usage["costUsd"], 6))
+            for stage, usage in self.usage.items()
+        }
+        return {
+            "promptTokens": sum(usage["promptTokens"] for usage in stages.values()),
+            "outputTokens": sum(usage["outputTokens"] for usage in stages.values()),
+            "costUsd": round(sum(usage["costUsd"] for usage in self.usage.values()), 6),
+            "stages": stages
+        }
+
+    def to_metadata(self):
+        """
+        Build the metadata block returned with the response.
+
+        Returns:
+            dict: Request metadata. When a stage fell back to its default output,
+                "degraded" is "fallback" and "fallbacks" lists those stages.
+        """
+        metadata = {
+            "requestId": self.request_id,
+            "routing": list(self.routing),
+            "usage": self.usage_summary()
+        }
+        if self.fallbacks:
+            metadata["degraded"] = "fallback"
+            metadata["fallbacks"] = list(self.fallbacks)
+        return metadata
+
+def current_request():
+    """
+    Get the context of the request being served.
+
+    Returns:
+        RequestContext or None: The current request context, if any
+    """
+    return _current_request.get()
+
+@contextmanager
+def request_scope(request_id=None, tenant=None, priority=None):
+    """
+    Open a request context, or reuse the one that is already active.
+
+    Args:
+        request_id (str, optional): The id for a new context
+        tenant (str, optional): The tenant for a new context
+        priority (str, optional): The priority class for a new context
+
+    Yields:
+        RequestContext: The active request context
+    """
+    existing = _current_request.get()
+    if existing is not None:
+        yield existing
+        return
+
+    context = RequestContext(request_id, tenant, priority)
+    token = _current_request.set(context)
+    try:
+        yield context
+    finally:
+        _current_request.reset(token)
+
+@contextmanager
+def stage_timer(stage):
+    """
+    Time a block as a pipeline stage of the current request, if there is one,
+    and trace it as a span when the request is traced.
+
+    Args:
+        stage (str): The pipeline stage
+    """
+    start = time.perf_counter()
+    try:
+        with start_span(stage):
+            yield
+    finally:
+        context = _current_request.get()
+        if context is not None:
+            context.record_timing(stage, time.perf_counter() - start)
@@ -0,0 +1,59 @@
+"""
+Offline re-scoring script for the Belief Explorer.
+
+Re-integrates the analyses in an archive (see ANALYSIS_ARCHIVE_PATH) with a
+versioned formula set, without calling the model again. Interrupted runs resume
+from their checkpoint when started again with the same arguments.
+
+    python backend/rescore.py analyses.jsonl analyses.v2.jsonl --version 2
+    python backend/rescore.py analyses.jsonl analyses.v2.jsonl --workers 8 --chunk-size 20000
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models.analysis_integrator import FORMULA_SETS
+from backend.models.analysis_rescorer import AnalysisRescorer
+
+def main(argv=None):
+    """Parse arguments and re-score the archive."""
+    parser = argparse.ArgumentParser(description="Re-score archived Belief Explorer analyses")
+    parser.add_argument("source", help="JSONL analysis archive to read")
+    parser.add_argument("output", help="Where to write the re-scored archive")
+    parser.add_argument("--version", type=int, choices=sorted(FORMULA_SETS),
+                        help="Integrator version to apply (default: latest)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Records per worker task")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: OUTPUT.checkpoint)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    rescorer = AnalysisRescorer(
+        args.source,
+        args.output,
+        version=args.version,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        checkpoint_path=args.checkpoint
+    )
+    start = time.perf_counter()
+
+    def progress(checkpoint):
+        done = checkpoint["sourceOffset"] / max(1, checkpoint["sourceSize"])
+        print(f"\r{done:6.1%}  {checkpoint['rescored']} re-scored, "
+              f"{checkpoint['skipped'] + checkpoint['unreadable']} skipped", end="", flush=True)
+
+    summary = rescorer.run(progress=progress)
+    print(f"\nRe-scored {summary['rescored']} analyses with integrator version {summary['version']} "
+          f"in {time.perf_counter() - start:.1f} s ({summary['skipped']} without arbiter outputs, "
+          f"{summary['unreadable']} unreadable lines) -> {summary['output']}")
+
+if __name__ == "__main__":
+    main()
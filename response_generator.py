@@ -5,8 +5,9 @@ This module generates thoughtful, non-judgmental responses to user beliefs.
 """
 
 import logging
-import google.generativeai as genai
-from utils.config import get_gemini_api_key
+from utils.config import get_default_model
+from utils.depth_profiles import apply_stage_profile
+from utils.model_backend import get_backend
 
 logger = logging.getLogger(__name__)
 
@@ -15,16 +16,19 @@ class ResponseGenerator:
     Generates thoughtful, non-judgmental responses to user beliefs using Gemini 2.5 Pro.
     """
     
-    def __init__(self):
-        """Initialize the ResponseGenerator with Gemini API."""
-        self.api_key = get_gemini_api_key()
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
-        else:
+    def __init__(self, backend=None):
+        """
+        Initialize the ResponseGenerator with a model backend.
+        
+        Args:
+            backend (optional): The model backend to use. Defaults to the shared backend.
+        """
+        self.backend = backend or get_backend()
+        if not self.backend.available:
             logger.error("No Gemini API key found. ResponseGenerator will not function.")
         
         # Configure the model
-        self.model_name = "models/gemini-2.5-pro"
+        self.model_name = get_default_model()
         self.generation_config = {
             "temperature": 0.7,  # Balanced temperature for natural responses
             "top_p": 0.9,
@@ -32,7 +36,7 @@ class ResponseGenerator:
             "max_output_tokens": 1024,
         }
     
-    def generate_response(self, claim, analysis, conversation_history):
+    def generate_response(self, claim, analysis, conversation_history, stage_profile=None, summary=None):
         """
         Generate a thoughtful response to a user's belief.
         
@@ -40,82 +44,152 @@ class ResponseGenerator:
             claim (str): The user's claim
             analysis (dict): The integrated analysis of the claim
             conversation_history (list): Previous conversation turns
+            stage_profile (dict, optional): Model overrides for this call
+            summary (str, optional): Summary of the turns before conversation_history
             
         Returns:
             str: A thoughtful response to the user
         """
-        if not claim or not self.api_key:
+        if not claim or not self.backend.available:
             return self._get_default_response(claim)
         
         try:
-            # Extract key insights from the analysis
-            verifact_score = analysis.get("verifactScore", {}).get("overallScore", 0.5)
-            components = analysis.get("verifactScore", {}).get("components", {})
-            empirical_score = components.get("empiricalVerifiability", 0.5)
-            logical_score = components.get("logicalConsistency", 0.5)
-            
-            # Get perspectives if available
-            perspectives = analysis.get("perspectives", [])
-            perspective_insights = ""
-            if perspectives and len(perspectives) > 0:
-                perspective = perspectives[0]  # Use the first perspective for insights
-                perspective_insights = f"""
-                From a {perspective.get('name', 'different').lower()} perspective: {perspective.get('assessment', '')}
-                """
-            
-            # Format conversation history for the prompt
-            formatted_history = ""
-            if conversation_history:
-                for turn in conversation_history[-3:]:  # Use last 3 turns at most
-                    role = turn.get("role", "")
-                    content = turn.get("content", "")
-                    if role and content:
-                        formatted_history += f"{role.capitalize()}: {content}\n"
-            
-            # Create the prompt for response generation
-            prompt = f"""
-            You are a Belief Explorer, a helpful and curious AI assistant using the Socratic method. Your goal is to help the user reflect on their beliefs. Do NOT debate, agree, disagree, or give opinions.
-
-            The user stated the belief: "{claim}"
-
-            Analysis insights:
-            - Empirical verifiability: {empirical_score:.2f}
-            - Logical consistency: {logical_score:.2f}
-            - Overall Verifact score: {verifact_score:.2f}
-            {perspective_insights}
-
-            Recent conversation:
-            {formatted_history}
-
-            Generate a thoughtful, non-judgmental response that:
-            1. Acknowledges the user's belief without agreeing or disagreeing
-            2. Asks one or two open-ended, reflective questions about this specific belief
-            3. Encourages the user to think about their reasoning or the evidence
-            4. Uses a warm, curious tone that invites further exploration
-
-            Your response should be 2-4 sentences long and end with a question.
-            """
-            
-            # Generate response from Gemini
-            model = genai.GenerativeModel(
-                model_name=self.model_name,
-                generation_config=self.generation_config
+            response = self.backend.generate_content(
+                **self._request(claim, analysis, conversation_history, stage_profile, summary)
             )
+            return self._accept(claim, response.text)
+        except Exception as e:
+            return self._fail(claim, e)
+    
+    async def generate_response_async(self, claim, analysis, conversation_history, stage_profile=None,
+                                      summary=None):
+        """
+        Generate a thoughtful response to a user's belief without blocking the event loop.
+        
+        Args:
+            claim (str): The user's claim
+            analysis (dict): The integrated analysis of the claim
+            conversation_history (list): Previous conversation turns
+            stage_profile (dict, optional): Model overrides for this call
+            summary (str, optional): Summary of the turns before conversation_history
             
-            response = model.generate_content(prompt)
-            
-            # Clean up the response
-            response_text = response.text.strip()
-            
-            # Remove any prefixes like "Response:" or "Assistant:"
-            response_text = response_text.replace("Response:", "").replace("Assistant:", "").strip()
+        Returns:
+            str: A thoughtful response to the user
+        """
+        if not claim or not self.backend.available:
+            return self._get_default_response(claim)
+        
+        try:
+            response = await self.backend.generate_content_async(
+                **self._request(claim, analysis, conversation_history, stage_profile, summary)
+            )
+            return self._accept(claim, response.text)
+        except Exception as e:
+            return self._fail(claim, e)
+    
+    def _request(self, claim, analysis, conversation_history, stage_profile=None, summary=None):
+        """
+        Build the model call that writes the response to a claim.
+        
+        Args:
+            claim (str): The user's claim
+            analysis (dict): The integrated analysis of the claim
+            conversation_history (list): Previous conversation turns
+            stage_profile (dict, optional): Model overrides for this call
+            summary (str, optional): Summary of the turns before conversation_history
             
-            logger.info(f"Generated response for claim: {claim[:50]}...")
-            return response_text
+        Returns:
+            dict: The prompt, model name, generation config and stage of the call
+        """
+        model_name, generation_config = apply_stage_profile(
+            self.model_name, self.generation_config, stage_profile
+        )
+        return {
+            "prompt": self._build_prompt(claim, analysis, conversation_history, summary),
+            "model_name": model_name,
+            "generation_config": generation_config,
+            "stage": "response"
+        }
+    
+    def _accept(self, claim, response_text):
+        """Clean up the model's response, removing any prefixes like "Response:" or "Assistant:"."""
+        response_text = response_text.strip().replace("Response:", "").replace("Assistant:", "").strip()
+        logger.info("Generated response for claim: %s...", claim[:50])
+        return response_text
+    
+    def _fail(self, claim, error):
+        """Log a failed generation and fall back to the default response."""
+        logger.error("Error generating response: %s", error, exc_info=True)
+        return self._get_default_response(claim)
+    
+    def _build_prompt(self, claim, analysis, conversation_history, summary=None):
+        """
+        Build the response prompt from a claim, its analysis and the recent conversation.
+        
+        Args:
+            claim (str): The user's claim
+            analysis (dict): The integrated analysis of the claim
+            conversation_history (list): Previous conversation turns
+            summary (str, optional): Summary of the turns before conversation_history
             
-        except Exception as e:
-            logger.error(f"Error generating response: {str(e)}", exc_info=True)
-            return self._get_default_response(claim)
+        Returns:
+            str: The prompt
+        """
+        # Extract key insights from the analysis
+        verifact_score = analysis.get("verifactScore", {}).get("overallScore", 0.5)
+        components = analysis.get("verifactScore", {}).get("components", {})
+        empirical_score = components.get("empiricalVerifiability", 0.5)
+        logical_score = components.get("logicalConsistency", 0.5)
+        
+        # Get perspectives if available
+        perspectives = analysis.get("perspectives", [])
+        perspective_insights = ""
+        if perspectives and len(perspectives) > 0:
+            perspective = perspectives[0]  # Use the first perspective for insights
+            perspective_insights = f"""
+            From a {perspective.get('name', 'different').lower()} perspective: {perspective.get('assessment', '')}
+            """
+        
+        # Format conversation history for the prompt
+        formatted_history = ""
+        if conversation_history:
+            for turn in conversation_history[-3:]:  # Use last 3 turns at most
+                role = turn.get("role", "")
+                content = turn.get("content", "")
+                if role and content:
+                    formatted_history += f"{role.capitalize()}: {content}\n"
+        
+        # Older turns of a server-side session arrive condensed
+        earlier_conversation = ""
+        if summary:
+            earlier_conversation = f"""
+        Earlier in the conversation:
+        {summary}
+        """
+        
+        # Create the prompt for response generation
+        return f"""
+        You are a Belief Explorer, a helpful and curious AI assistant using the Socratic method. Your goal is to help the user reflect on their beliefs. Do NOT debate, agree, disagree, or give opinions.
+        
+        The user stated the belief: "{claim}"
+        
+        Analysis insights:
+        - Empirical verifiability: {empirical_score:.2f}
+        - Logical consistency: {logical_score:.2f}
+        - Overall Verifact score: {verifact_score:.2f}
+        {perspective_insights}
+        {earlier_conversation}
+        Recent conversation:
+        {formatted_history}
+        
+        Generate a thoughtful, non-judgmental response that:
+        1. Acknowledges the user's belief without agreeing or disagreeing
+        2. Asks one or two open-ended, reflective questions about this specific belief
+        3. Encourages the user to think about their reasoning or the evidence
+        4. Uses a warm, curious tone that invites further exploration
+        
+        Your response should be 2-4 sentences long and end with a question.
+        """
     
     def _get_default_response(self, claim=None):
         """
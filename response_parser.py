@@ -0,0 +1,401 @@
+"""
+Response parsing utilities for the Belief Explorer backend.
+
+One place for turning raw model output into the shapes the components expect:
+JSON objects and arrays, Python-list-style string lists, and typed validation
+of arbiter analyses and perspectives. Every extractor scans its input in linear
+time and never evaluates model output as code.
+"""
+
+import math
+import logging
+from utils.structured_output import parse_json_text
+
+logger = logging.getLogger(__name__)
+
+# Expected shape of each arbiter's analysis
+ANALYSIS_SHAPES = {
+    "empirical": {
+        "score": "empiricalScore",
+        "components": ("evidenceAvailability", "measurability", "observability", "testability"),
+        "lists": (),
+    },
+    "logical": {
+        "score": "logicalScore",
+        "components": ("structure", "consistency", "validity", "fallacies"),
+        "lists": ("identifiedFallacies",),
+    },
+    "pragmatic": {
+        "score": "pragmaticScore",
+        "components": ("utility", "consequences", "stakeholderValue", "adaptability"),
+        "lists": ("keyStakeholders",),
+    },
+}
+
+PERSPECTIVE_FIELDS = ("name", "description", "assessment")
+
+# Response schemas use the OpenAPI subset accepted by Gemini's response_schema
+_SCORE_SCHEMA = {"type": "number", "description": "Score from 0.0 to 1.0"}
+
+def analysis_schema(kind):
+    """
+    Build the response schema of an arbiter's analysis from its shape.
+
+    Args:
+        kind (str): "empirical", "logical" or "pragmatic"
+
+    Returns:
+        dict: The response schema
+    """
+    shape = ANALYSIS_SHAPES[kind]
+    properties = {
+        shape["score"]: dict(_SCORE_SCHEMA),
+        "components": {
+            "type": "object",
+            "properties": {key: dict(_SCORE_SCHEMA) for key in shape["components"]},
+            "required": list(shape["components"]),
+        },
+        "reasoning": {"type": "string"},
+    }
+    for key in shape["lists"]:
+        properties[key] = {"type": "array", "items": {"type": "string"}}
+
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": [shape["score"], "components", "reasoning", *shape["lists"]],
+    }
+
+CLAIMS_SCHEMA = {
+    "type": "array",
+    "items": {"type": "string"},
+    # Empty for replies that make no claim of their own
+    "min_items": 0,
+    "max_items": 3,
+}
+
+PERSPECTIVES_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "description": {"type": "string"},
+            "assessment": {"type": "string"},
+            "score": dict(_SCORE_SCHEMA),
+        },
+        "required": [*PERSPECTIVE_FIELDS, "score"],
+    },
+    "min_items": 1,
+}
+
+_SCHEMA_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+}
+
+def matches_schema(value, schema):
+    """
+    Check a value against a response schema.
+
+    Args:
+        value: The parsed JSON value
+        schema (dict): The response schema
+
+    Returns:
+        bool: Whether the value has the schema's types, required keys and item counts
+    """
+    schema_type = schema.get("type", "").lower()
+    if schema_type in ("number", "integer") and isinstance(value, bool):
+        return False
+    if schema_type in _SCHEMA_TYPES and not isinstance(value, _SCHEMA_TYPES[schema_type]):
+        return False
+
+    if schema_type == "object":
+        if any(key not in value for key in schema.get("required", ())):
+            return False
+        properties = schema.get("properties", {})
+        return all(matches_schema(value[key], properties[key]) for key in properties if key in value)
+
+    if schema_type == "array":
+        if len(value) < schema.get("min_items", 0):
+            return False
+        if "max_items" in schema and len(value) > schema["max_items"]:
+            return False
+        items = schema.get("items")
+        return items is None or all(matches_schema(item, items) for item in value)
+
+    return True
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "0": "\0",
+            "\\": "\\", "'": "'", '"': '"', "/": "/"}
+
+def extract_json_object(text):
+    """
+    Extract the first complete JSON object from a response.
+
+    Args:
+        text (str): The raw response from the model
+
+    Returns:
+        dict: The parsed object
+
+    Raises:
+        ValueError: If no complete object is found
+    """
+    return parse_json_text(text or "", expect="object")
+
+def extract_json_array(text, accept=None):
+    """
+    Extract the first complete JSON array from a response.
+
+    Args:
+        text (str): The raw response from the model
+        accept (callable, optional): Returns False for arrays that should be skipped
+
+    Returns:
+        list: The parsed array
+
+    Raises:
+        ValueError: If no complete array is found
+    """
+    return parse_json_text(text or "", expect="array", accept=accept)
+
+def _scan_string_literal(text, pos):
+    """
+    Scan a single- or double-quoted string literal.
+
+    Args:
+        text (str): The text being scanned
+        pos (int): Index of the opening quote
+
+    Returns:
+        tuple: The decoded string and the index after the closing quote,
+            or (None, index where scanning stopped) if the literal is malformed
+    """
+    quote = text[pos]
+    parts = []
+    i = pos + 1
+    length = len(text)
+    while i < length:
+        char = text[i]
+        if char == quote:
+            return "".join(parts), i + 1
+        if char == "\\":
+            if i + 1 >= length:
+                return None, length
+            escape = text[i + 1]
+            if escape == "u" and i + 6 <= length:
+                try:
+                    parts.append(chr(int(text[i + 2:i + 6], 16)))
+                except ValueError:
+                    return None, i + 2
+                i += 6
+                continue
+            parts.append(_ESCAPES.get(escape, "\\" + escape))
+            i += 2
+            continue
+        if char == "\n":
+            return None, i
+        parts.append(char)
+        i += 1
+    return None, length
+
+def _scan_string_list(text, pos):
+    """
+    Scan a list of string literals starting at an opening bracket.
+
+    Args:
+        text (str): The text being scanned
+        pos (int): Index of the opening bracket
+
+    Returns:
+        tuple: The list of strings and the index after the closing bracket,
+            or (None, index where scanning stopped) if it is not a string list
+    """
+    items = []
+    i = pos + 1
+    length = len(text)
+    expect_item = True
+    while i < length:
+        char = text[i]
+        if char.isspace():
+            i += 1
+        elif char == "]":
+            return items, i + 1
+        elif char in "'\"" and expect_item:
+            item, i = _scan_string_literal(text, i)
+            if item is None:
+                return None, i
+            items.append(item)
+            expect_item = False
+        elif char == "," and not expect_item:
+            expect_item = True
+            i += 1
+        else:
+            return None, max(i, pos + 1)
+    return None, length
+
+def extract_string_list(text):
+    """
+    Extract the first list of strings from a response.
+
+    Accepts JSON arrays and Python-list-style output with single or double
+    quotes, such as ["Main claim", 'Secondary claim'].
+
+    Args:
+        text (str): The raw response from the model
+
+    Returns:
+        list or None: The strings, or None if no string list is found
+    """
+    if not text:
+        return None
+
+    pos = text.find("[")
+    while pos != -1:
+        items, end = _scan_string_list(text, pos)
+        if items is not None:
+            return items
+        # Resume after the failed candidate so the scan stays linear
+        pos = text.find("[", end)
+    return None
+
+def extract_list_lines(text, min_length=10, limit=3):
+    """
+    Extract list items written one per line, with numbering or bullets removed.
+
+    Args:
+        text (str): The raw response from the model
+        min_length (int, optional): Minimum length of an item
+        limit (int, optional): Maximum number of items
+
+    Returns:
+        list: The extracted items
+    """
+    items = []
+    for line in (text or "").split("\n"):
+        # Remove common prefixes like numbers, dashes, etc.
+        clean_line = line.strip().lstrip("0123456789.- *\"'")
+        if clean_line and len(clean_line) > min_length:
+            items.append(clean_line)
+            if len(items) >= limit:
+                break
+    return items
+
+def parse_claims(text, limit=3):
+    """
+    Parse the claims list from a claim extraction response.
+
+    Args:
+        text (str): The raw response from the model
+        limit (int, optional): Maximum number of claims from line-based output
+
+    Returns:
+        list: The extracted claims
+    """
+    claims = extract_string_list(text)
+    if claims is not None:
+        return claims
+    return extract_list_lines(text, limit=limit)
+
+def coerce_score(value, default=0.5):
+    """
+    Coerce a model-provided score to a float between 0.0 and 1.0.
+
+    Args:
+        value: The raw score (number or numeric string)
+        default (float, optional): Used when the value is not numeric
+
+    Returns:
+        float: The score
+    """
+    if isinstance(value, bool):
+        return default
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return default
+    if math.isnan(score):
+        return default
+    return min(1.0, max(0.0, score))
+
+def validate_analysis(analysis, kind):
+    """
+    Validate a parsed arbiter analysis into its expected shape.
+
+    Scores are coerced to floats in [0, 1], missing components default to 0.5,
+    reasoning is a string and list fields are lists of strings. Extra keys are kept.
+
+    Args:
+        analysis (dict): The analysis parsed from the model's response
+        kind (str): "empirical", "logical" or "pragmatic"
+
+    Returns:
+        dict: The validated analysis
+
+    Raises:
+        ValueError: If the analysis is not a dictionary
+    """
+    if not isinstance(analysis, dict):
+        raise ValueError("Analysis is not a dictionary")
+
+    shape = ANALYSIS_SHAPES[kind]
+    analysis[shape["score"]] = coerce_score(analysis.get(shape["score"]))
+
+    components = analysis.get("components")
+    if not isinstance(components, dict):
+        components = {}
+    for key in shape["components"]:
+        components[key] = coerce_score(components.get(key))
+    analysis["components"] = components
+
+    reasoning = analysis.get("reasoning")
+    if not isinstance(reasoning, str) or not reasoning:
+        analysis["reasoning"] = "Analysis reasoning not provided."
+
+    for key in shape["lists"]:
+        items = analysis.get(key)
+        if not isinstance(items, list):
+            items = []
+        analysis[key] = [str(item) for item in items if isinstance(item, (str, int, float))]
+
+    return analysis
+
+def validate_perspectives(perspectives):
+    """
+    Validate parsed perspectives, dropping incomplete entries.
+
+    Args:
+        perspectives (list): The perspectives parsed from the model's response
+
+    Returns:
+        list: The valid perspective objects
+
+    Raises:
+        ValueError: If no valid perspectives are found
+    """
+    if not isinstance(perspectives, list):
+        raise ValueError("Perspectives is not a list")
+
+    valid_perspectives = []
+    for perspective in perspectives:
+        if not isinstance(perspective, dict):
+            continue
+        if not all(isinstance(perspective.get(key), str) for key in PERSPECTIVE_FIELDS):
+            continue
+        perspective["score"] = coerce_score(perspective.get("score"))
+        valid_perspectives.append(perspective)
+
+    if not valid_perspectives:
+        raise ValueError("No valid perspectives found")
+
+    return valid_perspectives
+
+def has_perspective_objects(value):
+    """Return True for arrays that contain at least one object."""
+    return isinstance(value, list) and any(isinstance(item, dict) for item in value)
@@ -7,7 +7,7 @@ This script runs the Flask application.
 import os
 import sys
 from dotenv import load_dotenv
-from backend.app import app
+from backend.app import app, start_warm_up
 
 # Load environment variables
 load_dotenv()
@@ -16,5 +16,8 @@ if __name__ == '__main__':
     # Get port from environment or use default
     port = int(os.environ.get('PORT', 5000))
     
+    # Warm up while the server starts; /readyz reports when it is done
+    start_warm_up()
+    
     # Run the app
     app.run(host='0.0.0.0', port=port, debug=False)
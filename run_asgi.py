@@ -0,0 +1,28 @@
+"""
+Async run script for the Belief Explorer application.
+
+This script serves the ASGI application with uvicorn, so that one process can
+keep many analysis requests in flight while they wait on the model service.
+"""
+
+import os
+import tempfile
+import uvicorn
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+if __name__ == '__main__':
+    # Get port and worker count from environment or use defaults
+    port = int(os.environ.get('PORT', 5000))
+    workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+    
+    # Several workers share their metrics through a directory, so a scrape covers them all
+    if workers > 1:
+        from backend.utils.metrics import prepare_metrics_dir
+        prepare_metrics_dir(os.environ.get('METRICS_DIR') or os.path.join(
+            tempfile.gettempdir(), f"belief_explorer_metrics_{port}"))
+
+    # Run the app
+    uvicorn.run('backend.asgi:app', host='0.0.0.0', port=port, workers=workers)
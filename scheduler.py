@@ -0,0 +1,294 @@
+"""
+Call scheduling utilities for the Belief Explorer backend.
+
+Limits the model calls a process has in flight and decides which waiting call
+goes next when a slot frees up. Calls belong to a priority class (interactive,
+then streaming, then batch) and a higher class is always served first, except
+that a class whose oldest call has waited longer than the class's maximum wait
+is served next, so batch work is slowed but never starved. Within a class,
+tenants share the slots by weighted fair queuing: each call is tagged with a
+virtual finish time from its tenant's weight and its prompt size, and the
+earliest tag is served first, so one tenant's bulk job cannot crowd out others.
+"""
+
+import os
+import json
+import time
+import heapq
+import asyncio
+import logging
+import threading
+import itertools
+from contextlib import asynccontextmanager, contextmanager
+from utils.admission import SlotWaiter
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, highest first
+PRIORITY_CLASSES = ("interactive", "streaming", "batch")
+DEFAULT_PRIORITY = "interactive"
+
+# Seconds the oldest call of a class may wait before the class is served next
+DEFAULT_MAX_WAIT = {"interactive": None, "streaming": 10.0, "batch": 30.0}
+
+# Buckets for the time calls wait for a slot
+WAIT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class _ClassQueue:
+    """
+    The waiting calls of one priority class, ordered by virtual finish time.
+    """
+
+    def __init__(self):
+        self.heap = []           # (finish tag, sequence, start tag, enqueued at, waiter)
+        self.virtual_time = 0.0
+        self.finish_tags = {}    # tenant -> finish tag of its last queued call
+
+    def push(self, waiter, tenant, cost, weight, sequence):
+        start = max(self.virtual_time, self.finish_tags.get(tenant, 0.0))
+        finish = start + cost / weight
+        self.finish_tags[tenant] = finish
+        heapq.heappush(self.heap, (finish, sequence, start, time.monotonic(), waiter))
+
+    def pop(self):
+        _, _, start, enqueued_at, waiter = heapq.heappop(self.heap)
+        self.virtual_time = start
+        if not self.heap:
+            # An idle class forgets its history, so tags never grow without bound
+            self.virtual_time = 0.0
+            self.finish_tags.clear()
+        return waiter, enqueued_at
+
+    def remove(self, waiter):
+        self.heap = [entry for entry in self.heap if entry[4] is not waiter]
+        heapq.heapify(self.heap)
+        if not self.heap:
+            self.virtual_time = 0.0
+            self.finish_tags.clear()
+
+    def oldest(self):
+        return min(entry[3] for entry in self.heap)
+
+class CallScheduler:
+    """
+    Admits outbound model calls up to a concurrency limit, by priority class
+    and weighted fair share across tenants.
+    """
+
+    def __init__(self, max_concurrency=32, max_wait=None, tenant_weights=None):
+        """
+        Initialize the CallScheduler.
+
+        Args:
+            max_concurrency (int, optional): Model calls in flight at once
+            max_wait (dict, optional): Priority class to the seconds its oldest call
+                may wait before the class is served ahead of higher ones (None for never)
+            tenant_weights (dict, optional): Tenant id to its share weight (1 by default)
+        """
+        self.max_concurrency = max_concurrency
+        self.max_wait = dict(DEFAULT_MAX_WAIT, **(max_wait or {}))
+        self.tenant_weights = dict(tenant_weights or {})
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._queues = {priority: _ClassQueue() for priority in PRIORITY_CLASSES}
+        self._sequence = itertools.count()
+
+    @staticmethod
+    def priority_of(priority):
+        """Return a known priority class for a requested one."""
+        return priority if priority in PRIORITY_CLASSES else DEFAULT_PRIORITY
+
+    def _publish(self):
+        """Export the in-flight count and queue depths. Called with the lock held."""
+        metrics.set_gauge("model_schedule_inflight", self._inflight)
+        for priority, class_queue in self._queues.items():
+            metrics.set_gauge("model_schedule_queue_depth", len(class_queue.heap), priority=priority)
+
+    def _try_acquire(self, priority, tenant, cost, loop=None):
+        """
+        Take a free slot or join the class queue. Called with the lock held.
+
+        Returns:
+            SlotWaiter or None: The waiter to wait on, or None if a slot was taken
+        """
+        if self._inflight < self.max_concurrency and not any(q.heap for q in self._queues.values()):
+            self._inflight += 1
+            self._publish()
+            return None
+        waiter = SlotWaiter(loop)
+        weight = max(float(self.tenant_weights.get(tenant, 1.0)), 1e-6)
+        self._queues[priority].push(waiter, tenant, max(float(cost), 1.0), weight, next(self._sequence))
+        self._publish()
+        return waiter
+
+    def _next_class(self, now):
+        """Choose the class served next: an overdue class, else the highest waiting one."""
+        overdue = [
+            (now - class_queue.oldest() - self.max_wait[priority], priority)
+            for priority, class_queue in self._queues.items()
+            if class_queue.heap and self.max_wait.get(priority) is not None
+            and now - class_queue.oldest() > self.max_wait[priority]
+        ]
+        if overdue:
+            priority = max(overdue)[1]
+            if any(self._queues[higher].heap for higher in PRIORITY_CLASSES[:PRIORITY_CLASSES.index(priority)]):
+                metrics.inc("model_schedule_promoted_total", priority=priority)
+            return priority
+        return next(priority for priority in PRIORITY_CLASSES if self._queues[priority].heap)
+
+    def release(self):
+        """Free a slot and hand it to the next waiting call."""
+        with self._lock:
+            self._inflight -= 1
+            now = time.monotonic()
+            while self._inflight < self.max_concurrency and any(q.heap for q in self._queues.values()):
+                waiter, _ = self._queues[self._next_class(now)].pop()
+                self._inflight += 1
+                waiter.grant()
+            self._publish()
+
+    def _abandon(self, priority, waiter):
+        """Leave the queue when the caller stops waiting, passing on a slot granted meanwhile."""
+        with self._lock:
+            if not waiter.granted:
+                self._queues[priority].remove(waiter)
+                self._publish()
+                return
+        self.release()
+
+    def acquire(self, priority=DEFAULT_PRIORITY, tenant=None, cost=1.0):
+        """
+        Wait for a slot, blocking this thread.
+
+        Args:
+            priority (str, optional): The priority class of the call
+            tenant (str, optional): The tenant making the call
+            cost (float, optional): The call's size, such as its prompt length
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        priority = self.priority_of(priority)
+        start = time.perf_counter()
+        with self._lock:
+            waiter = self._try_acquire(priority, tenant, cost)
+        if waiter is not None:
+            try:
+                waiter.wait(None)
+            except BaseException:
+                self._abandon(priority, waiter)
+                raise
+        waited = time.perf_counter() - start
+        metrics.observe("model_schedule_wait_seconds", waited, buckets=WAIT_BUCKETS, priority=priority)
+        return waited
+
+    async def acquire_async(self, priority=DEFAULT_PRIORITY, tenant=None, cost=1.0):
+        """
+        Wait for a slot without blocking the event loop.
+
+        Args:
+            priority (str, optional): The priority class of the call
+            tenant (str, optional): The tenant making the call
+            cost (float, optional): The call's size, such as its prompt length
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        priority = self.priority_of(priority)
+        start = time.perf_counter()
+        with self._lock:
+            waiter = self._try_acquire(priority, tenant, cost, asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await waiter.wait_async(None)
+            except BaseException:
+                self._abandon(priority, waiter)
+                raise
+        waited = time.perf_counter() - start
+        metrics.observe("model_schedule_wait_seconds", waited, buckets=WAIT_BUCKETS, priority=priority)
+        return waited
+
+    @contextmanager
+    def slot(self, priority=DEFAULT_PRIORITY, tenant=None, cost=1.0):
+        """
+        Run a block in a call slot.
+
+        Yields:
+            float: Seconds spent waiting for the slot
+        """
+        waited = self.acquire(priority, tenant, cost)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def slot_async(self, priority=DEFAULT_PRIORITY, tenant=None, cost=1.0):
+        """
+        Run a block in a call slot without blocking the event loop.
+
+        Yields:
+            float: Seconds spent waiting for the slot
+        """
+        waited = await self.acquire_async(priority, tenant, cost)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def snapshot(self):
+        """
+        Report the scheduler's state.
+
+        Returns:
+            dict: Calls in flight, the limit and the queue depth per class
+        """
+        with self._lock:
+            return {
+                "inflight": self._inflight,
+                "maxConcurrency": self.max_concurrency,
+                "queued": {priority: len(class_queue.heap) for priority, class_queue in self._queues.items()}
+            }
+
+def _json_env(variable):
+    """Load a JSON object from an environment variable, or return None."""
+    value = os.environ.get(variable)
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        logger.warning("Ignoring invalid JSON in %s", variable)
+        return None
+
+_scheduler = None
+_scheduler_configured = False
+_scheduler_lock = threading.Lock()
+
+def get_call_scheduler():
+    """
+    Get the shared model call scheduler for this process.
+
+    MODEL_MAX_CONCURRENCY sets the calls in flight (32 by default; 0 turns
+    scheduling off), MODEL_CLASS_MAX_WAIT a JSON object of seconds per priority
+    class, and TENANT_WEIGHTS a JSON object of share weights per tenant id.
+    The settings are read once.
+
+    Returns:
+        CallScheduler or None: The scheduler, or None when it is off
+    """
+    global _scheduler, _scheduler_configured
+    if _scheduler_configured:
+        return _scheduler
+    with _scheduler_lock:
+        if not _scheduler_configured:
+            max_concurrency = int(os.environ.get('MODEL_MAX_CONCURRENCY', 32))
+            if max_concurrency > 0:
+                _scheduler = CallScheduler(
+                    max_concurrency,
+                    max_wait=_json_env('MODEL_CLASS_MAX_WAIT'),
+                    tenant_weights=_json_env('TENANT_WEIGHTS')
+                )
+            _scheduler_configured = True
+    return _scheduler
@@ -0,0 +1,324 @@
+"""
+Session store utilities for the Belief Explorer backend.
+
+Keeps conversations on the server, so a client sends a session id and its new
+message instead of the whole history on every turn. Each session holds its most
+recent turns verbatim and a rolling summary of the older ones: when a turn falls
+out of the recent window it is condensed to a line and appended to the summary,
+whose oldest lines are dropped once it outgrows its budget. Prompts therefore
+stay the same size however long the conversation runs, and the summary is
+updated without another model call. A session also keeps the integrated
+analyses of the claims it has discussed, per depth tier, so a follow-up about
+the same claim needs only a response. Sessions live in a local SQLite database
+(WAL mode) shared by the worker processes, and expire after a period of inactivity.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import tempfile
+import threading
+from utils.analysis_store import claim_hash
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    tenant TEXT NOT NULL,
+    summary TEXT NOT NULL DEFAULT '',
+    turns_json TEXT NOT NULL DEFAULT '[]',
+    turn_count INTEGER NOT NULL DEFAULT 0,
+    analyses_json TEXT NOT NULL DEFAULT '{}',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at);
+"""
+
+# Client-chosen session ids are not accepted; ours are uuid4 hex strings
+SESSION_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# Columns added after the first release, with their definitions
+ADDED_COLUMNS = {"analyses_json": "TEXT NOT NULL DEFAULT '{}'"}
+
+# Characters of a turn kept in its summary line
+SUMMARY_LINE_CHARS = 200
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+
+def condense_turn(turn, limit=SUMMARY_LINE_CHARS):
+    """
+    Condense a conversation turn into one summary line.
+
+    A user turn keeps its opening sentence, where the belief is usually stated;
+    an assistant turn keeps its closing sentence, usually the question it asked.
+
+    Args:
+        turn (dict): A turn with "role" and "content"
+        limit (int, optional): Most characters of content kept
+
+    Returns:
+        str: The summary line
+    """
+    role = turn.get("role", "")
+    sentences = [s for s in _SENTENCE_END.split(" ".join(str(turn.get("content", "")).split())) if s]
+    if not sentences:
+        return ""
+    text = sentences[-1] if role == "assistant" else sentences[0]
+    if len(text) > limit:
+        text = text[:limit - 3].rstrip() + "..."
+    return f"{'Assistant asked' if role == 'assistant' else 'User said'}: {text}"
+
+def roll_summary(summary, turns, max_chars):
+    """
+    Add condensed turns to a summary, dropping its oldest lines past a budget.
+
+    Args:
+        summary (str): The summary so far, one line per turn
+        turns (list): The turns leaving the recent window, oldest first
+        max_chars (int): Most characters the summary may hold
+
+    Returns:
+        str: The new summary
+    """
+    lines = [line for line in summary.split("\n") if line]
+    lines.extend(line for line in (condense_turn(turn) for turn in turns) if line)
+    while lines and sum(len(line) + 1 for line in lines) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+class SessionStore:
+    """
+    SQLite-backed store of conversation sessions with rolling summaries.
+    """
+
+    def __init__(self, path, recent_turns=3, summary_chars=2000, max_turn_chars=4000, max_age=86400.0,
+                 max_analyses=5):
+        """
+        Initialize the SessionStore.
+
+        Args:
+            path (str): Path of the SQLite database file
+            recent_turns (int, optional): Turns kept verbatim for the prompt
+            summary_chars (int, optional): Most characters of the rolling summary
+            max_turn_chars (int, optional): Characters of a turn that are stored
+            max_age (float, optional): Seconds of inactivity after which a session expires
+            max_analyses (int, optional): Claim analyses kept per depth tier
+        """
+        self.path = path
+        self.recent_turns = recent_turns
+        self.summary_chars = summary_chars
+        self.max_turn_chars = max_turn_chars
+        self.max_age = max_age
+        self.max_analyses = max_analyses
+        self._local = threading.local()
+        self._last_purge = 0.0
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        columns = {row["name"] for row in connection.execute("PRAGMA table_info(sessions)")}
+        for column, definition in ADDED_COLUMNS.items():
+            if column not in columns:
+                connection.execute(f"ALTER TABLE sessions ADD COLUMN {column} {definition}")
+
+    def _connect(self):
+        """Open a connection configured for WAL mode, with explicit transactions."""
+        connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _connection(self):
+        """Get this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    @staticmethod
+    def _session(row):
+        """Build a session dict from a row."""
+        return {
+            "id": row["id"],
+            "turns": json.loads(row["turns_json"]),
+            "summary": row["summary"],
+            "turnCount": row["turn_count"],
+            "analyses": json.loads(row["analyses_json"])
+        }
+
+    def get(self, session_id, tenant):
+        """
+        Load a session.
+
+        Args:
+            session_id (str): The session id
+            tenant (str): The tenant the session must belong to
+
+        Returns:
+            dict or None: The session's "id", recent "turns", "summary",
+                "turnCount" and "analyses" (lists of integrated analyses by depth
+                tier), or None if it does not exist, has expired or belongs to
+                another tenant
+        """
+        if not isinstance(session_id, str) or not SESSION_ID_PATTERN.match(session_id):
+            return None
+        row = self._connection().execute(
+            "SELECT * FROM sessions WHERE id = ? AND tenant = ? AND updated_at >= ?",
+            (session_id, tenant, time.time() - self.max_age)).fetchone()
+        return self._session(row) if row is not None else None
+
+    def open(self, session_id, tenant):
+        """
+        Load a session, or start a new one if it cannot be found.
+
+        Args:
+            session_id (str or None): The id the client sent
+            tenant (str): The tenant the session belongs to
+
+        Returns:
+            dict: The session
+        """
+        session = self.get(session_id, tenant) if session_id else None
+        if session is not None:
+            metrics.inc("sessions_opened_total", result="resumed")
+            return session
+
+        now = time.time()
+        new_id = uuid.uuid4().hex
+        self._connection().execute(
+            "INSERT INTO sessions (id, tenant, created_at, updated_at) VALUES (?, ?, ?, ?)",
+            (new_id, tenant, now, now))
+        # A client that sent an id we no longer have starts over
+        metrics.inc("sessions_opened_total", result="expired" if session_id else "new")
+        self._purge_now_and_then(now)
+        return {"id": new_id, "turns": [], "summary": "", "turnCount": 0, "analyses": {}}
+
+    def record_turn(self, session_id, statement, response, analyses=None, depth=None):
+        """
+        Add a user statement and the assistant's response to a session.
+
+        Turns that leave the recent window are folded into the summary. The
+        turn's analyses replace earlier analyses of the same claims at the same
+        depth; the oldest claims are dropped past max_analyses.
+
+        Args:
+            session_id (str): The session id
+            statement (str): The user's statement
+            response (str): The assistant's response
+            analyses (list, optional): The integrated analyses of the turn's claims
+            depth (str, optional): The depth tier of the analyses
+
+        Returns:
+            dict or None: The updated session, or None if it no longer exists
+        """
+        new_turns = [
+            {"role": "user", "content": statement[:self.max_turn_chars]},
+            {"role": "assistant", "content": str(response)[:self.max_turn_chars]}
+        ]
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT * FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                connection.execute("ROLLBACK")
+                return None
+            session = self._session(row)
+            turns = session["turns"] + new_turns
+            overflow = max(0, len(turns) - self.recent_turns)
+            if overflow:
+                session["summary"] = roll_summary(session["summary"], turns[:overflow], self.summary_chars)
+                turns = turns[overflow:]
+            session["turns"] = turns
+            session["turnCount"] += len(new_turns)
+            if analyses and depth is not None:
+                kept = session["analyses"].get(depth, [])
+                hashes = {claim_hash(analysis.get("claim")) for analysis in analyses}
+                kept = [analysis for analysis in kept if claim_hash(analysis.get("claim")) not in hashes]
+                session["analyses"][depth] = (kept + list(analyses))[-self.max_analyses:]
+            connection.execute(
+                "UPDATE sessions SET summary = ?, turns_json = ?, turn_count = ?, analyses_json = ?, "
+                "updated_at = ? WHERE id = ?",
+                (session["summary"], json.dumps(turns), session["turnCount"], json.dumps(session["analyses"]),
+                 time.time(), session_id))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return session
+
+    def delete(self, session_id, tenant):
+        """
+        End a session.
+
+        Args:
+            session_id (str): The session id
+            tenant (str): The tenant the session must belong to
+
+        Returns:
+            bool: Whether a session was deleted
+        """
+        cursor = self._connection().execute(
+            "DELETE FROM sessions WHERE id = ? AND tenant = ?", (session_id, tenant))
+        return cursor.rowcount > 0
+
+    def purge(self):
+        """
+        Delete expired sessions.
+
+        Returns:
+            int: The number of sessions deleted
+        """
+        cursor = self._connection().execute(
+            "DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.max_age,))
+        return cursor.rowcount
+
+    def _purge_now_and_then(self, now):
+        """Purge expired sessions at most once an hour."""
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        try:
+            purged = self.purge()
+        except sqlite3.Error as e:
+            logger.error("Could not purge expired sessions: %s", e)
+            return
+        if purged:
+            logger.info("Purged %s expired sessions", purged)
+
+_session_store = None
+_session_store_lock = threading.Lock()
+
+def get_session_store():
+    """
+    Get the shared session store for this process.
+
+    SESSION_STORE_PATH sets the database (a file in the temporary directory by
+    default), SESSION_RECENT_TURNS the turns kept verbatim (3, as many as the
+    response prompt uses), SESSION_SUMMARY_CHARS the size of the rolling summary
+    (2000), SESSION_MAX_ANALYSES the claim analyses kept per depth tier (5) and
+    SESSION_MAX_AGE the seconds of inactivity after which a session expires
+    (one day).
+
+    Returns:
+        SessionStore: The session store
+    """
+    global _session_store
+    with _session_store_lock:
+        if _session_store is None:
+            _session_store = SessionStore(
+                os.environ.get('SESSION_STORE_PATH') or os.path.join(tempfile.gettempdir(),
+                                                                     "belief_explorer_sessions.db"),
+                recent_turns=int(os.environ.get('SESSION_RECENT_TURNS', 3)),
+                summary_chars=int(os.environ.get('SESSION_SUMMARY_CHARS', 2000)),
+                max_analyses=int(os.environ.get('SESSION_MAX_ANALYSES', 5)),
+                max_age=float(os.environ.get('SESSION_MAX_AGE', 86400))
+            )
+    return _session_store
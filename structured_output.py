@@ -0,0 +1,262 @@
+"""
+Structured output utilities for the Belief Explorer backend.
+
+Provides an incremental parser that finds the first complete JSON object or
+array in streamed model output, so generation can be stopped as soon as the
+value closes instead of waiting for the rest of a chatty completion, and a
+helper that asks the model service for schema-constrained JSON output.
+"""
+
+import os
+import re
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+_OPENERS = {"object": "{", "array": "["}
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_DECODER = json.JSONDecoder()
+
+def with_response_schema(generation_config, schema):
+    """
+    Ask the model service for JSON output that follows a response schema.
+
+    Constrained output starts with the JSON value itself, so there is no prose
+    to skip or fences to strip. Set STRUCTURED_OUTPUT to "off" to fall back to
+    the prompt-only format instructions.
+
+    Args:
+        generation_config (dict): The component's generation settings
+        schema (dict): The response schema
+
+    Returns:
+        dict: A new generation config dict
+    """
+    config = dict(generation_config)
+    if os.environ.get('STRUCTURED_OUTPUT', 'on').lower() != 'off':
+        config["response_mime_type"] = "application/json"
+        config["response_schema"] = schema
+    return config
+
+class IncrementalJSONParser:
+    """
+    Finds the first complete top-level JSON value of an expected kind in text
+    that arrives in chunks.
+
+    Each character is scanned at most once. The parser tracks nesting depth across
+    braces and brackets together with string and escape state, so braces that
+    appear inside string values do not end the value early. When a candidate
+    value closes but is not valid JSON (for example an echoed prompt skeleton
+    with comments), or is rejected by the accept check, scanning resumes after it.
+    """
+
+    def __init__(self, expect="object", accept=None):
+        """
+        Initialize the IncrementalJSONParser.
+
+        Args:
+            expect (str, optional): "object" or "array"
+            accept (callable, optional): Returns False for values that should be
+                skipped, such as a "[1]" citation before the real array
+
+        Raises:
+            ValueError: If expect is not a supported kind
+        """
+        if expect not in _OPENERS:
+            raise ValueError(f"Unsupported JSON kind '{expect}'")
+        self.expect = expect
+        self._opener = _OPENERS[expect]
+        self._accept = accept
+        self._chunks = []
+        # Pieces of the open candidate value from earlier chunks; only the new
+        # chunk is scanned, so the text is never copied or searched again
+        self._pieces = []
+        self._open = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.complete = False
+        self.value = None
+
+    def feed(self, chunk):
+        """
+        Consume the next chunk of text.
+
+        Args:
+            chunk (str): The next piece of model output
+
+        Returns:
+            The parsed value once it is complete, otherwise None
+        """
+        if self.complete or not chunk:
+            return self.value
+
+        self._chunks.append(chunk)
+        start = 0
+        pos = 0
+        length = len(chunk)
+        if self._escaped:
+            # The previous chunk ended on a backslash inside a string
+            self._escaped = False
+            pos = 1
+
+        while pos < length:
+            if not self._open:
+                pos = chunk.find(self._opener, pos)
+                if pos == -1:
+                    break
+                self._open = True
+                self._pieces = []
+                start = pos
+                self._depth = 1
+                pos += 1
+                continue
+
+            if self._in_string:
+                # Jump to the next quote or backslash inside the string
+                match = _STRING_SPECIAL.search(chunk, pos)
+                if match is None:
+                    break
+                pos = match.start()
+                if chunk[pos] == "\\":
+                    if pos + 1 >= length:
+                        # The escaped character has not arrived yet
+                        self._escaped = True
+                        break
+                    pos += 2
+                    continue
+                self._in_string = False
+                pos += 1
+                continue
+
+            # Jump to the next structural character
+            match = _STRUCTURAL.search(chunk, pos)
+            if match is None:
+                break
+            pos = match.start()
+            char = chunk[pos]
+            if char == '"':
+                self._in_string = True
+            elif char == "{" or char == "[":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pieces.append(chunk[start:pos + 1])
+                    candidate = "".join(self._pieces)
+                    self._pieces = []
+                    self._open = False
+                    try:
+                        value = json.loads(candidate)
+                    except (ValueError, RecursionError):
+                        # RecursionError comes from pathologically deep nesting
+                        value = None
+                    else:
+                        if self._accept is None or self._accept(value):
+                            self.value = value
+                            self.complete = True
+                            return value
+                    # Not a usable value; look for the next one after it
+            pos += 1
+
+        if self._open:
+            self._pieces.append(chunk[start:])
+        return None
+
+    @property
+    def text(self):
+        """str: All text consumed so far."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+def parse_json_stream(chunks, expect="object", accept=None):
+    """
+    Parse the first complete JSON value from a stream of text chunks.
+
+    Iteration stops as soon as the value is complete, and the stream is closed
+    if it supports it so that the rest of the generation is cancelled.
+
+    Args:
+        chunks (iterable): Text chunks, such as a ModelStream
+        expect (str, optional): "object" or "array"
+        accept (callable, optional): Returns False for values that should be skipped
+
+    Returns:
+        The parsed JSON value
+
+    Raises:
+        ValueError: If the stream ends before a complete value is found
+    """
+    parser = IncrementalJSONParser(expect, accept)
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            if parser.complete:
+                return parser.value
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+    raise ValueError(f"Could not find a complete JSON {expect} in response")
+
+async def parse_json_stream_async(chunks, expect="object", accept=None):
+    """
+    Parse the first complete JSON value from an async stream of text chunks.
+
+    The async counterpart of parse_json_stream: the stream is closed with
+    aclose() once the value is complete.
+
+    Args:
+        chunks (async iterable): Text chunks, such as an AsyncModelStream
+        expect (str, optional): "object" or "array"
+        accept (callable, optional): Returns False for values that should be skipped
+
+    Returns:
+        The parsed JSON value
+
+    Raises:
+        ValueError: If the stream ends before a complete value is found
+    """
+    parser = IncrementalJSONParser(expect, accept)
+    try:
+        async for chunk in chunks:
+            parser.feed(chunk)
+            if parser.complete:
+                return parser.value
+    finally:
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    raise ValueError(f"Could not find a complete JSON {expect} in response")
+
+def parse_json_text(text, expect="object", accept=None):
+    """
+    Parse the first complete JSON value from a full response text.
+
+    Args:
+        text (str): The raw response from the model
+        expect (str, optional): "object" or "array"
+        accept (callable, optional): Returns False for values that should be skipped
+
+    Returns:
+        The parsed JSON value
+
+    Raises:
+        ValueError: If no complete value is found
+    """
+    # Fast path: the common case of a valid value at the first opener
+    start = text.find(_OPENERS.get(expect, "{"))
+    if start != -1:
+        try:
+            value, _ = _DECODER.raw_decode(text, start)
+        except (ValueError, RecursionError):
+            pass
+        else:
+            if accept is None or accept(value):
+                return value
+    return parse_json_stream([text], expect, accept)
@@ -0,0 +1,163 @@
+"""
+Admission control test script for the Belief Explorer backend.
+
+This script checks the adaptive limit of the admission controller (cut on slow
+or failed analyses, at most once per round trip, growth while the limit is in
+use, and a steady limit under a mix of fast and slow requests) and its queue
+(slots handed over in arrival order, and passed on by a request cancelled after
+it was granted one).
+
+    python tests/test_admission.py
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.utils import admission
+from backend.utils.admission import AdmissionController
+# Imported the way the backend modules import it, so admission sees the same request context
+from utils.request_context import request_scope
+from checks import check, run_checks
+
+def run_one(controller, latency, ok=True, depth="standard"):
+    """Admit one request and release it as if it took the given latency."""
+    assert controller.acquire()
+    controller.release(latency, depth, ok)
+
+def check_cuts():
+    """Slow and failed analyses cut the limit, once per round trip."""
+    failures = 0
+    controller = AdmissionController(initial_limit=16, max_limit=16, backoff=0.5, tolerance=2.0)
+    for _ in range(10):
+        run_one(controller, 0.01)
+    failures += check("fast analyses keep the limit", controller.limit == 16)
+
+    run_one(controller, 1.0)
+    failures += check("a slow analysis cuts the limit", controller.limit == 8)
+
+    run_one(controller, 1.0)
+    failures += check("a second slow analysis in the same round trip does not cut again", controller.limit == 8)
+
+    time.sleep(0.2)
+    run_one(controller, 0.01, ok=False)
+    failures += check("a failed analysis cuts the limit in the next round trip", controller.limit == 4)
+
+    for _ in range(5):
+        time.sleep(0.2)
+        run_one(controller, 0.01, ok=False)
+    failures += check("the limit does not go below min_limit", controller.limit == 1)
+    return failures
+
+def check_growth():
+    """The limit grows by about one per round trip while it is in use, up to max_limit."""
+    failures = 0
+    controller = AdmissionController(initial_limit=4, max_limit=6)
+    for _ in range(20):
+        run_one(controller, 0.01)
+    failures += check("an unused limit does not grow", controller.limit == 4)
+
+    for _ in range(3):
+        assert controller.acquire()
+    for _ in range(6):
+        run_one(controller, 0.01)
+    failures += check("a used limit grows by one per round trip", controller.limit == 5)
+
+    for _ in range(100):
+        run_one(controller, 0.01)
+    failures += check("the limit does not grow past max_limit", controller.limit == 6)
+    return failures
+
+class FakeClock:
+    """Stands in for the time module in admission, so hours of traffic run at once."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+def check_mixed_latency():
+    """Fast requests mixed with full analyses do not drive the limit down."""
+    failures = 0
+    rng = random.Random(0)
+    clock = FakeClock()
+    real_time, admission.time = admission.time, clock
+    try:
+        # 30% of requests are fast, the rest full analyses of about 20 s, all adapting the limit
+        controller = AdmissionController(initial_limit=8, max_limit=8)
+        for _ in range(2000):
+            latency = 1.5 if rng.random() < 0.3 else rng.uniform(18.0, 22.0)
+            assert controller.acquire()
+            clock.now += latency / controller.limit
+            controller.release(latency, "standard")
+        failures += check("a share of fast requests leaves the limit in place", controller.limit == 8)
+
+        # Most requests are served from earlier analyses and are left out of adapting the limit
+        controller = AdmissionController(initial_limit=8, max_limit=8)
+        for _ in range(2000):
+            reused = rng.random() < 0.8
+            with request_scope() as context, controller.admit("standard") as admitted:
+                assert admitted
+                if not reused:
+                    context.record_analyzed_claim()
+                clock.now += 1.5 if reused else rng.uniform(18.0, 22.0)
+        failures += check("requests that ran no arbiters do not adapt the limit",
+                          controller.limit == 8 and controller.snapshot()["baselines"]["standard"] >= 18.0)
+
+        # A lasting slowdown of full analyses still cuts the limit
+        for _ in range(5):
+            with request_scope() as context, controller.admit("standard"):
+                context.record_analyzed_claim()
+                clock.now += 60.0
+        failures += check("full analyses well over the baseline still cut the limit", controller.limit < 8)
+    finally:
+        admission.time = real_time
+    return failures
+
+async def check_queue():
+    """Queued requests get slots in arrival order, and a cancelled one passes its slot on."""
+    failures = 0
+    controller = AdmissionController(initial_limit=1, max_limit=1, max_queue=3, queue_timeout=5.0)
+    assert await controller.acquire_async()
+    order = []
+
+    async def request(name):
+        if await controller.acquire_async():
+            order.append(name)
+            await asyncio.sleep(0)
+            controller.release()
+
+    tasks = []
+    for name in "abc":
+        tasks.append(asyncio.create_task(request(name)))
+        await asyncio.sleep(0)
+    shed = await controller.acquire_async()
+    failures += check("a request that finds the queue full is shed", shed is False)
+    controller.release()
+    await asyncio.wait_for(asyncio.gather(*tasks), 5)
+    failures += check("queued requests are admitted in arrival order", order == ["a", "b", "c"])
+
+    assert await controller.acquire_async()
+    first = asyncio.create_task(controller.acquire_async())
+    await asyncio.sleep(0)
+    second = asyncio.create_task(controller.acquire_async())
+    await asyncio.sleep(0)
+    # The slot is granted to the first request, which is cancelled before it resumes
+    controller.release()
+    first.cancel()
+    admitted = await asyncio.wait_for(second, 5)
+    failures += check("a cancelled request hands its granted slot to the next one",
+                      first.cancelled() and admitted and controller.snapshot()["inflight"] == 1)
+    return failures
+
+if __name__ == "__main__":
+    run_checks(check_cuts, check_growth, check_mixed_latency, check_queue)
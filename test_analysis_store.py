@@ -0,0 +1,154 @@
+"""
+Analysis store test script for the Belief Explorer backend.
+
+This script imports analyses into a scratch store and checks its two read
+paths: filtered queries paged with cursors, which must return every matching
+analysis exactly once in order even when sort values tie, and full-text search,
+which ranks claim matches first, ignores stopwords and very common words, and
+takes FTS5 operators in user input literally.
+
+    python tests/test_analysis_store.py
+"""
+
+import os
+import sys
+from datetime import datetime, timezone
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.utils import analysis_store
+from backend.utils.analysis_store import AnalysisStore, search_words
+from checks import check, in_directory, run_checks
+
+def record(index, claim, domain="health", score=0.5, reasoning="", created_at=None):
+    """
+    Build an archive record as the pipeline would store it.
+
+    Args:
+        index (int): Makes the id unique and, by default, orders the creation times
+        claim (str): The claim
+        domain (str, optional): The claim's domain
+        score (float, optional): The overall Verifact score
+        reasoning (str, optional): The empirical arbiter's reasoning
+        created_at (float, optional): Epoch creation time. Defaults to index.
+
+    Returns:
+        dict: The record
+    """
+    created_at = index if created_at is None else created_at
+    return {
+        "id": f"analysis-{index}",
+        "requestId": f"request-{index}",
+        "createdAt": datetime.fromtimestamp(1700000000 + created_at, timezone.utc).isoformat(),
+        "integratorVersion": 1,
+        "claim": claim,
+        "arbiters": {
+            "empirical": {"empiricalScore": score, "reasoning": reasoning},
+            "logical": {"logicalScore": score},
+            "pragmatic": {"pragmaticScore": score}
+        },
+        "analysis": {"domain": domain, "verifactScore": {"overallScore": score}, "assumptions": ""}
+    }
+
+def all_pages(store, **filters):
+    """Follow nextCursor through every page of a query and return the analysis ids."""
+    ids, cursor = [], None
+    while True:
+        page = store.query(cursor=cursor, **filters)
+        ids.extend(item["id"] for item in page["analyses"])
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return ids
+
+@in_directory
+def check_queries(directory):
+    """Cursor pages cover every matching analysis once, in order, across ties."""
+    failures = 0
+    store = AnalysisStore(os.path.join(directory, "store.db"))
+    # Pairs of analyses share a creation time and a score, so the cursor must break ties by rowid
+    store.write_rows(record(index, f"Claim number {index}", domain="health" if index % 3 else "science",
+                            score=(index // 2) / 10, created_at=index // 2)
+                     for index in range(11))
+
+    ids = all_pages(store, limit=3)
+    failures += check("recent pages return every analysis once, newest first",
+                      ids == [f"analysis-{index}" for index in reversed(range(11))])
+
+    ids = all_pages(store, sort="verifact", limit=4)
+    failures += check("verifact pages return every analysis once, highest first",
+                      ids == [f"analysis-{index}" for index in reversed(range(11))])
+
+    ids = all_pages(store, domain="health", min_verifact=0.1, limit=2)
+    failures += check("filters hold on every page",
+                      ids == [f"analysis-{index}" for index in reversed(range(11))
+                              if index % 3 and index // 2 >= 1])
+
+    page = store.query(claim="  CLAIM number   4 ")
+    failures += check("a claim filter ignores case and spacing",
+                      [item["id"] for item in page["analyses"]] == ["analysis-4"] and page["nextCursor"] is None)
+
+    for cursor in ("not-a-cursor", "0.5:x"):
+        try:
+            store.query(cursor=cursor)
+            raised = False
+        except ValueError:
+            raised = True
+        failures += check(f"an invalid cursor '{cursor}' is rejected", raised)
+
+    failures += check("a recent query seeks the creation time index",
+                      "idx_analyses_created" in store.explain(cursor="3.0:7"))
+    store.close()
+    return failures
+
+@in_directory
+def check_search(directory):
+    """Search ranks claim matches first and skips stopwords and common words."""
+    failures = 0
+    failures += check("stopwords are dropped and repeated words kept once",
+                      search_words("Does the coffee stunt the COFFEE growth?") == ["coffee", "stunt", "growth"])
+    failures += check("a query of only stopwords keeps them", search_words("is it so") == ["is", "it", "so"])
+    try:
+        search_words(" ?! ")
+        raised = False
+    except ValueError:
+        raised = True
+    failures += check("a query without words is rejected", raised)
+
+    store = AnalysisStore(os.path.join(directory, "search.db"))
+    rows = [record(0, "Coffee stunts growth in children", domain="science"),
+            record(1, "Milk builds bones", reasoning="Coffee does not stunt growth, studies show.")]
+    rows.extend(record(index, f"Coffee habit number {index}", reasoning="Studies of caffeine intake.")
+                for index in range(2, 32))
+    store.write_rows(rows)
+
+    results = store.search("growth")["results"]
+    failures += check("a claim match ranks above a reasoning match",
+                      [item["id"] for item in results] == ["analysis-0", "analysis-1"]
+                      and results[0]["rank"] < results[1]["rank"] and "[growth]" in results[0]["snippet"].lower())
+
+    results = store.search("growth", domain="science")["results"]
+    failures += check("a domain filter runs inside the search",
+                      [item["id"] for item in results] == ["analysis-0"])
+
+    failures += check("FTS5 operators in the query are searched for literally",
+                      store.search('growth OR "milk* NEAR(')["results"] == [])
+
+    candidates = analysis_store.SEARCH_CANDIDATES
+    analysis_store.SEARCH_CANDIDATES = 2
+    try:
+        found = store.search("coffee growth")
+        failures += check("a word in most recent analyses is ignored for ranking",
+                          found["ignoredTerms"] == ["coffee"]
+                          and [item["id"] for item in found["results"]] == ["analysis-0", "analysis-1"])
+        results = store.search("coffee", limit=5)["results"]
+        failures += check("a query of only common words returns the newest candidates by recency",
+                          [item["id"] for item in results] == ["analysis-31", "analysis-30"]
+                          and all(item["rank"] is None for item in results))
+    finally:
+        analysis_store.SEARCH_CANDIDATES = candidates
+    store.close()
+    return failures
+
+if __name__ == "__main__":
+    run_checks(check_queries, check_search)
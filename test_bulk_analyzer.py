@@ -0,0 +1,103 @@
+"""
+Bulk analysis test script for the Belief Explorer backend.
+
+This script runs the bulk analyzer over small statement files with the mock
+model backend and checks that rows it cannot analyze are listed in the errors
+file without stopping the run, that depths are normalized, and that a rerun
+resumes from the output, skipping finished statements and cutting off a line
+left half-written by a crash.
+
+    python tests/test_bulk_analyzer.py
+"""
+
+import os
+import sys
+import json
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('MODEL_BACKEND', 'mock')
+os.environ.setdefault('MOCK_LATENCY_SCALE', '0')
+
+from backend.models.bulk_analyzer import BulkAnalyzer
+from checks import check, in_directory, run_checks
+
+ROWS = [
+    '{"id": "a", "statement": "Coffee stunts growth.", "depth": "FAST"}',
+    '{"id": "b", "depth": "fast"}',
+    '{"id": "c", "statement": "Tea is healthier than coffee.", "depth": "extreme"}',
+    '{"id": "d", "statement": "Vaccines cause autism."',
+    '"The moon landing was staged."',
+    '{"id": "f", "statement": "Sugar makes children hyperactive.", "history": "none"}',
+]
+
+def read_jsonl(path):
+    """Read the objects of a JSONL file."""
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+@in_directory
+def check_bad_rows(directory):
+    """Rows that cannot be analyzed go to the errors file and the rest are analyzed."""
+    failures = 0
+    source = os.path.join(directory, "statements.jsonl")
+    with open(source, "w", encoding="utf-8") as f:
+        f.write("\n".join(ROWS) + "\n")
+    output = os.path.join(directory, "results.jsonl")
+
+    summary = BulkAnalyzer(source, output, depth="fast", workers=2).run()
+    failures += check("bad rows do not stop the run",
+                      summary["total"] == 6 and summary["analyzed"] == 2 and summary["failed"] == 4)
+
+    records = sorted(read_jsonl(output), key=lambda record: record["index"])
+    failures += check("good rows are analyzed with their depth normalized",
+                      [(record["index"], record["depth"]) for record in records] == [(0, "fast"), (4, "fast")]
+                      and all("result" in record for record in records))
+
+    errors = {record["index"]: record["error"] for record in read_jsonl(summary["errors"])}
+    failures += check("bad rows are listed with the reason",
+                      sorted(errors) == [1, 2, 3, 5] and errors[1] == "No statement"
+                      and errors[2] == "Unknown depth 'extreme'" and errors[3].startswith("Invalid JSON"))
+    return failures
+
+@in_directory
+def check_resume(directory):
+    """A rerun skips the statements in the output and redoes a half-written one."""
+    failures = 0
+    source = os.path.join(directory, "statements.csv")
+    with open(source, "w", encoding="utf-8") as f:
+        f.write("id,statement,depth\n")
+        for index in range(4):
+            f.write(f"s{index},Statement number {index} is true.,\n")
+    output = os.path.join(directory, "results.jsonl")
+
+    summary = BulkAnalyzer(source, output, depth="fast", workers=2).run()
+    failures += check("a complete run leaves no checkpoint or errors file",
+                      summary["analyzed"] == 4 and summary["errors"] is None
+                      and not os.path.exists(f"{output}.checkpoint"))
+
+    # Leave the state of a run that crashed while writing its third result
+    with open(output, "rb") as f:
+        lines = f.readlines()
+    with open(output, "wb") as f:
+        f.writelines(lines[:2])
+        f.write(lines[2][:len(lines[2]) // 2])
+    with open(f"{output}.checkpoint", "w", encoding="utf-8") as f:
+        json.dump({"source": os.path.abspath(source), "depth": "fast", "total": 4}, f)
+
+    summary = BulkAnalyzer(source, output, depth="fast", workers=2).run()
+    records = read_jsonl(output)
+    failures += check("a rerun skips finished statements",
+                      summary["skipped"] == 2 and summary["analyzed"] == 2 and summary["failed"] == 0)
+    failures += check("the half-written line is replaced and every statement is in the output once",
+                      sorted(record["index"] for record in records) == [0, 1, 2, 3])
+
+    summary = BulkAnalyzer(source, output, depth="deep", workers=2).run()
+    failures += check("a checkpoint of another depth starts the run over",
+                      summary["skipped"] == 0 and summary["analyzed"] == 4
+                      and all(record["depth"] == "deep" for record in read_jsonl(output)))
+    return failures
+
+if __name__ == "__main__":
+    run_checks(check_bad_rows, check_resume)
@@ -0,0 +1,99 @@
+"""
+Follow-up test script for the Belief Explorer analysis pipeline.
+
+This script runs a short conversation through the pipeline with the mock model
+backend and checks which turns reuse the analyses of earlier turns instead of
+calling the arbiters again.
+
+    python tests/test_follow_ups.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('CLAIM_CACHE_SIZE', '0')
+
+from backend.models.analysis_pipeline import AnalysisPipeline
+from backend.utils.model_backend import MockBackend
+from checks import check, run_checks
+
+FIRST_TURN = "Vaccines cause autism in young children."
+NEGATED_TURN = "Vaccines do not cause autism in young children."
+
+class CountingBackend(MockBackend):
+    """Mock backend that records the stage of every model call."""
+
+    def __init__(self):
+        super().__init__(latency_scale=0)
+        self.stages = []
+
+    def generate_content(self, prompt, model_name, generation_config, stage=None):
+        self.stages.append(stage)
+        return super().generate_content(prompt, model_name, generation_config, stage)
+
+    def generate_content_stream(self, prompt, model_name, generation_config, stage=None):
+        self.stages.append(stage)
+        return super().generate_content_stream(prompt, model_name, generation_config, stage)
+
+def follow_up(statement, extract=None, first_turn=FIRST_TURN):
+    """
+    Answer a statement after a first turn, with its analysis as the prior analyses.
+
+    Args:
+        statement (str): The follow-up statement
+        extract (callable, optional): Replaces the claim extractor, to stand in
+            for the model's answer
+        first_turn (str, optional): The statement analyzed first
+
+    Returns:
+        tuple: The follow-up's result, the first turn's analysis and the stages
+            of the follow-up's model calls
+    """
+    backend = CountingBackend()
+    pipeline = AnalysisPipeline(backend)
+    first = pipeline.analyze(first_turn, depth="standard")
+    if extract is not None:
+        pipeline.claim_extractor.extract_claims = extract
+    backend.stages.clear()
+    result = pipeline.analyze(statement, depth="standard", prior_analyses=first["AnalysisJSON"])
+    return result, first["AnalysisJSON"][0], backend.stages
+
+def check_follow_ups():
+    """Follow-ups that return to the earlier claim reuse its analysis; new claims do not."""
+    failures = 0
+
+    # A plain answer to the response's question makes no claim of its own
+    result, prior, stages = follow_up("Yes, I really think so.")
+    failures += check("a plain answer reuses the stored analysis",
+                      result["AnalysisJSON"] == [prior] and stages == ["response"])
+
+    result, prior, stages = follow_up("My doctor told me.", extract=lambda statement, stage_profile=None: [])
+    failures += check("a reply with no extracted claim reuses the stored analysis",
+                      result["AnalysisJSON"] == [prior] and stages == ["response"])
+
+    result, prior, stages = follow_up("I still think vaccines cause autism in young children.")
+    failures += check("a restated claim reuses the stored analysis",
+                      result["AnalysisJSON"] == [prior] and stages == ["response"])
+
+    result, prior, stages = follow_up("Vaccines don't cause autism in young children.")
+    failures += check("a negated claim is analyzed again",
+                      result["AnalysisJSON"][0]["claim"] != prior["claim"] and "empirical" in stages)
+
+    # Statements made of some of a negated claim's words are new claims, not restatements
+    for statement, case in (
+        ("Vaccines cause autism.", "a claim that drops the negation"),
+        ("Children cause autism.", "a claim with a different subject"),
+        ("Autism.", "a single word from the claim"),
+        ("I do not think so.", "a bare negation"),
+    ):
+        result, prior, stages = follow_up(statement, first_turn=NEGATED_TURN)
+        failures += check(f"{case} goes through claim extraction",
+                          stages[0] == "claims" and result["AnalysisJSON"] != [prior])
+
+    return failures
+
+if __name__ == "__main__":
+    run_checks(check_follow_ups)
@@ -0,0 +1,149 @@
+"""
+Job queue test script for the Belief Explorer backend.
+
+This script checks the leases of the persistent job queue: a job whose worker
+stops renewing its lease is taken up again, the worker that lost the lease
+cannot record an outcome, a job is failed after its maximum number of
+attempts, and a degraded result or a transient error sends the job back to the
+queue after a backoff.
+
+    python tests/test_job_queue.py
+"""
+
+import os
+import sys
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.utils.job_queue import JobQueue
+from checks import check, in_directory, run_checks
+
+@in_directory
+def check_leases(directory):
+    """A lapsed lease lets another worker resume the job and voids the first worker's outcome."""
+    failures = 0
+    queue = JobQueue(os.path.join(directory, "leases.db"), lease_seconds=0.05)
+    job_id = queue.submit("The moon landing was staged.", depth="fast")["jobId"]
+    first = queue.claim()
+    failures += check("a queued job is claimed", first["id"] == job_id and queue.claim() is None)
+
+    time.sleep(0.1)
+    second = queue.claim()
+    failures += check("a job whose lease lapsed is claimed again",
+                      second["id"] == job_id and second["attempts"] == 2
+                      and second["lease_owner"] != first["lease_owner"])
+
+    recorded = queue.finish(job_id, first["lease_owner"], result={"Response": "stale"})
+    failures += check("the worker that lost the lease cannot record an outcome",
+                      recorded is False and queue.get(job_id)["status"] == "running")
+
+    recorded = queue.finish(job_id, second["lease_owner"], result={"Response": "fresh"})
+    status = queue.get(job_id)
+    failures += check("the worker holding the lease records the outcome",
+                      recorded and status["status"] == "done" and status["result"] == {"Response": "fresh"})
+    return failures
+
+@in_directory
+def check_max_attempts(directory):
+    """A job whose worker dies on every attempt is failed after max_attempts."""
+    queue = JobQueue(os.path.join(directory, "attempts.db"), lease_seconds=0.05, max_attempts=2)
+    job_id = queue.submit("The moon landing was staged.", depth="fast")["jobId"]
+    for _ in range(2):
+        queue.claim()
+        time.sleep(0.1)
+    claimed = queue.claim()
+    status = queue.get(job_id)
+    return check("a job is failed after max_attempts",
+                 claimed is None and status["status"] == "failed"
+                 and status["error"] == "Abandoned after 2 attempts")
+
+def run_to_end(queue, job_id, runner):
+    """Run a job's attempts with runner until the job is done or failed, and return its status."""
+    queue.start(runner)
+    deadline = time.monotonic() + 5
+    while queue.get(job_id)["status"] in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    queue.stop()
+    return queue.get(job_id)
+
+@in_directory
+def check_degraded(directory):
+    """A degraded result queues the job again until it runs out of attempts."""
+    failures = 0
+    queue = JobQueue(os.path.join(directory, "degraded.db"), max_attempts=2, poll_interval=0.01,
+                     retry_delay=0.01)
+    job_id = queue.submit("The moon landing was staged.", depth="fast")["jobId"]
+    results = [
+        {"Response": "default", "Metadata": {"degraded": "fallback", "fallbacks": ["empirical"]}},
+        {"Response": "analyzed", "Metadata": {}}
+    ]
+    status = run_to_end(queue, job_id, lambda *args: results.pop(0))
+    failures += check("a degraded result is retried",
+                      status["status"] == "done" and status["attempts"] == 2
+                      and status["result"]["Response"] == "analyzed")
+    return failures
+
+@in_directory
+def check_backoff(directory):
+    """A retried job waits out its backoff, which doubles with each attempt."""
+    failures = 0
+    queue = JobQueue(os.path.join(directory, "backoff.db"), retry_delay=0.1, max_retry_delay=0.3)
+    failures += check("the retry delay doubles up to max_retry_delay",
+                      [queue.retry_after(attempts) for attempts in (1, 2, 3, 4)] == [0.1, 0.2, 0.3, 0.3])
+
+    job_id = queue.submit("The moon landing was staged.", depth="fast")["jobId"]
+    job = queue.claim()
+    queue.retry(job_id, job["lease_owner"], "TimeoutError: model call timed out", queue.retry_after(job["attempts"]))
+    status = queue.get(job_id)
+    failures += check("a retried job is not claimed before its backoff ends",
+                      queue.claim() is None and status["status"] == "queued" and "retryAt" in status)
+    time.sleep(0.15)
+    job = queue.claim()
+    failures += check("a retried job is claimed once its backoff ends",
+                      job is not None and job["id"] == job_id and job["attempts"] == 2)
+    return failures
+
+@in_directory
+def check_errors(directory):
+    """Transient errors are retried; errors another attempt would repeat fail the job."""
+    failures = 0
+
+    def run_job(name, runner):
+        queue = JobQueue(os.path.join(directory, name), max_attempts=2, poll_interval=0.01, retry_delay=0.01)
+        job_id = queue.submit("The moon landing was staged.", depth="fast")["jobId"]
+        return run_to_end(queue, job_id, runner)
+
+    outcomes = [ConnectionError("model service unreachable"), {"Response": "analyzed", "Metadata": {}}]
+
+    def flaky(*args):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    status = run_job("transient.db", flaky)
+    failures += check("a transient error is retried",
+                      status["status"] == "done" and status["attempts"] == 2
+                      and status["result"]["Response"] == "analyzed")
+
+    def broken(*args):
+        raise ValueError("unknown depth")
+
+    status = run_job("permanent.db", broken)
+    failures += check("a permanent error fails the job on its first attempt",
+                      status["status"] == "failed" and status["attempts"] == 1
+                      and status["error"] == "ValueError: unknown depth")
+
+    def timing_out(*args):
+        raise TimeoutError("timed out")
+
+    status = run_job("exhausted.db", timing_out)
+    failures += check("a transient error fails the job after max_attempts",
+                      status["status"] == "failed" and status["attempts"] == 2
+                      and status["error"] == "TimeoutError: timed out")
+    return failures
+
+if __name__ == "__main__":
+    run_checks(check_leases, check_max_attempts, check_degraded, check_backoff, check_errors)
@@ -0,0 +1,77 @@
+"""
+Claim lexicon test script for the Belief Explorer backend.
+
+This script checks how an external lexicon file (LEXICON_PATH) is merged into
+the built-in claim lexicons: valid domains and terms are added, entries that
+are not lists of strings are skipped instead of being split into letters or
+failing at startup, and a broken file leaves the built-in lexicons in place.
+
+    python tests/test_lexicons.py
+"""
+
+import os
+import sys
+import json
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models.analysis_integrator import (ABSOLUTE_LABEL, ABSOLUTE_TERMS, DOMAIN_KEYWORDS,
+                                                build_claim_matcher, load_claim_lexicons)
+from checks import check, in_directory, run_checks
+
+def write_lexicons(directory, name, content):
+    """Write a lexicon file and return its path."""
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content if isinstance(content, str) else json.dumps(content))
+    return path
+
+@in_directory
+def check_loader(directory):
+    """Valid entries of a lexicon file are merged; malformed ones are skipped."""
+    failures = 0
+
+    lexicons = load_claim_lexicons(write_lexicons(directory, "valid.json", {
+        "domains": {"economics": ["inflation", "interest rate"], "health": ["vaccine"]},
+        "absoluteTerms": ["ever"]
+    }))
+    failures += check("a new domain is added and an existing one extended",
+                      lexicons["domains"]["economics"] == ["inflation", "interest rate"]
+                      and lexicons["domains"]["health"] == DOMAIN_KEYWORDS["health"] + ["vaccine"])
+    failures += check("absolute terms are added", lexicons["absoluteTerms"] == ABSOLUTE_TERMS + ["ever"])
+    matcher = build_claim_matcher(lexicons)
+    failures += check("the added terms are matched",
+                      matcher.count_labels("Inflation has never been this high")
+                      == {("domain", "economics"): 1, ABSOLUTE_LABEL: 1})
+
+    lexicons = load_claim_lexicons(write_lexicons(directory, "malformed.json", {
+        "domains": {"economics": "inflation", "finance": ["stocks", 5], "energy": ["oil"]},
+        "absoluteTerms": "ever"
+    }))
+    failures += check("a domain given as a string is skipped, not split into letters",
+                      "economics" not in lexicons["domains"])
+    failures += check("a domain with a non-string term is skipped", "finance" not in lexicons["domains"])
+    failures += check("the valid domains of the same file are still added",
+                      lexicons["domains"]["energy"] == ["oil"])
+    failures += check("absolute terms given as a string are skipped",
+                      lexicons["absoluteTerms"] == ABSOLUTE_TERMS)
+    failures += check("a matcher is built from the remaining lexicons",
+                      build_claim_matcher(lexicons).count_labels("Oil prices")
+                      == {("domain", "energy"): 1})
+
+    builtin = {"domains": DOMAIN_KEYWORDS, "absoluteTerms": ABSOLUTE_TERMS}
+    for name, content, case in (
+        ("domains.json", {"domains": ["inflation"]}, "domains given as a list"),
+        ("array.json", ["inflation"], "a file that is not a JSON object"),
+        ("broken.json", "{\"domains\": ", "a file that is not valid JSON"),
+    ):
+        lexicons = load_claim_lexicons(write_lexicons(directory, name, content))
+        failures += check(f"{case} leaves the built-in lexicons", lexicons == builtin)
+
+    failures += check("a missing file leaves the built-in lexicons",
+                      load_claim_lexicons(os.path.join(directory, "missing.json")) == builtin)
+    return failures
+
+if __name__ == "__main__":
+    run_checks(check_loader)
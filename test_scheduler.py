@@ -0,0 +1,92 @@
+"""
+Call scheduling test script for the Belief Explorer backend.
+
+This script checks the order in which the call scheduler hands out freed slots:
+higher priority classes first, a class whose oldest call is overdue ahead of
+them, tenants within a class by weighted fair share, and a slot granted to a
+cancelled call passed on to the next one.
+
+    python tests/test_scheduler.py
+"""
+
+import os
+import sys
+import asyncio
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.utils.scheduler import CallScheduler
+from checks import check, run_checks
+
+async def serve_order(scheduler, calls, delay_after=None):
+    """
+    Queue calls behind a held slot, then free it and record the order they run in.
+
+    Args:
+        scheduler (CallScheduler): A scheduler with one slot
+        calls (list): (name, priority, tenant) of each call, in arrival order
+        delay_after (dict, optional): Call name to seconds to wait after queuing it
+
+    Returns:
+        list: The call names in the order they got the slot
+    """
+    await scheduler.acquire_async()
+    order = []
+
+    async def call(name, priority, tenant):
+        async with scheduler.slot_async(priority, tenant):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    tasks = []
+    for name, priority, tenant in calls:
+        tasks.append(asyncio.create_task(call(name, priority, tenant)))
+        await asyncio.sleep((delay_after or {}).get(name, 0))
+    scheduler.release()
+    await asyncio.wait_for(asyncio.gather(*tasks), 5)
+    return order
+
+async def check_ordering():
+    """Freed slots go out by priority class, overdue classes and tenant share."""
+    failures = 0
+
+    order = await serve_order(CallScheduler(max_concurrency=1), [
+        ("batch", "batch", None), ("streaming", "streaming", None), ("interactive", "interactive", None)
+    ])
+    failures += check("higher priority classes are served first", order == ["interactive", "streaming", "batch"])
+
+    order = await serve_order(CallScheduler(max_concurrency=1), [
+        ("first", "interactive", None), ("second", "interactive", None), ("third", "interactive", None)
+    ])
+    failures += check("calls of one class and tenant are served in arrival order",
+                      order == ["first", "second", "third"])
+
+    order = await serve_order(CallScheduler(max_concurrency=1, max_wait={"batch": 0.05}), [
+        ("batch", "batch", None), ("interactive", "interactive", None)
+    ], delay_after={"batch": 0.1})
+    failures += check("an overdue class is served ahead of higher ones", order == ["batch", "interactive"])
+
+    calls = [(f"b{index}", "batch", "b") for index in range(4)] + [(f"a{index}", "batch", "a") for index in range(4)]
+    order = await serve_order(CallScheduler(max_concurrency=1, tenant_weights={"a": 3}), calls)
+    failures += check("a tenant's share follows its weight",
+                      sum(name.startswith("a") for name in order[:4]) == 3)
+    failures += check("each tenant's calls keep their order",
+                      [name for name in order if name.startswith("b")] == ["b0", "b1", "b2", "b3"])
+
+    scheduler = CallScheduler(max_concurrency=1)
+    await scheduler.acquire_async()
+    first = asyncio.create_task(scheduler.acquire_async())
+    await asyncio.sleep(0)
+    second = asyncio.create_task(scheduler.acquire_async())
+    await asyncio.sleep(0)
+    # The slot is granted to the first call, which is cancelled before it resumes
+    scheduler.release()
+    first.cancel()
+    await asyncio.wait_for(second, 5)
+    failures += check("a cancelled call hands its granted slot to the next one",
+                      first.cancelled() and scheduler.snapshot()["inflight"] == 1)
+    return failures
+
+if __name__ == "__main__":
+    run_checks(check_ordering)
@@ -0,0 +1,81 @@
+"""
+Session store test script for the Belief Explorer backend.
+
+This script checks how a session condenses its history: turns leaving the
+recent window are folded into a rolling summary that keeps to its budget by
+dropping its oldest lines, and a turn's analyses replace earlier analyses of
+the same claims at the same depth.
+
+    python tests/test_session_store.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.utils.session_store import SessionStore, roll_summary
+from checks import check, in_directory, run_checks
+
+def check_summary():
+    """The rolling summary condenses turns and drops its oldest lines past its budget."""
+    failures = 0
+    turns = [
+        {"role": "user", "content": "Coffee stunts growth. My parents always said so."},
+        {"role": "assistant", "content": "That is a common belief. Where did it come from?"}
+    ]
+    summary = roll_summary("", turns, 1000)
+    failures += check("a user turn keeps its first sentence and an assistant turn its last",
+                      summary == "User said: Coffee stunts growth.\nAssistant asked: Where did it come from?")
+
+    summary = roll_summary(summary, [{"role": "user", "content": "I read it in a magazine."}], 80)
+    failures += check("the oldest lines are dropped past the budget",
+                      summary == "Assistant asked: Where did it come from?\nUser said: I read it in a magazine.")
+
+    summary = roll_summary("", [{"role": "user", "content": "x" * 500}], 1000)
+    failures += check("a long turn is cut to one summary line",
+                      summary == "User said: " + "x" * 197 + "...")
+    return failures
+
+def analysis(claim, score):
+    """Build a minimal integrated analysis of a claim."""
+    return {"claim": claim, "verifactScore": {"overallScore": score}}
+
+@in_directory
+def check_turns(directory):
+    """Turns roll into the summary, and analyses of the same claim are replaced."""
+    failures = 0
+    store = SessionStore(os.path.join(directory, "sessions.db"), recent_turns=2, max_analyses=2)
+    session_id = store.open(None, "tenant")["id"]
+
+    store.record_turn(session_id, "Coffee stunts growth.", "Why do you think so?",
+                      [analysis("Coffee stunts growth", 0.2)], "standard")
+    session = store.record_turn(session_id, "My parents said so.", "Did they give a reason?")
+    failures += check("turns past the recent window are folded into the summary",
+                      [turn["content"] for turn in session["turns"]] == ["My parents said so.", "Did they give a reason?"]
+                      and session["summary"] == "User said: Coffee stunts growth.\nAssistant asked: Why do you think so?"
+                      and session["turnCount"] == 4)
+
+    session = store.record_turn(session_id, "COFFEE stunts  growth.", "What would change your mind?",
+                                [analysis("coffee stunts growth", 0.3)], "standard")
+    failures += check("a claim's analysis replaces the earlier one, ignoring case and spacing",
+                      session["analyses"]["standard"] == [analysis("coffee stunts growth", 0.3)])
+
+    session = store.record_turn(session_id, "Tea is healthier.", "Healthier in what way?",
+                                [analysis("Tea is healthier", 0.5), analysis("Milk builds bones", 0.7)], "standard")
+    failures += check("the oldest claims are dropped past max_analyses",
+                      [item["claim"] for item in session["analyses"]["standard"]] == ["Tea is healthier", "Milk builds bones"])
+
+    session = store.record_turn(session_id, "Tea is healthier.", "Healthier in what way?",
+                                [analysis("Tea is healthier", 0.6)], "deep")
+    failures += check("analyses are kept per depth",
+                      session["analyses"]["deep"] == [analysis("Tea is healthier", 0.6)]
+                      and len(session["analyses"]["standard"]) == 2)
+
+    failures += check("the stored session matches the returned one",
+                      store.get(session_id, "tenant") == session and store.get(session_id, "other") is None)
+    return failures
+
+if __name__ == "__main__":
+    run_checks(check_summary, check_turns)
@@ -0,0 +1,411 @@
+"""
+Tracing utilities for the Belief Explorer backend.
+
+Each analysis request is a trace whose id is the request id, and each pipeline
+stage and model call is a span in it, with attributes such as the model, token
+counts, output size and parse outcome. Finished spans are queued and exported
+by a background thread, either as JSON lines to a local file or as OTLP/JSON to
+a collector. When no exporter is configured, spans are not created at all.
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_current_span = ContextVar("belief_explorer_span", default=None)
+
+class Span:
+    """
+    A timed operation within a trace.
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes",
+                 "status", "start_ns", "end_ns", "_exporter")
+
+    def __init__(self, name, trace_id, parent_id, exporter, attributes=None):
+        """
+        Initialize the Span and start its clock.
+
+        Args:
+            name (str): The operation, such as a stage name
+            trace_id (str): The id of the trace (32 hex characters)
+            parent_id (str or None): The id of the parent span
+            exporter (SpanExporter): Where the span is sent when it ends
+            attributes (dict, optional): Initial attributes
+        """
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes) if attributes else {}
+        self.status = "ok"
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self._exporter = exporter
+
+    def set_attributes(self, **attributes):
+        """
+        Add or replace attributes.
+
+        Args:
+            **attributes: Attribute values (str, int, float or bool)
+        """
+        self.attributes.update(attributes)
+
+    def end(self, error=None):
+        """
+        End the span and hand it to the exporter. Later calls do nothing.
+
+        Args:
+            error (BaseException, optional): The exception that ended the operation
+        """
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.status = "error"
+            self.attributes["error"] = type(error).__name__
+        self._exporter.export(self)
+
+    def to_dict(self):
+        """
+        Describe the span as a flat dict.
+
+        Returns:
+            dict: The span fields, with times in Unix nanoseconds
+        """
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+class SpanExporter:
+    """
+    Base class for exporters that send finished spans in batches from a
+    background thread. Spans are dropped and counted when the queue is full.
+    """
+
+    def __init__(self, queue_size=10000, batch_size=500, flush_interval=1.0):
+        """
+        Initialize the SpanExporter and start its export thread.
+
+        Args:
+            queue_size (int, optional): Pending spans kept before new ones are dropped
+            batch_size (int, optional): Maximum spans exported at once
+            flush_interval (float, optional): Seconds a partial batch waits for more spans
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._thread = threading.Thread(target=self._export_loop, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span):
+        """
+        Queue a finished span without blocking.
+
+        Args:
+            span (Span): The finished span
+
+        Returns:
+            bool: Whether the span was queued
+        """
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            metrics.inc("trace_spans_dropped_total")
+            return False
+        return True
+
+    def _export_loop(self):
+        """Export queued spans in batches until the exporter is closed."""
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            flushes = [item for item in batch if isinstance(item, threading.Event)]
+            spans = [item.to_dict() for item in batch if isinstance(item, Span)]
+            if spans:
+                try:
+                    self._write(spans)
+                    metrics.inc("trace_spans_exported_total", len(spans))
+                except Exception as e:
+                    metrics.inc("trace_export_errors_total")
+                    logger.warning("Could not export %s spans: %s", len(spans), e)
+            for done in flushes:
+                done.set()
+
+    def _write(self, spans):
+        """
+        Send a batch of spans.
+
+        Args:
+            spans (list): The spans as dicts
+        """
+        raise NotImplementedError
+
+    def flush(self, timeout=10.0):
+        """
+        Wait until the spans queued so far have been exported.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait
+
+        Returns:
+            bool: Whether the spans were exported in time
+        """
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=10.0):
+        """
+        Stop accepting spans and export the queued ones.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait for the export thread
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+class FileSpanExporter(SpanExporter):
+    """
+    Appends spans to a local file, one JSON object per line.
+    """
+
+    def __init__(self, path, **kwargs):
+        """
+        Initialize the FileSpanExporter.
+
+        Args:
+            path (str): The file the spans are appended to
+            **kwargs: Queue settings passed to SpanExporter
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        super().__init__(**kwargs)
+
+    def _write(self, spans):
+        data = "".join(json.dumps(span, default=str) + "\n" for span in spans)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(data)
+
+def _otlp_value(value):
+    """Wrap an attribute value in its OTLP/JSON AnyValue form."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def to_otlp(spans, service_name):
+    """
+    Build an OTLP/JSON trace export request.
+
+    Args:
+        spans (list): The spans as dicts
+        service_name (str): The service.name resource attribute
+
+    Returns:
+        dict: The request body for an OTLP/HTTP collector
+    """
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": service_name}}
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "belief-explorer"},
+                "spans": [
+                    {
+                        "traceId": span["traceId"],
+                        "spanId": span["spanId"],
+                        "parentSpanId": span["parentSpanId"] or "",
+                        "name": span["name"],
+                        "kind": 1,
+                        "startTimeUnixNano": str(span["startTimeUnixNano"]),
+                        "endTimeUnixNano": str(span["endTimeUnixNano"]),
+                        "attributes": [
+                            {"key": key, "value": _otlp_value(value)}
+                            for key, value in span["attributes"].items()
+                        ],
+                        # STATUS_CODE_OK is 1 and STATUS_CODE_ERROR is 2
+                        "status": {"code": 2 if span["status"] == "error" else 1}
+                    }
+                    for span in spans
+                ]
+            }]
+        }]
+    }
+
+class OtlpSpanExporter(SpanExporter):
+    """
+    Posts spans to an OTLP/HTTP collector as JSON.
+    """
+
+    def __init__(self, endpoint, service_name="belief-explorer", timeout=5.0, **kwargs):
+        """
+        Initialize the OtlpSpanExporter.
+
+        Args:
+            endpoint (str): The collector's traces URL, such as
+                http://localhost:4318/v1/traces
+            service_name (str, optional): The service.name resource attribute
+            timeout (float, optional): Seconds to wait for the collector
+            **kwargs: Queue settings passed to SpanExporter
+        """
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def _write(self, spans):
+        body = json.dumps(to_otlp(spans, self.service_name), default=str).encode('utf-8')
+        request = urllib.request.Request(
+            self.endpoint,
+            data=body,
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+_exporter = None
+_exporter_configured = False
+_exporter_lock = threading.Lock()
+
+def get_span_exporter():
+    """
+    Get the shared span exporter for this process.
+
+    TRACE_OTLP_ENDPOINT selects the OTLP exporter and TRACE_EXPORT_PATH the file
+    exporter. The setting is read once.
+
+    Returns:
+        SpanExporter or None: The exporter, or None when tracing is off
+    """
+    global _exporter, _exporter_configured
+    if _exporter_configured:
+        return _exporter
+    with _exporter_lock:
+        if not _exporter_configured:
+            endpoint = os.environ.get('TRACE_OTLP_ENDPOINT')
+            path = os.environ.get('TRACE_EXPORT_PATH')
+            if endpoint:
+                _exporter = OtlpSpanExporter(endpoint, os.environ.get('TRACE_SERVICE_NAME', 'belief-explorer'))
+            elif path:
+                _exporter = FileSpanExporter(path)
+            if _exporter is not None:
+                atexit.register(_exporter.close)
+            _exporter_configured = True
+    return _exporter
+
+def begin_span(name, trace_id=None, **attributes):
+    """
+    Start a span without making it the current span.
+
+    The span is a child of the current span. With no current span it starts a
+    new trace if a trace id is given. The caller must end it.
+
+    Args:
+        name (str): The operation
+        trace_id (str, optional): The trace id used when no span is active
+        **attributes: Initial attributes
+
+    Returns:
+        Span or None: The span, or None when there is nothing to trace
+    """
+    parent = _current_span.get()
+    if parent is not None:
+        return Span(name, parent.trace_id, parent.span_id, parent._exporter, attributes)
+    if trace_id is None:
+        return None
+    exporter = get_span_exporter()
+    if exporter is None:
+        return None
+    return Span(name, trace_id, None, exporter, attributes)
+
+@contextmanager
+def start_span(name, trace_id=None, **attributes):
+    """
+    Run a block as the current span.
+
+    Args:
+        name (str): The operation
+        trace_id (str, optional): The trace id used when no span is active
+        **attributes: Initial attributes
+
+    Yields:
+        Span or None: The span, or None when there is nothing to trace
+    """
+    span = begin_span(name, trace_id, **attributes)
+    if span is None:
+        yield None
+        return
+
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.end(error=e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+def annotate(**attributes):
+    """
+    Add attributes to the current span, if there is one.
+
+    Args:
+        **attributes: Attribute values (str, int, float or bool)
+    """
+    span = _current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
@@ -0,0 +1,126 @@
+"""
+Warm-up utilities for the Belief Explorer backend.
+
+A new worker runs its warm-up steps once, on a background thread, and only
+reports itself ready afterwards, so the first requests a load balancer sends it
+do not pay for building model clients, opening connections or filling caches.
+Each step is timed. A step that fails is logged and reported but does not keep
+the worker out of service: it then pays that cost on its first requests, as it
+would without a warm-up.
+"""
+
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class WarmUp:
+    """
+    Runs a list of warm-up steps once and tracks readiness.
+    """
+
+    def __init__(self, steps):
+        """
+        Initialize the WarmUp.
+
+        Args:
+            steps (list): (name, callable) pairs, run in order. A callable may
+                return a JSON-serializable detail, such as a count, for the report.
+        """
+        self.steps = list(steps)
+        self._results = []
+        self._state = "pending"
+        self._started_at = None
+        self._seconds = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def ready(self):
+        """bool: Whether the warm-up has finished."""
+        return self._done.is_set()
+
+    def start(self):
+        """
+        Start the warm-up on a background thread. Later calls do nothing.
+
+        Returns:
+            bool: Whether this call started it
+        """
+        with self._lock:
+            if self._state != "pending":
+                return False
+            self._state = "running"
+        threading.Thread(target=self._run, name="warm-up", daemon=True).start()
+        return True
+
+    def run(self):
+        """
+        Run the warm-up on this thread, unless it has already started.
+
+        Returns:
+            dict: The status, as returned by status
+        """
+        with self._lock:
+            if self._state != "pending":
+                return self.status()
+            self._state = "running"
+        self._run()
+        return self.status()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the warm-up to finish.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait
+
+        Returns:
+            bool: Whether it has finished
+        """
+        return self._done.wait(timeout)
+
+    def _run(self):
+        """Run each step, recording its outcome and duration."""
+        self._started_at = datetime.now(timezone.utc).isoformat()
+        start = time.perf_counter()
+        for name, step in self.steps:
+            step_start = time.perf_counter()
+            try:
+                result = {"name": name, "status": "ok", "detail": step()}
+            except Exception as e:
+                logger.error("Warm-up step %s failed: %s", name, e, exc_info=True)
+                result = {"name": name, "status": "error", "detail": f"{type(e).__name__}: {e}"}
+            result["seconds"] = round(time.perf_counter() - step_start, 4)
+            metrics.set_gauge("warm_up_step_seconds", result["seconds"], step=name)
+            with self._lock:
+                self._results.append(result)
+
+        with self._lock:
+            self._seconds = round(time.perf_counter() - start, 4)
+            self._state = "ready"
+        metrics.set_gauge("worker_ready", 1)
+        self._done.set()
+        logger.info("Warm-up finished in %.2f s: %s", self._seconds,
+                    ", ".join(f"{result['name']} {result['seconds']:.2f} s" for result in self._results))
+
+    def status(self):
+        """
+        Report the progress of the warm-up.
+
+        Returns:
+            dict: "ready", "state" ("pending", "running" or "ready"), "startedAt",
+                total "seconds" once finished, and the "steps" run so far with
+                their status, seconds and detail
+        """
+        with self._lock:
+            return {
+                "ready": self._state == "ready",
+                "state": self._state,
+                "startedAt": self._started_at,
+                "seconds": self._seconds,
+                "steps": [dict(result) for result in self._results]
+            }